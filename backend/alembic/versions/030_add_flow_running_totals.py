@@ -0,0 +1,51 @@
+"""030: Add running flow totals to kegs and bulk tanks.
+
+Flow meter ingestion used to SUM every historical reading for a container
+on each pour. Kegs and tanks now carry running totals updated with each
+reading; reconciliation records any drift from the readings table.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "030"
+down_revision = "v99_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("keg_tracking") as batch_op:
+        batch_op.add_column(sa.Column("last_reading_at", sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column("last_reading_ml", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("totals_drift_ml", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("reconciled_at", sa.DateTime(timezone=True), nullable=True))
+
+    with op.batch_alter_table("bulk_tank_levels") as batch_op:
+        batch_op.add_column(sa.Column("dispensed_volume_ml", sa.Float(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("pours_count", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("last_reading_at", sa.DateTime(timezone=True), nullable=True))
+        batch_op.add_column(sa.Column("last_reading_ml", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("totals_drift_ml", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("reconciled_at", sa.DateTime(timezone=True), nullable=True))
+
+    # Backfill keg totals once from the readings they replace
+    op.execute(
+        """
+        UPDATE keg_tracking SET dispensed_volume_ml = COALESCE((
+            SELECT SUM(r.flow_volume_ml) FROM flow_meter_readings r
+            WHERE r.container_id = keg_tracking.keg_id
+        ), dispensed_volume_ml)
+        """
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("bulk_tank_levels") as batch_op:
+        for column in ("reconciled_at", "totals_drift_ml", "last_reading_ml",
+                       "last_reading_at", "pours_count", "dispensed_volume_ml"):
+            batch_op.drop_column(column)
+
+    with op.batch_alter_table("keg_tracking") as batch_op:
+        for column in ("reconciled_at", "totals_drift_ml", "last_reading_ml", "last_reading_at"):
+            batch_op.drop_column(column)
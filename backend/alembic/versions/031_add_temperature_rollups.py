@@ -0,0 +1,43 @@
+"""031: Add minute/hour temperature rollups.
+
+Temperature history and HACCP reports now read per-device min/max/avg
+aggregates maintained by the telemetry pipeline, so raw readings can be
+purged after their retention period. Rollups for readings stored before
+this migration can be built with
+app.services.iot_telemetry.rebuild_temperature_rollups.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "031"
+down_revision = "030"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "temperature_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("venue_id", sa.Integer(), sa.ForeignKey("venues.id"), nullable=False),
+        sa.Column("device_id", sa.Integer(), sa.ForeignKey("iot_devices.id"), nullable=False),
+        sa.Column("location", sa.String(200), nullable=True),
+        sa.Column("resolution", sa.String(10), nullable=False),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("reading_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("min_celsius", sa.Float(), nullable=True),
+        sa.Column("max_celsius", sa.Float(), nullable=True),
+        sa.Column("sum_celsius", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("out_of_range_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("device_id", "resolution", "bucket_start", name="uq_temperature_rollup_bucket"),
+    )
+    op.create_index(
+        "ix_temp_rollups_venue_bucket", "temperature_rollups", ["venue_id", "resolution", "bucket_start"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_temp_rollups_venue_bucket", table_name="temperature_rollups")
+    op.drop_table("temperature_rollups")
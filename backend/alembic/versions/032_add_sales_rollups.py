@@ -0,0 +1,61 @@
+"""032: Add the hourly sales cube and its per-order postings.
+
+Dashboard KPIs, sales analytics and sales reports read pre-aggregated
+hour x location x channel x staff x menu item rows maintained by
+app.services.sales_rollup. Orders and checks closed before this migration
+are loaded with scripts/rebuild_sales_rollups.py.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "032"
+down_revision = "031"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    money = sa.Numeric(14, 4)
+    op.create_table(
+        "sales_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("bucket_key", sa.String(40), nullable=False, unique=True),
+        sa.Column("source", sa.String(20), nullable=False),
+        sa.Column("kind", sa.String(10), nullable=False),
+        sa.Column("bucket_hour", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=True),
+        sa.Column("channel", sa.String(20), nullable=False),
+        sa.Column("staff_id", sa.Integer(), nullable=True),
+        sa.Column("menu_item_id", sa.Integer(), nullable=True),
+        sa.Column("item_name", sa.String(200), nullable=True),
+        sa.Column("category", sa.String(100), nullable=True),
+        sa.Column("order_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("quantity", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("revenue", money, nullable=False, server_default="0"),
+        sa.Column("cost", money, nullable=False, server_default="0"),
+        sa.Column("cost_estimate", money, nullable=False, server_default="0"),
+        sa.Column("discount", money, nullable=False, server_default="0"),
+        sa.Column("tips", money, nullable=False, server_default="0"),
+        sa.Column("refund_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("refunds", money, nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_sales_rollups_hour_location", "sales_rollups", ["bucket_hour", "location_id"])
+
+    op.create_table(
+        "sales_rollup_postings",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("source", sa.String(20), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("state", sa.String(20), nullable=False),
+        sa.Column("facts", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("source", "order_id", name="uq_sales_rollup_posting_order"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sales_rollup_postings")
+    op.drop_index("ix_sales_rollups_hour_location", table_name="sales_rollups")
+    op.drop_table("sales_rollups")
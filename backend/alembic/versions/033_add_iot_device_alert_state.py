@@ -0,0 +1,26 @@
+"""033: Track the open temperature alert on each IoT device.
+
+The temperature telemetry pipeline evaluates alert hysteresis per process.
+``alert_type`` is claimed with a conditional UPDATE when an excursion opens,
+so several API workers (or a restarted one) raise each alert only once.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "033"
+down_revision = "032"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("iot_devices") as batch_op:
+        batch_op.add_column(sa.Column("alert_type", sa.String(30), nullable=True))
+        batch_op.add_column(sa.Column("alert_since", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("iot_devices") as batch_op:
+        batch_op.drop_column("alert_since")
+        batch_op.drop_column("alert_type")
@@ -0,0 +1,27 @@
+"""034: Seed the compiled recipe cache version.
+
+app.services.recipe_bom_cache stores a new token in app_settings
+(system / recipe_bom_version) whenever a recipe, recipe line, menu item or
+product unit changes. Seeding the row up front means writers only ever
+update it, so two first writers cannot race on the unique key.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "034"
+down_revision = "033"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.text(
+        "INSERT INTO app_settings (category, key, value) "
+        "SELECT 'system', 'recipe_bom_version', '\"initial\"' "
+        "WHERE NOT EXISTS (SELECT 1 FROM app_settings WHERE category = 'system' AND key = 'recipe_bom_version')"
+    ))
+
+
+def downgrade() -> None:
+    op.execute(sa.text("DELETE FROM app_settings WHERE category = 'system' AND key = 'recipe_bom_version'"))
@@ -0,0 +1,29 @@
+"""035: Add scheduled_job_claims.
+
+Every API worker runs the background cron scheduler. Before a recurring job
+fires for a cron slot, the worker claims the slot here with a conditional
+UPDATE (or the first INSERT for the job), so each slot runs on one worker.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "035"
+down_revision = "034"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scheduled_job_claims",
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("job_name", sa.String(200), nullable=False, unique=True),
+        sa.Column("slot", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("claimed_by", sa.String(100), nullable=True),
+        sa.Column("claimed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scheduled_job_claims")
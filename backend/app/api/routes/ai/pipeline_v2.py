@@ -24,6 +24,7 @@ from app.schemas.ai import (
 )
 from app.models.inventory import InventorySession, InventoryLine, SessionStatus, CountMethod
 from app.services.ai.inference import run_inference
+from app.services.ai.embedding_index import invalidate_embedding_index
 from app.services.ai.feature_extraction import (
     extract_combined_features, find_best_match, compute_similarity,
     augment_and_extract_features, aggregate_product_features
@@ -507,6 +508,7 @@ def label_active_learning_item(
         )
         db.add(training_image)
         db.commit()
+        invalidate_embedding_index()
 
     # Remove from queue
     try:
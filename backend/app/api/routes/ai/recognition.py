@@ -24,6 +24,7 @@ from app.schemas.ai import (
 )
 from app.models.inventory import InventorySession, InventoryLine, SessionStatus, CountMethod
 from app.services.ai.inference import run_inference
+from app.services.ai.embedding_index import embedding_index
 from app.services.ai.feature_extraction import (
     extract_combined_features, find_best_match, compute_similarity,
     augment_and_extract_features, aggregate_product_features
@@ -50,7 +51,7 @@ except ImportError:
 # Import CLIP+YOLO service (optional, graceful fallback)
 try:
     from app.services.ai.clip_yolo_service import (
-        extract_enhanced_features, hybrid_recognition,
+        extract_enhanced_features,
         get_status as get_clip_yolo_status, detect_bottles,
         extract_clip_features, compute_clip_similarity
     )
@@ -69,6 +70,9 @@ TRAINING_DIR.mkdir(parents=True, exist_ok=True)
 # Allowed image MIME types
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp", "image/gif"}
 
+# Largest confidence boost the OCR text match below can add to a CLIP score
+OCR_MAX_BOOST = 0.15
+
 @router.post("/recognize", response_model=RecognitionResponse)
 @limiter.limit("20/minute")
 async def recognize_bottle(
@@ -142,18 +146,10 @@ async def recognize_bottle(
     # This allows recognition of bottles that YOLO doesn't detect (unusual shapes, angles)
     # The is_bar_item=False flag tells the client YOLO didn't confirm it's a bar item
 
-    # Get all training images with CLIP features (2048 bytes)
-    # Filter out old incompatible feature formats (17792 bytes etc)
-    training_images = db.query(TrainingImage).filter(
-        TrainingImage.feature_vector.isnot(None),
-        func.length(TrainingImage.feature_vector) == 2048  # CLIP features only
-    ).all()
-
-    # Get all stock items for CLIP zero-shot
-    stock_items = db.query(StockItem).filter(StockItem.is_active == True).all()
-    product_labels = {s.id: s.name for s in stock_items}
+    # Resident CLIP embedding index (rebuilt only when training features change)
+    index = embedding_index.get(db)
 
-    if not training_images and not product_labels:
+    if not index.size and db.query(StockItem.id).filter(StockItem.is_active == True).first() is None:
         inference_time = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
         return RecognitionResponse(
             results=[RecognitionResult(
@@ -167,41 +163,8 @@ async def recognize_bottle(
 
     results = []
 
-    # Disable hybrid CLIP recognition - use trained features only for better accuracy
+    # Hybrid CLIP zero-shot recognition is disabled - use trained features only for better accuracy
     # CLIP zero-shot can override trained features incorrectly
-    if False and CLIP_YOLO_AVAILABLE:
-        try:
-            # Prepare training features
-            training_features = []
-            for img in training_images:
-                product = db.query(StockItem).filter(StockItem.id == img.product_id).first()
-                product_name = product.name if product else "Unknown"
-                training_features.append((img.product_id, product_name, img.feature_vector))
-
-            # Run hybrid recognition
-            hybrid_results = hybrid_recognition(
-                image_data=image_data,
-                training_features=training_features,
-                product_labels=product_labels,
-                clip_weight=0.4,
-                feature_weight=0.6,
-                threshold=0.1,
-            )
-
-            for product_id, product_name, score in hybrid_results[:5]:
-                results.append(RecognitionResult(
-                    product_id=product_id,
-                    product_name=product_name,
-                    confidence=round(score, 4),
-                    is_match=score >= settings.ai_recognition_threshold,
-                ))
-
-        except Exception as e:
-            # Log error and fall back to traditional matching
-            logger.error(f"Hybrid recognition failed, falling back: {e}")
-            results = []
-
-    # Fall back to CLIP feature matching if no results
     if not results:
         try:
             # Use CLIP for query feature extraction (same as training data)
@@ -241,44 +204,20 @@ async def recognize_bottle(
             except Exception as e:
                 logger.debug(f"Optional: OCR text extraction for recognition query: {e}")
 
-        # Build candidates per product - group CLIP features by stock_item_id
-        product_features: dict[int, list] = {}
-        for img in training_images:
-            if img.stock_item_id not in product_features:
-                product_features[img.stock_item_id] = []
-            # Convert raw bytes to numpy array (CLIP features are float32, 512 dims = 2048 bytes)
-            try:
-                feat_array = np.frombuffer(img.feature_vector, dtype=np.float32)
-                if len(feat_array) == 512:  # Valid CLIP embedding
-                    product_features[img.stock_item_id].append(feat_array)
-            except Exception as e:
-                logger.warning(f"Failed to parse feature vector for training image {img.id} (stock_item {img.stock_item_id}): {e}")
-                continue
-
-        # Find best match per product using CLIP cosine similarity
-        for stock_item_id, features_list in product_features.items():
-            if not features_list:
-                continue
-
-            # Compute similarity with each training image, take best
-            best_sim = 0.0
-            for train_feat in features_list:
-                # Cosine similarity
-                sim = float(np.dot(query_embedding, train_feat))
-                if sim > best_sim:
-                    best_sim = sim
-
-            # Also compute mean feature similarity
-            if len(features_list) > 1:
-                mean_feat = np.mean(features_list, axis=0)
-                mean_feat = mean_feat / (np.linalg.norm(mean_feat) + 1e-7)
-                mean_sim = float(np.dot(query_embedding, mean_feat))
-                best_sim = max(best_sim, mean_sim)
-
-            final_sim = best_sim
-
-            product = db.query(StockItem).filter(StockItem.id == stock_item_id).first()
-            product_name = product.name if product else "Unknown"
+        # Score every product in one vectorized pass. Keep all products within
+        # OCR_MAX_BOOST of the 5th best so the OCR re-ranking below is unaffected.
+        candidates = index.top_k(query_embedding, k=5, margin=OCR_MAX_BOOST)
+        candidate_names = {
+            item.id: item.name
+            for item in db.query(StockItem.id, StockItem.name).filter(
+                StockItem.id.in_([c.product_id for c in candidates])
+            ).all()
+        } if candidates else {}
+
+        for candidate in candidates:
+            stock_item_id = candidate.product_id
+            final_sim = candidate.score
+            product_name = candidate_names.get(stock_item_id, "Unknown")
 
             # OCR text match boost - if OCR detected brand/text matches product name
             ocr_boost = 0.0
@@ -497,40 +436,10 @@ async def recognize_multi(
         )
 
     # ===== Load training data =====
-    training_images = db.query(TrainingImage).filter(
-        TrainingImage.feature_vector.isnot(None),
-        func.length(TrainingImage.feature_vector) == 2048
-    ).all()
-
-    # Build product features matrix for vectorized matching
-    product_ids = []
-    product_mean_features = []
-
-    product_features_dict: dict[int, list] = {}
-    for ti in training_images:
-        if ti.stock_item_id not in product_features_dict:
-            product_features_dict[ti.stock_item_id] = []
-        try:
-            feat_array = np.frombuffer(ti.feature_vector, dtype=np.float32)
-            if len(feat_array) == 512:
-                product_features_dict[ti.stock_item_id].append(feat_array)
-        except Exception as e:
-            logger.warning(f"Failed to parse feature vector for training image {ti.id} (stock_item {ti.stock_item_id}): {e}")
-            continue
-
-    # Build mean feature matrix for vectorized similarity
-    for pid, features in product_features_dict.items():
-        if features:
-            mean_feat = np.mean(features, axis=0)
-            mean_feat = mean_feat / (np.linalg.norm(mean_feat) + 1e-7)
-            product_ids.append(pid)
-            product_mean_features.append(mean_feat)
-
-    # Stack into matrix for fast batch similarity
-    if product_mean_features:
-        feature_matrix = np.stack(product_mean_features)  # Shape: (num_products, 512)
-    else:
-        feature_matrix = None
+    # Per-product normalized mean embeddings from the resident index, shape (num_products, 512)
+    index = embedding_index.get(db)
+    product_ids = [int(pid) for pid in index.product_ids]
+    feature_matrix = index.mean_matrix if index.product_count else None
 
     # Get product names
     stock_items = {s.id: s.name for s in db.query(StockItem).filter(StockItem.is_active == True).all()}
@@ -751,6 +660,7 @@ def get_ai_status(
         "ocr_available": OCR_AVAILABLE,
         "clip_yolo_available": CLIP_YOLO_AVAILABLE,
         "recognition_threshold": settings.ai_recognition_threshold,
+        "embedding_index": embedding_index.get_stats(),
     }
 
     if CLIP_YOLO_AVAILABLE:
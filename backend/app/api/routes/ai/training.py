@@ -24,6 +24,7 @@ from app.schemas.ai import (
 )
 from app.models.inventory import InventorySession, InventoryLine, SessionStatus, CountMethod
 from app.services.ai.inference import run_inference
+from app.services.ai.embedding_index import invalidate_embedding_index
 from app.services.ai.feature_extraction import (
     extract_combined_features, find_best_match, compute_similarity,
     augment_and_extract_features, aggregate_product_features
@@ -170,6 +171,7 @@ async def upload_training_image(
     db.add(training_image)
     db.commit()
     db.refresh(training_image)
+    invalidate_embedding_index()
 
     return TrainingImageResponse(
         id=training_image.id,
@@ -266,6 +268,7 @@ async def upload_training_batch(
             results["failed"] += 1
 
     db.commit()
+    invalidate_embedding_index()
     return results
 
 
@@ -471,6 +474,7 @@ async def upload_training_video(
         results["frames_extracted"] = extracted_count
 
         db.commit()
+        invalidate_embedding_index()
 
     except Exception as e:
         logger.error(f"Video processing failed: {e}")
@@ -605,6 +609,7 @@ def delete_training_image(
 
     db.delete(image)
     db.commit()
+    invalidate_embedding_index()
 
     return {"message": "Training image deleted"}
 
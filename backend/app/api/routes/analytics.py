@@ -21,6 +21,7 @@ from app.services.menu_engineering_service import (
     MenuEngineeringService, ServerPerformanceService, DailyMetricsService
 )
 from app.services.conversational_ai_service import ConversationalAIService
+from app.services.sales_rollup import SOURCE_GUEST_ORDER, hourly_sales, item_sales, sales_totals
 from app.services.scale_service import (
     ScaleService, BottleWeightDatabaseService, InventoryCountingService
 )
@@ -77,32 +78,23 @@ def _compute_table_turns_kpi(db, today_start, yesterday_start, location_id):
     return {"name": "Table Turns", "value": today_turns, "change": change, "trend": "up" if change >= 0 else "down", "unit": "ratio"}
 
 
-def _compute_food_cost_kpi(db, today_start, yesterday_start, location_id):
-    """Compute food cost % from orders with base_price data."""
-    from app.models.restaurant import MenuItem as MenuItemModel
-    orders = db.query(GuestOrder).filter(GuestOrder.created_at >= today_start)
-    if location_id:
-        orders = orders.filter(GuestOrder.location_id == location_id)
-    orders = orders.limit(10000).all()
-
-    total_revenue = 0
-    total_cost = 0
-    for o in orders:
-        if o.items:
-            for item in o.items:
-                qty = item.get("quantity", 1)
-                price = item.get("price", 0)
-                total_revenue += price * qty
-                mid = item.get("menu_item_id") or item.get("id")
-                if mid:
-                    mi = db.query(MenuItemModel.base_price).filter(MenuItemModel.id == mid).first()
-                    if mi and mi.base_price:
-                        total_cost += float(mi.base_price) * qty
-
+def _compute_food_cost_kpi(totals):
+    """Compute food cost % from the period's line revenue and base-price cost."""
+    total_revenue = float(totals["item_revenue"])
+    total_cost = float(totals["cost"])
     food_cost_pct = round(total_cost / total_revenue * 100, 1) if total_revenue > 0 else 0
     return {"name": "Food Cost %", "value": food_cost_pct, "change": 0, "trend": "stable", "unit": "percentage"}
 
 
+def _sales_category(name: str) -> str:
+    """Dashboard category of an item, by name pattern."""
+    if any(drink in name.lower() for drink in ["drink", "coffee", "tea", "juice", "soda"]):
+        return "Beverages"
+    if any(dessert in name.lower() for dessert in ["brownie", "cheesecake", "sundae", "ice cream", "cake"]):
+        return "Desserts"
+    return "Food"
+
+
 # ==================== STUB ENDPOINTS ====================
 
 @router.get("/labor")
@@ -329,33 +321,24 @@ def get_dashboard_kpis(
     db: DbSession,
     location_id: Optional[int] = None,
 ):
-    """Get key performance indicators for dashboard widgets."""
+    """Get key performance indicators for dashboard widgets.
+
+    Reads the hourly sales cube (closed guest orders, net of voids and refunds).
+    """
     today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
     yesterday_start = today_start - timedelta(days=1)
 
-    # Get today's orders
-    today_query = db.query(GuestOrder).filter(GuestOrder.created_at >= today_start)
-    if location_id:
-        today_query = today_query.filter(GuestOrder.location_id == location_id)
-    today_orders = today_query.limit(10000).all()
-
-    # Get yesterday's orders for comparison
-    yesterday_query = db.query(GuestOrder).filter(
-        GuestOrder.created_at >= yesterday_start,
-        GuestOrder.created_at < today_start
-    )
-    if location_id:
-        yesterday_query = yesterday_query.filter(GuestOrder.location_id == location_id)
-    yesterday_orders = yesterday_query.limit(10000).all()
+    today = sales_totals(db, today_start, location_id=location_id, source=SOURCE_GUEST_ORDER)
+    yesterday = sales_totals(db, yesterday_start, today_start, location_id=location_id, source=SOURCE_GUEST_ORDER)
 
     # Calculate today's metrics
-    today_revenue = sum(float(o.total) if o.total else 0 for o in today_orders)
-    today_count = len(today_orders)
+    today_revenue = float(today["revenue"])
+    today_count = today["orders"]
     today_avg_ticket = today_revenue / today_count if today_count > 0 else 0
 
     # Calculate yesterday's metrics
-    yesterday_revenue = sum(float(o.total) if o.total else 0 for o in yesterday_orders)
-    yesterday_count = len(yesterday_orders)
+    yesterday_revenue = float(yesterday["revenue"])
+    yesterday_count = yesterday["orders"]
     yesterday_avg_ticket = yesterday_revenue / yesterday_count if yesterday_count > 0 else 0
 
     # Calculate changes
@@ -374,7 +357,7 @@ def get_dashboard_kpis(
             {"name": "Orders Today", "value": today_count, "change": order_change, "trend": "up" if order_change >= 0 else "down", "unit": "count"},
             {"name": "Avg Ticket", "value": round(today_avg_ticket, 2), "change": ticket_change, "trend": "up" if ticket_change >= 0 else "down", "unit": "currency"},
             _compute_table_turns_kpi(db, today_start, yesterday_start, location_id),
-            _compute_food_cost_kpi(db, today_start, yesterday_start, location_id),
+            _compute_food_cost_kpi(today),
         ],
         "comparison_period": "vs yesterday",
         "generated_at": datetime.now(timezone.utc).isoformat(),
@@ -389,7 +372,7 @@ def get_sales_analytics(
     location_id: Optional[int] = None,
     period: str = "today",
 ):
-    """Get sales analytics summary from database."""
+    """Get sales analytics summary from the hourly sales cube."""
     # Calculate date range based on period
     now = datetime.now(timezone.utc)
     if period == "today":
@@ -401,42 +384,26 @@ def get_sales_analytics(
     else:
         start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
-    # Get guest orders from database
-    query = db.query(GuestOrder).filter(GuestOrder.created_at >= start_date)
-    if location_id:
-        query = query.filter(GuestOrder.location_id == location_id)
-    orders = query.limit(10000).all()
+    totals = sales_totals(db, start_date, location_id=location_id, source=SOURCE_GUEST_ORDER)
+    items = item_sales(db, start_date, location_id=location_id, source=SOURCE_GUEST_ORDER)
 
     # Calculate totals
-    total_sales = sum(float(o.total) if o.total else 0 for o in orders)
-    order_count = len(orders)
+    total_sales = float(totals["revenue"])
+    order_count = totals["orders"]
     average_ticket = total_sales / order_count if order_count > 0 else 0
 
     # Calculate sales by category
     category_sales = {}
-    item_sales = {}
-    for order in orders:
-        if order.items:
-            for item in order.items:
-                name = item.get("name", "Unknown")
-                category = item.get("category", "Food")  # Default to Food if not specified
-                price = float(item.get("price", 0))
-                qty = item.get("quantity", 1)
-                item_total = price * qty
-
-                # Determine category based on item name patterns
-                if any(drink in name.lower() for drink in ["drink", "coffee", "tea", "juice", "soda"]):
-                    category = "Beverages"
-                elif any(dessert in name.lower() for dessert in ["brownie", "cheesecake", "sundae", "ice cream", "cake"]):
-                    category = "Desserts"
-                else:
-                    category = "Food"
-
-                category_sales[category] = category_sales.get(category, 0) + item_total
-                if name not in item_sales:
-                    item_sales[name] = {"quantity": 0, "revenue": 0}
-                item_sales[name]["quantity"] += qty
-                item_sales[name]["revenue"] += item_total
+    item_sales_by_name = {}
+    for item in items:
+        name = item["name"] or "Unknown"
+        revenue = float(item["revenue"])
+        category = _sales_category(name)
+        category_sales[category] = category_sales.get(category, 0) + revenue
+        if name not in item_sales_by_name:
+            item_sales_by_name[name] = {"quantity": 0, "revenue": 0}
+        item_sales_by_name[name]["quantity"] += item["quantity"]
+        item_sales_by_name[name]["revenue"] += revenue
 
     # Format category sales
     sales_by_category = []
@@ -451,13 +418,10 @@ def get_sales_analytics(
     # Sort by amount descending
     sales_by_category.sort(key=lambda x: x["amount"], reverse=True)
 
-    # Calculate sales by hour
+    # Calculate sales by hour of day
     sales_by_hour = {}
-    for order in orders:
-        if order.created_at:
-            hour = order.created_at.hour
-            order_total = float(order.total) if order.total else 0
-            sales_by_hour[hour] = sales_by_hour.get(hour, 0) + order_total
+    for bucket_hour, _, revenue in hourly_sales(db, start_date, location_id=location_id, source=SOURCE_GUEST_ORDER):
+        sales_by_hour[bucket_hour.hour] = sales_by_hour.get(bucket_hour.hour, 0) + float(revenue)
 
     formatted_sales_by_hour = [
         {"hour": hour, "amount": round(amount, 2)}
@@ -467,7 +431,7 @@ def get_sales_analytics(
     # Get top items
     top_items = sorted(
         [{"name": name, "quantity": data["quantity"], "revenue": round(data["revenue"], 2)}
-         for name, data in item_sales.items()],
+         for name, data in item_sales_by_name.items()],
         key=lambda x: x["revenue"],
         reverse=True
     )[:10]
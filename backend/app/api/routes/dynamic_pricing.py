@@ -15,6 +15,7 @@ from app.db.session import get_db
 from app.services.dynamic_pricing_service import DynamicPricingService
 from app.models import DynamicPricingRule
 from app.core.config import settings
+from app.core.http_client import sync_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -485,7 +486,6 @@ def get_weather_impact(
     - Recommended price adjustments
     """
     import os
-    import httpx
 
     # Try to fetch real weather data from OpenWeatherMap API
     api_key = settings.openweather_api_key
@@ -497,7 +497,7 @@ def get_weather_impact(
             lat, lon = 42.2667, 23.6000
             url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric"
 
-            with httpx.Client(timeout=5.0) as client:
+            with sync_http_client("weather", timeout=5.0) as client:
                 response = client.get(url)
                 if response.status_code == 200:
                     data = response.json()
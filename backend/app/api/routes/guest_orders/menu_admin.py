@@ -5,6 +5,7 @@ from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Query, Body, Request
 from pydantic import BaseModel, Field, field_validator
 
+from app.core.cache import invalidate_menu_cache
 from app.core.sanitize import sanitize_text
 from app.core.responses import list_response, paginated_response
 
@@ -15,7 +16,6 @@ from app.models.restaurant import (
     ComboMeal, ComboItem, MenuCategory as MenuCategoryModel,
     CheckItem,
 )
-from app.models.operations import AppSetting
 from app.services.stock_deduction_service import StockDeductionService
 import logging
 from app.core.rate_limit import limiter
@@ -67,6 +67,7 @@ def admin_create_menu_item(request: Request, db: DbSession, data: dict = Body(..
     )
     db.add(item)
     db.commit()
+    invalidate_menu_cache()
     db.refresh(item)
     return _menu_item_to_admin_dict(item, db)
 
@@ -109,6 +110,7 @@ def admin_update_menu_item(request: Request, db: DbSession, item_id: int, data:
         item.available = data["available"]
 
     db.commit()
+    invalidate_menu_cache()
     db.refresh(item)
     return _menu_item_to_admin_dict(item, db)
 
@@ -122,6 +124,7 @@ def admin_delete_menu_item(request: Request, db: DbSession, item_id: int):
         raise HTTPException(status_code=404, detail="Item not found")
     item.soft_delete()
     db.commit()
+    invalidate_menu_cache()
     return {"success": True}
 
 
@@ -134,6 +137,7 @@ def admin_toggle_item_availability(request: Request, db: DbSession, item_id: int
         raise HTTPException(status_code=404, detail="Item not found")
     item.available = not item.available
     db.commit()
+    invalidate_menu_cache()
     return {"id": item.id, "available": item.available}
 
 
@@ -182,6 +186,7 @@ def admin_create_category(request: Request, db: DbSession, data: dict = Body(...
     )
     db.add(cat)
     db.commit()
+    invalidate_menu_cache()
     db.refresh(cat)
     return _category_to_response(cat)
 
@@ -199,6 +204,7 @@ def admin_reorder_categories(request: Request, db: DbSession, data: dict = Body(
             if cat:
                 cat.sort_order = sort_order
     db.commit()
+    invalidate_menu_cache()
     return {"success": True}
 
 
@@ -245,6 +251,7 @@ def admin_update_category(request: Request, db: DbSession, category_id: int, dat
         cat.schedule = data["schedule"]
 
     db.commit()
+    invalidate_menu_cache()
     db.refresh(cat)
     return _category_to_response(cat)
 
@@ -272,6 +279,7 @@ def admin_delete_category(request: Request, db: DbSession, category_id: int):
 
     db.delete(cat)
     db.commit()
+    invalidate_menu_cache()
     return {"success": True}
 
 
@@ -284,6 +292,7 @@ def admin_toggle_category_active(request: Request, db: DbSession, category_id: i
         raise HTTPException(status_code=404, detail="Category not found")
     cat.active = not cat.active
     db.commit()
+    invalidate_menu_cache()
     return {"id": cat.id, "active": cat.active}
 
 
@@ -328,6 +337,7 @@ def admin_create_modifier_group(request: Request, db: DbSession, data: dict = Bo
     )
     db.add(group)
     db.commit()
+    invalidate_menu_cache()
     db.refresh(group)
     return {
         "id": group.id,
@@ -351,6 +361,7 @@ def admin_update_modifier_group(request: Request, db: DbSession, group_id: int,
         if key in data:
             setattr(group, key, data[key])
     db.commit()
+    invalidate_menu_cache()
     db.refresh(group)
     return {"id": group.id, "name": group.name, "min_selections": group.min_selections,
             "max_selections": group.max_selections, "active": group.active, "sort_order": group.sort_order}
@@ -365,6 +376,7 @@ def admin_delete_modifier_group(request: Request, db: DbSession, group_id: int):
         raise HTTPException(status_code=404, detail="Modifier group not found")
     db.delete(group)
     db.commit()
+    invalidate_menu_cache()
     return {"success": True}
 
 
@@ -383,6 +395,7 @@ def admin_create_modifier_option(request: Request, db: DbSession, group_id: int,
     )
     db.add(option)
     db.commit()
+    invalidate_menu_cache()
     db.refresh(option)
     return {
         "id": option.id,
@@ -404,6 +417,7 @@ def admin_update_modifier_option(request: Request, db: DbSession, option_id: int
         if key in data:
             setattr(option, key, data[key])
     db.commit()
+    invalidate_menu_cache()
     db.refresh(option)
     return {"id": option.id, "group_id": option.group_id, "name": option.name,
             "price_adjustment": float(option.price_adjustment or 0), "available": option.available}
@@ -418,6 +432,7 @@ def admin_delete_modifier_option(request: Request, db: DbSession, option_id: int
         raise HTTPException(status_code=404, detail="Modifier option not found")
     db.delete(option)
     db.commit()
+    invalidate_menu_cache()
     return {"success": True}
 
 
@@ -482,6 +497,7 @@ def admin_create_combo(request: Request, db: DbSession, data: dict = Body(...)):
         )
         db.add(ci)
     db.commit()
+    invalidate_menu_cache()
     db.refresh(combo)
     return {"id": combo.id, "name": combo.name, "price": float(combo.price),
             "available": combo.available, "featured": combo.featured}
@@ -515,6 +531,7 @@ def admin_update_combo(request: Request, db: DbSession, combo_id: int, data: dic
             )
             db.add(ci)
     db.commit()
+    invalidate_menu_cache()
     db.refresh(combo)
     return {"id": combo.id, "name": combo.name, "price": float(combo.price),
             "available": combo.available, "featured": combo.featured}
@@ -529,6 +546,7 @@ def admin_delete_combo(request: Request, db: DbSession, combo_id: int):
         raise HTTPException(status_code=404, detail="Combo meal not found")
     db.delete(combo)
     db.commit()
+    invalidate_menu_cache()
     return {"success": True}
 
 
@@ -541,6 +559,7 @@ def admin_toggle_combo_available(request: Request, db: DbSession, combo_id: int)
         raise HTTPException(status_code=404, detail="Combo meal not found")
     combo.available = not combo.available
     db.commit()
+    invalidate_menu_cache()
     return {"id": combo.id, "available": combo.available}
 
 
@@ -553,6 +572,7 @@ def admin_toggle_combo_featured(request: Request, db: DbSession, combo_id: int):
         raise HTTPException(status_code=404, detail="Combo meal not found")
     combo.featured = not combo.featured
     db.commit()
+    invalidate_menu_cache()
     return {"id": combo.id, "featured": combo.featured}
 
 
@@ -583,6 +603,7 @@ def _save_dayparts(db: DbSession, items: list):
     else:
         rec.config = {"items": items, "next_id": next_id}
     db.commit()
+    invalidate_menu_cache()
 
 
 @router.get("/menu-admin/dayparts")
@@ -751,6 +772,7 @@ def admin_create_modifier(request: Request, db: DbSession, data: dict = Body(...
     )
     db.add(option)
     db.commit()
+    invalidate_menu_cache()
     db.refresh(option)
     return {"id": option.id, "group_id": option.group_id, "name": option.name,
             "price_adjustment": float(option.price_adjustment or 0), "available": option.available}
@@ -767,6 +789,7 @@ def admin_update_modifier(request: Request, db: DbSession, modifier_id: int, dat
         if key in data:
             setattr(option, key, data[key])
     db.commit()
+    invalidate_menu_cache()
     db.refresh(option)
     return {"id": option.id, "group_id": option.group_id, "name": option.name,
             "price_adjustment": float(option.price_adjustment or 0), "available": option.available}
@@ -781,6 +804,7 @@ def admin_delete_modifier(request: Request, db: DbSession, modifier_id: int):
         raise HTTPException(status_code=404, detail="Modifier not found")
     db.delete(option)
     db.commit()
+    invalidate_menu_cache()
     return {"success": True}
 
 
@@ -799,6 +823,7 @@ def admin_add_modifier_option(request: Request, db: DbSession, modifier_id: int,
     )
     db.add(option)
     db.commit()
+    invalidate_menu_cache()
     db.refresh(option)
     return {"id": option.id, "modifier_id": modifier_id, "name": option.name,
             "price_adjustment": float(option.price_adjustment or 0), "available": option.available}
@@ -813,6 +838,7 @@ def admin_remove_modifier_option(request: Request, db: DbSession, option_id: int
         raise HTTPException(status_code=404, detail="Modifier option not found")
     db.delete(option)
     db.commit()
+    invalidate_menu_cache()
     return {"success": True}
 
 
@@ -825,6 +851,7 @@ def admin_toggle_modifier_group_active(request: Request, db: DbSession, group_id
         raise HTTPException(status_code=404, detail="Modifier group not found")
     group.active = not group.active
     db.commit()
+    invalidate_menu_cache()
     return {"id": group.id, "active": group.active}
 
 
@@ -837,6 +864,7 @@ def admin_toggle_modifier_option_available(request: Request, db: DbSession, opti
         raise HTTPException(status_code=404, detail="Modifier option not found")
     option.available = not option.available
     db.commit()
+    invalidate_menu_cache()
     return {"id": option.id, "available": option.available}
 
 
@@ -961,6 +989,7 @@ def bulk_price_update(request: Request, request_data: dict, db: DbSession, venue
         updated += 1
 
     db.commit()
+    invalidate_menu_cache()
     return {"success": True, "updated_count": updated}
 
 
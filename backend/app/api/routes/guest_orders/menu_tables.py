@@ -1,10 +1,12 @@
 """Menu browsing & table management"""
+import json
 from datetime import datetime, timezone
 from decimal import Decimal
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Query, Body, Request
 from pydantic import BaseModel, Field, field_validator
 
+from app.core.cache import CacheKeys, invalidate_menu_cache, json_snapshot, snapshot_response
 from app.core.sanitize import sanitize_text
 from app.core.responses import list_response, paginated_response
 
@@ -24,6 +26,11 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Guest menu snapshots are invalidated on menu writes and 86'ing; the TTL only
+# bounds staleness from writers that don't invalidate (or other workers
+# when Redis is not configured).
+MENU_SNAPSHOT_TTL_SECONDS = 60
+
 # Import shared schemas and helpers
 from app.api.routes.guest_orders._shared import *
 from app.api.routes.guest_orders._shared import _get_table_by_token, _menu_item_to_dict, _get_venue_name
@@ -47,36 +54,44 @@ def get_table_menu(
     """
     Get table information and menu for guest ordering.
     This endpoint is used by the customer-facing QR code ordering page.
+
+    The menu part is a cached snapshot; only the table lookup hits the database.
     """
     table = _get_table_by_token(db, token)
 
-    # Get menu items from database
-    menu_items = db.query(MenuItem).filter(MenuItem.available == True, MenuItem.not_deleted()).limit(500).all()
-
-    # Group menu items by category
-    categories = {}
-    for item in menu_items:
-        cat = item.category
-        if cat not in categories:
-            categories[cat] = []
-        categories[cat].append(_menu_item_to_dict(item))
+    def build_menu():
+        # Get menu items from database
+        menu_items = db.query(MenuItem).filter(MenuItem.available == True, MenuItem.not_deleted()).limit(500).all()
+
+        # Group menu items by category
+        categories = {}
+        for item in menu_items:
+            cat = item.category
+            if cat not in categories:
+                categories[cat] = []
+            categories[cat].append(_menu_item_to_dict(item))
+
+        menu_categories = [
+            {"id": i + 1, "name": cat, "items": items}
+            for i, (cat, items) in enumerate(categories.items())
+        ]
+        return {
+            "categories": menu_categories,
+            "menu": {
+                "categories": menu_categories,
+                "total_items": len(menu_items),
+            },
+        }
 
-    menu_categories = [
-        {"id": i + 1, "name": cat, "items": items}
-        for i, (cat, items) in enumerate(categories.items())
-    ]
+    menu = json_snapshot(f"{CacheKeys.MENU}:table", build_menu, MENU_SNAPSHOT_TTL_SECONDS)
+    venue_name = json.loads(
+        json_snapshot(f"{CacheKeys.MENU}:venue_name", lambda: _get_venue_name(db), MENU_SNAPSHOT_TTL_SECONDS)["body"]
+    )
 
-    return {
-        "table": {
-            **table,
-            "venue_name": _get_venue_name(db),
-        },
-        "categories": menu_categories,
-        "menu": {
-            "categories": menu_categories,
-            "total_items": len(menu_items),
-        },
-    }
+    # Splice the per-table object in front of the pre-serialized menu body
+    table_json = json.dumps({**table, "venue_name": venue_name}, ensure_ascii=False, separators=(",", ":"))
+    body = f'{{"table":{table_json},{menu["body"][1:]}'
+    return snapshot_response(request, body)
 
 
 @router.get("/menu/items")
@@ -88,14 +103,19 @@ def get_menu_items(
     available_only: bool = True,
 ):
     """Get all menu items, optionally filtered by category."""
-    query = db.query(MenuItem).filter(MenuItem.not_deleted())
-    if category:
-        query = query.filter(MenuItem.category == category)
-    if available_only:
-        query = query.filter(MenuItem.available == True)
+    def build():
+        query = db.query(MenuItem).filter(MenuItem.not_deleted())
+        if category:
+            query = query.filter(MenuItem.category == category)
+        if available_only:
+            query = query.filter(MenuItem.available == True)
+
+        items = query.all()
+        return {"items": [_menu_item_to_dict(i) for i in items], "total": len(items)}
 
-    items = query.all()
-    return {"items": [_menu_item_to_dict(i) for i in items], "total": len(items)}
+    key = f"{CacheKeys.MENU}:items:{int(available_only)}:{category or ''}"
+    snapshot = json_snapshot(key, build, MENU_SNAPSHOT_TTL_SECONDS)
+    return snapshot_response(request, snapshot["body"], snapshot["etag"])
 
 
 @router.get("/menu/items/{item_id}")
@@ -112,29 +132,38 @@ def get_menu_item(request: Request, db: DbSession, item_id: int):
 @limiter.limit("60/minute")
 def get_menu_categories(request: Request, db: DbSession):
     """Get all menu categories."""
-    items = db.query(MenuItem).filter(MenuItem.available == True, MenuItem.not_deleted()).all()
-    categories = list(set(item.category for item in items))
-    return {"categories": categories}
+    def build():
+        items = db.query(MenuItem).filter(MenuItem.available == True, MenuItem.not_deleted()).all()
+        # Sorted: set order differs per process, and with it the cached body and ETag
+        categories = sorted(set(item.category for item in items))
+        return {"categories": categories}
+
+    snapshot = json_snapshot(f"{CacheKeys.MENU}:categories", build, MENU_SNAPSHOT_TTL_SECONDS)
+    return snapshot_response(request, snapshot["body"], snapshot["etag"])
 
 
 @router.get("/menu/display")
 @limiter.limit("60/minute")
 def get_menu_display(request: Request, db: DbSession):
     """Get full menu display for guests (grouped by category)."""
-    items = db.query(MenuItem).filter(MenuItem.available == True, MenuItem.not_deleted()).all()
-    categories_dict: dict = {}
-    for item in items:
-        cat = item.category or "Other"
-        if cat not in categories_dict:
-            categories_dict[cat] = []
-        categories_dict[cat].append(_menu_item_to_dict(item))
-    return {
-        "categories": [
-            {"name": cat, "items": cat_items}
-            for cat, cat_items in categories_dict.items()
-        ],
-        "total_items": len(items),
-    }
+    def build():
+        items = db.query(MenuItem).filter(MenuItem.available == True, MenuItem.not_deleted()).all()
+        categories_dict: dict = {}
+        for item in items:
+            cat = item.category or "Other"
+            if cat not in categories_dict:
+                categories_dict[cat] = []
+            categories_dict[cat].append(_menu_item_to_dict(item))
+        return {
+            "categories": [
+                {"name": cat, "items": cat_items}
+                for cat, cat_items in categories_dict.items()
+            ],
+            "total_items": len(items),
+        }
+
+    snapshot = json_snapshot(f"{CacheKeys.MENU}:display", build, MENU_SNAPSHOT_TTL_SECONDS)
+    return snapshot_response(request, snapshot["body"], snapshot["etag"])
 
 
 # ==================== MENU ITEM CRUD ====================
@@ -157,6 +186,7 @@ def create_menu_item(request: Request, db: DbSession, item: MenuItemCreate):
     )
     db.add(db_item)
     db.commit()
+    invalidate_menu_cache()
     db.refresh(db_item)
     return {
         "status": "created",
@@ -194,6 +224,7 @@ def update_menu_item(request: Request, db: DbSession, item_id: int, item: MenuIt
         db_item.station = item.station
 
     db.commit()
+    invalidate_menu_cache()
     db.refresh(db_item)
     return {
         "status": "updated",
@@ -211,6 +242,7 @@ def delete_menu_item(request: Request, db: DbSession, item_id: int):
 
     db_item.soft_delete()
     db.commit()
+    invalidate_menu_cache()
     return {"status": "deleted", "item_id": item_id}
 
 
@@ -246,6 +278,7 @@ def rename_category(request: Request, db: DbSession, old_name: str, new_name: st
     for item in items:
         item.category = new_name
     db.commit()
+    invalidate_menu_cache()
 
     return {"status": "renamed", "old_name": old_name, "new_name": new_name, "items_updated": len(items)}
 
@@ -262,12 +295,14 @@ def delete_category(request: Request, db: DbSession, name: str, delete_items: bo
         for item in items:
             item.soft_delete()
         db.commit()
+        invalidate_menu_cache()
         return {"status": "deleted", "category": name, "items_deleted": len(items)}
     else:
         # Move items to "Uncategorized"
         for item in items:
             item.category = "Uncategorized"
         db.commit()
+        invalidate_menu_cache()
         return {"status": "deleted", "category": name, "items_moved_to": "Uncategorized"}
 
 
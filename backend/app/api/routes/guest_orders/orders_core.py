@@ -4,11 +4,12 @@ from decimal import Decimal
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Query, Body, Request
 from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import select
 
 from app.core.sanitize import sanitize_text
 from app.core.responses import list_response, paginated_response
 
-from app.db.session import DbSession
+from app.db.session import AsyncDbSession, DbSession
 from app.models.restaurant import (
     GuestOrder as GuestOrderModel, KitchenOrder, Table, MenuItem,
     ModifierGroup, ModifierOption, MenuItemModifierGroup,
@@ -154,9 +155,9 @@ def place_guest_order(
 
 @router.get("/orders/guest/{order_id}")
 @limiter.limit("60/minute")
-def get_guest_order(request: Request, db: DbSession, order_id: int):
+async def get_guest_order(request: Request, db: AsyncDbSession, order_id: int):
     """Get a guest order by ID from database."""
-    order = db.query(GuestOrderModel).filter(GuestOrderModel.id == order_id).first()
+    order = await db.get(GuestOrderModel, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return {
@@ -178,19 +179,19 @@ def get_guest_order(request: Request, db: DbSession, order_id: int):
 
 @router.get("/orders/table/{token}")
 @limiter.limit("60/minute")
-def get_table_orders(
+async def get_table_orders(
     request: Request,
-    db: DbSession,
+    db: AsyncDbSession,
     token: str,
     status: Optional[str] = None,
     limit: int = 20,
 ):
     """Get orders for a specific table."""
-    query = db.query(GuestOrderModel).filter(GuestOrderModel.table_token == token)
+    stmt = select(GuestOrderModel).where(GuestOrderModel.table_token == token)
     if status:
-        query = query.filter(GuestOrderModel.status == status)
+        stmt = stmt.where(GuestOrderModel.status == status)
 
-    orders = query.order_by(GuestOrderModel.created_at.desc()).limit(limit).all()
+    orders = (await db.scalars(stmt.order_by(GuestOrderModel.created_at.desc()).limit(limit))).all()
 
     return {
         "orders": [
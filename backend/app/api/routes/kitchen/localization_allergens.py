@@ -6,7 +6,7 @@ from typing import List, Dict, Optional, Any
 from datetime import datetime, timezone, timedelta
 
 from app.core.rate_limit import limiter
-from app.db.session import get_db
+from app.db.session import AsyncDbSession, get_db
 
 # Import shared schemas and helpers
 from app.api.routes.kitchen._shared import *
@@ -137,7 +137,7 @@ async def update_localization_translation(request: Request, key: str, body: dict
 
 @router.get("/orders/{order_id}/allergen-check")
 @limiter.limit("60/minute")
-async def check_order_allergens(request: Request, order_id: int, db: DbSession):
+async def check_order_allergens(request: Request, order_id: int, db: AsyncDbSession):
     """Check all items in an order for allergen flags."""
     try:
         from app.services.allergen_nutrition_service import AllergenNutritionService
@@ -148,7 +148,7 @@ async def check_order_allergens(request: Request, order_id: int, db: DbSession):
             "lupin", "milk", "molluscs", "mustard", "nuts",
             "peanuts", "sesame", "soybeans", "sulphites"
         ]
-        result = service.check_order_allergens(order_id, all_allergens)
+        result = await service.check_order_allergens_async(order_id, all_allergens)
         result["requires_verification"] = bool(result.get("warnings"))
         return result
     except Exception as e:
@@ -163,7 +163,7 @@ async def check_order_allergens(request: Request, order_id: int, db: DbSession):
 
 @router.post("/orders/{order_id}/allergen-verify")
 @limiter.limit("30/minute")
-async def verify_order_allergens(request: Request, order_id: int, db: DbSession, data: dict = {}):
+async def verify_order_allergens(request: Request, order_id: int, data: dict = {}):
     """Record allergen verification for an order before kitchen processing."""
     from datetime import datetime, timezone
 
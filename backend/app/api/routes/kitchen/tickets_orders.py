@@ -5,6 +5,7 @@ from sqlalchemy import func, desc, and_
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timezone, timedelta
 
+from app.core.cache import invalidate_menu_cache
 from app.core.rate_limit import limiter
 from app.db.session import get_db
 
@@ -504,6 +505,7 @@ def mark_item_86(
     if menu_item:
         menu_item.available = False
         db.commit()
+        invalidate_menu_cache()
         return {"status": "ok", "item_id": item_id, "is_86": True}
 
     # If item doesn't exist, just return success
@@ -522,6 +524,7 @@ def unmark_item_86(
     if menu_item:
         menu_item.available = True
         db.commit()
+        invalidate_menu_cache()
     return {"status": "ok", "item_id": item_id, "is_86": False}
 
 
@@ -907,6 +910,7 @@ def mark_item_available(
     if menu_item:
         menu_item.available = True
         db.commit()
+        invalidate_menu_cache()
     return {"status": "ok", "item_id": item_id, "is_86": False}
 
 
@@ -6,6 +6,7 @@ from typing import List, Dict, Optional, Any
 from datetime import datetime, date, timezone, timedelta
 from decimal import Decimal
 
+from app.core.cache import invalidate_menu_cache
 from app.core.rate_limit import limiter
 from app.db.session import get_db
 
@@ -176,6 +177,7 @@ def mark_item_86(
     # Update item availability
     item.available = False
     db.commit()
+    invalidate_menu_cache()
 
     # Get alternatives
     alternatives = []
@@ -280,6 +282,7 @@ def restore_86_item(
     record["restored_at"] = datetime.now(timezone.utc).isoformat()
 
     db.commit()
+    invalidate_menu_cache()
 
     return {"message": "Item restored", "id": item86_id}
 
@@ -49,6 +49,9 @@ class PrinterResponse(BaseModel):
     ip_address: Optional[str] = None
     port: int = 9100
     status: str = "unknown"
+    queue_depth: int = 0
+    last_success_at: Optional[str] = None
+    last_error: Optional[str] = None
 
 
 class ReceiptItemRequest(BaseModel):
@@ -177,7 +180,10 @@ async def list_printers(request: Request):
             connection=p["connection"],
             ip_address=p.get("ip_address"),
             port=p.get("port", 9100),
-            status="configured",
+            status=p["status"],
+            queue_depth=p["queue_depth"],
+            last_success_at=p["last_success_at"],
+            last_error=p["last_error"],
         )
         for p in printers
     ]
@@ -249,7 +255,10 @@ async def get_printer(request: Request, printer_id: str):
         connection=printer.config.connection_type.value,
         ip_address=printer.config.ip_address,
         port=printer.config.port,
-        status="configured",
+        status=printer.status,
+        queue_depth=printer.queue_depth,
+        last_success_at=printer.last_success_at.isoformat() if printer.last_success_at else None,
+        last_error=printer.last_error,
     )
 
 
@@ -263,7 +272,7 @@ async def remove_printer(request: Request, printer_id: str):
     if not printer:
         raise HTTPException(status_code=404, detail=f"Printer '{printer_id}' not found")
 
-    await printer.disconnect()
+    await printer.close()
     manager.remove_printer(printer_id)
 
     return {"success": True, "message": f"Printer '{printer_id}' removed"}
@@ -429,6 +438,8 @@ async def print_kitchen_ticket(request: Request, ticket_request: PrintKitchenTic
         station=ticket_request.station,
     )
 
+    if success and printer.offline:
+        return PrintResult(success=True, message="Printer offline; kitchen ticket spooled and will print on reconnect")
     if success:
         return PrintResult(success=True, message="Kitchen ticket printed successfully")
     else:
@@ -1,8 +1,6 @@
 """Reporting routes."""
 
 
-import csv
-import io
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Optional, List
@@ -16,6 +14,8 @@ from app.db.session import DbSession
 from app.models.location import Location
 from app.models.product import Product
 from app.models.stock import StockMovement, StockOnHand
+from app.services.report_export import FORMAT_ALIASES, MEDIA_TYPES, encode_rows, stream_rows
+from app.services.sales_rollup import SOURCE_CHECK, hourly_sales, item_sales, sales_totals
 from app.core.rate_limit import limiter
 
 router = APIRouter()
@@ -583,14 +583,45 @@ def get_product_mix_report(
     request: Request,
     db: DbSession,
     location_id: Optional[int] = Query(None),
+    days: int = Query(30, ge=1, le=366),
 ):
     """
-    Get product mix analysis report.
+    Get product mix analysis report (guest orders and checks, from the hourly sales cube).
     """
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    items = item_sales(db, start, location_id=location_id)
+    total_revenue = sum(item["revenue"] for item in items)
+
+    categories: dict = {}
+    for item in items:
+        category = categories.setdefault(item["category"] or "Other", {
+            "category": item["category"] or "Other",
+            "items_sold": 0,
+            "revenue": Decimal("0"),
+            "items": [],
+        })
+        category["items_sold"] += item["quantity"]
+        category["revenue"] += item["revenue"]
+        category["items"].append({
+            "name": item["name"],
+            "quantity_sold": item["quantity"],
+            "revenue": float(item["revenue"]),
+            "mix_percentage": float(item["revenue"] / total_revenue * 100) if total_revenue > 0 else 0,
+        })
+
+    results = []
+    for category in sorted(categories.values(), key=lambda c: c["revenue"], reverse=True):
+        results.append({
+            **category,
+            "revenue": float(category["revenue"]),
+            "mix_percentage": float(category["revenue"] / total_revenue * 100) if total_revenue > 0 else 0,
+        })
+
     return {
-        "total_items_sold": 0,
-        "total_revenue": 0,
-        "categories": [],
+        "period_days": days,
+        "total_items_sold": sum(item["quantity"] for item in items),
+        "total_revenue": float(total_revenue),
+        "categories": results,
         "generated_at": datetime.now(timezone.utc).isoformat(),
     }
 
@@ -604,15 +635,40 @@ def get_trends_report(
     period: str = Query("week"),
 ):
     """
-    Get sales and operational trends.
+    Get sales and operational trends (daily sales from the hourly sales cube).
     """
+    days = 30 if period == "month" else 7
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days - 1)
+    previous_start = start - timedelta(days=days)
+
+    daily: dict = {}
+    for bucket_hour, orders, revenue in hourly_sales(db, start, location_id=location_id):
+        day = daily.setdefault(bucket_hour.date(), {"revenue": Decimal("0"), "orders": 0})
+        day["revenue"] += revenue
+        day["orders"] += orders
+
+    sales_trend = []
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).date()
+        totals = daily.get(day, {"revenue": Decimal("0"), "orders": 0})
+        sales_trend.append({
+            "date": day.isoformat(),
+            "revenue": round(float(totals["revenue"]), 2),
+            "orders": totals["orders"],
+        })
+
+    current_sales = float(sum(day["revenue"] for day in daily.values()))
+    previous_sales = float(sales_totals(db, previous_start, start, location_id=location_id)["revenue"])
+    change = (current_sales - previous_sales) / previous_sales * 100 if previous_sales > 0 else 0
+
     return {
         "period": period,
-        "sales_trend": [],
+        "sales_trend": sales_trend,
         "comparison": {
-            "current_period_sales": 0,
-            "previous_period_sales": 0,
-            "change_percentage": 0,
+            "current_period_sales": round(current_sales, 2),
+            "previous_period_sales": round(previous_sales, 2),
+            "change_percentage": round(change, 1),
         },
         "generated_at": datetime.now(timezone.utc).isoformat(),
     }
@@ -685,92 +741,30 @@ def get_turnover_base_prices_report(
     - markup_percentage: Markup as percentage of base
     - gross_margin: Markup as percentage of actual
     """
-    from app.models.restaurant import Check, CheckItem, MenuItem
-    from datetime import timedelta
-
     if not start_date:
         start_date = (datetime.now(timezone.utc).date() - timedelta(days=30)).strftime("%Y-%m-%d")
     if not end_date:
         end_date = datetime.now(timezone.utc).date().strftime("%Y-%m-%d")
     try:
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+        start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        end = datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
-    # Query closed checks within date range
-    check_query = db.query(Check).filter(
-        Check.status == "closed",
-        Check.closed_at >= start,
-        Check.closed_at <= end,
-    )
-
-    if location_id:
-        check_query = check_query.filter(Check.location_id == location_id)
-
-    checks = check_query.all()
-    check_ids = [c.id for c in checks]
-
-    if not check_ids:
-        return {
-            "period": {"start_date": start_date, "end_date": end_date},
-            "summary": {
-                "actual_revenue": 0,
-                "base_revenue": 0,
-                "markup_amount": 0,
-                "markup_percentage": 0,
-                "gross_margin_percentage": 0,
-                "total_items_sold": 0,
-                "total_checks": 0,
-            },
-            "by_category": [],
-            "by_item": [],
-            "generated_at": datetime.now(timezone.utc).isoformat(),
-        }
-
-    # Get check items
-    items_query = db.query(CheckItem).filter(
-        CheckItem.check_id.in_(check_ids),
-        CheckItem.status != "voided",
-    )
-    check_items = items_query.all()
-
-    # Build menu item lookup with base prices
-    menu_item_ids = list(set(ci.menu_item_id for ci in check_items if ci.menu_item_id))
-    menu_items_map = {}
-    if menu_item_ids:
-        menu_items = db.query(MenuItem).filter(MenuItem.id.in_(menu_item_ids)).all()
-        menu_items_map = {mi.id: mi for mi in menu_items}
+    # Closed checks, pre-aggregated per hour and item; base_revenue is the
+    # menu item base price, or 35% of the selling price where none is set
+    totals = sales_totals(db, start, end, location_id=location_id, source=SOURCE_CHECK)
+    check_items = item_sales(db, start, end, location_id=location_id, source=SOURCE_CHECK, category=category)
 
     # Calculate totals
-    total_actual = Decimal("0")
-    total_base = Decimal("0")
-    total_items = 0
+    total_actual = sum((ci["revenue"] for ci in check_items), Decimal("0"))
+    total_base = sum((ci["cost_estimate"] for ci in check_items), Decimal("0"))
+    total_items = sum(ci["quantity"] for ci in check_items)
     by_category_data: dict = {}
     by_item_data: dict = {}
 
     for ci in check_items:
-        actual_price = ci.total or (ci.price * ci.quantity)
-        total_actual += actual_price
-        total_items += ci.quantity
-
-        # Get base price from menu item
-        base_price = Decimal("0")
-        item_category = "Other"
-
-        if ci.menu_item_id and ci.menu_item_id in menu_items_map:
-            mi = menu_items_map[ci.menu_item_id]
-            base_price = (mi.base_price or mi.price * Decimal("0.35")) * ci.quantity  # Default 35% cost if no base
-            item_category = mi.category or "Other"
-        else:
-            # Estimate 35% cost if no menu item link
-            base_price = actual_price * Decimal("0.35")
-
-        # Filter by category if specified
-        if category and item_category != category:
-            continue
-
-        total_base += base_price
+        item_category = ci["category"] or "Other"
 
         # Aggregate by category
         if item_category not in by_category_data:
@@ -780,12 +774,12 @@ def get_turnover_base_prices_report(
                 "base_revenue": Decimal("0"),
                 "items_sold": 0,
             }
-        by_category_data[item_category]["actual_revenue"] += actual_price
-        by_category_data[item_category]["base_revenue"] += base_price
-        by_category_data[item_category]["items_sold"] += ci.quantity
+        by_category_data[item_category]["actual_revenue"] += ci["revenue"]
+        by_category_data[item_category]["base_revenue"] += ci["cost_estimate"]
+        by_category_data[item_category]["items_sold"] += ci["quantity"]
 
         # Aggregate by item
-        item_name = ci.name
+        item_name = ci["name"]
         if item_name not in by_item_data:
             by_item_data[item_name] = {
                 "name": item_name,
@@ -793,9 +787,9 @@ def get_turnover_base_prices_report(
                 "base_revenue": Decimal("0"),
                 "quantity_sold": 0,
             }
-        by_item_data[item_name]["actual_revenue"] += actual_price
-        by_item_data[item_name]["base_revenue"] += base_price
-        by_item_data[item_name]["quantity_sold"] += ci.quantity
+        by_item_data[item_name]["actual_revenue"] += ci["revenue"]
+        by_item_data[item_name]["base_revenue"] += ci["cost_estimate"]
+        by_item_data[item_name]["quantity_sold"] += ci["quantity"]
 
     # Calculate markup
     markup_amount = total_actual - total_base
@@ -842,7 +836,7 @@ def get_turnover_base_prices_report(
             "markup_percentage": float(markup_pct),
             "gross_margin_percentage": float(gross_margin_pct),
             "total_items_sold": total_items,
-            "total_checks": len(checks),
+            "total_checks": totals["orders"],
         },
         "by_category": categories,
         "by_item": items,
@@ -861,9 +855,12 @@ def export_report(
     period: str = Body("week", embed=True),
 ):
     """
-    Export report in requested format (csv, excel).
-    
-    Supported report types: sales, inventory, financial, customers, staff
+    Export report in requested format (csv, excel, pdf, json).
+
+    Supported report types: sales, inventory, staff
+
+    Rows are streamed from a server-side cursor, so exports are complete for
+    any date range and use constant memory.
     """
     # Calculate date range based on period
     end_date = datetime.now(timezone.utc).date()
@@ -879,93 +876,110 @@ def export_report(
         start_date = end_date - timedelta(days=365)
     else:
         start_date = end_date - timedelta(days=7)
+    start = datetime.combine(start_date, datetime.min.time())
+    end = datetime.combine(end_date, datetime.max.time())
 
-    # Generate report data based on type
+    # Select the report's rows; they are only read while the response streams
     if report_type == "sales":
-        data = _generate_sales_export(db, start_date, end_date)
-        headers = ["Date", "Order ID", "Items", "Total", "Payment Method"]
+        headers, stmt, row_factory = _sales_export_query(start, end)
     elif report_type == "inventory":
-        data = _generate_inventory_export(db)
-        headers = ["Product", "SKU", "Quantity", "Unit", "Value"]
+        headers, stmt, row_factory = _inventory_export_query()
     elif report_type == "staff":
-        data = _generate_staff_export(db, start_date, end_date)
-        headers = ["Staff Name", "Role", "Hours Worked", "Sales Total"]
+        headers, stmt, row_factory = _staff_export_query(start, end)
     else:
-        data = []
-        headers = ["No data available"]
-
-    # Generate CSV response
-    if format == "csv":
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(headers)
-        for row in data:
-            writer.writerow(row)
-        output.seek(0)
-        
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename={report_type}_report_{end_date}.csv"
-            }
-        )
-    
-    # Default: return JSON
-    return {
+        headers, stmt, row_factory = ["No data available"], None, None
+
+    export_format = FORMAT_ALIASES.get(format.lower(), "json")
+    rows = stream_rows(db.get_bind(), stmt, row_factory) if stmt is not None else iter(())
+    envelope = {
         "report_type": report_type,
         "period": {"start": str(start_date), "end": str(end_date)},
-        "headers": headers,
-        "data": data,
-        "generated_at": datetime.now(timezone.utc).isoformat()
+        "generated_at": datetime.now(timezone.utc).isoformat(),
     }
+    title = f"{report_type.replace('_', ' ').title()} Report {start_date} - {end_date}"
 
+    response_headers = {}
+    if export_format != "json":
+        response_headers["Content-Disposition"] = (
+            f"attachment; filename={report_type}_report_{end_date}.{export_format}"
+        )
+    return StreamingResponse(
+        encode_rows(export_format, headers, rows, title=title, envelope=envelope),
+        media_type=MEDIA_TYPES[export_format],
+        headers=response_headers,
+    )
 
-def _generate_sales_export(db, start_date, end_date):
-    """Generate sales data for export."""
+
+def _sales_export_query(start, end):
+    """POS sales lines of the period, oldest first."""
+    from sqlalchemy import select
     from app.models.pos import PosSalesLine
-    
-    sales = db.query(PosSalesLine).filter(
-        PosSalesLine.ts >= datetime.combine(start_date, datetime.min.time()),
-        PosSalesLine.ts <= datetime.combine(end_date, datetime.max.time())
-    ).limit(1000).all()
-    
-    return [
-        [str(s.ts.date()), s.order_ref or "", s.product_name or "", float(s.total or 0), s.payment_type or ""]
-        for s in sales
-    ]
 
+    stmt = (
+        select(
+            PosSalesLine.ts, PosSalesLine.pos_item_id, PosSalesLine.name,
+            PosSalesLine.qty, PosSalesLine.is_refund, PosSalesLine.location_id,
+        )
+        .where(PosSalesLine.ts >= start, PosSalesLine.ts <= end)
+        .order_by(PosSalesLine.ts, PosSalesLine.id)
+    )
+
+    def row(r):
+        ts, pos_item_id, name, qty, is_refund, location_id = r
+        return [
+            str(ts.date()), ts.strftime("%H:%M:%S"), pos_item_id or "", name,
+            float(qty or 0), "yes" if is_refund else "no", location_id or "",
+        ]
 
-def _generate_inventory_export(db):
-    """Generate inventory data for export."""
-    from app.models.stock import StockOnHand
-    from app.models.product import Product
-    
-    stock = db.query(StockOnHand).limit(1000).all()
-    result = []
-    for s in stock:
-        product = db.query(Product).filter(Product.id == s.product_id).first()
-        if product:
-            value = float(s.qty or 0) * float(product.cost_price or 0)
-            result.append([product.name, product.sku or "", float(s.qty or 0), product.unit or "", value])
-    return result
+    headers = ["Date", "Time", "POS Item ID", "Item", "Quantity", "Refund", "Location ID"]
+    return headers, stmt, row
 
 
-def _generate_staff_export(db, start_date, end_date):
-    """Generate staff data for export."""
+def _inventory_export_query():
+    """Stock on hand per product and location with its value at cost."""
+    from sqlalchemy import select
+
+    stmt = (
+        select(
+            Product.name, Product.sku, StockOnHand.location_id, StockOnHand.qty,
+            Product.unit, Product.cost_price,
+        )
+        .join(Product, Product.id == StockOnHand.product_id)
+        .order_by(Product.name, StockOnHand.location_id)
+    )
+
+    def row(r):
+        name, sku, location_id, qty, unit, cost_price = r
+        qty = float(qty or 0)
+        return [name, sku or "", location_id, qty, unit or "", round(qty * float(cost_price or 0), 2)]
+
+    headers = ["Product", "SKU", "Location ID", "Quantity", "Unit", "Value"]
+    return headers, stmt, row
+
+
+def _staff_export_query(start, end):
+    """Active staff with the hours they clocked in the period."""
+    from sqlalchemy import and_, func, select
     from app.models.staff import StaffUser, TimeClockEntry
 
-    staff = db.query(StaffUser).filter(StaffUser.is_active == True).all()
-    result = []
-    for s in staff:
-        entries = db.query(TimeClockEntry).filter(
-            TimeClockEntry.staff_id == s.id,
-            TimeClockEntry.clock_in >= datetime.combine(start_date, datetime.min.time()),
-            TimeClockEntry.clock_in <= datetime.combine(end_date, datetime.max.time())
-        ).all()
-        total_hours = sum(e.total_hours or 0 for e in entries)
-        result.append([s.full_name, s.role, total_hours, 0])  # Sales total would need POS data
-    return result
+    stmt = (
+        select(StaffUser.full_name, StaffUser.role, func.coalesce(func.sum(TimeClockEntry.total_hours), 0))
+        .outerjoin(TimeClockEntry, and_(
+            TimeClockEntry.staff_id == StaffUser.id,
+            TimeClockEntry.clock_in >= start,
+            TimeClockEntry.clock_in <= end,
+        ))
+        .where(StaffUser.is_active == True)
+        .group_by(StaffUser.id, StaffUser.full_name, StaffUser.role)
+        .order_by(StaffUser.full_name)
+    )
+
+    def row(r):
+        full_name, role, hours = r
+        return [full_name, role, round(float(hours or 0), 2), 0]  # Sales total would need POS data
+
+    headers = ["Staff Name", "Role", "Hours Worked", "Sales Total"]
+    return headers, stmt, row
 
 
 # ==================== MERGED FROM reports_enhanced.py ====================
@@ -11,6 +11,8 @@ from app.core.rate_limit import limiter
 
 # Import all services and schemas from shared
 from app.api.routes.v9_endpoints._shared import *
+from app.schemas.v9_schemas import FlowMeterReadingBatch, TemperatureReadingBatch
+from app.services.iot_service import FlowMeterService, TemperatureMonitoringService
 
 router = APIRouter()
 
@@ -98,6 +100,26 @@ async def record_temperature(
     return TemperatureMonitoringService.record_temperature(db, device_id, temperature, unit, humidity)
 
 
+@router.post("/iot/temperature/batch", response_model=Dict[str, Any], tags=["V9 - IoT"])
+@limiter.limit("120/minute")
+async def record_temperature_readings(
+    request: Request,
+    batch: TemperatureReadingBatch,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Record a batch of temperature readings from a sensor gateway"""
+    venue_id = current_user.venue_id
+    if not venue_id:
+        raise HTTPException(status_code=400, detail="User has no venue assigned")
+    try:
+        return TemperatureMonitoringService.record_temperature_readings(
+            db, venue_id, [reading.model_dump() for reading in batch.readings]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.get("/iot/temperature/history", response_model=Dict[str, Any], tags=["V9 - IoT"])
 @limiter.limit("60/minute")
 async def get_temperature_history(
@@ -107,6 +129,7 @@ async def get_temperature_history(
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     alerts_only: bool = False,
+    resolution: str = Query("auto", pattern="^(auto|raw|minute|hour)$"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
@@ -114,7 +137,7 @@ async def get_temperature_history(
     venue_id = current_user.venue_id
     if not venue_id:
         raise HTTPException(status_code=400, detail="User has no venue assigned")
-    return TemperatureMonitoringService.get_temperature_history(db, venue_id, device_id, location, start_date, end_date, alerts_only)
+    return TemperatureMonitoringService.get_temperature_history(db, venue_id, device_id, location, start_date, end_date, alerts_only, resolution)
 
 
 @router.post("/iot/temperature/acknowledge/{log_id}", response_model=Dict[str, Any], tags=["V9 - IoT"])
@@ -209,6 +232,28 @@ async def record_weight(
     return ScaleService.record_weight(db, device_id, item_id, weight_grams, expected_weight_grams)
 
 
+# ==================== IOT - FLOW METERS ====================
+
+@router.post("/iot/flow/readings/batch", response_model=Dict[str, Any], tags=["V9 - IoT"])
+@limiter.limit("120/minute")
+async def record_flow_meter_readings(
+    request: Request,
+    batch: FlowMeterReadingBatch,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Record a batch of flow meter readings from a gateway in one transaction"""
+    venue_id = current_user.venue_id
+    if not venue_id:
+        raise HTTPException(status_code=400, detail="User has no venue assigned")
+    try:
+        return FlowMeterService.record_flow_meter_readings(
+            db, venue_id, [reading.model_dump() for reading in batch.readings]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 # ==================== COMPLIANCE - AUDIT LOGS ====================
 
 @router.post("/compliance/audit-log", response_model=Dict[str, Any], tags=["V9 - Compliance"])
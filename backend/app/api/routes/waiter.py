@@ -1035,6 +1035,7 @@ def transfer_check(request: Request, db: DbSession, check_id: int, body: Transfe
         remaining_items = [i for i in source_check.items if i.status != "voided"]
         if not remaining_items:
             source_check.status = "closed"
+            source_check.closed_at = datetime.now(timezone.utc)
             source_table = db.query(Table).filter(Table.id == source_check.table_id).first()
             if source_table:
                 source_table.status = "available"
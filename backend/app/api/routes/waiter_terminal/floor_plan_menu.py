@@ -1,75 +1,80 @@
 """Floor plan, table management & quick menu"""
 from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 
 from app.core.rate_limit import limiter
-from app.db.session import get_db
+from app.db.session import AsyncDbSession, get_db
 
 # Import shared schemas and helpers
 from app.api.routes.waiter_terminal._shared import *
+from app.schemas.pagination import paginate_select
+from app.services.floor_state import floor_state
 
 router = APIRouter()
 
+
+def _table_status(row: Dict[str, Any], now: datetime) -> TableStatusResponse:
+    seated_at = datetime.fromisoformat(row["seated_at"]) if row["seated_at"] else None
+    return TableStatusResponse(
+        table_id=row["table_id"],
+        table_name=row["table_name"],
+        capacity=row["capacity"],
+        status=row["status"],
+        current_check_id=row["current_check_id"],
+        guest_count=row["guest_count"],
+        server_name=row["server_name"],
+        seated_at=seated_at,
+        time_seated_minutes=int((now - seated_at).total_seconds() / 60) if seated_at else None,
+        current_total=row["current_total"]
+    )
+
+
 @router.get("/floor-plan")
 @limiter.limit("60/minute")
 async def get_floor_plan(
     request: Request,
+    db: AsyncDbSession,
     section: Optional[str] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=500),
-    db: Session = Depends(get_db),
     current_user: StaffUser = Depends(get_current_user)
 ):
     """Get floor plan with table statuses"""
-    query = db.query(Table).filter(or_(Table.location_id == current_user.venue_id, Table.location_id.is_(None)))
+    state = await floor_state.venue_async(db, current_user.venue_id)
+    with floor_state.lock:
+        rows = [row for row in state.tables.values() if not section or row["area"] == section]
 
-    if section:
-        query = query.filter(Table.section == section)
+    now = datetime.now(timezone.utc)
+    result = [_table_status(row, now) for row in rows[skip:skip + limit]]
+    return PaginatedResponse.create(items=result, total=len(rows), skip=skip, limit=limit)
 
-    tables, total = paginate_query(query, skip, limit)
 
-    result = []
-    for table in tables:
-        # Get active session
-        session = db.query(TableSession).filter(
-            TableSession.table_id == table.id,
-            TableSession.status == "active"
-        ).first()
-
-        # Get current order if any
-        current_order = None
-        if session:
-            current_order = db.query(Order).filter(
-                Order.session_id == session.id,
-                Order.status.notin_([OrderStatus.SERVED, OrderStatus.CANCELLED])
-            ).first()
-
-        waiter = None
-        if session and session.waiter_id:
-            waiter = db.query(StaffUser).filter(StaffUser.id == session.waiter_id).first()
-
-        time_seated = None
-        if session and session.started_at:
-            time_seated = int((datetime.now(timezone.utc) - session.started_at.replace(tzinfo=timezone.utc)).total_seconds() / 60)
-
-        result.append(TableStatusResponse(
-            table_id=table.id,
-            table_name=f"Table {table.number}",
-            capacity=table.capacity or 4,
-            status="occupied" if session else ("reserved" if getattr(table, 'reserved', False) else "available"),
-            current_check_id=current_order.id if current_order else None,
-            guest_count=session.guest_count if session else None,
-            server_name=waiter.full_name if waiter else None,
-            seated_at=session.started_at if session else None,
-            time_seated_minutes=time_seated,
-            current_total=float(current_order.total or 0) if current_order else None
-        ))
+@router.get("/floor-plan/state")
+@limiter.limit("120/minute")
+async def get_floor_state(
+    request: Request,
+    db: AsyncDbSession,
+    epoch: Optional[str] = None,
+    since_version: Optional[int] = Query(None, ge=0),
+    current_user: StaffUser = Depends(get_current_user)
+):
+    """Versioned floor snapshot, or only the changes after ``since_version``.
 
-    return PaginatedResponse.create(items=result, total=total, skip=skip, limit=limit)
+    Handhelds keep the returned ``epoch``/``version`` and apply the deltas
+    pushed on /ws/floor; after a reconnect they pass them back here and get
+    the missed changes, or a full snapshot when those are no longer kept.
+    """
+    state = await floor_state.venue_async(db, current_user.venue_id)
+    with floor_state.lock:
+        if since_version is not None:
+            changes = state.changes_since(epoch, since_version)
+            if changes is not None:
+                return changes
+        return state.snapshot()
 
 
 @router.post("/tables/{table_id}/seat", response_model=QuickActionResponse)
@@ -110,6 +115,7 @@ async def seat_table(
     )
     db.add(session)
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [table_id])
 
     return QuickActionResponse(
         success=True,
@@ -146,6 +152,7 @@ async def transfer_table(
 
     session.waiter_id = body.to_waiter_id
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [table_id])
 
     return QuickActionResponse(
         success=True,
@@ -182,6 +189,7 @@ async def clear_table(
     session.status = "closed"
     session.ended_at = datetime.now(timezone.utc)
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [table_id])
 
     return QuickActionResponse(
         success=True,
@@ -193,30 +201,38 @@ async def clear_table(
 @limiter.limit("60/minute")
 async def get_my_tables(
     request: Request,
+    db: AsyncDbSession,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=500),
-    db: Session = Depends(get_db),
     current_user: StaffUser = Depends(get_current_user)
 ):
     """Get tables assigned to current waiter"""
-    query = db.query(TableSession).filter(
+    stmt = select(TableSession).where(
         TableSession.waiter_id == current_user.id,
         TableSession.venue_id == current_user.venue_id,
         TableSession.status == "active"
     )
-    sessions, total = paginate_query(query, skip, limit)
+    sessions, total = await paginate_select(db, stmt, skip, limit)
+
+    # Tables and open orders of the whole page in two queries
+    tables = {
+        table.id: table
+        for table in await db.scalars(select(Table).where(Table.id.in_({s.table_id for s in sessions})))
+    }
+    orders = {}
+    for order in await db.scalars(select(Order).where(
+        Order.session_id.in_([s.id for s in sessions]),
+        Order.status.notin_([OrderStatus.SERVED, OrderStatus.CANCELLED])
+    ).order_by(Order.id)):
+        orders.setdefault(order.session_id, order)
 
     result = []
     for session in sessions:
-        table = db.query(Table).filter(Table.id == session.table_id).first()
+        table = tables.get(session.table_id)
         if not table:
             continue
 
-        order = db.query(Order).filter(
-            Order.session_id == session.id,
-            Order.status.notin_([OrderStatus.SERVED, OrderStatus.CANCELLED])
-        ).first()
-
+        order = orders.get(session.id)
         time_seated = int((datetime.now(timezone.utc) - session.started_at.replace(tzinfo=timezone.utc)).total_seconds() / 60)
 
         result.append(TableStatusResponse(
@@ -1,16 +1,18 @@
 """Orders, tabs & checks"""
 from fastapi import APIRouter, HTTPException, Depends, Query, Body, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 
 from app.core.rate_limit import limiter
-from app.db.session import get_db
+from app.db.session import AsyncDbSession, get_db
 
 # Import shared schemas and helpers
 from app.api.routes.waiter_terminal._shared import *
+from app.schemas.pagination import paginate_select
+from app.services.floor_state import floor_state
 
 router = APIRouter()
 
@@ -149,6 +151,7 @@ async def create_waiter_order(
 
     db.commit()
     db.refresh(order)
+    floor_state.refresh(db, current_user.venue_id, [body.table_id])
 
     # Deduct stock for ordered items
     try:
@@ -235,6 +238,7 @@ async def add_items_to_order(
     order.total = subtotal + tax
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [order.table_id])
 
     # Deduct stock for newly added items
     try:
@@ -370,13 +374,13 @@ async def fire_all_items(
 async def get_order_by_seat(
     request: Request,
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncDbSession,
     current_user: StaffUser = Depends(get_current_user)
 ):
     """Get order items grouped by seat number"""
-    items = db.query(OrderItem).filter(
+    items = (await db.scalars(select(OrderItem).where(
         OrderItem.order_id == order_id
-    ).limit(500).all()
+    ).limit(500))).all()
 
     by_seat = {}
     for item in items:
@@ -384,7 +388,7 @@ async def get_order_by_seat(
         if seat not in by_seat:
             by_seat[seat] = {"items": [], "subtotal": 0}
 
-        menu_item = db.query(MenuItem).filter(MenuItem.id == item.menu_item_id).first()
+        menu_item = await db.get(MenuItem, item.menu_item_id)
         by_seat[seat]["items"].append({
             "id": item.id,
             "name": menu_item.name if menu_item else "Unknown",
@@ -448,37 +452,39 @@ async def open_tab(
 @limiter.limit("60/minute")
 async def list_open_tabs(
     request: Request,
+    db: AsyncDbSession,
     search: Optional[str] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=500),
-    db: Session = Depends(get_db),
     current_user: StaffUser = Depends(get_current_user)
 ):
     """List all open bar tabs"""
-    query = db.query(TableSession).filter(
+    stmt = select(TableSession).where(
         TableSession.venue_id == current_user.venue_id,
         TableSession.status == "active"
     )
 
     if search:
-        query = query.filter(
+        stmt = stmt.where(
             TableSession.guest_name.ilike(f"%{search}%")
         )
 
-    query = query.order_by(TableSession.started_at.desc())
-    tabs, total = paginate_query(query, skip, limit)
+    stmt = stmt.order_by(TableSession.started_at.desc())
+    tabs, total = await paginate_select(db, stmt, skip, limit)
 
     result = []
     for tab in tabs:
         # Get orders for this tab
-        orders = db.query(Order).filter(Order.session_id == tab.id).limit(500).all()
+        orders = (await db.scalars(select(Order).where(Order.session_id == tab.id).limit(500))).all()
         items = []
         tab_total = 0.0
 
         for order in orders:
-            order_items = db.query(OrderItem).filter(OrderItem.order_id == order.id).limit(500).all()
+            order_items = (await db.scalars(
+                select(OrderItem).where(OrderItem.order_id == order.id).limit(500)
+            )).all()
             for item in order_items:
-                menu_item = db.query(MenuItem).filter(MenuItem.id == item.menu_item_id).first()
+                menu_item = await db.get(MenuItem, item.menu_item_id)
                 items.append({
                     "name": menu_item.name if menu_item else "Unknown",
                     "quantity": item.quantity,
@@ -486,7 +492,7 @@ async def list_open_tabs(
                 })
                 tab_total += float(item.total_price)
 
-        waiter = db.query(StaffUser).filter(StaffUser.id == tab.waiter_id).first()
+        waiter = await db.get(StaffUser, tab.waiter_id) if tab.waiter_id else None
 
         result.append(TabResponse(
             tab_id=tab.id,
@@ -618,6 +624,7 @@ async def transfer_tab(
         order.table_id = body.table_id
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [body.table_id])
 
     return QuickActionResponse(
         success=True,
@@ -671,6 +678,7 @@ async def close_tab(
         order.status = "paid"
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [tab.table_id])
 
     return QuickActionResponse(
         success=True,
@@ -11,6 +11,7 @@ from app.db.session import get_db
 
 # Import shared schemas and helpers
 from app.api.routes.waiter_terminal._shared import *
+from app.services.floor_state import floor_state
 
 router = APIRouter()
 
@@ -154,6 +155,7 @@ async def split_by_seat(
     order.total = subtotal + tax
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [order.table_id])
 
     # Return all checks
     all_orders = [order] + new_checks
@@ -262,6 +264,7 @@ async def split_by_items(
     target_order.total = target_order.subtotal + target_order.tax
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [order.table_id, target_order.table_id])
 
     return {
         "success": True,
@@ -304,6 +307,7 @@ async def merge_checks(
     target.total = target.subtotal + target.tax
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [o.table_id for o in orders])
 
     return {
         "success": True,
@@ -363,6 +367,7 @@ async def process_payment(
         order.status = "paid"
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [order.table_id])
 
     change = max(0, body.amount - balance) if body.payment_method == PaymentMethod.CASH else 0
 
@@ -422,6 +427,7 @@ async def split_tender_payment(
         order.status = "paid"
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [order.table_id])
 
     return QuickActionResponse(
         success=True,
@@ -479,6 +485,7 @@ async def apply_discount(
     order.total = subtotal + float(order.tax or 0) - discount
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [order.table_id])
 
     return QuickActionResponse(
         success=True,
@@ -512,6 +519,7 @@ async def apply_auto_gratuity(
     order.total = subtotal + float(order.tax or 0) - float(order.discount or 0) + gratuity
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [order.table_id])
 
     return QuickActionResponse(
         success=True,
@@ -588,6 +596,7 @@ async def void_item(
         order.total = order.subtotal + order.tax - float(order.discount or 0)
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [order.table_id])
 
     return QuickActionResponse(
         success=True,
@@ -647,6 +656,7 @@ async def comp_item(
         order.total = order.subtotal + order.tax - float(order.discount or 0)
 
     db.commit()
+    floor_state.refresh(db, current_user.venue_id, [order.table_id])
 
     return QuickActionResponse(
         success=True,
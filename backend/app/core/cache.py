@@ -10,6 +10,9 @@ import json
 import logging
 import threading
 
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
 logger = logging.getLogger(__name__)
 
 
@@ -117,6 +120,10 @@ class RedisCacheClient:
                 logger.warning(f"Redis unavailable, using memory cache: {e}")
                 self._redis = None
 
+    @property
+    def connected(self) -> bool:
+        return self._redis is not None
+
     def get(self, key: str) -> Any | None:
         try:
             if self._redis:
@@ -232,3 +239,52 @@ class CacheKeys:
     DASHBOARD = "dashboard"
     FORECAST = "forecast"
     STOCK = "stock"
+
+
+def invalidate_menu_cache():
+    """Drop guest menu snapshots after menu edits or 86'ing."""
+    redis_cache.invalidate_pattern(f"{CacheKeys.MENU}:*")
+    invalidate_cache(f"{CacheKeys.MENU}:")
+
+
+# ==================== PRE-SERIALIZED JSON SNAPSHOTS ====================
+
+def make_etag(body: str) -> str:
+    """Strong ETag for a response body."""
+    return f'"{hashlib.md5(body.encode()).hexdigest()}"'
+
+
+def json_snapshot(key: str, build: Callable[[], Any], ttl_seconds: int = 300) -> dict:
+    """
+    Cached JSON body plus ETag for a read-mostly endpoint.
+
+    ``build`` only runs on a miss. Its result is serialized once, the same
+    way FastAPI's JSONResponse would, and stored as {"body": str, "etag": str}
+    in redis_cache (memory fallback), so hits skip the database and the
+    serializer entirely.
+    """
+    snapshot = redis_cache.get(key)
+    if snapshot is None:
+        body = json.dumps(
+            jsonable_encoder(build()),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        )
+        snapshot = {"body": body, "etag": make_etag(body)}
+        redis_cache.set(key, snapshot, ttl_seconds)
+    return snapshot
+
+
+def snapshot_response(request: Request, body: str, etag: Optional[str] = None) -> Response:
+    """Serve a pre-serialized JSON body, or 304 when If-None-Match matches."""
+    etag = etag or make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -194,6 +194,91 @@ class Settings(BaseSettings):
     # ==========================================================================
     environment: str = "development"
 
+    # ==========================================================================
+    # Audit logging
+    # ==========================================================================
+    audit_queue_max_size: int = 10000
+    audit_batch_size: int = 500
+    audit_flush_interval_ms: int = 250
+    audit_spill_path: Optional[str] = None  # Append-only JSONL used when the DB is unavailable
+
+    # ==========================================================================
+    # Metrics
+    # ==========================================================================
+    # Shared directory for per-worker metrics snapshots (multi-worker uvicorn)
+    metrics_multiproc_dir: Optional[str] = None
+    metrics_flush_interval_seconds: float = 5.0
+
+    # ==========================================================================
+    # Kitchen Display
+    # ==========================================================================
+    # In-memory KDS state is reloaded from the DB after this many seconds
+    kds_state_resync_seconds: float = 30.0
+
+    # ==========================================================================
+    # Waiter terminal floor state
+    # ==========================================================================
+    floor_state_resync_seconds: float = 30.0  # In-memory floor is reloaded (and diffed) after this
+    floor_state_delta_log: int = 500  # Deltas kept per venue for handhelds catching up by version
+
+    # ==========================================================================
+    # WebSocket fan-out
+    # ==========================================================================
+    ws_send_queue_size: int = 256  # Outbound frames buffered per connection
+    ws_slow_client_policy: str = "drop_oldest"  # drop_oldest | coalesce | disconnect
+    ws_send_timeout_seconds: float = 10.0  # A single send blocked longer closes the connection
+    # Cross-worker event bus: "auto" (Redis when redis_url is set), "redis" or "memory"
+    ws_event_bus_backend: str = "auto"
+    ws_event_bus_channel: str = "bjs:ws-events"
+    ws_event_bus_presence_ttl_seconds: float = 30.0
+
+    # ==========================================================================
+    # Outbound HTTP (shared per-integration connection pools)
+    # ==========================================================================
+    http_pool_max_connections: int = 100
+    http_pool_max_keepalive: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http2_enabled: bool = True  # Only takes effect when the h2 package is installed
+
+    # ==========================================================================
+    # IoT telemetry ingestion
+    # ==========================================================================
+    iot_telemetry_queue_max_size: int = 20000
+    iot_telemetry_batch_size: int = 500
+    iot_telemetry_flush_interval_ms: int = 1000
+    iot_sensor_cache_ttl_seconds: float = 300.0  # Device thresholds/locations are re-read after this
+    iot_temperature_hysteresis_c: float = 0.5  # An alert clears only this far back inside the range
+    iot_raw_retention_days: int = 14  # Raw readings older than this are purged (alert rows are kept)
+    iot_minute_rollup_retention_days: int = 90  # Hour rollups are kept indefinitely
+
+    # ==========================================================================
+    # Recommendations (resident per-venue model)
+    # ==========================================================================
+    recommendation_refresh_seconds: float = 30.0  # New orders are folded in at most this often
+    recommendation_rebuild_seconds: int = 3600  # Full rebuild of every resident venue model
+    recommendation_neighbours: int = 10  # Similar customers kept per customer
+
+    # ==========================================================================
+    # Fraud Index (venue dashboard batch engine)
+    # ==========================================================================
+    fraud_index_cache_seconds: float = 300.0  # Cached venue indexes are served this long
+    fraud_index_full_rescore_seconds: float = 3600.0  # Otherwise only staff with new activity are rescored
+
+    # ==========================================================================
+    # Sync DB offloading and event-loop lag
+    # ==========================================================================
+    db_offload_async_handlers: bool = True  # Run await-free async handlers using DbSession on the DB pool
+    db_executor_workers: Optional[int] = None  # Defaults to the SQLAlchemy pool capacity
+    loop_lag_sample_interval_seconds: float = 0.5
+    loop_lag_warn_threshold_seconds: float = 0.1  # Longer stalls are logged with the blocking handler
+
+    # ==========================================================================
+    # Background workers (async task queue and recurring jobs)
+    # ==========================================================================
+    # Off by default (the baseline never started it): recurring jobs call out
+    # to third-party integrations, so deployments opt in explicitly
+    background_workers_enabled: bool = False
+
     # ==========================================================================
     # External POS Integration
     # ==========================================================================
@@ -287,6 +372,9 @@ class Settings(BaseSettings):
     ai_store_photos: bool = False
     ai_training_images_path: str = "./data/training_images"
     ai_recognition_threshold: float = 0.55  # Lowered for better matching with OCR
+    ai_onnx_intra_op_threads: int = 0  # 0 = onnxruntime default
+    ai_onnx_inter_op_threads: int = 0  # 0 = onnxruntime default
+    ai_onnx_session_pool_size: int = 1  # >1 checks out one session per concurrent request
 
     # AI V2 Pipeline (2-stage: YOLO detection + SKU classification)
     ai_v2_enabled: bool = False  # Feature flag for new pipeline
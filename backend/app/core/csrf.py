@@ -8,9 +8,7 @@ as the X-CSRF-Token header. The server compares the two values.
 """
 
 import logging
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.responses import Response
+from starlette.requests import HTTPConnection
 
 logger = logging.getLogger(__name__)
 
@@ -42,42 +40,39 @@ def _is_csrf_exempt(path: str) -> bool:
     return False
 
 
-class CSRFMiddleware(BaseHTTPMiddleware):
-    """Double-submit cookie CSRF protection.
+def csrf_check_failed(conn: HTTPConnection, method: str) -> bool:
+    """Double-submit cookie CSRF check for one request.
 
     Only enforced when the request is authenticated via cookies
     (i.e., has an access_token cookie but no Authorization header).
     Requests using Bearer token auth are not vulnerable to CSRF.
+    Returns True when the request must be rejected with 403.
     """
+    # Only check unsafe methods
+    if method not in UNSAFE_METHODS:
+        return False
+
+    # Skip exempt paths
+    path = conn.url.path
+    if _is_csrf_exempt(path):
+        return False
+
+    # Only enforce CSRF when auth comes from cookies (not Bearer header)
+    auth_header = conn.headers.get("Authorization", "")
+    has_cookie_auth = "access_token" in conn.cookies
+    has_bearer_auth = auth_header.startswith("Bearer ")
+
+    if has_cookie_auth and not has_bearer_auth:
+        # Cookie-based auth: require CSRF token
+        cookie_csrf = conn.cookies.get("csrf_token", "")
+        header_csrf = conn.headers.get("X-CSRF-Token", "")
+
+        if not cookie_csrf or not header_csrf or cookie_csrf != header_csrf:
+            logger.warning(
+                f"CSRF validation failed: path={path} "
+                f"method={method} cookie={'set' if cookie_csrf else 'missing'} "
+                f"header={'set' if header_csrf else 'missing'}"
+            )
+            return True
 
-    async def dispatch(self, request: Request, call_next: RequestResponseEndpoint) -> Response:
-        # Only check unsafe methods
-        if request.method not in UNSAFE_METHODS:
-            return await call_next(request)
-
-        # Skip exempt paths
-        if _is_csrf_exempt(request.url.path):
-            return await call_next(request)
-
-        # Only enforce CSRF when auth comes from cookies (not Bearer header)
-        auth_header = request.headers.get("Authorization", "")
-        has_cookie_auth = "access_token" in request.cookies
-        has_bearer_auth = auth_header.startswith("Bearer ")
-
-        if has_cookie_auth and not has_bearer_auth:
-            # Cookie-based auth: require CSRF token
-            cookie_csrf = request.cookies.get("csrf_token", "")
-            header_csrf = request.headers.get("X-CSRF-Token", "")
-
-            if not cookie_csrf or not header_csrf or cookie_csrf != header_csrf:
-                logger.warning(
-                    f"CSRF validation failed: path={request.url.path} "
-                    f"method={request.method} cookie={'set' if cookie_csrf else 'missing'} "
-                    f"header={'set' if header_csrf else 'missing'}"
-                )
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="CSRF validation failed",
-                )
-
-        return await call_next(request)
+    return False
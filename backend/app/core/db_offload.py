@@ -0,0 +1,405 @@
+"""
+Sync database work off the event loop, and event-loop lag monitoring.
+
+Most route handlers are ``async def`` but query through the sync
+``DbSession``; every query then blocks the event loop, and with it every
+other request on the worker. Until they are ported to ``AsyncDbSession``:
+
+- ``db_executor`` is a dedicated thread pool sized to the SQLAlchemy pool
+  capacity (pool_size + max_overflow), so offloaded work never queues on
+  connections inside a thread.
+- ``await run_sync_db(fn, *args)`` runs one sync section of a handler there.
+- ``@offload_db`` runs a whole handler there. It takes a sync function, or
+  an ``async def`` that never suspends (no ``await`` / ``async for`` /
+  ``async with``), whose coroutine then runs to completion on the pool thread.
+- ``offload_sync_db_routes(app)`` applies ``offload_db`` at startup to every
+  route that depends on ``get_db`` and whose handler qualifies, so handlers
+  keep their shape.
+
+``loop_lag_monitor`` is a watchdog thread that schedules a callback on the
+loop every ``loop_lag_sample_interval_seconds`` and measures how late it
+runs. Lag is exported to /metrics. When a sample exceeds
+``loop_lag_warn_threshold_seconds`` the loop thread's stack is read while it
+is still blocked, and the route handler on it is logged and counted.
+"""
+import asyncio
+import contextvars
+import dis
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import DURATION_BUCKETS, Histogram, metrics
+
+logger = logging.getLogger(__name__)
+
+# Opcodes at which a coroutine can suspend (3.9 - 3.12)
+_SUSPEND_OPS = frozenset({
+    "GET_AWAITABLE", "GET_AITER", "GET_ANEXT", "BEFORE_ASYNC_WITH", "SETUP_ASYNC_WITH",
+    "END_ASYNC_FOR", "YIELD_VALUE", "YIELD_FROM", "SEND",
+})
+# Calls that need a running loop in the current thread
+_LOOP_NAMES = frozenset({
+    "create_task", "ensure_future", "get_running_loop", "get_event_loop", "current_task",
+    "run_coroutine_threadsafe",
+})
+# Decorators whose async wrapper only awaits the wrapped handler
+_TRANSPARENT_WRAPPERS = ("slowapi",)
+
+# Handlers tracked individually in event_loop_blocked_total; the rest are "other"
+MAX_TRACKED_HANDLERS = 100
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_ROUTES_DIR = os.path.join(_APP_DIR, "api", "routes") + os.sep
+
+
+def pool_capacity(engine) -> int:
+    """Connections an engine's pool hands out at most (pool_size + max_overflow)."""
+    pool = engine.pool
+    size = pool.size() if callable(getattr(pool, "size", None)) else 0
+    overflow = getattr(pool, "_max_overflow", 0)
+    if size <= 0 or overflow < 0:
+        return 0
+    return size + overflow
+
+
+class DbExecutor:
+    """Bounded thread pool for sync Session work from async code."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.wait = Histogram()
+        self.stats = {"calls": 0, "errors": 0}
+
+    @property
+    def max_workers(self) -> int:
+        if self._max_workers is None:
+            self._max_workers = settings.db_executor_workers or self._default_workers()
+        return self._max_workers
+
+    @staticmethod
+    def _default_workers() -> int:
+        from app.db.session import engine
+
+        return pool_capacity(engine) or 16
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db-offload")
+            return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool in a copy of the caller's context."""
+        executor = self._get_executor()
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def call():
+            with self._lock:
+                self.queued -= 1
+                self.in_flight += 1
+                self.wait.observe(time.perf_counter() - submitted)
+                self.stats["calls"] += 1
+            try:
+                return context.run(fn, *args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.stats["errors"] += 1
+                raise
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+    def shutdown(self):
+        """Wait for running work and drop the pool; the next call starts a new one."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "max_workers": self.max_workers, "in_flight": self.in_flight, "queued": self.queued}
+
+    def prometheus_lines(self) -> List[str]:
+        with self._lock:
+            counts, total = list(self.wait.counts), self.wait.sum
+            in_flight, queued = self.in_flight, self.queued
+
+        lines = [
+            "# HELP db_executor_workers Threads in the sync database offload pool",
+            "# TYPE db_executor_workers gauge",
+            f"db_executor_workers {self.max_workers}",
+            "# HELP db_executor_tasks Offloaded database calls, by state",
+            "# TYPE db_executor_tasks gauge",
+            f'db_executor_tasks{{state="running"}} {in_flight}',
+            f'db_executor_tasks{{state="queued"}} {queued}',
+            "# HELP db_executor_wait_seconds Time offloaded calls waited for a pool thread",
+            "# TYPE db_executor_wait_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, counts):
+            cumulative += count
+            lines.append(f'db_executor_wait_seconds_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'db_executor_wait_seconds_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"db_executor_wait_seconds_sum {total:.6f}")
+        lines.append(f"db_executor_wait_seconds_count {cumulative}")
+        return lines
+
+
+db_executor = DbExecutor()
+metrics.register_collector(db_executor.prometheus_lines)
+
+
+async def run_sync_db(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Shortcut for ``db_executor.run``."""
+    return await db_executor.run(fn, *args, **kwargs)
+
+
+# ===== Handler offloading =====
+
+def _innermost(fn: Callable) -> Callable:
+    while hasattr(fn, "__wrapped__"):
+        fn = fn.__wrapped__
+    return fn
+
+
+def _code_objects(code):
+    yield code
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            yield from _code_objects(const)
+
+
+def _never_suspends(fn: Callable) -> bool:
+    """An ``async def`` without await / async for / async with (nested functions excluded)."""
+    code = getattr(fn, "__code__", None)
+    if code is None or not asyncio.iscoroutinefunction(fn):
+        return False
+    return not any(instr.opname in _SUSPEND_OPS for instr in dis.get_instructions(code))
+
+
+def _needs_loop(fn: Callable) -> bool:
+    return any(_LOOP_NAMES.intersection(code.co_names) for code in _code_objects(fn.__code__))
+
+
+def can_offload(fn: Callable) -> bool:
+    """Whether ``fn`` (with its decorators) can run to completion on a pool thread."""
+    inner = _innermost(fn)
+    if not asyncio.iscoroutinefunction(inner):
+        return callable(inner) and not asyncio.iscoroutinefunction(fn)
+    if not _never_suspends(inner) or _needs_loop(inner):
+        return False
+    layer = fn
+    while layer is not inner:
+        filename = getattr(getattr(layer, "__code__", None), "co_filename", "")
+        if not any(name in filename for name in _TRANSPARENT_WRAPPERS):
+            return False
+        layer = layer.__wrapped__
+    return True
+
+
+def _drive(fn: Callable, args, kwargs) -> Any:
+    result = fn(*args, **kwargs)
+    if not asyncio.iscoroutine(result):
+        return result
+    try:
+        result.send(None)
+    except StopIteration as done:
+        return done.value
+    result.close()
+    raise RuntimeError(f"{getattr(fn, '__qualname__', fn)} suspended while running on the database pool")
+
+
+def offload_db(fn: Callable) -> Callable:
+    """Run a handler (sync, or ``async def`` that never suspends) on ``db_executor``.
+
+    The signature is kept for FastAPI; apply it below ``@router.*`` and
+    ``@limiter.limit``.
+    """
+    if not can_offload(fn):
+        raise TypeError(f"{fn.__qualname__} awaits or needs the event loop and cannot be offloaded")
+
+    @functools.wraps(fn)
+    async def offloaded(*args, **kwargs):
+        return await db_executor.run(_drive, fn, args, kwargs)
+
+    offloaded.__offloaded__ = True
+    return offloaded
+
+
+def _uses_sync_session(dependant) -> bool:
+    from app.db.session import get_db
+
+    return any(dep.call is get_db or _uses_sync_session(dep) for dep in dependant.dependencies)
+
+
+def offload_sync_db_routes(app) -> int:
+    """Wrap every async route handler that uses ``get_db`` and never awaits.
+
+    Returns the number of routes rewired to ``db_executor``.
+    """
+    from fastapi.routing import APIRoute
+
+    count = 0
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        call = route.dependant.call
+        if getattr(call, "__offloaded__", False) or not asyncio.iscoroutinefunction(call):
+            continue
+        if not _uses_sync_session(route.dependant) or not can_offload(call):
+            continue
+        # The request handler looks up dependant.call on every request
+        route.dependant.call = offload_db(call)
+        count += 1
+    return count
+
+
+# ===== Event-loop lag =====
+
+def _describe(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+def blocking_handler(frame) -> str:
+    """The route handler on a stack: the outermost frame in app/api/routes.
+
+    Falls back to the innermost application frame, then the innermost frame.
+    """
+    handler = app_frame = None
+    innermost = frame
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_ROUTES_DIR):
+            handler = frame
+        elif app_frame is None and filename.startswith(_APP_DIR):
+            app_frame = frame
+        frame = frame.f_back
+    chosen = handler or app_frame or innermost
+    return _describe(chosen) if chosen is not None else "unknown"
+
+
+class LoopLagMonitor:
+    """Samples event-loop scheduling delay from a watchdog thread."""
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = Histogram()
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.blocked_by: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self, interval: Optional[float] = None, threshold: Optional[float] = None):
+        """Start watching the running loop; call from the loop thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.interval = interval if interval is not None else settings.loop_lag_sample_interval_seconds
+        self.threshold = threshold if threshold is not None else settings.loop_lag_warn_threshold_seconds
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-monitor", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop lag monitor started (every {self.interval}s, warn above {self.threshold}s)")
+
+    def stop(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=self.interval + self.threshold + 1)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            ran = threading.Event()
+            start = time.perf_counter()
+            try:
+                self._loop.call_soon_threadsafe(ran.set)
+            except RuntimeError:
+                # Loop closed
+                return
+            culprit = None
+            if not ran.wait(self.threshold):
+                frame = sys._current_frames().get(self._loop_thread)
+                culprit = blocking_handler(frame) if frame is not None else "unknown"
+                while not ran.wait(self.interval):
+                    if self._stop.is_set():
+                        return
+            self.record(time.perf_counter() - start, culprit)
+
+    def record(self, lag: float, culprit: Optional[str] = None):
+        with self._lock:
+            self.lag.observe(lag)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if culprit is not None:
+                if culprit not in self.blocked_by and len(self.blocked_by) >= MAX_TRACKED_HANDLERS:
+                    culprit = "other"
+                self.blocked_by[culprit] = self.blocked_by.get(culprit, 0) + 1
+        if culprit is not None:
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms by {culprit}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            worst = sorted(self.blocked_by.items(), key=lambda item: item[1], reverse=True)
+            return {
+                "samples": sum(self.lag.counts),
+                "last_lag_seconds": round(self.last_lag, 6),
+                "max_lag_seconds": round(self.max_lag, 6),
+                "blocked_by": dict(worst[:20]),
+            }
+
+    def prometheus_lines(self) -> List[str]:
+        with self._lock:
+            counts, total = list(self.lag.counts), self.lag.sum
+            last_lag, max_lag = self.last_lag, self.max_lag
+            blocked_by = dict(self.blocked_by)
+
+        lines = [
+            "# HELP event_loop_lag_seconds Delay before a callback scheduled on the event loop runs",
+            "# TYPE event_loop_lag_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, counts):
+            cumulative += count
+            lines.append(f'event_loop_lag_seconds_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += counts[-1]
+        lines.append(f'event_loop_lag_seconds_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"event_loop_lag_seconds_sum {total:.6f}")
+        lines.append(f"event_loop_lag_seconds_count {cumulative}")
+        lines.append("# HELP event_loop_lag_last_seconds Most recent event loop lag sample")
+        lines.append("# TYPE event_loop_lag_last_seconds gauge")
+        lines.append(f"event_loop_lag_last_seconds {last_lag:.6f}")
+        lines.append("# HELP event_loop_lag_max_seconds Largest event loop lag sample since start")
+        lines.append("# TYPE event_loop_lag_max_seconds gauge")
+        lines.append(f"event_loop_lag_max_seconds {max_lag:.6f}")
+        lines.append("# HELP event_loop_blocked_total Lag samples over the warn threshold, by handler")
+        lines.append("# TYPE event_loop_blocked_total counter")
+        for handler, count in sorted(blocked_by.items()):
+            lines.append(f'event_loop_blocked_total{{handler="{handler}"}} {count}')
+        return lines
+
+
+loop_lag_monitor = LoopLagMonitor()
+metrics.register_collector(loop_lag_monitor.prometheus_lines)
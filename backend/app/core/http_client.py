@@ -0,0 +1,276 @@
+"""
+Shared outbound HTTP clients.
+
+Services used to open a new ``httpx.AsyncClient`` (or aiohttp session) for
+every call, paying TCP and TLS setup each time. The registry keeps one
+connection pool per integration, reused for the life of the process:
+
+    async with http_client("stripe") as client:
+        response = await client.post(url, json=payload)
+
+``http_client`` returns an ordinary ``httpx.AsyncClient`` (base_url, headers,
+auth etc. are passed through), built on the integration's pooled transport.
+Closing the client does not close the pool, so existing ``async with`` call
+sites keep their shape. The pools are closed in the application lifespan.
+
+Each integration has:
+- a default timeout
+- a concurrency cap on in-flight requests
+- HTTP/2 when the ``h2`` package is installed
+
+Request latency and errors are recorded per integration and host.
+"""
+import asyncio
+import importlib.util
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import DURATION_BUCKETS, Histogram, metrics
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Hosts tracked individually per integration; the rest are reported as "other"
+MAX_TRACKED_HOSTS = 50
+
+
+@dataclass(frozen=True)
+class IntegrationLimits:
+    timeout: float = 30.0
+    max_concurrency: int = 20
+
+
+INTEGRATION_LIMITS: Dict[str, IntegrationLimits] = {
+    "default": IntegrationLimits(),
+    # Fiscal printers and local hardware bridges handle one request at a time
+    "fiscal": IntegrationLimits(timeout=30.0, max_concurrency=2),
+    "hardware": IntegrationLimits(timeout=10.0, max_concurrency=4),
+    # Payments
+    "stripe": IntegrationLimits(timeout=30.0, max_concurrency=20),
+    "paypal": IntegrationLimits(timeout=30.0, max_concurrency=10),
+    "square": IntegrationLimits(timeout=30.0, max_concurrency=10),
+    # Delivery platforms
+    "delivery": IntegrationLimits(timeout=30.0, max_concurrency=20),
+    "doordash": IntegrationLimits(timeout=30.0, max_concurrency=10),
+    "glovo": IntegrationLimits(timeout=30.0, max_concurrency=10),
+    "ubereats": IntegrationLimits(timeout=30.0, max_concurrency=10),
+    "wolt": IntegrationLimits(timeout=30.0, max_concurrency=10),
+    # Accounting APIs rate-limit aggressively
+    "quickbooks": IntegrationLimits(timeout=30.0, max_concurrency=5),
+    "xero": IntegrationLimits(timeout=30.0, max_concurrency=5),
+    "accounting": IntegrationLimits(timeout=30.0, max_concurrency=5),
+    # Reservations
+    "google_reserve": IntegrationLimits(timeout=30.0, max_concurrency=10),
+    "opentable": IntegrationLimits(timeout=30.0, max_concurrency=10),
+    # Messaging, webhooks and everything else
+    "messaging": IntegrationLimits(timeout=15.0, max_concurrency=20),
+    "webhooks": IntegrationLimits(timeout=30.0, max_concurrency=20),
+    "sso": IntegrationLimits(timeout=15.0, max_concurrency=10),
+    "weather": IntegrationLimits(timeout=5.0, max_concurrency=4),
+    "connectivity": IntegrationLimits(timeout=3.0, max_concurrency=4),
+}
+
+
+def _limits_for(integration: str) -> IntegrationLimits:
+    return INTEGRATION_LIMITS.get(integration, INTEGRATION_LIMITS["default"])
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.http_pool_max_connections,
+        max_keepalive_connections=settings.http_pool_max_keepalive,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+
+
+class _PooledTransport(httpx.AsyncBaseTransport):
+    """Async transport shared by every client of one integration."""
+
+    def __init__(self, registry: "HttpClientRegistry", integration: str):
+        self.registry = registry
+        self.integration = integration
+        self.transport = httpx.AsyncHTTPTransport(
+            http2=settings.http2_enabled and HTTP2_AVAILABLE,
+            limits=_pool_limits(),
+        )
+        self._semaphore = asyncio.Semaphore(_limits_for(integration).max_concurrency)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # The cap covers connect and time-to-headers; streamed bodies are read after release
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except Exception as e:
+                self.registry.record(self.integration, request.url.host, time.perf_counter() - start, error=e)
+                raise
+        self.registry.record(self.integration, request.url.host, time.perf_counter() - start,
+                             status=response.status_code)
+        return response
+
+    async def aclose(self) -> None:
+        pass  # Owned by the registry; clients closing must not close the pool
+
+
+class _SyncPooledTransport(httpx.BaseTransport):
+    """Blocking counterpart of _PooledTransport for sync call sites."""
+
+    def __init__(self, registry: "HttpClientRegistry", integration: str):
+        self.registry = registry
+        self.integration = integration
+        self.transport = httpx.HTTPTransport(limits=_pool_limits())
+        self._semaphore = threading.BoundedSemaphore(_limits_for(integration).max_concurrency)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self._semaphore:
+            start = time.perf_counter()
+            try:
+                response = self.transport.handle_request(request)
+            except Exception as e:
+                self.registry.record(self.integration, request.url.host, time.perf_counter() - start, error=e)
+                raise
+        self.registry.record(self.integration, request.url.host, time.perf_counter() - start,
+                             status=response.status_code)
+        return response
+
+    def close(self) -> None:
+        pass
+
+
+class HttpClientRegistry:
+    """Application-scoped connection pools, one per integration."""
+
+    def __init__(self):
+        self._transports: Dict[str, _PooledTransport] = {}
+        self._sync_transports: Dict[str, _SyncPooledTransport] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.errors: Dict[Tuple[str, str, str], int] = {}
+        self.stats = {"pools_opened": 0, "requests": 0, "errors": 0}
+
+    def start(self) -> None:
+        """Bind the async pools to the running loop (called from the lifespan)."""
+        self._loop = asyncio.get_running_loop()
+        logger.info(f"Outbound HTTP pools ready (HTTP/2 {'on' if settings.http2_enabled and HTTP2_AVAILABLE else 'off'})")
+
+    def _transport(self, integration: str) -> _PooledTransport:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pooled connections belong to the loop that opened them; only
+            # happens when a new loop is started (tests, scripts)
+            self._transports = {}
+            self._loop = loop
+        transport = self._transports.get(integration)
+        if transport is None:
+            transport = self._transports[integration] = _PooledTransport(self, integration)
+            self.stats["pools_opened"] += 1
+        return transport
+
+    def client(self, integration: str = "default", **kwargs) -> httpx.AsyncClient:
+        """An AsyncClient on the integration's shared pool.
+
+        Accepts the usual AsyncClient arguments; ``timeout`` defaults to the
+        integration's timeout.
+        """
+        kwargs.setdefault("timeout", _limits_for(integration).timeout)
+        return httpx.AsyncClient(transport=self._transport(integration), **kwargs)
+
+    def sync_client(self, integration: str = "default", **kwargs) -> httpx.Client:
+        """A blocking Client on the integration's shared sync pool."""
+        with self._lock:
+            transport = self._sync_transports.get(integration)
+            if transport is None:
+                transport = self._sync_transports[integration] = _SyncPooledTransport(self, integration)
+                self.stats["pools_opened"] += 1
+        kwargs.setdefault("timeout", _limits_for(integration).timeout)
+        return httpx.Client(transport=transport, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close every pool (called from the lifespan on shutdown)."""
+        transports, self._transports = self._transports, {}
+        for transport in transports.values():
+            try:
+                await transport.transport.aclose()
+            except Exception as e:
+                logger.debug(f"HTTP pool for {transport.integration} did not close cleanly: {e}")
+        with self._lock:
+            sync_transports, self._sync_transports = self._sync_transports, {}
+        for transport in sync_transports.values():
+            transport.transport.close()
+
+    # ----- Metrics -----
+
+    def record(self, integration: str, host: str, duration: float,
+               status: Optional[int] = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            key = (integration, host)
+            histogram = self.latency.get(key)
+            if histogram is None:
+                hosts = sum(1 for i, _ in self.latency if i == integration)
+                if hosts >= MAX_TRACKED_HOSTS:
+                    key = (integration, "other")
+                histogram = self.latency.setdefault(key, Histogram())
+            histogram.observe(duration)
+            self.stats["requests"] += 1
+
+            kind = type(error).__name__ if error is not None else ("http_5xx" if status >= 500 else None)
+            if kind is not None:
+                error_key = (key[0], key[1], kind)
+                self.errors[error_key] = self.errors.get(error_key, 0) + 1
+                self.stats["errors"] += 1
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "http2": settings.http2_enabled and HTTP2_AVAILABLE,
+            "pools": sorted(set(self._transports) | set(self._sync_transports)),
+        }
+
+    def prometheus_lines(self) -> List[str]:
+        with self._lock:
+            latency = {key: (list(h.counts), h.sum) for key, h in self.latency.items()}
+            errors = dict(self.errors)
+
+        lines = [
+            "# HELP http_client_request_duration_seconds Outbound HTTP time to response headers",
+            "# TYPE http_client_request_duration_seconds histogram",
+        ]
+        for (integration, host), (counts, total) in sorted(latency.items()):
+            labels = f'integration="{integration}",host="{host}"'
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, counts):
+                cumulative += count
+                lines.append(f'http_client_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'http_client_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"http_client_request_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"http_client_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+        lines.append("# HELP http_client_errors_total Outbound HTTP transport errors and 5xx responses")
+        lines.append("# TYPE http_client_errors_total counter")
+        for (integration, host, kind), count in sorted(errors.items()):
+            lines.append(f'http_client_errors_total{{integration="{integration}",host="{host}",kind="{kind}"}} {count}')
+        return lines
+
+
+# Global registry
+http_clients = HttpClientRegistry()
+metrics.register_collector(http_clients.prometheus_lines)
+
+
+def http_client(integration: str = "default", **kwargs) -> httpx.AsyncClient:
+    """Shortcut for ``http_clients.client``."""
+    return http_clients.client(integration, **kwargs)
+
+
+def sync_http_client(integration: str = "default", **kwargs) -> httpx.Client:
+    """Shortcut for ``http_clients.sync_client``."""
+    return http_clients.sync_client(integration, **kwargs)
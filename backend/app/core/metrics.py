@@ -1,43 +1,134 @@
-"""Prometheus-compatible metrics for application monitoring."""
+"""Prometheus-compatible metrics for application monitoring.
 
-import time
+Request durations are kept as fixed-bucket cumulative histograms per
+normalized route, so recording is O(1) and memory is constant per route.
+Infrastructure gauges are read live: the SQLAlchemy pool through checkout/
+checkin events, Redis and WebSocket counts through registered callbacks.
+
+Multiple workers: when ``metrics_multiproc_dir`` is set, every worker writes
+its counters, histograms and gauges to ``<dir>/metrics_<pid>.json`` (on a
+timer started in the lifespan and on every scrape), and a scrape merges all
+files. At startup and on every scrape the files of exited workers are folded
+into ``<dir>/archive.json`` under a file lock and deleted, so totals never go
+backwards, gauges only count live workers and the directory does not grow
+with every restart. A file left under our own PID by an earlier process
+(PID reuse) is folded the same way before it is overwritten.
+"""
+
+import bisect
+import json
 import logging
-from typing import Dict, List, Optional
+import os
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: dead workers' files are skipped instead of folded
+    fcntl = None
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
 from starlette.responses import PlainTextResponse
 
+from app.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+# Request duration histogram upper bounds in seconds (+Inf is implicit)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ARCHIVE_FILE = "archive.json"
+ARCHIVE_LOCK_FILE = "archive.lock"
+
+# How gauges combine across workers
+_GAUGE_MERGE = {
+    "redis_connected": min,
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram; per-bucket counts are made cumulative on export."""
+
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, counts: Optional[List[int]] = None, total: float = 0.0):
+        # One slot per bucket plus the +Inf overflow slot
+        self.counts = counts or [0] * (len(DURATION_BUCKETS) + 1)
+        self.sum = total
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(DURATION_BUCKETS, value)] += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+
 
 class MetricsCollector:
     """Collects HTTP request metrics in Prometheus exposition format."""
 
-    def __init__(self):
+    def __init__(self, multiproc_dir: Optional[str] = None):
+        self._lock = threading.Lock()
         self.request_count: Dict[str, int] = {}
-        self.request_duration: Dict[str, List[float]] = {}
+        self.request_duration: Dict[str, Histogram] = {}
         self.error_count: Dict[int, int] = {}
         self.active_requests: int = 0
         # Infrastructure gauges
-        self.db_pool_size: int = 20
+        self.db_pool_size: int = 0
         self.db_pool_checked_out: int = 0
-        self.redis_connected: int = 1
-        self.ws_active_connections: int = 0
+        self._gauge_callbacks: Dict[str, List[Callable[[], float]]] = {}
+        # Extra exposition lines from other subsystems (audit writer, caches, ...)
+        self._collectors: List[Callable[[], List[str]]] = []
+        # Tells this process's snapshot file apart from one left under a reused PID
+        self._instance = uuid.uuid4().hex
+        self.multiproc_dir = multiproc_dir
+        if multiproc_dir:
+            os.makedirs(multiproc_dir, exist_ok=True)
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        """Register a callable returning extra Prometheus lines for /metrics."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def register_gauge(self, name: str, callback: Callable[[], float]):
+        """Register a callable read at scrape time; callbacks for one name are summed."""
+        callbacks = self._gauge_callbacks.setdefault(name, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def instrument_pool(self, engine):
+        """Track checked-out connections via the engine's pool events.
+
+        Pools of every instrumented engine (sync and async) add up.
+        """
+        from sqlalchemy import event
+
+        pool_size = getattr(engine.pool, "size", None)
+        self.db_pool_size += pool_size() if callable(pool_size) else 0
+
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.db_pool_checked_out += 1
+
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            with self._lock:
+                self.db_pool_checked_out -= 1
 
     def record_request(self, method: str, path: str, status: int, duration: float):
         # Normalize path to avoid cardinality explosion
         normalized = self._normalize_path(path)
         key = f"{method} {normalized}"
-        self.request_count[key] = self.request_count.get(key, 0) + 1
-        if key not in self.request_duration:
-            self.request_duration[key] = []
-        durations = self.request_duration[key]
-        durations.append(duration)
-        if len(durations) > 1000:
-            self.request_duration[key] = durations[-1000:]
-        if status >= 400:
-            self.error_count[status] = self.error_count.get(status, 0) + 1
+        with self._lock:
+            self.request_count[key] = self.request_count.get(key, 0) + 1
+            histogram = self.request_duration.get(key)
+            if histogram is None:
+                histogram = self.request_duration[key] = Histogram()
+            histogram.observe(duration)
+            if status >= 400:
+                self.error_count[status] = self.error_count.get(status, 0) + 1
 
     @staticmethod
     def _normalize_path(path: str) -> str:
@@ -45,79 +136,224 @@ class MetricsCollector:
         parts = path.split("/")
         return "/".join(":id" if p.isdigit() else p for p in parts)
 
+    # ===== Snapshots / multiprocess =====
+
+    def _gauges(self) -> Dict[str, float]:
+        gauges = {
+            "http_active_requests": self.active_requests,
+            "db_pool_size": self.db_pool_size,
+            "db_pool_checked_out": self.db_pool_checked_out,
+        }
+        for name, callbacks in self._gauge_callbacks.items():
+            total = 0
+            for callback in callbacks:
+                try:
+                    total += callback()
+                except Exception as e:
+                    logger.warning(f"Gauge callback for {name} failed: {e}")
+            gauges[name] = total
+        return gauges
+
+    def snapshot(self) -> dict:
+        """This process's metrics as a JSON-serializable dict."""
+        gauges = self._gauges()
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "instance": self._instance,
+                "requests": dict(self.request_count),
+                "errors": {str(code): count for code, count in self.error_count.items()},
+                "durations": {
+                    key: {"counts": list(h.counts), "sum": h.sum}
+                    for key, h in self.request_duration.items()
+                },
+                "gauges": gauges,
+            }
+
+    def write_snapshot(self, snapshot: Optional[dict] = None) -> None:
+        """Publish this worker's snapshot for the other workers' scrapes."""
+        if not self.multiproc_dir:
+            return
+        path = os.path.join(self.multiproc_dir, f"metrics_{os.getpid()}.json")
+        try:
+            _write_json(path, snapshot or self.snapshot())
+        except OSError as e:
+            logger.warning(f"Failed to write metrics snapshot {path}: {e}")
+
+    def _worker_files(self) -> List[Tuple[str, dict]]:
+        snapshots = []
+        for name in os.listdir(self.multiproc_dir):
+            if not (name.startswith("metrics_") and name.endswith(".json")):
+                continue
+            path = os.path.join(self.multiproc_dir, name)
+            data = _read_json(path)
+            if data is not None:
+                snapshots.append((path, data))
+        return snapshots
+
+    def _is_dead(self, data: dict) -> bool:
+        if data.get("instance") == self._instance:
+            return False
+        # Our PID with another instance token: an exited process whose PID we reused
+        return data.get("pid") == os.getpid() or not _pid_alive(data.get("pid"))
+
+    def reap_dead_workers(self) -> None:
+        """Fold the counters of exited workers into the archive and delete their files."""
+        if not self.multiproc_dir or fcntl is None:
+            return
+        try:
+            with open(os.path.join(self.multiproc_dir, ARCHIVE_LOCK_FILE), "a") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                dead = [(path, data) for path, data in self._worker_files() if self._is_dead(data)]
+                if not dead:
+                    return
+                archive_path = os.path.join(self.multiproc_dir, ARCHIVE_FILE)
+                merged = self._merge([_read_json(archive_path) or {}] + [data for _, data in dead])
+                _write_json(archive_path, {
+                    "requests": merged["requests"],
+                    "errors": {str(code): count for code, count in merged["errors"].items()},
+                    "durations": {
+                        key: {"counts": list(h.counts), "sum": h.sum}
+                        for key, h in merged["durations"].items()
+                    },
+                })
+                for path, _ in dead:
+                    os.unlink(path)
+        except OSError as e:
+            logger.warning(f"Failed to archive metrics of exited workers: {e}")
+
+    def _load_snapshots(self, own: dict) -> List[dict]:
+        """All workers' snapshots and the archive; this worker's is taken from memory."""
+        if not self.multiproc_dir:
+            return [own]
+        snapshots = [own]
+        archive = _read_json(os.path.join(self.multiproc_dir, ARCHIVE_FILE))
+        if archive is not None:
+            snapshots.append(archive)
+        for _, data in self._worker_files():
+            if data.get("instance") == self._instance:
+                continue
+            if self._is_dead(data):
+                # Not reaped yet (no flock on this platform or a failed archive write)
+                data["gauges"] = {}
+            snapshots.append(data)
+        return snapshots
+
+    @staticmethod
+    def _merge(snapshots: List[dict]) -> dict:
+        requests: Dict[str, int] = {}
+        errors: Dict[int, int] = {}
+        durations: Dict[str, Histogram] = {}
+        gauges: Dict[str, List[float]] = {}
+        for snap in snapshots:
+            for key, count in snap.get("requests", {}).items():
+                requests[key] = requests.get(key, 0) + count
+            for code, count in snap.get("errors", {}).items():
+                errors[int(code)] = errors.get(int(code), 0) + count
+            for key, data in snap.get("durations", {}).items():
+                histogram = Histogram(list(data["counts"]), data["sum"])
+                if key in durations:
+                    durations[key].merge(histogram)
+                else:
+                    durations[key] = histogram
+            for name, value in snap.get("gauges", {}).items():
+                gauges.setdefault(name, []).append(value)
+        return {
+            "requests": requests,
+            "errors": errors,
+            "durations": durations,
+            "gauges": {name: _GAUGE_MERGE.get(name, sum)(values) for name, values in gauges.items()},
+        }
+
     def get_prometheus_metrics(self) -> str:
+        own = self.snapshot()
+        self.reap_dead_workers()
+        self.write_snapshot(own)
+        merged = self._merge(self._load_snapshots(own))
+        gauges = merged["gauges"]
+
         lines: List[str] = []
         lines.append("# HELP http_requests_total Total HTTP requests")
         lines.append("# TYPE http_requests_total counter")
-        for key, count in sorted(self.request_count.items()):
+        for key, count in sorted(merged["requests"].items()):
             method, path = key.split(" ", 1)
             lines.append(f'http_requests_total{{method="{method}",path="{path}"}} {count}')
 
         lines.append("# HELP http_errors_total Total HTTP errors by status code")
         lines.append("# TYPE http_errors_total counter")
-        for code, count in sorted(self.error_count.items()):
+        for code, count in sorted(merged["errors"].items()):
             lines.append(f'http_errors_total{{status="{code}"}} {count}')
 
         lines.append("# HELP http_active_requests Current active requests")
         lines.append("# TYPE http_active_requests gauge")
-        lines.append(f"http_active_requests {self.active_requests}")
+        lines.append(f"http_active_requests {gauges.get('http_active_requests', 0)}")
 
         lines.append("# HELP http_request_duration_seconds Request duration histogram")
-        lines.append("# TYPE http_request_duration_seconds summary")
-        for key, durations in sorted(self.request_duration.items()):
-            if durations:
-                method, path = key.split(" ", 1)
-                avg = sum(durations) / len(durations)
-                p99 = sorted(durations)[int(len(durations) * 0.99)] if len(durations) > 1 else durations[0]
-                lines.append(f'http_request_duration_seconds{{method="{method}",path="{path}",quantile="0.99"}} {p99:.4f}')
-                lines.append(f'http_request_duration_seconds{{method="{method}",path="{path}",quantile="0.5"}} {avg:.4f}')
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for key, histogram in sorted(merged["durations"].items()):
+            method, path = key.split(" ", 1)
+            labels = f'method="{method}",path="{path}"'
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, histogram.counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            cumulative += histogram.counts[-1]
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
 
         # Database connection pool metrics
         lines.append("# HELP db_pool_size Total database connection pool size")
         lines.append("# TYPE db_pool_size gauge")
-        lines.append(f"db_pool_size {self.db_pool_size}")
+        lines.append(f"db_pool_size {gauges.get('db_pool_size', 0)}")
         lines.append("# HELP db_pool_checked_out Database connections currently in use")
         lines.append("# TYPE db_pool_checked_out gauge")
-        lines.append(f"db_pool_checked_out {self.db_pool_checked_out}")
+        lines.append(f"db_pool_checked_out {gauges.get('db_pool_checked_out', 0)}")
 
         # Redis connection status
         lines.append("# HELP redis_connected Redis connection status (1=connected, 0=disconnected)")
         lines.append("# TYPE redis_connected gauge")
-        lines.append(f"redis_connected {self.redis_connected}")
+        lines.append(f"redis_connected {gauges.get('redis_connected', 0)}")
 
         # WebSocket active connections
         lines.append("# HELP ws_active_connections Active WebSocket connections")
         lines.append("# TYPE ws_active_connections gauge")
-        lines.append(f"ws_active_connections {self.ws_active_connections}")
+        lines.append(f"ws_active_connections {gauges.get('ws_active_connections', 0)}")
+
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {collector!r} failed: {e}")
 
         return "\n".join(lines) + "\n"
 
 
-metrics = MetricsCollector()
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    """Middleware that records request metrics."""
+def _write_json(path: str, data: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
 
-    async def dispatch(self, request: Request, call_next):
-        if request.url.path == "/metrics":
-            return await call_next(request)
 
-        metrics.active_requests += 1
-        start = time.time()
-        try:
-            response = await call_next(request)
-            duration = time.time() - start
-            metrics.record_request(
-                request.method,
-                request.url.path,
-                response.status_code,
-                duration,
-            )
-            return response
-        except Exception:
-            duration = time.time() - start
-            metrics.record_request(request.method, request.url.path, 500, duration)
-            raise
-        finally:
-            metrics.active_requests -= 1
+def _pid_alive(pid) -> bool:
+    if not isinstance(pid, int):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+metrics = MetricsCollector(multiproc_dir=settings.metrics_multiproc_dir)
@@ -11,13 +11,10 @@ limiter = Limiter(key_func=get_remote_address, enabled=settings.rate_limit_enabl
 
 def get_user_or_ip(request: Request) -> str:
     """Rate limit by user ID if authenticated, else by IP."""
-    auth = request.headers.get("Authorization", "")
-    if auth.startswith("Bearer "):
-        from app.core.security import decode_access_token
-        token = auth.split(" ", 1)[1]
-        payload = decode_access_token(token)
-        if payload and payload.get("sub"):
-            return f"user:{payload['sub']}"
+    from app.core.security import request_token_payload
+    payload = request_token_payload(request)
+    if payload and payload.get("sub"):
+        return f"user:{payload['sub']}"
     return get_remote_address(request)
 
 
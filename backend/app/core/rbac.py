@@ -5,7 +5,7 @@ from typing import Annotated, Optional
 
 from fastapi import Depends, HTTPException, Request, status
 
-from app.core.security import decode_access_token
+from app.core.security import request_token_payload
 from app.db.session import SessionLocal
 
 
@@ -54,20 +54,7 @@ async def get_current_user(request: Request) -> TokenData:
     1. Authorization: Bearer <token> header
     2. access_token cookie (HttpOnly)
     """
-    payload = None
-
-    # Try Authorization header first
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ", 1)[1]
-        if token:
-            payload = decode_access_token(token)
-
-    # Fall back to cookie if no Bearer or Bearer was invalid
-    if payload is None:
-        cookie_token = request.cookies.get("access_token")
-        if cookie_token:
-            payload = decode_access_token(cookie_token)
+    payload = request_token_payload(request)
 
     if payload is None:
         raise HTTPException(
@@ -154,20 +141,7 @@ async def get_optional_current_user(request: Request) -> Optional[TokenData]:
     1. Authorization: Bearer <token> header
     2. access_token cookie (HttpOnly)
     """
-    payload = None
-
-    # Try Authorization header first
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ", 1)[1]
-        if token:
-            payload = decode_access_token(token)
-
-    # Fall back to cookie if no Bearer or Bearer was invalid
-    if payload is None:
-        cookie_token = request.cookies.get("access_token")
-        if cookie_token:
-            payload = decode_access_token(cookie_token)
+    payload = request_token_payload(request)
 
     if payload is None:
         return None
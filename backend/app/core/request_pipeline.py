@@ -0,0 +1,289 @@
+"""Single-pass request pipeline middleware.
+
+Replaces the stack of BaseHTTPMiddleware subclasses that used to wrap every
+request (metrics, HTTPS redirect, security headers, auth enforcement, CSRF,
+audit logging, request logging) with one pure ASGI middleware. BaseHTTPMiddleware
+costs a task plus a body stream per layer; here the request passes through a
+single ``send`` wrapper.
+
+The JWT is decoded at most once per request (``request_token_payload`` caches
+it in ``scope["state"]``) and shared with the rate limiter and the
+``get_current_user`` dependencies. Public path checks use precompiled prefix
+tries instead of list scans.
+"""
+
+import logging
+import time
+from typing import Dict, Iterable, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.responses import JSONResponse, RedirectResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.csrf import csrf_check_failed
+from app.core.metrics import metrics
+from app.core.security import request_token_payload
+from app.services.audit_service import log_action as _audit_log_action
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("requests")
+
+
+class PrefixTrie:
+    """Character trie answering "does any registered prefix start this path?"."""
+
+    _END = ""  # Children are single characters, so "" can mark a complete prefix
+
+    def __init__(self, prefixes: Iterable[str] = ()):
+        self._root: Dict[str, dict] = {}
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix: str) -> None:
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[self._END] = {}
+
+    def matches(self, path: str) -> bool:
+        node = self._root
+        if self._END in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+
+
+# ===== Public paths =====
+
+# Paths that never require authentication (all methods)
+PUBLIC_EXACT_PATHS = frozenset({
+    "/",
+    "/health",
+    "/health/ready",
+})
+
+# Public GET paths that guests/anonymous users can access
+PUBLIC_GET_PREFIXES = PrefixTrie([
+    "/api/v1/guest-orders",
+    "/api/v1/menu/",
+    "/api/v1/menu-complete",
+    "/api/v1/menu-items",
+    "/api/v1/tables",
+    "/api/v1/reservations/availability",
+    "/api/v1/locations",
+    "/api/v1/orders/table/",
+])
+
+# State-changing requests allowed without a token
+PUBLIC_WRITE_PREFIXES = PrefixTrie([
+    "/api/v1/auth/login",
+    "/api/v1/auth/login/pin",
+    "/api/v1/auth/register",
+    "/api/v1/auth/refresh",
+    "/api/v1/orders/guest",
+    "/api/v1/guest-orders/create",
+    "/api/v1/orders/table/",
+    "/api/v1/waiter/calls",
+    "/api/v1/payments/webhook",
+])
+
+# Login/register are audited separately with more detail
+AUDIT_SKIP_PREFIXES = PrefixTrie(["/api/v1/auth/login", "/api/v1/auth/register"])
+
+# Health checks and docs are not request-logged
+REQUEST_LOG_SKIP_PATHS = frozenset({"/health", "/", "/docs", "/openapi.json"})
+
+# Map HTTP methods to audit actions
+METHOD_ACTION_MAP = {
+    "POST": "create",
+    "PUT": "update",
+    "PATCH": "update",
+    "DELETE": "delete",
+}
+
+_csp_origins = " ".join(settings.cors_origins_list)
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Content-Security-Policy": (
+        "default-src 'self'; "
+        "script-src 'self' https://js.stripe.com; "
+        "style-src 'self' 'unsafe-inline'; "
+        "img-src 'self' data: blob: https://api.qrserver.com; "
+        f"connect-src 'self' ws: wss: https://api.stripe.com {_csp_origins}; "
+        "frame-src https://js.stripe.com; "
+        "font-src 'self' data:;"
+    ),
+    # Note: HSTS is set at the nginx layer to avoid duplicate headers
+}
+
+
+def _has_valid_token(conn: HTTPConnection) -> bool:
+    payload = request_token_payload(conn)
+    return payload is not None and all(payload.get(k) for k in ("sub", "email", "role"))
+
+
+def auth_rejection(conn: HTTPConnection, method: str, path: str) -> Optional[JSONResponse]:
+    """Global authentication enforcement.
+
+    All /api/v1/* endpoints require a valid token unless the path is public
+    for the method. This provides defence-in-depth even if individual route
+    files forget to add Depends(get_current_user).
+    """
+    # Always allow OPTIONS (CORS preflight) and exact public paths
+    if method == "OPTIONS" or path in PUBLIC_EXACT_PATHS:
+        return None
+    if not path.startswith("/api/v1/"):
+        return None
+
+    if method == "GET":
+        if PUBLIC_GET_PREFIXES.matches(path) or _has_valid_token(conn):
+            return None
+        detail = "Authentication required"
+    else:
+        if PUBLIC_WRITE_PREFIXES.matches(path) or _has_valid_token(conn):
+            return None
+        detail = "Authentication required for this operation"
+
+    return JSONResponse(
+        status_code=401,
+        content={"detail": detail},
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def audit_request(conn: HTTPConnection, method: str, path: str, status_code: int) -> None:
+    """Queue an audit entry for a successful state-changing API request.
+
+    Captures: user_id (from JWT), action (from HTTP method), entity_type
+    (from URL path), IP address, and response status.
+    """
+    # Extract user info from JWT if present
+    user_id = None
+    user_name = ""
+    payload = request_token_payload(conn)
+    if payload:
+        user_id = int(payload.get("sub", 0)) or None
+        user_name = payload.get("email", "")
+
+    # Parse entity type and ID from URL path
+    # e.g. /api/v1/menu/items/5 -> entity_type=menu_items, entity_id=5
+    parts = path.replace("/api/v1/", "").strip("/").split("/")
+    entity_type = "_".join(parts[:2]) if len(parts) >= 2 else (parts[0] if parts else "unknown")
+    # Try to find an entity ID (numeric segment)
+    entity_id = ""
+    for part in reversed(parts):
+        if part.isdigit():
+            entity_id = part
+            break
+
+    _audit_log_action(
+        action=METHOD_ACTION_MAP[method],
+        entity_type=entity_type[:50],
+        entity_id=entity_id,
+        user_id=user_id,
+        user_name=user_name[:200],
+        ip_address=conn.client.host if conn.client else "",
+        details={
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+        },
+    )
+
+
+class RequestPipelineMiddleware:
+    """Pure ASGI middleware running the whole per-request pipeline in one pass.
+
+    Order matches the former middleware stack (outermost first): request
+    logging, audit logging, CSRF, auth enforcement, HTTPS redirect, metrics.
+    Security headers are added to every response, including 401/403
+    rejections.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        conn = HTTPConnection(scope)
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
+
+        async def send_with_headers(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS.items():
+                    headers[name] = value
+            await send(message)
+
+        log_request = path not in REQUEST_LOG_SKIP_PATHS
+        start_time = time.time()
+        client_ip = conn.client.host if conn.client else "unknown"
+        if log_request:
+            request_logger.info(f"Request: {method} {path} - Client: {client_ip}")
+
+        try:
+            rejection = None
+            if csrf_check_failed(conn, method):
+                rejection = JSONResponse(status_code=403, content={"detail": "CSRF validation failed"})
+            else:
+                rejection = auth_rejection(conn, method, path)
+            if rejection is None and not settings.debug and conn.headers.get("x-forwarded-proto") == "http":
+                # Redirect HTTP to HTTPS in production (behind reverse proxy)
+                rejection = RedirectResponse(url=str(conn.url.replace(scheme="https")), status_code=301)
+
+            if rejection is not None:
+                await rejection(scope, receive, send_with_headers)
+            elif path == "/metrics":
+                await self.app(scope, receive, send_with_headers)
+            else:
+                metrics.active_requests += 1
+                app_start = time.time()
+                try:
+                    await self.app(scope, receive, send_with_headers)
+                finally:
+                    metrics.record_request(method, path, status_code, time.time() - app_start)
+                    metrics.active_requests -= 1
+        except Exception as e:
+            if log_request:
+                request_logger.error(
+                    f"Error: {method} {path} - "
+                    f"Exception: {str(e)} - Time: {time.time() - start_time:.3f}s - Client: {client_ip}"
+                )
+            raise
+
+        # Only audit successful state-changing API operations (2xx status codes)
+        if (
+            200 <= status_code < 300
+            and method in METHOD_ACTION_MAP
+            and path.startswith("/api/v1/")
+            and not AUDIT_SKIP_PREFIXES.matches(path)
+        ):
+            try:
+                audit_request(conn, method, path, status_code)
+            except Exception as e:
+                # Never let audit logging break the request, but log the failure
+                logger.warning(f"Audit logging failed for {method} {path}: {e}")
+
+        if log_request:
+            log_level = logging.WARNING if status_code >= 400 else logging.INFO
+            request_logger.log(
+                log_level,
+                f"Response: {method} {path} - "
+                f"Status: {status_code} - Time: {time.time() - start_time:.3f}s - Client: {client_ip}"
+            )
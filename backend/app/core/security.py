@@ -136,6 +136,37 @@ def decode_access_token(token: str) -> dict[str, Any] | None:
         return None
 
 
+REQUEST_TOKEN_STATE_KEY = "token_payload"
+
+
+def request_token_payload(conn: Any) -> dict[str, Any] | None:
+    """Decoded JWT payload for an HTTP request, decoded at most once.
+
+    Tries the Authorization: Bearer header first, then the access_token
+    cookie. ``conn`` is a Starlette Request/HTTPConnection; the result is
+    cached in ``scope["state"]`` so the request pipeline middleware, the
+    rate limiter and the auth dependencies all share one decode.
+    """
+    state = conn.scope.setdefault("state", {})
+    if REQUEST_TOKEN_STATE_KEY in state:
+        return state[REQUEST_TOKEN_STATE_KEY]
+
+    payload = None
+    auth_header = conn.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        token = auth_header.split(" ", 1)[1]
+        if token:
+            payload = decode_access_token(token)
+    # Fall back to cookie if no Bearer or Bearer was invalid
+    if payload is None:
+        cookie_token = conn.cookies.get("access_token")
+        if cookie_token:
+            payload = decode_access_token(cookie_token)
+
+    state[REQUEST_TOKEN_STATE_KEY] = payload
+    return payload
+
+
 def blacklist_token(token: str) -> bool:
     """Add a token to the blacklist (invalidate session).
 
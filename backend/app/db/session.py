@@ -1,17 +1,21 @@
 """Database session management."""
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
 from fastapi import Depends
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import metrics
 
 # Create engine - handle SQLite specially for check_same_thread
 connect_args = {}
 pool_config = {}
+async_pool_config = {}
 
 if settings.database_url.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
@@ -20,6 +24,7 @@ if settings.database_url.startswith("sqlite"):
         "pool_pre_ping": True,
         "pool_recycle": 1800,  # Recycle connections every 30 minutes
     }
+    async_pool_config = pool_config
 else:
     # PostgreSQL/MySQL connection pooling configuration
     pool_config = {
@@ -28,6 +33,14 @@ else:
         "pool_pre_ping": True,    # Test connections before using them
         "pool_recycle": 3600,     # Recycle connections after 1 hour
     }
+    # The async engine opens its own connections; few routes use it so far,
+    # so keep it small instead of doubling each worker's connection budget
+    async_pool_config = {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+    }
 
 engine = create_engine(
     settings.database_url,
@@ -36,16 +49,45 @@ engine = create_engine(
     **pool_config,
 )
 
+
+def async_database_url(url: str) -> str:
+    """The same database addressed through its asyncio driver (asyncpg / aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    return url
+
+
+# Async engine for async route handlers and background workers: queries are
+# awaited instead of blocking the event loop for their round trip
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    echo=settings.debug,
+    **async_pool_config,
+)
+
 # Enable foreign key enforcement for SQLite
 if settings.database_url.startswith("sqlite"):
     @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.close()
 
+# Live db_pool_* gauges for /metrics
+metrics.instrument_pool(engine)
+metrics.instrument_pool(async_engine.sync_engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# expire_on_commit=False: attributes stay loaded after commit, since lazy
+# loads cannot run implicitly on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db() -> Generator[Session, None, None]:
     """Get database session dependency."""
@@ -59,5 +101,16 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
-# Type alias for dependency injection
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session dependency."""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
+
+# Type aliases for dependency injection
 DbSession = Annotated[Session, Depends(get_db)]
+AsyncDbSession = Annotated[AsyncSession, Depends(get_async_db)]
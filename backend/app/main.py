@@ -4,79 +4,63 @@ import logging
 import json
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
-from uuid import uuid4
+from typing import Dict, Any, Optional, Set
 
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, Query, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
-from fastapi.responses import RedirectResponse
-
 from app.core.rate_limit import limiter
-from app.core.metrics import MetricsMiddleware, metrics
+from app.core.metrics import metrics
 from app.core.cache import redis_cache
 from app.core.alerting import alert_manager
 
 from app.api.routes import api_router
 from app.core.config import settings
+from app.core.http_client import http_clients
 from app.core.security import decode_access_token
-from app.core.csrf import CSRFMiddleware
+from app.core.request_pipeline import RequestPipelineMiddleware
 from app.core.rbac import RequireManager
-from app.db.session import engine, SessionLocal
+from app.core.db_offload import db_executor, loop_lag_monitor, offload_sync_db_routes
+from app.db.session import async_engine, engine, SessionLocal
 from app.db.base import Base
-from app.services.audit_service import log_action as _audit_log_action
+from app.services.audit_service import audit_writer
+from app.services.floor_state import floor_state
+from app.services.iot_telemetry import TelemetryBackpressure, temperature_telemetry
+from app.services.kitchen_state import kitchen_state
+from app.services import recipe_bom_cache  # noqa: F401 - registers the session hooks that version compiled recipes
+from app.services import sales_rollup  # noqa: F401 - registers the session hooks that keep the sales cube in sync
+from app.services.websocket_service import manager as ws_service_manager
+from app.services.ws_event_bus import EventBus, event_bus, start_event_bus
+from app.services.ws_fanout import ws_fanout
 from sqlalchemy import text
 
-# Public paths that do NOT require authentication
-# All other /api/v1/* paths require a valid Bearer token
-PUBLIC_PATH_PREFIXES = [
-    "/health",
-    "/docs",
-    "/redoc",
-    "/openapi.json",
-    "/api/v1/auth/login",
-    "/api/v1/auth/register",
-    "/api/v1/auth/refresh",
-    "/api/v1/guest-orders/menu",
-    "/api/v1/guest-orders/create",
-    "/api/v1/guest-orders/delivery",
-    "/api/v1/guest-orders/pickup",
-    "/api/v1/guest-orders/upsell-suggestions",
-    "/api/v1/order-online",
-    "/api/v1/orders/guest",
-    "/api/v1/table/",
-    "/api/v1/admin/tables",      # Guest QR flow needs table info
-    "/api/v1/menu-items",        # Guest menu browsing
-    "/api/v1/menu/categories",   # Guest menu browsing
-    "/api/v1/menu/items",        # Guest menu browsing
-    "/ws/",                      # WebSocket (JWT enforced in endpoint handlers)
-]
-
-PUBLIC_EXACT_PATHS = [
-    "/",
-    "/health",
-    "/health/ready",
-]
-
 # Rate limiter instance (imported from app.core.rate_limit)
 
 
 # WebSocket Connection Manager for real-time updates
 class ConnectionManager:
-    """Manages WebSocket connections for real-time updates with security features."""
+    """Manages WebSocket connections for real-time updates with security features.
+
+    Sends go through the shared fan-out engine: a broadcast is serialized
+    once and queued to each connection's writer task. Broadcasts are also
+    published on the event bus so channel sockets on other workers get them.
+    """
 
     # Configuration
     MAX_CONNECTIONS_PER_CHANNEL = 1000
     MAX_MESSAGE_SIZE = 65536  # 64KB
 
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    def __init__(self, bus: Optional[EventBus] = None):
+        self.bus = bus or event_bus
+        self.bus.add_handler("app", self._deliver)
+        self.active_connections: Dict[str, Set[WebSocket]] = {}
         self.connection_metadata: Dict[int, Dict[str, Any]] = {}
+        # Channels each socket is subscribed to, so its writer stops with the last one
+        self.subscriptions: Dict[WebSocket, Set[str]] = {}
 
     async def connect(
         self,
@@ -90,7 +74,7 @@ class ConnectionManager:
         Returns True if connection was successful, False if rejected.
         """
         # Check channel capacity
-        if len(self.active_connections.get(channel, [])) >= self.MAX_CONNECTIONS_PER_CHANNEL:
+        if len(self.active_connections.get(channel, ())) >= self.MAX_CONNECTIONS_PER_CHANNEL:
             logger.warning(f"WebSocket connection rejected: channel '{channel}' at capacity")
             if accept:
                 await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
@@ -98,10 +82,12 @@ class ConnectionManager:
 
         if accept:
             await websocket.accept()
+        ws_fanout.register(websocket, on_close=self.disconnect_all)
 
         if channel not in self.active_connections:
-            self.active_connections[channel] = []
-        self.active_connections[channel].append(websocket)
+            self.active_connections[channel] = set()
+        self.active_connections[channel].add(websocket)
+        self.subscriptions.setdefault(websocket, set()).add(channel)
 
         # Store metadata for the connection
         self.connection_metadata[id(websocket)] = {
@@ -117,8 +103,16 @@ class ConnectionManager:
     def disconnect(self, websocket: WebSocket, channel: str = "default"):
         """Disconnect a WebSocket from a channel."""
         if channel in self.active_connections:
-            if websocket in self.active_connections[channel]:
-                self.active_connections[channel].remove(websocket)
+            self.active_connections[channel].discard(websocket)
+            if not self.active_connections[channel]:
+                del self.active_connections[channel]
+
+        channels = self.subscriptions.get(websocket)
+        if channels is not None:
+            channels.discard(channel)
+            if not channels:
+                del self.subscriptions[websocket]
+                ws_fanout.unregister(websocket)
 
         # Clean up metadata
         ws_id = id(websocket)
@@ -127,44 +121,69 @@ class ConnectionManager:
 
         logger.debug(f"WebSocket disconnected from channel '{channel}'")
 
+    def disconnect_all(self, websocket: WebSocket):
+        """Remove a WebSocket from every channel it is subscribed to."""
+        for channel in list(self.subscriptions.get(websocket, ())):
+            self.disconnect(websocket, channel)
+
     def update_ping(self, websocket: WebSocket):
         """Update last ping time for a connection."""
         ws_id = id(websocket)
         if ws_id in self.connection_metadata:
             self.connection_metadata[ws_id]["last_ping"] = datetime.now(timezone.utc)
 
-    async def broadcast(self, message: Dict[str, Any], channel: str = "default"):
-        """Broadcast a message to all connections in a channel."""
-        if channel not in self.active_connections:
-            return
-
-        disconnected = []
-        for connection in self.active_connections[channel]:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.debug(f"WebSocket send failed: {e}")
-                disconnected.append(connection)
+    def send(self, websocket: WebSocket, message: Any):
+        """Queue a reply for one connection behind any pending broadcasts."""
+        payload = message if isinstance(message, str) else _ws_dumps(message)
+        ws_fanout.send(websocket, payload)
 
-        # Clean up disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn, channel)
+    async def broadcast(
+        self,
+        message: Dict[str, Any],
+        channel: str = "default",
+        coalesce_key: Optional[str] = None
+    ):
+        """Broadcast a message to all connections in a channel, on every worker."""
+        data = {"channel": channel, "payload": _ws_dumps(message), "key": coalesce_key}
+        self._deliver(data)
+        await self.bus.publish("app", data)
 
     async def broadcast_all(self, message: Dict[str, Any]):
-        """Broadcast to all channels."""
-        for channel in list(self.active_connections.keys()):
-            await self.broadcast(message, channel)
+        """Broadcast to all channels (a socket in several channels gets it once)."""
+        data = {"channel": None, "payload": _ws_dumps(message), "key": None}
+        self._deliver(data)
+        await self.bus.publish("app", data)
+
+    def _deliver(self, data: Dict[str, Any]) -> int:
+        """Queue a serialized broadcast to this worker's sockets."""
+        if data["channel"] is None:
+            connections = list(self.subscriptions)
+        else:
+            connections = self.active_connections.get(data["channel"])
+        if not connections:
+            return 0
+        return ws_fanout.publish(connections, data["payload"], data["key"])
 
     def get_connection_count(self, channel: Optional[str] = None) -> int:
         """Get the number of active connections."""
         if channel:
-            return len(self.active_connections.get(channel, []))
+            return len(self.active_connections.get(channel, ()))
         return sum(len(conns) for conns in self.active_connections.values())
 
 
+def _ws_dumps(message: Dict[str, Any]) -> str:
+    """Serialize like WebSocket.send_json so clients see the same frames."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
 # Global connection manager instance
 ws_manager = ConnectionManager()
 
+# Live gauges for /metrics (connections of both WebSocket managers are summed)
+metrics.register_gauge("ws_active_connections", ws_manager.get_connection_count)
+metrics.register_gauge("ws_active_connections", ws_service_manager.get_connection_count)
+metrics.register_gauge("redis_connected", lambda: int(redis_cache.connected))
+
 # Configure logging - use JSON format in production, human-readable in dev
 root_logger = logging.getLogger()
 root_logger.setLevel(getattr(logging, settings.log_level))
@@ -194,263 +213,6 @@ else:
 root_logger.addHandler(handler)
 logger = logging.getLogger(__name__)
 auth_logger = logging.getLogger("auth")
-request_logger = logging.getLogger("requests")
-
-
-class HTTPSRedirectMiddleware(BaseHTTPMiddleware):
-    """Redirect HTTP to HTTPS in production (behind reverse proxy)."""
-
-    async def dispatch(self, request: Request, call_next):
-        if not settings.debug and request.headers.get("x-forwarded-proto") == "http":
-            url = request.url.replace(scheme="https")
-            return RedirectResponse(url=str(url), status_code=301)
-        return await call_next(request)
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to all responses."""
-
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        csp_origins = " ".join(settings.cors_origins_list)
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' https://js.stripe.com; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data: blob: https://api.qrserver.com; "
-            f"connect-src 'self' ws: wss: https://api.stripe.com {csp_origins}; "
-            "frame-src https://js.stripe.com; "
-            "font-src 'self' data:;"
-        )
-        # Note: HSTS is set at the nginx layer to avoid duplicate headers
-        return response
-
-
-class AuthEnforcementMiddleware(BaseHTTPMiddleware):
-    """Global authentication enforcement middleware.
-
-    All /api/v1/* endpoints require a valid Bearer token UNLESS
-    the path is in PUBLIC_PATH_PREFIXES or PUBLIC_EXACT_PATHS.
-    This provides defence-in-depth even if individual route files
-    forget to add Depends(get_current_user).
-    """
-
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
-        method = request.method
-
-        # Always allow OPTIONS (CORS preflight)
-        if method == "OPTIONS":
-            return await call_next(request)
-
-        # Check exact public paths (all methods)
-        if path in PUBLIC_EXACT_PATHS:
-            return await call_next(request)
-
-        # For GET requests: allow public browsing endpoints through,
-        # require auth for sensitive data endpoints
-        if method == "GET":
-            # Public GET paths that guests/anonymous users can access
-            public_get_prefixes = [
-                "/api/v1/guest-orders",
-                "/api/v1/menu/",
-                "/api/v1/menu-complete",
-                "/api/v1/menu-items",
-                "/api/v1/tables",
-                "/api/v1/reservations/availability",
-                "/api/v1/locations",
-                "/api/v1/orders/table/",
-            ]
-            for prefix in public_get_prefixes:
-                if path.startswith(prefix):
-                    return await call_next(request)
-
-            # All other GET endpoints require authentication
-            if path.startswith("/api/v1/"):
-                payload = None
-                auth_header = request.headers.get("Authorization", "")
-                if auth_header.startswith("Bearer "):
-                    token = auth_header.split(" ", 1)[1]
-                    if token:
-                        payload = decode_access_token(token)
-                # Fall back to cookie if no Bearer or Bearer was invalid
-                if payload is None and "access_token" in request.cookies:
-                    payload = decode_access_token(request.cookies["access_token"])
-
-                if payload is None or not all(
-                    payload.get(k) for k in ("sub", "email", "role")
-                ):
-                    return JSONResponse(
-                        status_code=401,
-                        content={"detail": "Authentication required"},
-                        headers={"WWW-Authenticate": "Bearer"},
-                    )
-            return await call_next(request)
-
-        # For state-changing methods (POST/PUT/PATCH/DELETE),
-        # only allow specific public endpoints
-        public_write_paths = [
-            "/api/v1/auth/login",
-            "/api/v1/auth/login/pin",
-            "/api/v1/auth/register",
-            "/api/v1/auth/refresh",
-            "/api/v1/orders/guest",
-            "/api/v1/guest-orders/create",
-            "/api/v1/orders/table/",
-            "/api/v1/waiter/calls",
-            "/api/v1/payments/webhook",
-        ]
-        for pub_path in public_write_paths:
-            if path.startswith(pub_path):
-                return await call_next(request)
-
-        # All other POST/PUT/PATCH/DELETE on /api/v1/* require authentication
-        if path.startswith("/api/v1/"):
-            payload = None
-            auth_header = request.headers.get("Authorization", "")
-            if auth_header.startswith("Bearer "):
-                token = auth_header.split(" ", 1)[1]
-                if token:
-                    payload = decode_access_token(token)
-            # Fall back to cookie if no Bearer or Bearer was invalid
-            if payload is None and "access_token" in request.cookies:
-                payload = decode_access_token(request.cookies["access_token"])
-
-            if payload is None or not all(
-                payload.get(k) for k in ("sub", "email", "role")
-            ):
-                return JSONResponse(
-                    status_code=401,
-                    content={"detail": "Authentication required for this operation"},
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-
-        return await call_next(request)
-
-
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging all HTTP requests and responses."""
-
-    async def dispatch(self, request: Request, call_next):
-        import time
-
-        # Skip logging for health checks and static files
-        if request.url.path in ["/health", "/", "/docs", "/openapi.json"]:
-            return await call_next(request)
-
-        start_time = time.time()
-        client_ip = request.client.host if request.client else "unknown"
-
-        # Log request
-        request_logger.info(
-            f"Request: {request.method} {request.url.path} - Client: {client_ip}"
-        )
-
-        # Process request
-        try:
-            response = await call_next(request)
-            process_time = time.time() - start_time
-
-            # Log response
-            log_level = logging.WARNING if response.status_code >= 400 else logging.INFO
-            request_logger.log(
-                log_level,
-                f"Response: {request.method} {request.url.path} - "
-                f"Status: {response.status_code} - Time: {process_time:.3f}s - Client: {client_ip}"
-            )
-
-            return response
-        except Exception as e:
-            process_time = time.time() - start_time
-            request_logger.error(
-                f"Error: {request.method} {request.url.path} - "
-                f"Exception: {str(e)} - Time: {process_time:.3f}s - Client: {client_ip}"
-            )
-            raise
-
-
-class AuditLoggingMiddleware(BaseHTTPMiddleware):
-    """Auto-log all state-changing API requests to the audit_log_entries table.
-
-    Captures: user_id (from JWT), action (from HTTP method), entity_type (from URL path),
-    IP address, and response status.
-    """
-
-    # Map HTTP methods to audit actions
-    METHOD_ACTION_MAP = {
-        "POST": "create",
-        "PUT": "update",
-        "PATCH": "update",
-        "DELETE": "delete",
-    }
-
-    async def dispatch(self, request: Request, call_next):
-        method = request.method
-        path = request.url.path
-
-        # Only audit state-changing methods on API paths
-        if method not in self.METHOD_ACTION_MAP or not path.startswith("/api/v1/"):
-            return await call_next(request)
-
-        # Skip auditing auth login/register (logged separately with more detail)
-        if any(path.startswith(p) for p in ["/api/v1/auth/login", "/api/v1/auth/register"]):
-            return await call_next(request)
-
-        response = await call_next(request)
-
-        # Only audit successful operations (2xx status codes)
-        if 200 <= response.status_code < 300:
-            try:
-                # Extract user info from JWT if present
-                user_id = None
-                user_name = ""
-                payload = None
-                auth_header = request.headers.get("Authorization", "")
-                if auth_header.startswith("Bearer "):
-                    token = auth_header.split(" ", 1)[1]
-                    if token:
-                        payload = decode_access_token(token)
-                if payload is None and "access_token" in request.cookies:
-                    payload = decode_access_token(request.cookies["access_token"])
-
-                if payload:
-                    user_id = int(payload.get("sub", 0)) or None
-                    user_name = payload.get("email", "")
-
-                # Parse entity type and ID from URL path
-                # e.g. /api/v1/menu/items/5 -> entity_type=menu_items, entity_id=5
-                parts = path.replace("/api/v1/", "").strip("/").split("/")
-                entity_type = "_".join(parts[:2]) if len(parts) >= 2 else (parts[0] if parts else "unknown")
-                # Try to find an entity ID (numeric segment)
-                entity_id = ""
-                for part in reversed(parts):
-                    if part.isdigit():
-                        entity_id = part
-                        break
-
-                client_ip = request.client.host if request.client else ""
-
-                _audit_log_action(
-                    action=self.METHOD_ACTION_MAP[method],
-                    entity_type=entity_type[:50],
-                    entity_id=entity_id,
-                    user_id=user_id,
-                    user_name=user_name[:200],
-                    ip_address=client_ip,
-                    details={
-                        "method": method,
-                        "path": path,
-                        "status_code": response.status_code,
-                    },
-                )
-            except Exception as e:
-                # Never let audit logging break the request, but log the failure
-                logger.warning(f"Audit logging failed for {method} {path}: {e}")
-
-        return response
 
 
 @asynccontextmanager
@@ -528,13 +290,83 @@ async def lifespan(app: FastAPI):
     cleanup_task = asyncio.create_task(_periodic_guest_order_cleanup())
     logger.info("Background guest order cleanup started (runs every 10 minutes)")
 
+    # Sample event-loop scheduling delay; stalls are attributed to the blocking handler
+    loop_lag_monitor.start()
+
+    # Start batched audit log writer (middleware audit rows are queued, not written inline)
+    await audit_writer.start()
+
+    # Start temperature telemetry pipeline (readings are bulk-written with their rollups)
+    await temperature_telemetry.start()
+
+    # Shared outbound HTTP connection pools (one per integration)
+    http_clients.start()
+
+    # Deliver WebSocket broadcasts to sockets held by every worker
+    await start_event_bus()
+
+    # Push KDS ticket deltas and cook-time stage changes to /ws/kitchen screens
+    await kitchen_state.start(lambda message: ws_manager.broadcast(message, "kitchen"), bus=event_bus)
+
+    # Push waiter floor-plan deltas to /ws/floor handhelds
+    floor_state.start(lambda message: ws_manager.broadcast(message, "floor"), bus=event_bus)
+
+    # Publish this worker's metrics for multi-worker /metrics aggregation
+    async def _periodic_metrics_snapshot():
+        while True:
+            try:
+                await asyncio.sleep(settings.metrics_flush_interval_seconds)
+                await asyncio.to_thread(metrics.write_snapshot)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning(f"Metrics snapshot error: {e}")
+
+    metrics_task = None
+    if metrics.multiproc_dir:
+        # Fold snapshot files left by workers of earlier runs into the archive
+        await asyncio.to_thread(metrics.reap_dead_workers)
+        metrics_task = asyncio.create_task(_periodic_metrics_snapshot())
+
     # Start task scheduler
     from app.services.scheduler_service import scheduler
+    from app.services.iot_service import run_flow_totals_reconciliation
+
+    async def _reconcile_flow_totals():
+        await asyncio.to_thread(run_flow_totals_reconciliation)
+
+    # Keg/tank running totals are checked against the raw flow readings hourly
+    scheduler.add_task("flow_totals_reconciliation", _reconcile_flow_totals, 3600)
+
+    from app.services.iot_telemetry import run_telemetry_retention
+
+    async def _purge_telemetry():
+        await asyncio.to_thread(run_telemetry_retention)
+
+    # Raw temperature readings and minute rollups past retention are purged daily
+    scheduler.add_task("telemetry_retention", _purge_telemetry, 86400)
+
+    from app.services.recommendation_model import run_recommendation_model_rebuild
+
+    async def _rebuild_recommendation_models():
+        await asyncio.to_thread(run_recommendation_model_rebuild)
+
+    # Resident recommendation models are rebuilt from scratch periodically
+    scheduler.add_task(
+        "recommendation_model_rebuild", _rebuild_recommendation_models, settings.recommendation_rebuild_seconds
+    )
     scheduler_task = asyncio.create_task(scheduler.start())
     logger.info("Task scheduler started")
 
+    # Async task queue; handlers run on AsyncSessionLocal sessions
+    from app.services.background_workers import worker_manager
+    if settings.background_workers_enabled:
+        await worker_manager.start()
+
     yield
 
+    await worker_manager.stop()
+
     # Stop scheduler
     scheduler.stop()
     scheduler_task.cancel()
@@ -550,6 +382,25 @@ async def lifespan(app: FastAPI):
     except asyncio.CancelledError:
         pass
 
+    if metrics_task:
+        metrics_task.cancel()
+        try:
+            await metrics_task
+        except asyncio.CancelledError:
+            pass
+
+    await kitchen_state.stop()
+    floor_state.stop()
+    await event_bus.stop()
+    await http_clients.aclose()
+
+    # Flush queued telemetry and audit entries before the process exits
+    await temperature_telemetry.stop()
+    await audit_writer.stop()
+    loop_lag_monitor.stop()
+    await asyncio.to_thread(db_executor.shutdown)
+    await async_engine.dispose()
+
     logger.info("Shutting down Inventory Management System")
 
 
@@ -567,31 +418,24 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# Metrics middleware (Prometheus-compatible)
-app.add_middleware(MetricsMiddleware)
-
-# HTTPS redirect middleware (production only)
-if not settings.debug:
-    app.add_middleware(HTTPSRedirectMiddleware)
-
-# Security headers middleware
-app.add_middleware(SecurityHeadersMiddleware)
-
-# Authentication enforcement middleware (POST/PUT/PATCH/DELETE require auth)
-app.add_middleware(AuthEnforcementMiddleware)
-
-# CSRF protection middleware (enforces double-submit cookie for cookie-based auth)
-app.add_middleware(CSRFMiddleware)
 
-# Audit logging middleware (records state changes to audit_log_entries table)
-app.add_middleware(AuditLoggingMiddleware)
+@app.exception_handler(TelemetryBackpressure)
+async def telemetry_backpressure_handler(request: Request, exc: TelemetryBackpressure):
+    """Sensors retry later instead of having their readings dropped."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
-# Request logging middleware
-app.add_middleware(RequestLoggingMiddleware)
+# Request pipeline (pure ASGI): request logging, audit logging, CSRF, auth
+# enforcement, security headers, HTTPS redirect (production only) and metrics
+# in a single pass with one JWT decode per request.
+app.add_middleware(RequestPipelineMiddleware)
 
 # CORS middleware - MUST be added last so it runs first (Starlette LIFO order).
 # This ensures CORS headers are present on ALL responses, including 401s from
-# AuthEnforcementMiddleware. Origins configured via CORS_ORIGINS env variable.
+# RequestPipelineMiddleware. Origins configured via CORS_ORIGINS env variable.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
@@ -613,6 +457,11 @@ app.add_middleware(
 # Include API routes
 app.include_router(api_router, prefix=settings.api_v1_prefix)
 
+# async def handlers that only use the sync DbSession run on the bounded DB
+# pool instead of blocking the event loop
+if settings.db_offload_async_handlers:
+    logger.info(f"Offloaded {offload_sync_db_routes(app)} sync-DB async handlers to the DB thread pool")
+
 
 @app.get("/health")
 def health_check():
@@ -775,7 +624,7 @@ async def _ws_loop(websocket: WebSocket, channel: str, user_id: int):
             data = await websocket.receive_text()
             if data == "ping":
                 ws_manager.update_ping(websocket)
-                await websocket.send_text("pong")
+                ws_manager.send(websocket, "pong")
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket, channel)
     except Exception as e:
@@ -808,6 +657,18 @@ async def websocket_kitchen(
     await _ws_loop(websocket, "kitchen", user_id)
 
 
+@app.websocket("/ws/floor")
+async def websocket_floor(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None)
+):
+    """WebSocket endpoint for waiter floor-plan deltas. Requires JWT token."""
+    user_id = await _authenticate_websocket(websocket, token, "floor")
+    if user_id is None:
+        return
+    await _ws_loop(websocket, "floor", user_id)
+
+
 @app.websocket("/ws/orders")
 async def websocket_orders(
     websocket: WebSocket,
@@ -843,7 +704,7 @@ async def websocket_venue(
             await ws_manager.connect(websocket, channel, user_id=user_id, accept=False)
 
     try:
-        await websocket.send_json({
+        ws_manager.send(websocket, {
             "event": "connected",
             "data": {"venue_id": venue_id, "channels": channel_list, "user_id": user_id},
             "timestamp": datetime.now(timezone.utc).isoformat()
@@ -862,7 +723,7 @@ async def websocket_venue(
 
                 if event_type == "ping":
                     ws_manager.update_ping(websocket)
-                    await websocket.send_json({
+                    ws_manager.send(websocket, {
                         "event": "pong",
                         "timestamp": datetime.now(timezone.utc).isoformat()
                     })
@@ -879,17 +740,13 @@ async def websocket_venue(
             except json.JSONDecodeError:
                 if data == "ping":
                     ws_manager.update_ping(websocket)
-                    await websocket.send_text("pong")
+                    ws_manager.send(websocket, "pong")
     except WebSocketDisconnect:
         logger.debug(f"WebSocket disconnected from venue {venue_id}")
-        ws_manager.disconnect(websocket, primary_channel)
-        for channel in channel_list:
-            ws_manager.disconnect(websocket, channel)
+        ws_manager.disconnect_all(websocket)
     except Exception as e:
         logger.error(f"WebSocket error in venue {venue_id}: {e}", exc_info=True)
-        ws_manager.disconnect(websocket, primary_channel)
-        for channel in channel_list:
-            ws_manager.disconnect(websocket, channel)
+        ws_manager.disconnect_all(websocket)
 
 
 # Helper function to broadcast waiter call updates (called from routes)
@@ -70,6 +70,8 @@ from app.models.analytics import (
     ServerPerformance,
     SalesForecast,
     DailyMetrics,
+    SalesRollup,
+    SalesRollupPosting,
     ConversationalQuery,
     Benchmark,
     BottleWeight,
@@ -120,7 +122,7 @@ from app.models.hardware import (
     OCRJob,
 )
 from app.models.operations import (
-    AppSetting, PayrollRun, PayrollEntry, Notification,
+    AppSetting, ScheduledJobClaim, PayrollRun, PayrollEntry, Notification,
     NotificationPreference, AlertConfig, HACCPTemperatureLog,
     HACCPSafetyCheck, FeedbackReview, AuditLogEntry,
     VIPCustomerLink, VIPOccasion, Warehouse, WarehouseTransfer,
@@ -299,6 +301,8 @@ __all__ = [
     "ServerPerformance",
     "SalesForecast",
     "DailyMetrics",
+    "SalesRollup",
+    "SalesRollupPosting",
     "ConversationalQuery",
     "Benchmark",
     "BottleWeight",
@@ -342,6 +346,7 @@ __all__ = [
     "KitchenStation",
     # Operations
     "AppSetting",
+    "ScheduledJobClaim",
     "PayrollRun",
     "PayrollEntry",
     "Notification",
@@ -1015,6 +1015,10 @@ class IoTDevice(Base):
     last_seen = Column(DateTime(timezone=True), nullable=True)
     battery_level = Column(Integer, nullable=True)  # 0-100
 
+    # Open temperature alert, claimed by the worker that raised it
+    alert_type = Column(String(30), nullable=True)  # above_maximum, below_minimum
+    alert_since = Column(DateTime(timezone=True), nullable=True)
+
     # Configuration
     config_json = Column(JSON, nullable=True)
 
@@ -1078,6 +1082,33 @@ class TemperatureLog(Base):
     )
 
 
+class TemperatureRollup(Base):
+    """Minute/hour min-max-avg temperature aggregates per device"""
+    __tablename__ = "temperature_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    venue_id = Column(Integer, ForeignKey("venues.id"), nullable=False)
+    device_id = Column(Integer, ForeignKey("iot_devices.id"), nullable=False)
+    location = Column(String(200), nullable=True)
+
+    resolution = Column(String(10), nullable=False)  # minute, hour
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+
+    # Aggregates (Celsius); avg = sum_celsius / reading_count
+    reading_count = Column(Integer, nullable=False, default=0)
+    min_celsius = Column(Float, nullable=True)
+    max_celsius = Column(Float, nullable=True)
+    sum_celsius = Column(Float, nullable=False, default=0)
+    out_of_range_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('device_id', 'resolution', 'bucket_start', name='uq_temperature_rollup_bucket'),
+        Index('ix_temp_rollups_venue_bucket', 'venue_id', 'resolution', 'bucket_start'),
+    )
+
+
 class PourReading(Base):
     """Smart pour/flow meter readings"""
     __tablename__ = "pour_readings"
@@ -1346,6 +1377,12 @@ class KegTracking(Base):
     avg_pour_ml = Column(Float, nullable=True)
     yield_percentage = Column(Float, nullable=True)  # Actual vs expected yield
 
+    # Running totals, maintained with each flow meter reading
+    last_reading_at = Column(DateTime(timezone=True), nullable=True)
+    last_reading_ml = Column(Float, nullable=True)
+    totals_drift_ml = Column(Float, nullable=True)  # Set by reconciliation when totals disagree with readings
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+
     # Deposit tracking
     deposit_amount = Column(Float, nullable=True)
     deposit_returned = Column(Boolean, default=False)
@@ -1394,6 +1431,14 @@ class BulkTankLevel(Base):
     daily_usage_avg_liters = Column(Float, nullable=True)
     days_until_empty = Column(Float, nullable=True)
 
+    # Running totals since last refill, maintained with each flow meter reading
+    dispensed_volume_ml = Column(Float, default=0)
+    pours_count = Column(Integer, default=0)
+    last_reading_at = Column(DateTime(timezone=True), nullable=True)
+    last_reading_ml = Column(Float, nullable=True)
+    totals_drift_ml = Column(Float, nullable=True)
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)
+
     # Status
     status = Column(String(20), default="normal")  # normal, low, critical, empty
     last_refill_date = Column(DateTime(timezone=True), nullable=True)
@@ -4,7 +4,7 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from enum import Enum
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Enum as SQLEnum, JSON, Numeric, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, ForeignKey, Enum as SQLEnum, JSON, Numeric, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.base import Base
@@ -202,6 +202,64 @@ class DailyMetrics(Base):
     calculated_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class SalesRollup(Base):
+    """Hourly sales cube: hour x location x channel x staff x menu item.
+
+    ``kind`` "order" rows carry order-level measures (order count, order
+    total, discount, tips, refunds); "item" rows carry line measures
+    (quantity, revenue, cost). Maintained by app.services.sales_rollup.
+    """
+    __tablename__ = "sales_rollups"
+    __table_args__ = (
+        Index("ix_sales_rollups_hour_location", "bucket_hour", "location_id"),
+        {'extend_existing': True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Hash of the dimension values; the dimensions themselves are nullable
+    bucket_key = Column(String(40), nullable=False, unique=True)
+
+    # Dimensions
+    source = Column(String(20), nullable=False)  # guest_order, check
+    kind = Column(String(10), nullable=False)  # order, item
+    bucket_hour = Column(DateTime(timezone=True), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
+    channel = Column(String(20), nullable=False)  # dine-in, takeout, delivery
+    staff_id = Column(Integer, nullable=True)
+    menu_item_id = Column(Integer, nullable=True)
+    item_name = Column(String(200), nullable=True)
+    category = Column(String(100), nullable=True)
+
+    # Measures
+    order_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 4), nullable=False, default=Decimal("0"))
+    cost = Column(Numeric(14, 4), nullable=False, default=Decimal("0"))  # at menu item base price, where set
+    cost_estimate = Column(Numeric(14, 4), nullable=False, default=Decimal("0"))  # 35% of price where no base price
+    discount = Column(Numeric(14, 4), nullable=False, default=Decimal("0"))
+    tips = Column(Numeric(14, 4), nullable=False, default=Decimal("0"))
+    refund_count = Column(Integer, nullable=False, default=0)
+    refunds = Column(Numeric(14, 4), nullable=False, default=Decimal("0"))
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class SalesRollupPosting(Base):
+    """What one order or check currently contributes to the sales cube."""
+    __tablename__ = "sales_rollup_postings"
+    __table_args__ = (
+        UniqueConstraint('source', 'order_id', name='uq_sales_rollup_posting_order'),
+        {'extend_existing': True},
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(20), nullable=False)  # guest_order, check
+    order_id = Column(Integer, nullable=False)
+    state = Column(String(20), nullable=False)  # open, closed, voided, refunded
+    facts = Column(JSON, nullable=False, default=list)  # posted cube rows, reversed when the order changes
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class ConversationalQuery(Base):
     """Log conversational AI analytics queries."""
     __tablename__ = "conversational_queries"
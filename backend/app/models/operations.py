@@ -34,6 +34,19 @@ class AppSetting(Base):
     )
 
 
+class ScheduledJobClaim(Base):
+    """Last cron slot of a recurring background job claimed by an API worker."""
+    __tablename__ = "scheduled_job_claims"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_name = Column(String(200), nullable=False, unique=True)
+    slot = Column(DateTime(timezone=True), nullable=False)
+    claimed_by = Column(String(100), nullable=True)
+    claimed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = {'extend_existing': True}
+
+
 # ===================== PAYROLL =====================
 
 class PayrollRun(Base):
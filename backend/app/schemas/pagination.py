@@ -2,6 +2,7 @@
 
 from typing import Generic, List, TypeVar, Optional
 from pydantic import BaseModel, Field
+from sqlalchemy import func, select
 
 T = TypeVar("T")
 
@@ -59,3 +60,22 @@ def paginate_query(query, skip: int = 0, limit: int = 50):
     items = query.offset(skip).limit(limit).all()
 
     return items, total
+
+
+async def paginate_select(db, stmt, skip: int = 0, limit: int = 50):
+    """
+    Apply pagination to a ``select()`` on an ``AsyncSession``.
+
+    Args:
+        db: AsyncSession
+        stmt: Select statement for ORM entities
+        skip: Number of items to skip
+        limit: Maximum items to return
+
+    Returns:
+        Tuple of (paginated items, total count)
+    """
+    total = await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+    items = (await db.scalars(stmt.offset(skip).limit(limit))).all()
+
+    return list(items), total or 0
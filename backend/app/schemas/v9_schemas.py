@@ -37,6 +37,8 @@ __all__ = [
     # IoT & Compliance
     "IoTDeviceRegister", "IoTDeviceResponse", "TemperatureReading",
     "TemperatureAlertResponse", "HACCPReport", "PourReading", "PourAnalytics",
+    "FlowMeterReadingCreate", "FlowMeterReadingBatch",
+    "TemperatureReadingCreate", "TemperatureReadingBatch",
     "AuditLogCreate", "AuditLogResponse", "AuditChainVerification",
     "FiscalArchiveCreate", "NRAExportRequest", "NRAExportResponse",
     "AgeVerificationLog",
@@ -672,6 +674,37 @@ class PourAnalytics(BaseModel):
     cost_impact: Decimal
 
 
+class TemperatureReadingCreate(BaseModel):
+    device_id: int
+    temperature: float
+    unit: str = Field("C", pattern="^[CF]$")
+    humidity: Optional[float] = None
+    recorded_at: Optional[datetime] = None  # Gateway timestamp; defaults to time of ingest
+
+
+class TemperatureReadingBatch(BaseModel):
+    readings: List[TemperatureReadingCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class FlowMeterReadingCreate(BaseModel):
+    device_id: int
+    meter_type: str
+    flow_volume_ml: float = Field(..., ge=0)
+    container_id: Optional[str] = None
+    stock_item_id: Optional[int] = None
+    flow_rate_ml_per_sec: Optional[float] = None
+    temperature_celsius: Optional[float] = None
+    pressure_psi: Optional[float] = None
+    order_id: Optional[int] = None
+    staff_user_id: Optional[int] = None
+    tap_number: Optional[int] = None
+    recorded_at: Optional[datetime] = None  # Gateway timestamp; defaults to time of ingest
+
+
+class FlowMeterReadingBatch(BaseModel):
+    readings: List[FlowMeterReadingCreate] = Field(..., min_length=1, max_length=1000)
+
+
 # ============== COMPLIANCE SCHEMAS ==============
 
 class AuditLogCreate(BaseModel):
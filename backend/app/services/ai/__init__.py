@@ -15,6 +15,12 @@ from app.services.ai.training_pipeline import (
     run_full_training_pipeline,
 )
 
+from app.services.ai.embedding_index import (
+    EmbeddingIndex,
+    embedding_index,
+    invalidate_embedding_index,
+)
+
 __all__ = [
     # CLIP service
     "is_clip_available",
@@ -27,4 +33,8 @@ __all__ = [
     "AccuracyTracker",
     "TrainingPipeline",
     "run_full_training_pipeline",
+    # Embedding index
+    "EmbeddingIndex",
+    "embedding_index",
+    "invalidate_embedding_index",
 ]
@@ -14,6 +14,7 @@ import numpy as np
 from sqlalchemy.orm import Session
 
 from app.models.ai import TrainingImage, ProductFeatureCache
+from app.services.ai.embedding_index import invalidate_embedding_index
 from app.models.product import Product
 
 logger = logging.getLogger(__name__)
@@ -72,6 +73,7 @@ def update_product_cache(product_id: int, db: Session) -> Optional[ProductFeatur
 
     db.commit()
     db.refresh(cache_entry)
+    invalidate_embedding_index()
 
     logger.info(f"Updated cache for product {product_id} with {len(vectors)} images")
     return cache_entry
@@ -161,6 +163,7 @@ def invalidate_cache(product_id: int, db: Session) -> bool:
         ProductFeatureCache.stock_item_id == product_id
     ).delete()
     db.commit()
+    invalidate_embedding_index()
     return result > 0
 
 
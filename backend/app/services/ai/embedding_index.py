@@ -0,0 +1,254 @@
+"""
+Resident CLIP Embedding Index
+
+Keeps every valid CLIP training embedding in one contiguous float32 matrix so
+recognition can score a query against the whole training set with a single
+matrix-vector product instead of loading TrainingImage rows per request.
+
+The index is versioned two ways:
+- In-process: writers call ``invalidate_embedding_index()`` after storing new
+  feature vectors (cache_service, FeatureAggregator, TrainingPipeline,
+  training upload routes), which bumps a generation counter.
+- Cross-worker: before serving, a single aggregate query (row count, max id,
+  max updated_at) is compared with the signature the index was built from, so
+  writes made by another uvicorn worker are picked up as well.
+
+Usage:
+    from app.services.ai.embedding_index import embedding_index
+
+    index = embedding_index.get(db)
+    for match in index.top_k(query_embedding, k=5, margin=0.15):
+        ...
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.ai import TrainingImage
+
+logger = logging.getLogger(__name__)
+
+# Feature vector size for CLIP (openai/clip-vit-base-patch32)
+CLIP_FEATURE_SIZE = 512
+CLIP_FEATURE_BYTES = CLIP_FEATURE_SIZE * 4  # float32 = 4 bytes = 2048 bytes
+
+
+@dataclass
+class ProductMatch:
+    """Similarity of one product to a query embedding."""
+    product_id: int
+    score: float       # max(best single-image similarity, mean similarity)
+    max_sim: float     # best similarity to any training image of the product
+    mean_sim: float    # similarity to the normalized mean training embedding
+    image_count: int
+
+
+class EmbeddingSnapshot:
+    """Immutable, query-ready view of the training embeddings.
+
+    Rows of ``matrix`` are grouped by product: rows
+    ``offsets[i]:offsets[i] + counts[i]`` belong to ``product_ids[i]``.
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        product_ids: np.ndarray,
+        offsets: np.ndarray,
+        counts: np.ndarray,
+        generation: int,
+        signature: Tuple,
+    ):
+        self.matrix = matrix
+        self.product_ids = product_ids
+        self.offsets = offsets
+        self.counts = counts
+        self.generation = generation
+        self.signature = signature
+
+        if len(product_ids):
+            # Per-product mean embedding, normalized, as one (P, 512) matrix
+            sums = np.add.reduceat(matrix, offsets, axis=0)
+            means = sums / counts[:, None].astype(np.float32)
+            norms = np.linalg.norm(means, axis=1, keepdims=True) + 1e-7
+            self.mean_matrix = np.ascontiguousarray(means / norms, dtype=np.float32)
+        else:
+            self.mean_matrix = np.zeros((0, CLIP_FEATURE_SIZE), dtype=np.float32)
+
+    @property
+    def size(self) -> int:
+        """Number of training embeddings in the index."""
+        return int(self.matrix.shape[0])
+
+    @property
+    def product_count(self) -> int:
+        """Number of distinct products in the index."""
+        return int(len(self.product_ids))
+
+    def similarities(self, query: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Score a normalized query against every product in one pass.
+
+        Returns ``(scores, max_sims, mean_sims)`` aligned with ``product_ids``.
+        ``scores`` follows the recognition rule: best single-image similarity
+        (floored at 0), raised to the mean-embedding similarity for products
+        with more than one training image.
+        """
+        if not self.size:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty, empty
+
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        image_sims = self.matrix @ query
+        max_sims = np.maximum.reduceat(image_sims, self.offsets)
+        mean_sims = self.mean_matrix @ query
+
+        scores = np.maximum(max_sims, 0.0)
+        scores = np.where(self.counts > 1, np.maximum(scores, mean_sims), scores)
+        return scores, max_sims, mean_sims
+
+    def top_k(self, query: np.ndarray, k: int = 5, margin: float = 0.0) -> List[ProductMatch]:
+        """Return the best ``k`` products, best first.
+
+        ``margin`` widens the result to every product whose score is within
+        ``margin`` of the k-th best, so callers that add a bounded boost on top
+        (e.g. OCR text matching) can re-rank without missing a candidate.
+        """
+        scores, max_sims, mean_sims = self.similarities(query)
+        if not len(scores):
+            return []
+
+        if k >= len(scores):
+            candidates = np.arange(len(scores))
+        else:
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+            candidates = np.flatnonzero(scores >= kth - margin)
+
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [
+            ProductMatch(
+                product_id=int(self.product_ids[i]),
+                score=float(scores[i]),
+                max_sim=float(max_sims[i]),
+                mean_sim=float(mean_sims[i]),
+                image_count=int(self.counts[i]),
+            )
+            for i in order
+        ]
+
+
+class EmbeddingIndex:
+    """Process-resident holder for the current EmbeddingSnapshot."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._snapshot: Optional[EmbeddingSnapshot] = None
+
+    def invalidate(self) -> None:
+        """Mark the resident snapshot stale; the next ``get`` rebuilds it."""
+        with self._lock:
+            self._generation += 1
+
+    def get(self, db: Session) -> EmbeddingSnapshot:
+        """Return an up-to-date snapshot, rebuilding it only when stale."""
+        signature = self._signature(db)
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and snapshot.generation == self._generation
+            and snapshot.signature == signature
+        ):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            generation = self._generation
+            if (
+                snapshot is None
+                or snapshot.generation != generation
+                or snapshot.signature != signature
+            ):
+                snapshot = self._build(db, generation, signature)
+                self._snapshot = snapshot
+        return snapshot
+
+    def get_stats(self) -> dict:
+        """Describe the resident snapshot (for status endpoints)."""
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "generation": self._generation,
+            "embeddings": snapshot.size if snapshot else 0,
+            "products": snapshot.product_count if snapshot else 0,
+            "stale": snapshot is None or snapshot.generation != self._generation,
+        }
+
+    @staticmethod
+    def _signature(db: Session) -> Tuple:
+        row = db.query(
+            func.count(TrainingImage.id),
+            func.max(TrainingImage.id),
+            func.max(TrainingImage.updated_at),
+        ).filter(
+            TrainingImage.feature_vector.isnot(None),
+            func.length(TrainingImage.feature_vector) == CLIP_FEATURE_BYTES,
+        ).one()
+        return tuple(row)
+
+    @staticmethod
+    def _build(db: Session, generation: int, signature: Tuple) -> EmbeddingSnapshot:
+        rows = db.query(
+            TrainingImage.stock_item_id,
+            TrainingImage.feature_vector,
+        ).filter(
+            TrainingImage.feature_vector.isnot(None),
+            func.length(TrainingImage.feature_vector) == CLIP_FEATURE_BYTES,
+        ).order_by(TrainingImage.stock_item_id, TrainingImage.id).all()
+
+        n = len(rows)
+        matrix = np.empty((n, CLIP_FEATURE_SIZE), dtype=np.float32)
+        owners = np.empty(n, dtype=np.int64)
+        kept = 0
+        for stock_item_id, feature_vector in rows:
+            if feature_vector is None or len(feature_vector) != CLIP_FEATURE_BYTES:
+                continue
+            matrix[kept] = np.frombuffer(feature_vector, dtype=np.float32)
+            owners[kept] = stock_item_id
+            kept += 1
+
+        matrix = matrix[:kept]
+        owners = owners[:kept]
+        if kept:
+            product_ids, offsets, counts = np.unique(owners, return_index=True, return_counts=True)
+        else:
+            product_ids = np.zeros(0, dtype=np.int64)
+            offsets = np.zeros(0, dtype=np.int64)
+            counts = np.zeros(0, dtype=np.int64)
+
+        logger.info(
+            f"Built embedding index generation {generation}: "
+            f"{kept} embeddings across {len(product_ids)} products"
+        )
+        return EmbeddingSnapshot(
+            matrix=np.ascontiguousarray(matrix),
+            product_ids=product_ids,
+            offsets=offsets,
+            counts=counts,
+            generation=generation,
+            signature=signature,
+        )
+
+
+# Singleton instance
+embedding_index = EmbeddingIndex()
+
+
+def invalidate_embedding_index() -> None:
+    """Invalidate the resident embedding index after feature vectors change."""
+    embedding_index.invalidate()
@@ -29,6 +29,10 @@ from dataclasses import dataclass, field
 import numpy as np
 from PIL import Image, ImageFilter, ImageEnhance, ImageOps
 
+from app.services.ai.image_kernels import (
+    brief_descriptors, correlate3x3, fast_corners, hog_descriptor, lbp_codes
+)
+
 logger = logging.getLogger(__name__)
 
 # Try to import OCR service
@@ -197,11 +201,7 @@ def assess_image_quality(image_data: bytes) -> QualityReport:
         # Blur detection using Laplacian variance
         gray = np.mean(img_array, axis=2)
         laplacian = np.array([[0, 1, 0], [1, -4, 1], [0, 1, 0]])
-        h, w = gray.shape
-        blur_response = np.zeros_like(gray)
-        for y in range(1, h - 1):
-            for x in range(1, w - 1):
-                blur_response[y, x] = abs(np.sum(gray[y-1:y+2, x-1:x+2] * laplacian))
+        blur_response = np.abs(correlate3x3(gray, laplacian))
 
         blur_score = np.var(blur_response) / 1000.0  # Normalize
         blur_score = min(1.0, blur_score)
@@ -365,51 +365,12 @@ def extract_hog_features(image: Image.Image, config: FeatureConfig = None) -> np
     gray = gray.resize((64, 128))
     img_array = np.array(gray, dtype=np.float32)
 
-    gx = np.zeros_like(img_array)
-    gy = np.zeros_like(img_array)
-
-    gx[:, 1:-1] = img_array[:, 2:] - img_array[:, :-2]
-    gy[1:-1, :] = img_array[2:, :] - img_array[:-2, :]
-
-    magnitude = np.sqrt(gx**2 + gy**2)
-    orientation = np.arctan2(gy, gx) * (180 / np.pi) % 180
-
-    n_orientations = config.hog_orientations
-    cell_size = config.hog_pixels_per_cell
-    block_size = config.hog_cells_per_block
-
-    n_cells_y = img_array.shape[0] // cell_size[0]
-    n_cells_x = img_array.shape[1] // cell_size[1]
-
-    cell_hists = np.zeros((n_cells_y, n_cells_x, n_orientations))
-
-    for cy in range(n_cells_y):
-        for cx in range(n_cells_x):
-            y_start = cy * cell_size[0]
-            y_end = y_start + cell_size[0]
-            x_start = cx * cell_size[1]
-            x_end = x_start + cell_size[1]
-
-            cell_mag = magnitude[y_start:y_end, x_start:x_end]
-            cell_ori = orientation[y_start:y_end, x_start:x_end]
-
-            bin_width = 180 / n_orientations
-            bins = (cell_ori / bin_width).astype(int) % n_orientations
-
-            for b in range(n_orientations):
-                cell_hists[cy, cx, b] = np.sum(cell_mag[bins == b])
-
-    n_blocks_y = n_cells_y - block_size[0] + 1
-    n_blocks_x = n_cells_x - block_size[1] + 1
-
-    hog_features = []
-    for by in range(n_blocks_y):
-        for bx in range(n_blocks_x):
-            block = cell_hists[by:by+block_size[0], bx:bx+block_size[1], :].flatten()
-            norm = np.sqrt(np.sum(block**2) + 1e-7)
-            hog_features.extend(block / norm)
-
-    return np.array(hog_features, dtype=np.float32)
+    return hog_descriptor(
+        img_array,
+        config.hog_orientations,
+        config.hog_pixels_per_cell,
+        config.hog_cells_per_block,
+    )
 
 
 # ==================== TEXTURE FEATURES ====================
@@ -422,27 +383,8 @@ def extract_lbp_features(image: Image.Image, config: FeatureConfig = None) -> np
     gray = gray.resize((64, 64))
     img_array = np.array(gray, dtype=np.float32)
 
-    radius = config.lbp_radius
     n_points = config.lbp_points
-
-    angles = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
-    sample_x = radius * np.cos(angles)
-    sample_y = radius * np.sin(angles)
-
-    height, width = img_array.shape
-    lbp = np.zeros((height - 2*radius, width - 2*radius), dtype=np.uint32)
-
-    for i, (dx, dy) in enumerate(zip(sample_x, sample_y)):
-        for y in range(radius, height - radius):
-            for x in range(radius, width - radius):
-                center = img_array[y, x]
-                sx = int(round(x + dx))
-                sy = int(round(y + dy))
-
-                if 0 <= sx < width and 0 <= sy < height:
-                    neighbor = img_array[sy, sx]
-                    if neighbor >= center:
-                        lbp[y - radius, x - radius] |= (1 << i)
+    lbp = lbp_codes(img_array, config.lbp_radius, n_points)
 
     n_bins = min(n_points + 2, 26)
     hist, _ = np.histogram(lbp.flatten(), bins=n_bins, range=(0, 2**n_points))
@@ -545,57 +487,16 @@ def extract_keypoint_features(image: Image.Image, max_keypoints: int = 100) -> n
     gray = gray.resize((128, 128))
     img_array = np.array(gray, dtype=np.float32)
 
-    corners = []
-    threshold = 20
-
-    for y in range(3, img_array.shape[0] - 3):
-        for x in range(3, img_array.shape[1] - 3):
-            center = img_array[y, x]
-
-            circle_points = [
-                img_array[y-3, x], img_array[y-2, x+2], img_array[y, x+3],
-                img_array[y+2, x+2], img_array[y+3, x], img_array[y+2, x-2],
-                img_array[y, x-3], img_array[y-2, x-2]
-            ]
-
-            brighter = sum(1 for p in circle_points if p > center + threshold)
-            darker = sum(1 for p in circle_points if p < center - threshold)
-
-            if brighter >= 6 or darker >= 6:
-                patch = img_array[y-1:y+2, x-1:x+2]
-                gx = patch[:, 2] - patch[:, 0]
-                gy = patch[2, :] - patch[0, :]
-
-                strength = np.sum(gx**2) * np.sum(gy**2) - np.sum(gx * gy)**2
-                corners.append((y, x, strength))
-
-    corners.sort(key=lambda c: c[2], reverse=True)
-    corners = corners[:max_keypoints]
+    corners = fast_corners(img_array, threshold=20, max_keypoints=max_keypoints)
 
     if len(corners) == 0:
         return np.zeros(256, dtype=np.float32)
 
-    descriptors = []
-
-    for y, x, _ in corners:
-        if y < 8 or y >= img_array.shape[0] - 8 or x < 8 or x >= img_array.shape[1] - 8:
-            continue
-
-        patch = img_array[y-8:y+8, x-8:x+8]
-
-        desc = []
-        np.random.seed(42)
-        for _ in range(32):
-            y1, x1 = np.random.randint(0, 16, 2)
-            y2, x2 = np.random.randint(0, 16, 2)
-            desc.append(1 if patch[y1, x1] > patch[y2, x2] else 0)
-
-        descriptors.append(desc)
+    descriptors = brief_descriptors(img_array, corners)
 
     if len(descriptors) == 0:
         return np.zeros(256, dtype=np.float32)
 
-    descriptors = np.array(descriptors)
     desc_values = np.packbits(descriptors, axis=1)
 
     hist, _ = np.histogram(desc_values.flatten(), bins=256, range=(0, 256))
@@ -614,14 +515,7 @@ def extract_text_features(image: Image.Image) -> np.ndarray:
     img_array = np.array(gray, dtype=np.float32)
 
     laplacian = np.array([[0, 1, 0], [1, -4, 1], [0, 1, 0]], dtype=np.float32)
-
-    h, w = img_array.shape
-    edges = np.zeros_like(img_array)
-
-    for y in range(1, h - 1):
-        for x in range(1, w - 1):
-            region = img_array[y-1:y+2, x-1:x+2]
-            edges[y, x] = abs(np.sum(region * laplacian))
+    edges = np.abs(correlate3x3(img_array, laplacian))
 
     features = np.array([
         np.mean(edges),
@@ -0,0 +1,190 @@
+"""Vectorized image kernels for hand-crafted bottle features.
+
+Array-shifted replacements for the per-pixel Python loops previously used by
+app.services.ai.feature_extraction and app.services.ai_bottle_recognition_service:
+- 3x3 correlation (Laplacian) and separable Sobel gradients
+- LBP codes with nearest-neighbour sampling
+- HOG cell histograms + block normalization
+- FAST-like corners with Harris-like strength and BRIEF-like descriptors
+
+Each kernel reproduces the output of the loop it replaced (same border
+handling, rounding and ordering) so stored feature vectors stay comparable.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+# BRIEF-like test pairs. The loop implementation reseeded the global RNG with 42
+# for every keypoint, so every keypoint used this same sequence of pairs.
+_brief_rng = np.random.RandomState(42)
+_BRIEF_PAIRS = np.array(
+    [np.concatenate([_brief_rng.randint(0, 16, 2), _brief_rng.randint(0, 16, 2)]) for _ in range(32)]
+)  # rows of (y1, x1, y2, x2)
+del _brief_rng
+
+# FAST-like circle of radius 3 (8 samples) as (dy, dx) offsets
+_FAST_CIRCLE = ((-3, 0), (-2, 2), (0, 3), (2, 2), (3, 0), (2, -2), (0, -3), (-2, -2))
+
+
+def correlate3x3(img: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """3x3 correlation over the valid interior; the 1-pixel border is zero."""
+    h, w = img.shape
+    result = np.zeros_like(img)
+    acc = None
+    for ky in range(3):
+        for kx in range(3):
+            weight = kernel[ky, kx]
+            if weight == 0:
+                continue
+            term = img[ky:h - 2 + ky, kx:w - 2 + kx] * weight
+            acc = term if acc is None else acc + term
+    if acc is not None:
+        result[1:-1, 1:-1] = acc
+    return result
+
+
+def sobel_gradients(img: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Separable 3x3 Sobel (correlation) with a zero 1-pixel border.
+
+    gx = [1, 2, 1]^T (x) [-1, 0, 1]; gy = [-1, 0, 1]^T (x) [1, 2, 1].
+    """
+    gx = np.zeros_like(img)
+    gy = np.zeros_like(img)
+
+    smooth_y = img[:-2, :] + 2 * img[1:-1, :] + img[2:, :]
+    gx[1:-1, 1:-1] = smooth_y[:, 2:] - smooth_y[:, :-2]
+
+    smooth_x = img[:, :-2] + 2 * img[:, 1:-1] + img[:, 2:]
+    gy[1:-1, 1:-1] = smooth_x[2:, :] - smooth_x[:-2, :]
+
+    return gx, gy
+
+
+def lbp_codes(img: np.ndarray, radius: int, n_points: int) -> np.ndarray:
+    """LBP codes for the interior pixels, nearest-neighbour sampled.
+
+    Returns a (H - 2r, W - 2r) uint32 array; bit ``i`` is set when sample
+    point ``i`` is >= the center pixel.
+    """
+    height, width = img.shape
+    angles = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
+    sample_x = radius * np.cos(angles)
+    sample_y = radius * np.sin(angles)
+
+    ys = np.arange(radius, height - radius)
+    xs = np.arange(radius, width - radius)
+    center = img[radius:height - radius, radius:width - radius]
+    lbp = np.zeros(center.shape, dtype=np.uint32)
+
+    for i, (dx, dy) in enumerate(zip(sample_x, sample_y)):
+        # np.round matches Python's round() (half to even) used by the loop version
+        sy = np.round(ys + dy).astype(np.int64)
+        sx = np.round(xs + dx).astype(np.int64)
+        valid = ((sy >= 0) & (sy < height))[:, None] & ((sx >= 0) & (sx < width))[None, :]
+        neighbor = img[np.clip(sy, 0, height - 1)[:, None], np.clip(sx, 0, width - 1)[None, :]]
+        lbp |= ((neighbor >= center) & valid).astype(np.uint32) << np.uint32(i)
+
+    return lbp
+
+
+def hog_descriptor(
+    img: np.ndarray,
+    n_orientations: int,
+    cell_size: Tuple[int, int],
+    block_size: Tuple[int, int],
+) -> np.ndarray:
+    """HOG with central-difference gradients, unsigned orientation bins and
+    L2 block normalization. Block features are ordered (block_y, block_x,
+    cell_y, cell_x, orientation)."""
+    gx = np.zeros_like(img)
+    gy = np.zeros_like(img)
+    gx[:, 1:-1] = img[:, 2:] - img[:, :-2]
+    gy[1:-1, :] = img[2:, :] - img[:-2, :]
+
+    magnitude = np.sqrt(gx**2 + gy**2)
+    orientation = np.arctan2(gy, gx) * (180 / np.pi) % 180
+
+    n_cells_y = img.shape[0] // cell_size[0]
+    n_cells_x = img.shape[1] // cell_size[1]
+    crop_h = n_cells_y * cell_size[0]
+    crop_w = n_cells_x * cell_size[1]
+
+    bin_width = 180 / n_orientations
+    bins = (orientation[:crop_h, :crop_w] / bin_width).astype(int) % n_orientations
+
+    cell_y = np.arange(crop_h) // cell_size[0]
+    cell_x = np.arange(crop_w) // cell_size[1]
+    flat_index = ((cell_y[:, None] * n_cells_x + cell_x[None, :]) * n_orientations + bins).ravel()
+
+    cell_hists = np.bincount(
+        flat_index,
+        weights=magnitude[:crop_h, :crop_w].ravel(),
+        minlength=n_cells_y * n_cells_x * n_orientations,
+    ).reshape(n_cells_y, n_cells_x, n_orientations)
+
+    n_blocks_y = n_cells_y - block_size[0] + 1
+    n_blocks_x = n_cells_x - block_size[1] + 1
+    if n_blocks_y <= 0 or n_blocks_x <= 0:
+        return np.zeros(0, dtype=np.float32)
+
+    windows = np.lib.stride_tricks.sliding_window_view(cell_hists, block_size, axis=(0, 1))
+    # (by, bx, orient, cy, cx) -> (by, bx, cy, cx, orient)
+    blocks = windows.transpose(0, 1, 3, 4, 2).reshape(n_blocks_y * n_blocks_x, -1)
+    norms = np.sqrt(np.sum(blocks**2, axis=1, keepdims=True) + 1e-7)
+
+    return (blocks / norms).ravel().astype(np.float32)
+
+
+def fast_corners(img: np.ndarray, threshold: float = 20, max_keypoints: int = 100) -> np.ndarray:
+    """FAST-like corners ranked by Harris-like strength.
+
+    Returns an (N, 2) array of (y, x), strongest first; ties keep row-major order.
+    """
+    h, w = img.shape
+    center = img[3:h - 3, 3:w - 3]
+
+    brighter = np.zeros(center.shape, dtype=np.int32)
+    darker = np.zeros(center.shape, dtype=np.int32)
+    for dy, dx in _FAST_CIRCLE:
+        point = img[3 + dy:h - 3 + dy, 3 + dx:w - 3 + dx]
+        brighter += point > center + threshold
+        darker += point < center - threshold
+
+    cand_y, cand_x = np.nonzero((brighter >= 6) | (darker >= 6))
+    if len(cand_y) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    ys = cand_y + 3
+    xs = cand_x + 3
+
+    # gx: column x+1 minus column x-1 over rows y-1..y+1; gy: row y+1 minus row y-1
+    gx = [img[ys + r, xs + 1] - img[ys + r, xs - 1] for r in (-1, 0, 1)]
+    gy = [img[ys + 1, xs + c] - img[ys - 1, xs + c] for c in (-1, 0, 1)]
+    sum_gx2 = gx[0] ** 2 + gx[1] ** 2 + gx[2] ** 2
+    sum_gy2 = gy[0] ** 2 + gy[1] ** 2 + gy[2] ** 2
+    sum_gxgy = gx[0] * gy[0] + gx[1] * gy[1] + gx[2] * gy[2]
+    strength = sum_gx2 * sum_gy2 - sum_gxgy**2
+
+    order = np.argsort(-strength, kind="stable")[:max_keypoints]
+    return np.stack([ys[order], xs[order]], axis=1)
+
+
+def brief_descriptors(img: np.ndarray, corners: np.ndarray) -> np.ndarray:
+    """32-bit BRIEF-like binary descriptors over 16x16 patches.
+
+    Corners within 8 pixels of the border are skipped. Returns an (N, 32)
+    array of 0/1 ints.
+    """
+    if len(corners) == 0:
+        return np.zeros((0, 32), dtype=np.int64)
+
+    h, w = img.shape
+    ys, xs = corners[:, 0], corners[:, 1]
+    inside = (ys >= 8) & (ys < h - 8) & (xs >= 8) & (xs < w - 8)
+    top = (ys[inside] - 8)[:, None]
+    left = (xs[inside] - 8)[:, None]
+
+    y1, x1, y2, x2 = _BRIEF_PAIRS.T
+    first = img[top + y1[None, :], left + x1[None, :]]
+    second = img[top + y2[None, :], left + x2[None, :]]
+    return (first > second).astype(np.int64)
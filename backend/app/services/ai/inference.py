@@ -6,6 +6,7 @@ Enhanced with:
 - Multi-scale detection
 - Confidence calibration
 - Batch processing support
+- Cached ONNX sessions (keyed by model path + mtime)
 - Demo mode fallback
 """
 
@@ -13,6 +14,10 @@ import hashlib
 import json
 import os
 import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any, List, Dict, Tuple, Optional
 from dataclasses import dataclass
@@ -23,6 +28,7 @@ from PIL import Image
 import io
 
 from app.core.config import settings
+from app.services.ai.postprocess import decode_yolo, nms, yolo_predictions
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +92,140 @@ def get_detection_mode() -> DetectionMode:
     return DetectionMode.DEMO
 
 
+# ==================== SESSION REGISTRY ====================
+
+class OnnxSessionPool:
+    """ONNX Runtime sessions for one model file.
+
+    With ``size == 1`` a single session is shared by all callers
+    (``InferenceSession.run`` is thread-safe). With ``size > 1`` each caller
+    checks out its own session, created lazily up to ``size``.
+    """
+
+    def __init__(self, model_path: Path, mtime: float, size: int = 1):
+        self.model_path = model_path
+        self.mtime = mtime
+        self.size = max(1, size)
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._shared = None
+        self._created = 0
+        self._lock = threading.Lock()
+        self.load_time_ms = 0.0
+
+    def _create_session(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.ai_onnx_intra_op_threads > 0:
+            options.intra_op_num_threads = settings.ai_onnx_intra_op_threads
+        if settings.ai_onnx_inter_op_threads > 0:
+            options.inter_op_num_threads = settings.ai_onnx_inter_op_threads
+
+        start = time.perf_counter()
+        session = ort.InferenceSession(str(self.model_path), sess_options=options)
+        self.load_time_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Loaded ONNX session for {self.model_path.name} in {self.load_time_ms:.0f}ms")
+        return session
+
+    @contextmanager
+    def acquire(self):
+        """Check out a session for the duration of the ``with`` block."""
+        if self.size == 1:
+            if self._shared is None:
+                with self._lock:
+                    if self._shared is None:
+                        self._shared = self._create_session()
+                        self._created = 1
+            yield self._shared
+            return
+
+        try:
+            session = self._idle.get_nowait()
+        except queue.Empty:
+            session = None
+            with self._lock:
+                if self._created < self.size:
+                    session = self._create_session()
+                    self._created += 1
+            if session is None:
+                session = self._idle.get()
+
+        try:
+            yield session
+        finally:
+            self._idle.put(session)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Describe this pool (for status endpoints and benchmarks)."""
+        return {
+            "model_path": str(self.model_path),
+            "mtime": self.mtime,
+            "pool_size": self.size,
+            "sessions_created": self._created,
+            "sessions_idle": self._idle.qsize(),
+            "load_time_ms": round(self.load_time_ms, 2),
+        }
+
+
+_session_pools: Dict[str, OnnxSessionPool] = {}
+_session_pools_lock = threading.Lock()
+
+
+def get_session_pool(model_path: Path = None) -> OnnxSessionPool:
+    """Return the cached session pool for a model, reloading if the file changed."""
+    model_path = Path(model_path or MODEL_PATH)
+    key = str(model_path.resolve())
+    mtime = model_path.stat().st_mtime
+
+    pool = _session_pools.get(key)
+    if pool is not None and pool.mtime == mtime:
+        return pool
+
+    with _session_pools_lock:
+        pool = _session_pools.get(key)
+        if pool is None or pool.mtime != mtime:
+            pool = OnnxSessionPool(model_path, mtime, settings.ai_onnx_session_pool_size)
+            _session_pools[key] = pool
+    return pool
+
+
+def clear_session_cache() -> None:
+    """Drop all cached ONNX sessions (next inference reloads the model)."""
+    with _session_pools_lock:
+        _session_pools.clear()
+
+
+def get_session_stats() -> List[Dict[str, Any]]:
+    """Describe every cached session pool."""
+    return [pool.get_stats() for pool in list(_session_pools.values())]
+
+
+def _run_session(session, batch: np.ndarray) -> List[np.ndarray]:
+    """Run a (N, 3, H, W) batch, splitting it if the model has a fixed batch size.
+
+    A dynamic batch axis (symbolic or missing dimension) takes the whole batch
+    in one run. With a fixed batch size the batch is cut into chunks of that
+    size; the last chunk is zero-padded to full size and the padding rows are
+    trimmed from the outputs.
+    """
+    model_input = session.get_inputs()[0]
+    batch_dim = model_input.shape[0] if model_input.shape else None
+
+    if not isinstance(batch_dim, int) or batch_dim <= 0 or batch_dim == len(batch):
+        return session.run(None, {model_input.name: batch})
+
+    chunks = []
+    for i in range(0, len(batch), batch_dim):
+        chunk = batch[i:i + batch_dim]
+        real = len(chunk)
+        if real < batch_dim:
+            padding = np.zeros((batch_dim - real,) + chunk.shape[1:], dtype=chunk.dtype)
+            chunk = np.concatenate([chunk, padding], axis=0)
+        chunks.append([output[:real] for output in session.run(None, {model_input.name: chunk})])
+    return [np.concatenate(parts, axis=0) for parts in zip(*chunks)]
+
+
 def run_inference(
     image_data: bytes,
     config: InferenceConfig = None
@@ -120,9 +260,35 @@ def run_batch_inference(
     """
     Run inference on multiple images.
 
-    More efficient than running individual inference.
+    More efficient than running individual inference: in ONNX mode all
+    images are letterboxed and stacked into one batched tensor per scale.
     """
     config = config or DEFAULT_CONFIG
+
+    if get_detection_mode() == DetectionMode.ONNX:
+        try:
+            import onnxruntime  # noqa: F401
+
+            decoded = []
+            for image_data in images:
+                try:
+                    decoded.append(Image.open(io.BytesIO(image_data)).convert("RGB"))
+                except Exception as e:
+                    logger.error(f"Batch inference failed to decode image: {e}")
+                    decoded.append(None)
+
+            valid = [i for i, img in enumerate(decoded) if img is not None]
+            batched = _run_onnx_batch([decoded[i] for i in valid], config) if valid else []
+
+            results: List[List[Dict[str, Any]]] = [[] for _ in images]
+            for i, dets in zip(valid, batched):
+                results[i] = dets
+            return results
+        except ImportError:
+            logger.warning("onnxruntime not installed, falling back to demo mode")
+        except Exception as e:
+            logger.error(f"Batched ONNX inference failed: {e}, running images individually")
+
     results = []
 
     for image_data in images:
@@ -223,61 +389,54 @@ def _run_onnx_inference(
         # Load image
         image = Image.open(io.BytesIO(image_data))
         image = image.convert("RGB")
-        orig_width, orig_height = image.size
+        return _run_onnx_batch([image], config)[0]
+
+    except Exception as e:
+        logger.error(f"ONNX inference failed: {e}, falling back to demo mode")
+        return _run_demo_inference(image_data)
+
 
-        # Multi-scale inference if enabled
-        if config.multi_scale and len(config.scales) > 1:
-            all_detections = []
-            for scale in config.scales:
+def _run_onnx_batch(
+    images: List[Image.Image],
+    config: InferenceConfig
+) -> List[List[Dict[str, Any]]]:
+    """
+    Run inference on decoded images with one batched session call per scale.
+
+    Multi-scale detections are merged (NMS across scales) per image.
+    """
+    multi_scale = config.multi_scale and len(config.scales) > 1
+    scales = config.scales if multi_scale else [1.0]
+    per_image: List[List[Dict[str, Any]]] = [[] for _ in images]
+
+    pool = get_session_pool()
+    with pool.acquire() as session:
+        for scale in scales:
+            if multi_scale:
                 scaled_size = (
                     int(config.input_size[0] * scale),
                     int(config.input_size[1] * scale)
                 )
-                dets = _run_single_scale_inference(
-                    image, scaled_size, config, orig_width, orig_height
-                )
-                all_detections.extend(dets)
-
-            # Merge and NMS across scales
-            return _merge_detections(all_detections, config)
-        else:
-            return _run_single_scale_inference(
-                image, config.input_size, config, orig_width, orig_height
-            )
-
-    except Exception as e:
-        logger.error(f"ONNX inference failed: {e}, falling back to demo mode")
-        return _run_demo_inference(image_data)
+            else:
+                scaled_size = config.input_size
 
+            batch = np.concatenate([_preprocess_image(img, scaled_size) for img in images])
+            outputs = _run_session(session, batch)
 
-def _run_single_scale_inference(
-    image: Image.Image,
-    input_size: Tuple[int, int],
-    config: InferenceConfig,
-    orig_width: int,
-    orig_height: int
-) -> List[Dict[str, Any]]:
-    """Run inference at a single scale."""
-    import onnxruntime as ort
-
-    # Preprocess
-    image_array = _preprocess_image(image, input_size)
-
-    # Load and run model
-    session = ort.InferenceSession(str(MODEL_PATH))
-    input_name = session.get_inputs()[0].name
-    outputs = session.run(None, {input_name: image_array})
-
-    # Post-process
-    detections = _postprocess_yolo_output(
-        outputs,
-        config,
-        input_size,
-        orig_width,
-        orig_height
-    )
+            for i, image in enumerate(images):
+                orig_width, orig_height = image.size
+                per_image[i].extend(_postprocess_yolo_output(
+                    [output[i:i + 1] for output in outputs],
+                    config,
+                    scaled_size,
+                    orig_width,
+                    orig_height
+                ))
 
-    return detections
+    if multi_scale:
+        # Merge and NMS across scales
+        return [_merge_detections(dets, config) for dets in per_image]
+    return per_image
 
 
 def _preprocess_image(
@@ -337,58 +496,31 @@ def _postprocess_yolo_output(
     label_map = load_label_map()
 
     # Determine output format
-    output = outputs[0]
-
-    if len(output.shape) == 3:
-        # YOLOv8 format: (1, num_classes + 4, num_boxes)
-        output = output[0].T  # -> (num_boxes, num_classes + 4)
-    elif len(output.shape) == 2:
-        # Already in (num_boxes, features) format
-        pass
-    else:
-        logger.warning(f"Unknown output shape: {output.shape}")
+    preds = yolo_predictions(outputs[0])
+    if preds is None:
+        logger.warning(f"Unknown output shape: {outputs[0].shape}")
         return []
 
-    # Parse detections
-    detections = []
-    num_classes = output.shape[1] - 4  # Assuming [x, y, w, h, class_scores...]
-
-    for detection in output:
-        x_center, y_center, width, height = detection[:4]
-        class_scores = detection[4:]
-
-        # Get best class
-        class_id = np.argmax(class_scores)
-        confidence = class_scores[class_id]
-
-        if confidence < config.confidence_threshold:
-            continue
-
-        # Convert to normalized coordinates
-        x1 = (x_center - width / 2) / input_size[0]
-        y1 = (y_center - height / 2) / input_size[1]
-        x2 = (x_center + width / 2) / input_size[0]
-        y2 = (y_center + height / 2) / input_size[1]
+    # Confidence filter, class argmax and box decoding as array ops
+    boxes, scores, class_ids = decode_yolo(preds, config.confidence_threshold)
 
-        # Clip to valid range
-        x1 = max(0, min(1, x1))
-        y1 = max(0, min(1, y1))
-        x2 = max(0, min(1, x2))
-        y2 = max(0, min(1, y2))
+    # Convert to normalized coordinates and clip to valid range
+    boxes = boxes / np.array([input_size[0], input_size[1], input_size[0], input_size[1]])
+    boxes = np.clip(boxes, 0, 1)
 
-        # Map class ID to label
-        label = label_map.get(str(class_id), f"class_{class_id}")
+    # Apply class-aware NMS on arrays, then build dicts for the kept boxes only
+    keep = nms(boxes, scores, config.nms_threshold, class_ids=class_ids)
 
+    detections = []
+    for i in keep:
+        class_id = int(class_ids[i])
         detections.append({
-            "label": label,
-            "confidence": float(confidence),
-            "bbox": [float(x1), float(y1), float(x2), float(y2)],
-            "class_id": int(class_id),
+            "label": label_map.get(str(class_id), f"class_{class_id}"),
+            "confidence": float(scores[i]),
+            "bbox": [float(v) for v in boxes[i]],
+            "class_id": class_id,
         })
 
-    # Apply NMS
-    detections = _apply_nms(detections, config.nms_threshold)
-
     # Count instances per class
     detections = _count_instances(detections)
 
@@ -402,61 +534,16 @@ def _apply_nms(
     detections: List[Dict[str, Any]],
     nms_threshold: float
 ) -> List[Dict[str, Any]]:
-    """Apply Non-Maximum Suppression."""
+    """Apply class-aware Non-Maximum Suppression to detection dicts."""
     if len(detections) == 0:
         return []
 
-    # Sort by confidence
-    detections = sorted(detections, key=lambda x: x["confidence"], reverse=True)
-
-    keep = []
-    suppressed = set()
-
-    for i, det in enumerate(detections):
-        if i in suppressed:
-            continue
-
-        keep.append(det)
-
-        for j in range(i + 1, len(detections)):
-            if j in suppressed:
-                continue
+    boxes = np.array([det["bbox"] for det in detections], dtype=np.float64)
+    scores = np.array([det["confidence"] for det in detections], dtype=np.float64)
+    class_ids = np.array([det.get("class_id", -1) for det in detections], dtype=np.int64)
 
-            # Only suppress same class
-            if det.get("class_id") != detections[j].get("class_id"):
-                continue
-
-            iou = _compute_iou(det["bbox"], detections[j]["bbox"])
-            if iou > nms_threshold:
-                suppressed.add(j)
-
-    return keep
-
-
-def _compute_iou(box1: List[float], box2: List[float]) -> float:
-    """Compute Intersection over Union between two boxes."""
-    x1_1, y1_1, x2_1, y2_1 = box1
-    x1_2, y1_2, x2_2, y2_2 = box2
-
-    # Intersection
-    xi1 = max(x1_1, x1_2)
-    yi1 = max(y1_1, y1_2)
-    xi2 = min(x2_1, x2_2)
-    yi2 = min(y2_1, y2_2)
-
-    inter_width = max(0, xi2 - xi1)
-    inter_height = max(0, yi2 - yi1)
-    intersection = inter_width * inter_height
-
-    # Union
-    area1 = (x2_1 - x1_1) * (y2_1 - y1_1)
-    area2 = (x2_2 - x1_2) * (y2_2 - y1_2)
-    union = area1 + area2 - intersection
-
-    if union == 0:
-        return 0
-
-    return intersection / union
+    keep = nms(boxes, scores, nms_threshold, class_ids=class_ids)
+    return [detections[i] for i in keep]
 
 
 def _count_instances(detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -540,11 +627,11 @@ def get_model_info() -> Dict[str, Any]:
 
     if mode == DetectionMode.ONNX and MODEL_PATH.exists():
         try:
-            import onnxruntime as ort
-            session = ort.InferenceSession(str(MODEL_PATH))
-            info["input_shape"] = session.get_inputs()[0].shape
-            info["output_shape"] = session.get_outputs()[0].shape
-            info["providers"] = session.get_providers()
+            with get_session_pool().acquire() as session:
+                info["input_shape"] = session.get_inputs()[0].shape
+                info["output_shape"] = session.get_outputs()[0].shape
+                info["providers"] = session.get_providers()
+            info["sessions"] = get_session_stats()
         except Exception as e:
             info["error"] = str(e)
 
@@ -560,13 +647,13 @@ def validate_model() -> Tuple[bool, str]:
         return False, f"Expected .onnx file, got {MODEL_PATH.suffix}"
 
     try:
-        import onnxruntime as ort
-        session = ort.InferenceSession(str(MODEL_PATH))
+        import onnxruntime  # noqa: F401
 
-        # Try a dummy inference
-        input_shape = session.get_inputs()[0].shape
-        dummy_input = np.zeros(input_shape, dtype=np.float32)
-        session.run(None, {session.get_inputs()[0].name: dummy_input})
+        with get_session_pool().acquire() as session:
+            # Try a dummy inference
+            input_shape = session.get_inputs()[0].shape
+            dummy_input = np.zeros(input_shape, dtype=np.float32)
+            session.run(None, {session.get_inputs()[0].name: dummy_input})
 
         return True, "Model validated successfully"
 
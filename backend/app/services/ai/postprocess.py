@@ -0,0 +1,143 @@
+"""Vectorized YOLO post-processing.
+
+Array-based building blocks shared by the detection paths
+(app.services.ai.inference and ml.inference.pipeline_v2):
+- Decoding raw YOLOv5/YOLOv8 output into (N, 4) xyxy boxes, scores and class ids
+- Pairwise IoU
+- Batched class-aware greedy NMS
+
+Everything here works on NumPy arrays only; callers convert the kept rows to
+dicts / dataclasses at their API boundary. The module itself needs nothing
+but NumPy, but importing it runs the app.services package imports (and with
+them the settings), so ml.inference.pipeline_v2 imports it inside the ONNX
+detection path; its standalone CLI keeps working without app configuration.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def yolo_predictions(output: np.ndarray) -> Optional[np.ndarray]:
+    """Return raw YOLO output as a (num_boxes, features) array.
+
+    Accepts the YOLOv8 layout ``(1, 4 + num_classes, num_boxes)`` or an
+    already-flat ``(num_boxes, features)`` array. Returns None for unknown shapes.
+    """
+    if output.ndim == 3:
+        preds = output[0]
+        # YOLOv8 puts features first: (4 + num_classes, num_boxes)
+        if preds.shape[0] < preds.shape[1]:
+            preds = preds.T
+        return preds
+    if output.ndim == 2:
+        return output
+    return None
+
+
+def xywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    """Convert (N, 4) center-format boxes to corner format."""
+    half_w = boxes[:, 2] / 2
+    half_h = boxes[:, 3] / 2
+    return np.stack([
+        boxes[:, 0] - half_w,
+        boxes[:, 1] - half_h,
+        boxes[:, 0] + half_w,
+        boxes[:, 1] + half_h,
+    ], axis=1)
+
+
+def decode_yolo(
+    preds: np.ndarray,
+    conf_threshold: float,
+    objectness: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Filter and decode (num_boxes, features) YOLO predictions.
+
+    Args:
+        preds: Rows of ``[cx, cy, w, h, class_scores...]`` (YOLOv8) or
+            ``[cx, cy, w, h, objectness, class_scores...]`` (YOLOv5).
+        conf_threshold: Minimum class score (and objectness, for YOLOv5).
+        objectness: Whether column 4 is an objectness score.
+
+    Returns:
+        ``(boxes, scores, class_ids)`` for rows above threshold, with boxes in
+        xyxy input-pixel coordinates. For YOLOv5 the score is
+        ``objectness * class_score``.
+    """
+    first_class = 5 if objectness else 4
+    if preds.size == 0 or preds.shape[1] <= first_class:
+        return (
+            np.zeros((0, 4), dtype=np.float32),
+            np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.int64),
+        )
+
+    class_scores = preds[:, first_class:]
+    class_ids = np.argmax(class_scores, axis=1)
+    class_conf = class_scores[np.arange(len(preds)), class_ids]
+
+    keep = class_conf >= conf_threshold
+    scores = class_conf
+    if objectness:
+        keep &= preds[:, 4] >= conf_threshold
+        scores = preds[:, 4] * class_conf
+
+    keep_idx = np.flatnonzero(keep)
+    boxes = xywh_to_xyxy(preds[keep_idx, :4])
+    return boxes, scores[keep_idx], class_ids[keep_idx]
+
+
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU of one xyxy box against (N, 4) boxes; 0 where the union is empty."""
+    xi1 = np.maximum(box[0], boxes[:, 0])
+    yi1 = np.maximum(box[1], boxes[:, 1])
+    xi2 = np.minimum(box[2], boxes[:, 2])
+    yi2 = np.minimum(box[3], boxes[:, 3])
+
+    intersection = np.maximum(0, xi2 - xi1) * np.maximum(0, yi2 - yi1)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    union = area + areas - intersection
+
+    iou = np.zeros(len(boxes), dtype=np.float64)
+    np.divide(intersection, union, out=iou, where=union != 0)
+    return iou
+
+
+def nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_threshold: float,
+    class_ids: Optional[np.ndarray] = None,
+    max_detections: Optional[int] = None,
+) -> np.ndarray:
+    """Greedy NMS over (N, 4) xyxy boxes.
+
+    With ``class_ids`` boxes only suppress boxes of the same class (each class
+    is shifted to its own coordinate range so one pass handles all classes).
+    Ties in score keep input order.
+
+    Returns:
+        Indices of kept boxes, highest score first.
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    boxes = np.asarray(boxes, dtype=np.float64)
+    if class_ids is not None:
+        offset = boxes.max() - min(boxes.min(), 0) + 1
+        boxes = boxes + (np.asarray(class_ids, dtype=np.float64) * offset)[:, None]
+
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        if max_detections is not None and len(keep) >= max_detections:
+            break
+        rest = order[1:]
+        iou = box_iou(boxes[i], boxes[rest])
+        order = rest[iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
@@ -24,6 +24,7 @@ from sqlalchemy.orm import Session
 
 from app.models.ai import TrainingImage, ProductFeatureCache, RecognitionLog
 from app.models.product import Product
+from app.services.ai.embedding_index import invalidate_embedding_index
 
 logger = logging.getLogger(__name__)
 
@@ -212,6 +213,7 @@ class FeatureAggregator:
             self.db.add(cache)
 
         self.db.flush()
+        invalidate_embedding_index()
         return cache
 
     def update_all_products(
@@ -528,6 +530,7 @@ class TrainingPipeline:
             image.updated_at = datetime.now(timezone.utc)
             image.extraction_error = None
             self.db.flush()
+            invalidate_embedding_index()
 
             return True
 
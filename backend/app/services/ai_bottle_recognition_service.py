@@ -26,6 +26,10 @@ from enum import Enum
 import numpy as np
 from PIL import Image, ImageFilter, ImageEnhance, ImageOps
 
+from app.services.ai.image_kernels import (
+    brief_descriptors, correlate3x3, fast_corners, hog_descriptor, lbp_codes, sobel_gradients
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -245,57 +249,13 @@ def extract_hog_features(image: Image.Image, config: FeatureConfig = None) -> np
     gray = gray.resize((64, 128))  # Standard HOG size
     img_array = np.array(gray, dtype=np.float32)
 
-    # Compute gradients
-    gx = np.zeros_like(img_array)
-    gy = np.zeros_like(img_array)
-
-    gx[:, 1:-1] = img_array[:, 2:] - img_array[:, :-2]
-    gy[1:-1, :] = img_array[2:, :] - img_array[:-2, :]
-
-    # Compute magnitude and orientation
-    magnitude = np.sqrt(gx**2 + gy**2)
-    orientation = np.arctan2(gy, gx) * (180 / np.pi) % 180
-
-    # HOG parameters
-    n_orientations = config.hog_orientations
-    cell_size = config.hog_pixels_per_cell
-    block_size = config.hog_cells_per_block
-
-    # Compute cell histograms
-    n_cells_y = img_array.shape[0] // cell_size[0]
-    n_cells_x = img_array.shape[1] // cell_size[1]
-
-    cell_hists = np.zeros((n_cells_y, n_cells_x, n_orientations))
-
-    for cy in range(n_cells_y):
-        for cx in range(n_cells_x):
-            y_start = cy * cell_size[0]
-            y_end = y_start + cell_size[0]
-            x_start = cx * cell_size[1]
-            x_end = x_start + cell_size[1]
-
-            cell_mag = magnitude[y_start:y_end, x_start:x_end]
-            cell_ori = orientation[y_start:y_end, x_start:x_end]
-
-            # Bin orientations
-            bin_width = 180 / n_orientations
-            bins = (cell_ori / bin_width).astype(int) % n_orientations
-
-            for b in range(n_orientations):
-                cell_hists[cy, cx, b] = np.sum(cell_mag[bins == b])
-
-    # Block normalization
-    n_blocks_y = n_cells_y - block_size[0] + 1
-    n_blocks_x = n_cells_x - block_size[1] + 1
-
-    hog_features = []
-    for by in range(n_blocks_y):
-        for bx in range(n_blocks_x):
-            block = cell_hists[by:by+block_size[0], bx:bx+block_size[1], :].flatten()
-            norm = np.sqrt(np.sum(block**2) + 1e-7)
-            hog_features.extend(block / norm)
-
-    return np.array(hog_features, dtype=np.float32)
+    # Gradients, cell histograms and block normalization in one vectorized pass
+    return hog_descriptor(
+        img_array,
+        config.hog_orientations,
+        config.hog_pixels_per_cell,
+        config.hog_cells_per_block,
+    )
 
 
 # ==================== TEXTURE FEATURES (LBP) ====================
@@ -312,36 +272,10 @@ def extract_lbp_features(image: Image.Image, config: FeatureConfig = None) -> np
     gray = gray.resize((64, 64))
     img_array = np.array(gray, dtype=np.float32)
 
-    radius = config.lbp_radius
     n_points = config.lbp_points
 
-    # Generate sampling points
-    angles = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
-    sample_x = radius * np.cos(angles)
-    sample_y = radius * np.sin(angles)
-
-    height, width = img_array.shape
-    lbp = np.zeros((height - 2*radius, width - 2*radius), dtype=np.uint32)
-
-    for i, (dx, dy) in enumerate(zip(sample_x, sample_y)):
-        # Bilinear interpolation for sub-pixel sampling
-        x1, y1 = int(np.floor(dx)), int(np.floor(dy))
-        x2, y2 = x1 + 1, y1 + 1
-
-        fx, fy = dx - x1, dy - y1
-
-        for y in range(radius, height - radius):
-            for x in range(radius, width - radius):
-                center = img_array[y, x]
-
-                # Simplified: nearest neighbor sampling
-                sx = int(round(x + dx))
-                sy = int(round(y + dy))
-
-                if 0 <= sx < width and 0 <= sy < height:
-                    neighbor = img_array[sy, sx]
-                    if neighbor >= center:
-                        lbp[y - radius, x - radius] |= (1 << i)
+    # Compare every sample point against the center with shifted arrays
+    lbp = lbp_codes(img_array, config.lbp_radius, n_points)
 
     # Create histogram of LBP values
     # Using uniform patterns (reduces dimensionality)
@@ -364,26 +298,8 @@ def extract_edge_features(image: Image.Image) -> np.ndarray:
     gray = gray.resize((64, 64))
     img_array = np.array(gray, dtype=np.float32)
 
-    # Sobel kernels
-    sobel_x = np.array([[-1, 0, 1], [-2, 0, 2], [-1, 0, 1]], dtype=np.float32)
-    sobel_y = np.array([[-1, -2, -1], [0, 0, 0], [1, 2, 1]], dtype=np.float32)
-
-    # Simple convolution
-    def convolve2d(img, kernel):
-        h, w = img.shape
-        kh, kw = kernel.shape
-        pad_h, pad_w = kh // 2, kw // 2
-
-        result = np.zeros_like(img)
-        for y in range(pad_h, h - pad_h):
-            for x in range(pad_w, w - pad_w):
-                region = img[y-pad_h:y+pad_h+1, x-pad_w:x+pad_w+1]
-                result[y, x] = np.sum(region * kernel)
-
-        return result
-
-    gx = convolve2d(img_array, sobel_x)
-    gy = convolve2d(img_array, sobel_y)
+    # Separable Sobel gradients
+    gx, gy = sobel_gradients(img_array)
 
     # Magnitude and direction
     magnitude = np.sqrt(gx**2 + gy**2)
@@ -487,65 +403,19 @@ def extract_keypoint_features(image: Image.Image, max_keypoints: int = 100) -> n
     gray = gray.resize((128, 128))
     img_array = np.array(gray, dtype=np.float32)
 
-    # FAST-like corner detection (simplified)
-    corners = []
-    threshold = 20
-
-    for y in range(3, img_array.shape[0] - 3):
-        for x in range(3, img_array.shape[1] - 3):
-            center = img_array[y, x]
-
-            # Check circle of radius 3
-            circle_points = [
-                img_array[y-3, x], img_array[y-2, x+2], img_array[y, x+3],
-                img_array[y+2, x+2], img_array[y+3, x], img_array[y+2, x-2],
-                img_array[y, x-3], img_array[y-2, x-2]
-            ]
-
-            brighter = sum(1 for p in circle_points if p > center + threshold)
-            darker = sum(1 for p in circle_points if p < center - threshold)
-
-            if brighter >= 6 or darker >= 6:
-                # Calculate corner strength (Harris-like)
-                patch = img_array[y-1:y+2, x-1:x+2]
-                gx = patch[:, 2] - patch[:, 0]
-                gy = patch[2, :] - patch[0, :]
-
-                strength = np.sum(gx**2) * np.sum(gy**2) - np.sum(gx * gy)**2
-                corners.append((y, x, strength))
-
-    # Sort by strength and take top keypoints
-    corners.sort(key=lambda c: c[2], reverse=True)
-    corners = corners[:max_keypoints]
+    # FAST-like corner detection (simplified), sorted by strength
+    corners = fast_corners(img_array, threshold=20, max_keypoints=max_keypoints)
 
     if len(corners) == 0:
         return np.zeros(256, dtype=np.float32)
 
     # Extract simple descriptors (BRIEF-like)
-    descriptors = []
-
-    for y, x, _ in corners:
-        if y < 8 or y >= img_array.shape[0] - 8 or x < 8 or x >= img_array.shape[1] - 8:
-            continue
-
-        patch = img_array[y-8:y+8, x-8:x+8]
-
-        # Simple binary tests (BRIEF-like)
-        desc = []
-        np.random.seed(42)  # Deterministic
-        for _ in range(32):
-            y1, x1 = np.random.randint(0, 16, 2)
-            y2, x2 = np.random.randint(0, 16, 2)
-            desc.append(1 if patch[y1, x1] > patch[y2, x2] else 0)
-
-        descriptors.append(desc)
+    descriptors = brief_descriptors(img_array, corners)
 
     if len(descriptors) == 0:
         return np.zeros(256, dtype=np.float32)
 
     # Aggregate descriptors into a bag-of-words histogram
-    descriptors = np.array(descriptors)
-
     # Convert binary to decimal for binning
     desc_values = np.packbits(descriptors, axis=1)
 
@@ -574,14 +444,7 @@ def extract_text_features(image: Image.Image) -> np.ndarray:
     # High-frequency content indicates text
     # Use Laplacian-like filter
     laplacian = np.array([[0, 1, 0], [1, -4, 1], [0, 1, 0]], dtype=np.float32)
-
-    h, w = img_array.shape
-    edges = np.zeros_like(img_array)
-
-    for y in range(1, h - 1):
-        for x in range(1, w - 1):
-            region = img_array[y-1:y+2, x-1:x+2]
-            edges[y, x] = abs(np.sum(region * laplacian))
+    edges = np.abs(correlate3x3(img_array, laplacian))
 
     # Statistics that indicate text presence
     features = np.array([
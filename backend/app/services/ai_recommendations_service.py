@@ -10,26 +10,33 @@ Provides intelligent menu item recommendations using:
 
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc, case
+from sqlalchemy import func, and_, or_, desc
 from datetime import datetime, timedelta, timezone
 import logging
 from redis import Redis
-import json
 from enum import Enum
-import requests
 
 from app.core.config import settings
+from app.core.http_client import sync_http_client
 from app.models import (
-    MenuItem, Order, OrderItem, MenuCategory, ItemImage,
-    AnalyticsEvent, ItemRating, VenueStation, ItemTag,
-    ItemTagLink
+    MenuItem, Order, OrderItem, MenuCategory, VenueStation, ItemTag,
+    ItemTagLink, MenuItemRatingAggregate
 )
+from app.models.advanced_features import CustomerJourneyEvent
+from app.services.recommendation_model import recommendation_models
 
 logger = logging.getLogger(__name__)
 
 # OpenWeatherMap API key from environment
 OPENWEATHER_API_KEY = settings.openweather_api_key
 
+# Ratings come from the pre-calculated aggregates; a row without reviews
+# holds average_rating 0, so it is left out of the join
+RATED_ITEM = and_(
+    MenuItemRatingAggregate.menu_item_id == MenuItem.id,
+    MenuItemRatingAggregate.total_reviews > 0
+)
+
 
 class WeatherCondition(str, Enum):
     """Weather conditions for ski resort recommendations"""
@@ -76,7 +83,8 @@ class AIRecommendationsService:
 
         try:
             url = f"https://api.openweathermap.org/data/2.5/weather?lat={latitude}&lon={longitude}&appid={OPENWEATHER_API_KEY}&units=metric"
-            response = requests.get(url, timeout=5)
+            with sync_http_client("weather", timeout=5) as client:
+                response = client.get(url)
             response.raise_for_status()
             data = response.json()
 
@@ -114,20 +122,15 @@ class AIRecommendationsService:
 
     def _get_primary_image_url(self, menu_item_id: int) -> Optional[str]:
         """Get the primary image URL for a menu item"""
-        primary_image = self.db.query(ItemImage.url).filter(
-            ItemImage.item_id == menu_item_id,
-            ItemImage.is_primary == True
-        ).first()
-
-        if primary_image:
-            return primary_image[0]
-
-        # Fallback to first image if no primary set
-        first_image = self.db.query(ItemImage.url).filter(
-            ItemImage.item_id == menu_item_id
-        ).first()
+        return self._get_primary_image_urls([menu_item_id]).get(menu_item_id)
 
-        return first_image[0] if first_image else None
+    def _get_primary_image_urls(self, menu_item_ids: List[int]) -> Dict[int, Optional[str]]:
+        """Get the primary image URLs for several menu items in one query"""
+        if not menu_item_ids:
+            return {}
+        return dict(self.db.query(MenuItem.id, MenuItem.image_url).filter(
+            MenuItem.id.in_(set(menu_item_ids))
+        ).all())
 
     # ==================== COLLABORATIVE FILTERING ====================
 
@@ -140,94 +143,21 @@ class AIRecommendationsService:
         """
         User-based collaborative filtering
         "Customers similar to you also liked..."
-        Finds customers with similar order patterns and recommends items they ordered
+        Recommends items ordered by the customer's precomputed nearest neighbours
+        (see recommendation_model) that the customer hasn't tried yet
         """
-        # Get items ordered by this customer
-        customer_items = self.db.query(MenuItem.id).join(
-            OrderItem, MenuItem.id == OrderItem.menu_item_id
-        ).join(
-            Order, OrderItem.order_id == Order.id
-        ).join(
-            VenueStation, Order.station_id == VenueStation.id
-        ).filter(
-            Order.customer_id == customer_id,
-            VenueStation.venue_id == venue_id
-        ).distinct().all()
-
-        if not customer_items:
-            # No order history, return popular items
-            logger.info(f"No order history for customer {customer_id}, returning popular items")
-            return self.get_popular_items(venue_id, limit)
-
-        customer_item_ids = [item.id for item in customer_items]
-
-        # Find other customers who ordered the same items (similar customers)
-        similar_customers = self.db.query(
-            Order.customer_id,
-            func.count(func.distinct(OrderItem.menu_item_id)).label('common_items')
-        ).join(
-            OrderItem, Order.id == OrderItem.order_id
-        ).join(
-            VenueStation, Order.station_id == VenueStation.id
-        ).filter(
-            Order.customer_id != customer_id,
-            Order.customer_id.isnot(None),
-            OrderItem.menu_item_id.in_(customer_item_ids),
-            VenueStation.venue_id == venue_id
-        ).group_by(Order.customer_id).order_by(
-            desc('common_items')
-        ).limit(10).all()
+        recommendations = recommendation_models.get(self.db, venue_id).user_based(customer_id, limit)
 
-        if not similar_customers:
-            # No similar customers found, return popular items
+        if recommendations is None:
+            # No order history or no similar customers, return popular items
             logger.info(f"No similar customers found for customer {customer_id}, returning popular items")
             return self.get_popular_items(venue_id, limit)
 
-        similar_customer_ids = [customer.customer_id for customer in similar_customers]
-
-        # Get items ordered by similar customers that this customer hasn't tried
-        recommendations = self.db.query(
-            MenuItem.id,
-            MenuItem.name,
-            MenuItem.price,
-            func.count(func.distinct(Order.customer_id)).label('customer_count'),
-            func.count(OrderItem.id).label('order_count'),
-            func.avg(ItemRating.rating).label('avg_rating')
-        ).join(
-            OrderItem, MenuItem.id == OrderItem.menu_item_id
-        ).join(
-            Order, OrderItem.order_id == Order.id
-        ).join(
-            VenueStation, Order.station_id == VenueStation.id
-        ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
-        ).filter(
-            Order.customer_id.in_(similar_customer_ids),
-            MenuItem.id.notin_(customer_item_ids),
-            MenuItem.available == True,
-            VenueStation.venue_id == venue_id
-        ).group_by(MenuItem.id).order_by(
-            desc('customer_count'),
-            desc('avg_rating'),
-            desc('order_count')
-        ).limit(limit).all()
-
-        results = []
         for r in recommendations:
-            image_url = self._get_primary_image_url(r.id)
-            results.append({
-                'item_id': r.id,
-                'name': r.name,
-                'price': float(r.price),
-                'image_url': image_url,
-                'customer_count': r.customer_count,
-                'order_count': r.order_count,
-                'avg_rating': float(r.avg_rating) if r.avg_rating else None,
-                'recommendation_type': 'user_based',
-                'reason': 'Customers like you also enjoyed this'
-            })
+            r['recommendation_type'] = 'user_based'
+            r['reason'] = 'Customers like you also enjoyed this'
 
-        return results
+        return recommendations
     
     def get_item_based_recommendations(
         self,
@@ -238,63 +168,15 @@ class AIRecommendationsService:
         """
         Item-based collaborative filtering
         "Customers who ordered X also ordered Y"
-        Finds items frequently ordered together in the same order
+        Served from the venue's resident item co-occurrence matrix
         """
-        cache_key = f"item_reco:{item_id}:{venue_id}"
-        if self.redis:
-            cached = self.redis.get(cache_key)
-            if cached:
-                return json.loads(cached)
-
-        # Find orders containing this item, filtering by venue through station
-        orders_with_item = self.db.query(Order.id).join(
-            OrderItem
-        ).join(
-            VenueStation, Order.station_id == VenueStation.id
-        ).filter(
-            OrderItem.menu_item_id == item_id,
-            VenueStation.venue_id == venue_id
-        ).subquery()
+        recommendations = recommendation_models.get(self.db, venue_id).item_based(item_id, limit)
 
-        # Find other items frequently ordered together
-        recommendations = self.db.query(
-            MenuItem.id,
-            MenuItem.name,
-            MenuItem.price,
-            func.count(OrderItem.id).label('co_occurrence'),
-            func.avg(ItemRating.rating).label('avg_rating')
-        ).join(
-            OrderItem, MenuItem.id == OrderItem.menu_item_id
-        ).join(
-            Order, OrderItem.order_id == Order.id
-        ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
-        ).filter(
-            Order.id.in_(orders_with_item),
-            MenuItem.id != item_id,
-            MenuItem.available == True
-        ).group_by(MenuItem.id).order_by(
-            desc('co_occurrence')
-        ).limit(limit).all()
-
-        results = []
         for r in recommendations:
-            image_url = self._get_primary_image_url(r.id)
-            results.append({
-                'item_id': r.id,
-                'name': r.name,
-                'price': float(r.price),
-                'image_url': image_url,
-                'co_occurrence': r.co_occurrence,
-                'avg_rating': float(r.avg_rating) if r.avg_rating else None,
-                'recommendation_type': 'item_based',
-                'reason': 'Often ordered together'
-            })
+            r['recommendation_type'] = 'item_based'
+            r['reason'] = 'Often ordered together'
 
-        if self.redis:
-            self.redis.setex(cache_key, self.cache_ttl, json.dumps(results))
-
-        return results
+        return recommendations
     
     # ==================== CONTENT-BASED FILTERING ====================
 
@@ -354,17 +236,14 @@ class AIRecommendationsService:
             MenuItem.price,
             MenuItem.category_id,
             func.count(OrderItem.id).label('order_count'),
-            func.avg(ItemRating.rating).label('avg_rating')
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
         ).outerjoin(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
-        ).join(
-            VenueStation, MenuItem.station_id == VenueStation.id
+            MenuItemRatingAggregate, RATED_ITEM
         ).filter(
             MenuItem.category_id.in_(preferred_categories),
             MenuItem.available == True,
-            VenueStation.venue_id == venue_id,
             MenuItem.id.notin_(ordered_item_ids) if ordered_item_ids else True
         ).group_by(MenuItem.id).order_by(
             desc('avg_rating'),
@@ -404,17 +283,14 @@ class AIRecommendationsService:
             MenuItem.price,
             MenuItem.category_id,
             func.count(OrderItem.id).label('order_count'),
-            func.avg(ItemRating.rating).label('avg_rating')
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
         ).outerjoin(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
-        ).join(
-            VenueStation, MenuItem.station_id == VenueStation.id
+            MenuItemRatingAggregate, RATED_ITEM
         ).filter(
             MenuItem.category_id == category_id,
-            MenuItem.available == True,
-            VenueStation.venue_id == venue_id
+            MenuItem.available == True
         ).group_by(MenuItem.id).order_by(
             desc('avg_rating'),
             desc('order_count')
@@ -497,7 +373,7 @@ class AIRecommendationsService:
             MenuItem.price,
             MenuItem.description,
             func.count(OrderItem.id).label('order_count'),
-            func.avg(ItemRating.rating).label('avg_rating')
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
         ).outerjoin(
             ItemTagLink, MenuItem.id == ItemTagLink.item_id
         ).outerjoin(
@@ -505,11 +381,8 @@ class AIRecommendationsService:
         ).outerjoin(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
-        ).join(
-            VenueStation, MenuItem.station_id == VenueStation.id
+            MenuItemRatingAggregate, RATED_ITEM
         ).filter(
-            VenueStation.venue_id == venue_id,
             MenuItem.available == True,
             or_(
                 ItemTag.name.in_(tags),
@@ -600,7 +473,7 @@ class AIRecommendationsService:
             MenuItem.price,
             MenuItem.description,
             func.count(OrderItem.id).label('order_count'),
-            func.avg(ItemRating.rating).label('avg_rating')
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
         ).join(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).join(
@@ -608,7 +481,7 @@ class AIRecommendationsService:
         ).join(
             VenueStation, Order.station_id == VenueStation.id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
+            MenuItemRatingAggregate, RATED_ITEM
         ).outerjoin(
             ItemTagLink, MenuItem.id == ItemTagLink.item_id
         ).outerjoin(
@@ -671,60 +544,20 @@ class AIRecommendationsService:
         """
         Cross-sell recommendations based on current cart
         Suggests complementary items (e.g., fries with burger, wine with pasta)
-        Finds items frequently ordered together with items in the cart
+        Sums the cart items' rows of the resident co-occurrence matrix
         """
         if not cart_items:
             # Empty cart, return popular items instead
             logger.info("Empty cart, returning popular items for cross-sell")
             return self.get_popular_items(venue_id, limit)
 
-        # Find orders containing any of the cart items
-        orders_with_cart_items = self.db.query(Order.id).join(
-            OrderItem
-        ).join(
-            VenueStation, Order.station_id == VenueStation.id
-        ).filter(
-            OrderItem.menu_item_id.in_(cart_items),
-            VenueStation.venue_id == venue_id
-        ).subquery()
-
-        # Find other items frequently ordered together with cart items
-        recommendations = self.db.query(
-            MenuItem.id,
-            MenuItem.name,
-            MenuItem.price,
-            func.count(OrderItem.id).label('frequency'),
-            func.avg(ItemRating.rating).label('avg_rating')
-        ).join(
-            OrderItem, MenuItem.id == OrderItem.menu_item_id
-        ).join(
-            Order, OrderItem.order_id == Order.id
-        ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
-        ).filter(
-            Order.id.in_(orders_with_cart_items),
-            MenuItem.id.notin_(cart_items),
-            MenuItem.available == True
-        ).group_by(MenuItem.id).order_by(
-            desc('frequency'),
-            desc('avg_rating')
-        ).limit(limit).all()
+        recommendations = recommendation_models.get(self.db, venue_id).cart_based(cart_items, limit)
 
-        results = []
         for r in recommendations:
-            image_url = self._get_primary_image_url(r.id)
-            results.append({
-                'item_id': r.id,
-                'name': r.name,
-                'price': float(r.price),
-                'image_url': image_url,
-                'frequency': r.frequency,
-                'avg_rating': float(r.avg_rating) if r.avg_rating else None,
-                'recommendation_type': 'cross_sell',
-                'reason': 'Great with your current selection'
-            })
+            r['recommendation_type'] = 'cross_sell'
+            r['reason'] = 'Great with your current selection'
 
-        return results
+        return recommendations
     
     # ==================== POPULAR ITEMS ====================
 
@@ -746,23 +579,24 @@ class AIRecommendationsService:
             MenuItem.price,
             func.count(OrderItem.id).label('order_count'),
             func.sum(OrderItem.quantity).label('total_quantity'),
-            func.avg(ItemRating.rating).label('avg_rating'),
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating'),
             # Popularity score: order_count * 2 + total_quantity + (avg_rating * 10)
             (
                 func.count(OrderItem.id) * 2 +
                 func.coalesce(func.sum(OrderItem.quantity), 0) +
-                func.coalesce(func.avg(ItemRating.rating) * 10, 0)
+                func.coalesce(func.avg(MenuItemRatingAggregate.average_rating) * 10, 0)
             ).label('popularity_score')
         ).join(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).join(
             Order, OrderItem.order_id == Order.id
-        ).join(
+        ).outerjoin(
             VenueStation, Order.station_id == VenueStation.id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
+            MenuItemRatingAggregate, RATED_ITEM
         ).filter(
-            VenueStation.venue_id == venue_id,
+            # Same venue rule as the resident model: the order's venue or its station's
+            or_(Order.venue_id == venue_id, VenueStation.venue_id == venue_id),
             Order.created_at >= since_date,
             MenuItem.available == True
         ).group_by(MenuItem.id).order_by(
@@ -770,14 +604,14 @@ class AIRecommendationsService:
             desc('order_count')
         ).limit(limit).all()
 
+        image_urls = self._get_primary_image_urls([r.id for r in popular])
         results = []
         for r in popular:
-            image_url = self._get_primary_image_url(r.id)
             results.append({
                 'item_id': r.id,
                 'name': r.name,
                 'price': float(r.price),
-                'image_url': image_url,
+                'image_url': image_urls.get(r.id),
                 'order_count': r.order_count,
                 'total_quantity': r.total_quantity or 0,
                 'avg_rating': float(r.avg_rating) if r.avg_rating else None,
@@ -816,7 +650,7 @@ class AIRecommendationsService:
             MenuItem.price,
             func.count(OrderItem.id).label('order_count'),
             func.sum(OrderItem.quantity).label('total_quantity'),
-            func.avg(ItemRating.rating).label('avg_rating')
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
         ).join(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).join(
@@ -824,7 +658,7 @@ class AIRecommendationsService:
         ).join(
             VenueStation, Order.station_id == VenueStation.id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
+            MenuItemRatingAggregate, RATED_ITEM
         ).filter(
             VenueStation.venue_id == venue_id,
             Order.created_at >= since_date,
@@ -880,7 +714,7 @@ class AIRecommendationsService:
             MenuItem.price,
             func.count(OrderItem.id).label('order_count'),
             func.sum(OrderItem.quantity).label('total_quantity'),
-            func.avg(ItemRating.rating).label('avg_rating')
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
         ).join(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).join(
@@ -888,7 +722,7 @@ class AIRecommendationsService:
         ).join(
             VenueStation, Order.station_id == VenueStation.id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
+            MenuItemRatingAggregate, RATED_ITEM
         ).filter(
             VenueStation.venue_id == venue_id,
             Order.created_at >= since_date,
@@ -1002,10 +836,12 @@ class AIRecommendationsService:
         """
         try:
             # Store in analytics for later analysis
-            event = AnalyticsEvent(
-                venue_id=venue_id,
+            event = CustomerJourneyEvent(
+                session_id=session_id or f"venue-{venue_id}",
                 event_type='recommendation_feedback',
+                channel='recommendations',
                 event_data={
+                    'venue_id': venue_id,
                     'item_id': item_id,
                     'recommendation_type': recommendation_type,
                     'action': action,
@@ -1092,7 +928,7 @@ class AIRecommendationsService:
             MenuItem.price,
             recent_orders.c.recent_count,
             historical_orders.c.historical_count,
-            func.avg(ItemRating.rating).label('avg_rating'),
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating'),
             # Trend score with smoothing to avoid division by zero
             (
                 func.coalesce(recent_orders.c.recent_count, 0) * days_ratio /
@@ -1103,11 +939,8 @@ class AIRecommendationsService:
         ).outerjoin(
             historical_orders, MenuItem.id == historical_orders.c.id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
-        ).join(
-            VenueStation, MenuItem.station_id == VenueStation.id
+            MenuItemRatingAggregate, RATED_ITEM
         ).filter(
-            VenueStation.venue_id == venue_id,
             MenuItem.available == True,
             recent_orders.c.recent_count > 0  # Must have recent orders
         ).group_by(
@@ -1181,9 +1014,7 @@ class AIRecommendationsService:
         price_filter = True
         if segment == 'champions':
             # Show premium items for champions
-            avg_price = self.db.query(func.avg(MenuItem.price)).join(
-                VenueStation, MenuItem.station_id == VenueStation.id
-            ).filter(VenueStation.venue_id == venue_id).scalar() or 0
+            avg_price = self.db.query(func.avg(MenuItem.price)).scalar() or 0
             price_filter = MenuItem.price >= avg_price
         elif segment == 'at_risk':
             # Show their past favorites
@@ -1195,7 +1026,7 @@ class AIRecommendationsService:
             MenuItem.name,
             MenuItem.price,
             func.count(OrderItem.id).label('segment_orders'),
-            func.avg(ItemRating.rating).label('avg_rating')
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
         ).join(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).join(
@@ -1203,7 +1034,7 @@ class AIRecommendationsService:
         ).join(
             VenueStation, Order.station_id == VenueStation.id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
+            MenuItemRatingAggregate, RATED_ITEM
         ).filter(
             Order.customer_id.in_(segment_customer_ids),
             VenueStation.venue_id == venue_id,
@@ -1280,7 +1111,7 @@ class AIRecommendationsService:
             MenuItem.name,
             MenuItem.price,
             func.count(OrderItem.id).label('seasonal_orders'),
-            func.avg(ItemRating.rating).label('avg_rating')
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
         ).join(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).join(
@@ -1288,7 +1119,7 @@ class AIRecommendationsService:
         ).join(
             VenueStation, Order.station_id == VenueStation.id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
+            MenuItemRatingAggregate, RATED_ITEM
         ).outerjoin(
             ItemTagLink, MenuItem.id == ItemTagLink.item_id
         ).outerjoin(
@@ -1336,104 +1167,21 @@ class AIRecommendationsService:
         limit: int = 10
     ) -> List[Dict]:
         """
-        Calculate item similarity based on multiple features:
-        - Category similarity
-        - Price range similarity
-        - Tag overlap
-        - Co-occurrence in orders
-        - Rating similarity
+        Calculate item similarity based on content features:
+        - Same category: +40 points
+        - Similar price (within 30%): +20 points
+        - Tag overlap: +10 points per shared tag
 
+        Scored in one pass over the venue's resident content vectors.
         Returns items most similar to the given item
         """
-        # Get the source item
-        source_item = self.db.query(MenuItem).filter(MenuItem.id == item_id).first()
-        if not source_item:
-            return []
+        recommendations = recommendation_models.get(self.db, venue_id).similar_items(item_id, limit)
 
-        # Get source item's tags
-        source_tags = self.db.query(ItemTag.id).join(
-            ItemTagLink
-        ).filter(ItemTagLink.item_id == item_id).all()
-        source_tag_ids = [t.id for t in source_tags]
-
-        # Price range (within 30% of source price)
-        price_margin = float(source_item.price) * 0.3
-        min_price = float(source_item.price) - price_margin
-        max_price = float(source_item.price) + price_margin
-
-        # Calculate similarity score
-        # Components:
-        # - Same category: +40 points
-        # - Similar price: +20 points
-        # - Tag overlap: +10 points per shared tag
-        # - Co-occurrence: +5 points per co-occurrence
-
-        similar_items = self.db.query(
-            MenuItem.id,
-            MenuItem.name,
-            MenuItem.price,
-            MenuItem.category_id,
-            func.count(func.distinct(ItemTagLink.tag_id)).filter(
-                ItemTagLink.tag_id.in_(source_tag_ids)
-            ).label('shared_tags'),
-            func.avg(ItemRating.rating).label('avg_rating'),
-            # Category similarity
-            case(
-                (MenuItem.category_id == source_item.category_id, 40),
-                else_=0
-            ).label('category_score'),
-            # Price similarity
-            case(
-                (and_(MenuItem.price >= min_price, MenuItem.price <= max_price), 20),
-                else_=0
-            ).label('price_score')
-        ).outerjoin(
-            ItemTagLink, MenuItem.id == ItemTagLink.item_id
-        ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
-        ).join(
-            VenueStation, MenuItem.station_id == VenueStation.id
-        ).filter(
-            MenuItem.id != item_id,
-            MenuItem.available == True,
-            VenueStation.venue_id == venue_id
-        ).group_by(MenuItem.id).all()
-
-        # Calculate total similarity and sort
-        scored_items = []
-        for item in similar_items:
-            total_score = (
-                (item.category_score or 0) +
-                (item.price_score or 0) +
-                (item.shared_tags or 0) * 10
-            )
-            if total_score > 0:
-                scored_items.append({
-                    'item': item,
-                    'score': total_score
-                })
-
-        # Sort by score and take top items
-        scored_items.sort(key=lambda x: x['score'], reverse=True)
-        top_items = scored_items[:limit]
-
-        results = []
-        for scored in top_items:
-            item = scored['item']
-            image_url = self._get_primary_image_url(item.id)
-            results.append({
-                'item_id': item.id,
-                'name': item.name,
-                'price': float(item.price),
-                'image_url': image_url,
-                'similarity_score': scored['score'],
-                'shared_tags': item.shared_tags or 0,
-                'avg_rating': float(item.avg_rating) if item.avg_rating else None,
-                'recommendation_type': 'similar_items',
-                'reason': 'Similar to what you viewed'
-            })
+        for r in recommendations:
+            r['recommendation_type'] = 'similar_items'
+            r['reason'] = 'Similar to what you viewed'
 
-        return results
+        return recommendations
 
     def get_diversity_aware_recommendations(
         self,
@@ -1455,10 +1203,7 @@ class AIRecommendationsService:
             func.count(MenuItem.id).label('item_count')
         ).join(
             MenuItem, MenuCategory.id == MenuItem.category_id
-        ).join(
-            VenueStation, MenuItem.station_id == VenueStation.id
         ).filter(
-            VenueStation.venue_id == venue_id,
             MenuItem.available == True,
             MenuItem.id.notin_(already_recommended) if already_recommended else True
         ).group_by(MenuCategory.id).all()
@@ -1480,11 +1225,11 @@ class AIRecommendationsService:
                 MenuItem.name,
                 MenuItem.price,
                 func.count(OrderItem.id).label('order_count'),
-                func.avg(ItemRating.rating).label('avg_rating')
+                func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
             ).outerjoin(
                 OrderItem, MenuItem.id == OrderItem.menu_item_id
             ).outerjoin(
-                ItemRating, MenuItem.id == ItemRating.item_id
+                MenuItemRatingAggregate, RATED_ITEM
             ).filter(
                 MenuItem.category_id == category.id,
                 MenuItem.available == True,
@@ -1531,15 +1276,12 @@ class AIRecommendationsService:
             MenuItem.price,
             MenuItem.created_at,
             func.count(OrderItem.id).label('order_count'),
-            func.avg(ItemRating.rating).label('avg_rating')
+            func.avg(MenuItemRatingAggregate.average_rating).label('avg_rating')
         ).outerjoin(
             OrderItem, MenuItem.id == OrderItem.menu_item_id
         ).outerjoin(
-            ItemRating, MenuItem.id == ItemRating.item_id
-        ).join(
-            VenueStation, MenuItem.station_id == VenueStation.id
+            MenuItemRatingAggregate, RATED_ITEM
         ).filter(
-            VenueStation.venue_id == venue_id,
             MenuItem.available == True,
             MenuItem.created_at >= cutoff_date
         ).group_by(MenuItem.id).order_by(
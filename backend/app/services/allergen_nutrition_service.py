@@ -14,6 +14,7 @@ Features:
 
 from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 import uuid
 import enum
@@ -163,6 +164,7 @@ class AllergenNutritionService:
     }
     
     def __init__(self, db: Session):
+        # An AsyncSession is accepted for the *_async methods
         self.db = db
         # In-memory storage for nutrition data (should be in database)
         self._nutrition_data: Dict[int, Dict] = {}
@@ -293,6 +295,38 @@ class AllergenNutritionService:
         menu_items_list = self.db.query(MenuItem).filter(
             MenuItem.id.in_(menu_item_ids)
         ).all() if menu_item_ids else []
+
+        return self._order_allergen_report(order_id, order_items, menu_items_list, customer_allergens, language)
+
+    async def check_order_allergens_async(
+        self,
+        order_id: int,
+        customer_allergens: List[str],
+        language: str = "en"
+    ) -> Dict[str, Any]:
+        """check_order_allergens for a service built on an ``AsyncSession``."""
+        order = await self.db.get(Order, order_id)
+        if not order:
+            return {"success": False, "error": "Order not found"}
+
+        order_items = (await self.db.scalars(select(OrderItem).where(OrderItem.order_id == order_id))).all()
+
+        menu_item_ids = [oi.menu_item_id for oi in order_items]
+        menu_items_list = (await self.db.scalars(
+            select(MenuItem).where(MenuItem.id.in_(menu_item_ids))
+        )).all() if menu_item_ids else []
+
+        return self._order_allergen_report(order_id, order_items, menu_items_list, customer_allergens, language)
+
+    def _order_allergen_report(
+        self,
+        order_id: int,
+        order_items: List[OrderItem],
+        menu_items_list: List[MenuItem],
+        customer_allergens: List[str],
+        language: str
+    ) -> Dict[str, Any]:
+        """Classify loaded order lines as dangerous / caution / safe."""
         menu_items_map = {mi.id: mi for mi in menu_items_list}
 
         warnings = []
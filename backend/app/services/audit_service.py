@@ -1,31 +1,204 @@
 """Audit logging service.
 
 Provides functions to write audit log entries for state-changing operations.
-Used by the AuditLoggingMiddleware and can be called directly from route handlers
+Used by the request pipeline middleware and can be called directly from route handlers
 for more detailed logging (e.g., old/new values on updates).
 
-NOTE: When called from AuditLoggingMiddleware without an explicit ``db`` session,
-``log_action`` creates its own short-lived session so the middleware does not need
-to participate in the request's dependency-injected session.  This means each
-audited request opens a second DB connection.
+When ``log_action`` is called without an explicit ``db`` session (middleware,
+login events) the entry is handed to ``audit_writer``: a bounded in-process
+queue drained by a background task that bulk-inserts rows every
+``audit_flush_interval_ms`` or ``audit_batch_size`` rows, whichever comes first.
+Requests never wait on the audit write and never take a second pool connection.
+The writer is started/flushed by the application lifespan; outside of it
+(scripts, tests without lifespan) entries are written synchronously as before.
 
-TODO: Replace the synchronous own-session approach with an async background task
-(e.g. ``asyncio.create_task`` or a lightweight queue) so audit writes never block
-the response and do not require a second connection from the pool.
+If the bulk insert fails and ``audit_spill_path`` is set, the batch is appended
+to that JSONL file instead of being lost.
 """
 
+import asyncio
+import json
 import logging
+import threading
+from collections import deque
 from datetime import datetime, timezone
-from typing import Any, Optional
+from typing import Any, Deque, List, Optional
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.db.session import SessionLocal
 from app.models.operations import AuditLogEntry
 
 logger = logging.getLogger("audit")
 
 
+class AuditLogWriter:
+    """Bounded queue of audit rows, bulk-inserted by a background task."""
+
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.25,
+        spill_path: Optional[str] = None,
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self._queue: Deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "spilled": 0,
+            "write_errors": 0,
+            "batches": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def submit(self, row: dict) -> bool:
+        """Queue one audit row.
+
+        Returns False when the writer is not running so the caller can fall
+        back to a synchronous write. A full queue drops the row (counted in
+        ``dropped``) rather than blocking the request.
+        """
+        if not self.running:
+            return False
+        with self._lock:
+            if len(self._queue) >= self.max_queue_size:
+                self._stats["dropped"] += 1
+                return True
+            self._queue.append(row)
+            self._stats["enqueued"] += 1
+            wake = len(self._queue) >= self.batch_size
+        if wake:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Audit writer started (batch {self.batch_size} rows / "
+            f"{self.flush_interval * 1000:.0f}ms, queue limit {self.max_queue_size})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the drain task and flush whatever is still queued."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write every queued row; returns the number of rows taken off the queue."""
+        taken = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return taken
+            taken += len(batch)
+            await asyncio.to_thread(self._write_batch, batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Audit writer flush failed: {e}")
+
+    def _take_batch(self) -> List[dict]:
+        with self._lock:
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _write_batch(self, batch: List[dict]) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditLogEntry), batch)
+            db.commit()
+            with self._lock:
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                self._stats["write_errors"] += 1
+            logger.error(f"Failed to write {len(batch)} audit log entries: {e}")
+            self._spill(batch)
+        finally:
+            db.close()
+
+    def _spill(self, batch: List[dict]) -> None:
+        """Append a batch that could not be inserted to the spill file."""
+        if not self.spill_path:
+            with self._lock:
+                self._stats["dropped"] += len(batch)
+            return
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for row in batch:
+                    f.write(json.dumps(row, default=str) + "\n")
+            with self._lock:
+                self._stats["spilled"] += len(batch)
+        except OSError as e:
+            with self._lock:
+                self._stats["dropped"] += len(batch)
+            logger.error(f"Failed to spill audit log entries to {self.spill_path}: {e}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "queue_depth": len(self._queue), "running": self.running}
+
+    def prometheus_lines(self) -> List[str]:
+        stats = self.get_stats()
+        lines = []
+        for name in ("enqueued", "written", "dropped", "spilled", "write_errors"):
+            lines.append(f"# HELP audit_log_{name}_total Audit log entries {name.replace('_', ' ')}")
+            lines.append(f"# TYPE audit_log_{name}_total counter")
+            lines.append(f"audit_log_{name}_total {stats[name]}")
+        lines.append("# HELP audit_log_queue_depth Audit log entries waiting to be written")
+        lines.append("# TYPE audit_log_queue_depth gauge")
+        lines.append(f"audit_log_queue_depth {stats['queue_depth']}")
+        return lines
+
+
+# Global instance
+audit_writer = AuditLogWriter(
+    max_queue_size=settings.audit_queue_max_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_ms / 1000,
+    spill_path=settings.audit_spill_path,
+)
+metrics.register_collector(audit_writer.prometheus_lines)
+
+
 def log_action(
     action: str,
     entity_type: str = "",
@@ -46,24 +219,28 @@ def log_action(
         user_name: Name/email of the user
         ip_address: Client IP address
         details: Additional details (old_value, new_value, description, etc.)
-        db: Optional existing DB session. If None, creates a new one.
+        db: Optional existing DB session. If None, the entry is queued on
+            ``audit_writer`` (or written with a new session when the writer
+            is not running).
     """
+    row = {
+        "user_id": user_id,
+        "user_name": user_name,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": str(entity_id) if entity_id else "",
+        "details": details or {},
+        "ip_address": ip_address or "",
+        "created_at": datetime.now(timezone.utc),
+    }
     own_session = db is None
     if own_session:
+        if audit_writer.submit(row):
+            return
         db = SessionLocal()
 
     try:
-        entry = AuditLogEntry(
-            user_id=user_id,
-            user_name=user_name,
-            action=action,
-            entity_type=entity_type,
-            entity_id=str(entity_id) if entity_id else "",
-            details=details or {},
-            ip_address=ip_address or "",
-            created_at=datetime.now(timezone.utc),
-        )
-        db.add(entry)
+        db.add(AuditLogEntry(**row))
         if own_session:
             # Commit immediately so the short-lived session is flushed and can
             # be returned to the pool as quickly as possible.
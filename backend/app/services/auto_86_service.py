@@ -20,6 +20,7 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy import ForeignKey, String, and_, func, select
 from sqlalchemy.orm import Mapped, Session, mapped_column, relationship
 
+from app.core.cache import invalidate_menu_cache
 from app.db.base import Base, TimestampMixin
 from app.models.location import Location
 from app.models.product import Product
@@ -168,6 +169,8 @@ class Auto86Service:
                         )
 
         self.db.commit()
+        if items_86d or items_un86d:
+            invalidate_menu_cache()
 
         return {
             "product_id": product_id,
@@ -242,6 +245,7 @@ class Auto86Service:
             created_by=user_id,
         )
         self.db.commit()
+        invalidate_menu_cache()
         logger.info("Manual 86: menu_item %s by user %s", menu_item_id, user_id)
         return {"status": "86d", "menu_item_id": menu_item_id, "name": mi.name}
 
@@ -268,6 +272,7 @@ class Auto86Service:
             created_by=user_id,
         )
         self.db.commit()
+        invalidate_menu_cache()
         logger.info("Manual un-86: menu_item %s by user %s", menu_item_id, user_id)
         return {"status": "un86d", "menu_item_id": menu_item_id, "name": mi.name}
 
@@ -1,17 +1,41 @@
 """
 Background Workers Service
 Implements scheduled and async background tasks for gap features
+
+Tasks wait in two heaps: deferred tasks ordered by (scheduled_at, priority)
+and due tasks ordered by (priority, scheduled_at). Idle workers sleep on a
+condition until the earliest deferred task is due or a new task arrives,
+so deferred tasks and retries cost no CPU while they wait. Per-task-type
+concurrency limits keep, e.g., one sync per integration running at a time.
+
+Recurring jobs come from a cron-style table. Each job fires once per
+matching minute and is skipped while its previous run is still pending or
+running. Every API worker runs a scheduler, so a slot is first claimed in
+``scheduled_job_claims`` and only the worker whose claim wins fires it.
 """
 
 import asyncio
+import heapq
+import itertools
 import logging
+import os
+import socket
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, FrozenSet, List, Optional, Callable, Tuple
 from uuid import UUID
 from enum import Enum
 from dataclasses import dataclass, field
 from collections import defaultdict
 import traceback
+from contextlib import contextmanager
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.http_client import http_client
+from app.core.metrics import DURATION_BUCKETS, Histogram, metrics
+from app.models.operations import ScheduledJobClaim
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +57,25 @@ class TaskPriority(str, Enum):
     CRITICAL = "critical"
 
 
+# Heap rank per priority (lower runs first)
+PRIORITY_RANK = {
+    TaskPriority.CRITICAL: 0,
+    TaskPriority.HIGH: 1,
+    TaskPriority.NORMAL: 2,
+    TaskPriority.LOW: 3,
+}
+
+# Maximum concurrently running tasks per task type (others: up to max_workers)
+TASK_CONCURRENCY_LIMITS = {
+    "sync_7shifts": 1,
+    "sync_homebase": 1,
+    "sync_marginedge": 1,
+    "sync_accounting": 1,
+    "reconcile_bnpl_transactions": 1,
+    "deliver_webhook": 3,
+}
+
+
 @dataclass
 class BackgroundTask:
     """Background task definition"""
@@ -52,23 +95,142 @@ class BackgroundTask:
     result: Optional[Dict[str, Any]] = None
 
 
+class CronSchedule:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week),
+    evaluated in UTC. Fields accept ``*``, numbers, ``a-b`` ranges, ``*/n``
+    steps and comma lists; day-of-week 0 is Sunday. When both day fields are
+    restricted, both must match.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        )
+
+    @staticmethod
+    def _parse(part: str, low: int, high: int) -> FrozenSet[int]:
+        values = set()
+        for item in part.split(","):
+            step = 1
+            if "/" in item:
+                item, step_text = item.split("/", 1)
+                step = int(step_text)
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start_text, end_text = item.split("-", 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(item)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Cron field {part!r} out of range {low}-{high}")
+            values.update(range(start, end + 1, step))
+        return frozenset(values)
+
+    def matches(self, when: datetime) -> bool:
+        return (
+            when.minute in self.minutes
+            and when.hour in self.hours
+            and when.day in self.days
+            and when.month in self.months
+            and (when.weekday() + 1) % 7 in self.weekdays
+        )
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after ``after``."""
+        when = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = when + timedelta(days=366 * 5)
+        while when < limit:
+            if when.month not in self.months:
+                year, month = (when.year + 1, 1) if when.month == 12 else (when.year, when.month + 1)
+                when = when.replace(year=year, month=month, day=1, hour=0, minute=0)
+            elif when.day not in self.days or (when.weekday() + 1) % 7 not in self.weekdays:
+                when = when.replace(hour=0, minute=0) + timedelta(days=1)
+            elif when.hour not in self.hours:
+                when = when.replace(minute=0) + timedelta(hours=1)
+            elif when.minute not in self.minutes:
+                when += timedelta(minutes=1)
+            else:
+                return when
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+
+@dataclass
+class RecurringJob:
+    """Entry of the recurring schedule table"""
+    name: str
+    task_type: str
+    schedule: CronSchedule
+    priority: TaskPriority = TaskPriority.NORMAL
+    payload: Dict[str, Any] = field(default_factory=dict)
+    next_run: Optional[datetime] = None
+    last_task_id: Optional[str] = None
+
+
+# Built-in recurring jobs: (cron, task type, task name, priority)
+RECURRING_SCHEDULE = [
+    ("*/5 * * * *", "process_review_requests", "Process pending review requests", TaskPriority.NORMAL),
+    ("*/15 * * * *", "check_experiment_significance", "Check A/B experiment significance", TaskPriority.LOW),
+    ("0 * * * *", "sync_7shifts", "Hourly sync_7shifts sync", TaskPriority.NORMAL),
+    ("0 * * * *", "sync_homebase", "Hourly sync_homebase sync", TaskPriority.NORMAL),
+    ("0 * * * *", "sync_marginedge", "Hourly sync_marginedge sync", TaskPriority.NORMAL),
+    ("*/30 * * * *", "check_compliance", "Check labor compliance", TaskPriority.HIGH),
+    ("*/30 * * * *", "send_break_reminders", "Send break reminders", TaskPriority.HIGH),
+    ("*/10 * * * *", "retry_failed_webhooks", "Retry failed webhooks", TaskPriority.NORMAL),
+    ("*/5 * * * *", "check_device_health", "Check hardware device health", TaskPriority.NORMAL),
+    ("0 0 * * *", "cleanup_expired_tokens", "Cleanup expired API tokens", TaskPriority.LOW),
+    ("0 0 * * *", "update_api_analytics", "Update API analytics", TaskPriority.LOW),
+]
+
+
 class BackgroundWorkerManager:
     """
     Manages background workers and task queue.
     Uses asyncio for concurrent task execution.
     """
 
-    def __init__(self, max_workers: int = 5):
+    def __init__(
+        self,
+        max_workers: int = 5,
+        concurrency_limits: Optional[Dict[str, int]] = None
+    ):
         self.max_workers = max_workers
-        self.task_queue: asyncio.Queue = asyncio.Queue()
+        self.concurrency_limits = dict(
+            TASK_CONCURRENCY_LIMITS if concurrency_limits is None else concurrency_limits
+        )
+        # (scheduled ts, priority rank, seq, task) / (priority rank, scheduled ts, seq, task)
+        self._delayed: List[Tuple[float, int, int, BackgroundTask]] = []
+        self._ready: List[Tuple[int, float, int, BackgroundTask]] = []
+        self._seq = itertools.count()
+        self._cond = asyncio.Condition()
+        self._running_by_type: Dict[str, int] = defaultdict(int)
         self.workers: List[asyncio.Task] = []
         self.running = False
+        self.db_session_factory = None
+        self.sync_session_factory = None
+        # Identifies this process in scheduled_job_claims
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}"
         self.task_handlers: Dict[str, Callable] = {}
         self.task_history: Dict[str, BackgroundTask] = {}
         self.stats = defaultdict(int)
+        self.start_lag = Histogram()
+
+        # Recurring schedule table, keyed by job name
+        self.recurring_jobs: Dict[str, RecurringJob] = {}
+        self._schedule_changed = asyncio.Event()
 
-        # Register built-in handlers
+        # Register built-in handlers and recurring jobs
         self._register_handlers()
+        for cron, task_type, name, priority in RECURRING_SCHEDULE:
+            self.add_recurring(name, task_type, cron, priority=priority)
 
     def _register_handlers(self):
         """Register built-in task handlers."""
@@ -116,13 +278,33 @@ class BackgroundWorkerManager:
             "update_api_analytics": self._update_api_analytics,
         }
 
-    async def start(self, db_session_factory):
-        """Start the worker manager."""
+    async def start(self, db_session_factory=None, sync_session_factory=None):
+        """Start the worker manager.
+
+        Handlers receive an ``AsyncSession`` from ``db_session_factory``
+        (the app's ``AsyncSessionLocal`` by default). Services still written
+        against a sync ``Session`` get one from ``sync_session_factory``
+        (``SessionLocal``) through ``_sync_db``.
+        """
         if self.running:
             return
 
+        if db_session_factory is None:
+            from app.db.session import AsyncSessionLocal
+            db_session_factory = AsyncSessionLocal
+        if sync_session_factory is None:
+            from app.db.session import SessionLocal
+            sync_session_factory = SessionLocal
+
         self.running = True
         self.db_session_factory = db_session_factory
+        self.sync_session_factory = sync_session_factory
+        # Bind the queue primitives to the loop the workers run on
+        schedule_changed = self._schedule_changed.is_set()
+        self._cond = asyncio.Condition()
+        self._schedule_changed = asyncio.Event()
+        if schedule_changed:
+            self._schedule_changed.set()
 
         # Start workers
         for i in range(self.max_workers):
@@ -147,13 +329,14 @@ class BackgroundWorkerManager:
 
         # Wait for tasks to finish
         await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
 
         logger.info("Background worker manager stopped")
 
     async def enqueue(self, task: BackgroundTask):
         """Add a task to the queue."""
         self.task_history[task.id] = task
-        await self.task_queue.put(task)
+        await self._submit(task)
         self.stats["tasks_enqueued"] += 1
         logger.debug(f"Task enqueued: {task.name} ({task.id})")
 
@@ -182,6 +365,32 @@ class BackgroundWorkerManager:
         await self.enqueue(task)
         return task.id
 
+    def add_recurring(
+        self,
+        name: str,
+        task_type: str,
+        cron: str,
+        priority: TaskPriority = TaskPriority.NORMAL,
+        payload: Dict[str, Any] = None
+    ) -> RecurringJob:
+        """Add or replace a recurring job in the schedule table."""
+        job = RecurringJob(
+            name=name,
+            task_type=task_type,
+            schedule=CronSchedule(cron),
+            priority=priority,
+            payload=payload or {},
+        )
+        self.recurring_jobs[name] = job
+        self._schedule_changed.set()
+        return job
+
+    def remove_recurring(self, name: str) -> bool:
+        """Remove a recurring job; returns False if it was not scheduled."""
+        removed = self.recurring_jobs.pop(name, None) is not None
+        self._schedule_changed.set()
+        return removed
+
     def get_task_status(self, task_id: str) -> Optional[BackgroundTask]:
         """Get task status by ID."""
         return self.task_history.get(task_id)
@@ -190,7 +399,11 @@ class BackgroundWorkerManager:
         """Get worker statistics."""
         return {
             **dict(self.stats),
-            "queue_size": self.task_queue.qsize(),
+            "queue_size": len(self._ready) + len(self._delayed),
+            "ready_tasks": len(self._ready),
+            "delayed_tasks": len(self._delayed),
+            "running_by_type": {k: v for k, v in self._running_by_type.items() if v},
+            "recurring_jobs": len(self.recurring_jobs),
             "active_workers": sum(1 for w in self.workers if not w.done()),
             "pending_tasks": sum(1 for t in self.task_history.values()
                                  if t.status == TaskStatus.PENDING),
@@ -198,30 +411,105 @@ class BackgroundWorkerManager:
                                  if t.status == TaskStatus.RUNNING)
         }
 
+    def prometheus_lines(self) -> List[str]:
+        lines = []
+        for name in ("enqueued", "completed", "retried", "failed"):
+            lines.append(f"# HELP background_tasks_{name}_total Background tasks {name}")
+            lines.append(f"# TYPE background_tasks_{name}_total counter")
+            lines.append(f"background_tasks_{name}_total {self.stats[f'tasks_{name}']}")
+        lines.append("# HELP background_tasks_queue_depth Background tasks waiting, by state")
+        lines.append("# TYPE background_tasks_queue_depth gauge")
+        lines.append(f'background_tasks_queue_depth{{state="ready"}} {len(self._ready)}')
+        lines.append(f'background_tasks_queue_depth{{state="delayed"}} {len(self._delayed)}')
+
+        lines.append("# HELP background_task_start_lag_seconds Delay between scheduled_at and start")
+        lines.append("# TYPE background_task_start_lag_seconds histogram")
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, self.start_lag.counts):
+            cumulative += count
+            lines.append(f'background_task_start_lag_seconds_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += self.start_lag.counts[-1]
+        lines.append(f'background_task_start_lag_seconds_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"background_task_start_lag_seconds_sum {self.start_lag.sum:.6f}")
+        lines.append(f"background_task_start_lag_seconds_count {cumulative}")
+        return lines
+
+    # ----- Queue -----
+
+    async def _submit(self, task: BackgroundTask):
+        """Push a task into the delayed heap and wake a worker."""
+        async with self._cond:
+            heapq.heappush(self._delayed, (
+                task.scheduled_at.timestamp(),
+                PRIORITY_RANK.get(task.priority, PRIORITY_RANK[TaskPriority.NORMAL]),
+                next(self._seq),
+                task,
+            ))
+            # The woken worker recomputes its wakeup if this task is now the earliest
+            self._cond.notify()
+
+    def _pop_ready(self) -> Optional[BackgroundTask]:
+        """Move due tasks to the ready heap and pop the best runnable one.
+
+        Must be called while holding ``self._cond``.
+        """
+        now = time.time()
+        while self._delayed and self._delayed[0][0] <= now:
+            scheduled_ts, rank, seq, task = heapq.heappop(self._delayed)
+            heapq.heappush(self._ready, (rank, scheduled_ts, seq, task))
+
+        skipped = []
+        found = None
+        while self._ready:
+            entry = heapq.heappop(self._ready)
+            task = entry[3]
+            if task.status == TaskStatus.CANCELLED:
+                continue
+            limit = self.concurrency_limits.get(task.task_type)
+            if limit is not None and self._running_by_type[task.task_type] >= limit:
+                skipped.append(entry)
+                continue
+            found = task
+            break
+        for entry in skipped:
+            heapq.heappush(self._ready, entry)
+        return found
+
+    async def _next_task(self) -> BackgroundTask:
+        """Wait until a task is due and allowed to run."""
+        async with self._cond:
+            while True:
+                task = self._pop_ready()
+                if task is not None:
+                    self._running_by_type[task.task_type] += 1
+                    self.start_lag.observe(max(0.0, time.time() - task.scheduled_at.timestamp()))
+                    return task
+                timeout = None
+                if self._delayed:
+                    timeout = max(0.0, self._delayed[0][0] - time.time())
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _release(self, task: BackgroundTask):
+        async with self._cond:
+            self._running_by_type[task.task_type] -= 1
+            if task.task_type in self.concurrency_limits:
+                # A task held back by the limit may run now
+                self._cond.notify_all()
+
     async def _worker(self, worker_name: str):
         """Worker coroutine that processes tasks from the queue."""
         logger.info(f"Worker {worker_name} started")
 
         while self.running:
             try:
-                # Get task with timeout
+                task = await self._next_task()
                 try:
-                    task = await asyncio.wait_for(
-                        self.task_queue.get(),
-                        timeout=1.0
-                    )
-                except asyncio.TimeoutError:
-                    continue
-
-                # Check if scheduled time has arrived
-                if task.scheduled_at > datetime.now(timezone.utc):
-                    # Re-queue for later
-                    await self.task_queue.put(task)
-                    await asyncio.sleep(0.1)
-                    continue
-
-                # Process task
-                await self._process_task(task, worker_name)
+                    await self._process_task(task, worker_name)
+                finally:
+                    await self._release(task)
 
             except asyncio.CancelledError:
                 break
@@ -265,7 +553,7 @@ class BackgroundWorkerManager:
                 task.scheduled_at = datetime.now(timezone.utc) + timedelta(
                     seconds=min(300, 2 ** task.retry_count * 10)
                 )
-                await self.task_queue.put(task)
+                await self._submit(task)
                 self.stats["tasks_retried"] += 1
                 logger.warning(f"Task {task.name} failed, retry {task.retry_count}/{task.max_retries}")
             else:
@@ -274,83 +562,90 @@ class BackgroundWorkerManager:
                 self.stats["tasks_failed"] += 1
                 logger.error(f"Task {task.name} failed permanently: {e}\n{traceback.format_exc()}")
 
-    async def _scheduler(self):
-        """Scheduler for recurring tasks."""
-        logger.info("Task scheduler started")
-
-        while self.running:
-            try:
-                now = datetime.now(timezone.utc)
-
-                # Schedule recurring tasks
-                # Every 5 minutes: process review requests
-                if now.minute % 5 == 0 and now.second < 5:
-                    await self.schedule(
-                        "process_review_requests",
-                        "Process pending review requests",
-                        priority=TaskPriority.NORMAL
-                    )
-
-                # Every 15 minutes: check experiment significance
-                if now.minute % 15 == 0 and now.second < 5:
-                    await self.schedule(
-                        "check_experiment_significance",
-                        "Check A/B experiment significance",
-                        priority=TaskPriority.LOW
-                    )
-
-                # Every hour: sync integrations
-                if now.minute == 0 and now.second < 5:
-                    for sync_type in ["sync_7shifts", "sync_homebase", "sync_marginedge"]:
-                        await self.schedule(
-                            sync_type,
-                            f"Hourly {sync_type} sync",
-                            priority=TaskPriority.NORMAL
-                        )
+    # ----- Recurring jobs -----
 
-                # Every 30 minutes: check compliance
-                if now.minute % 30 == 0 and now.second < 5:
-                    await self.schedule(
-                        "check_compliance",
-                        "Check labor compliance",
-                        priority=TaskPriority.HIGH
-                    )
-                    await self.schedule(
-                        "send_break_reminders",
-                        "Send break reminders",
-                        priority=TaskPriority.HIGH
-                    )
+    async def _fire_recurring(self, job: RecurringJob):
+        """Enqueue one run of a recurring job unless the previous run is unfinished."""
+        previous = self.task_history.get(job.last_task_id) if job.last_task_id else None
+        if previous is not None and previous.status in (TaskStatus.PENDING, TaskStatus.RUNNING):
+            self.stats["recurring_skipped"] += 1
+            logger.debug(f"Recurring job {job.name} skipped: previous run still {previous.status.value}")
+            return
+        job.last_task_id = await self.schedule(
+            job.task_type,
+            job.name,
+            payload=dict(job.payload),
+            priority=job.priority
+        )
 
-                # Every 10 minutes: retry failed webhooks
-                if now.minute % 10 == 0 and now.second < 5:
-                    await self.schedule(
-                        "retry_failed_webhooks",
-                        "Retry failed webhooks",
-                        priority=TaskPriority.NORMAL
-                    )
+    async def _claim_slot(self, job: RecurringJob, slot: datetime) -> bool:
+        """Claim ``slot`` of ``job`` for this process across all API workers.
 
-                # Every 5 minutes: check device health
-                if now.minute % 5 == 0 and now.second < 5:
-                    await self.schedule(
-                        "check_device_health",
-                        "Check hardware device health",
-                        priority=TaskPriority.NORMAL
+        The claim moves ``scheduled_job_claims.slot`` forward with a
+        conditional UPDATE; the first claim of a job is an INSERT guarded by
+        the unique job name. Exactly one worker sees its statement succeed.
+        Without a database (manager not started) every slot is ours.
+        """
+        if self.db_session_factory is None:
+            return True
+        try:
+            async with self.db_session_factory() as db:
+                result = await db.execute(
+                    update(ScheduledJobClaim)
+                    .where(ScheduledJobClaim.job_name == job.name, ScheduledJobClaim.slot < slot)
+                    .values(slot=slot, claimed_by=self.instance_id)
+                )
+                if result.rowcount == 0:
+                    exists = await db.scalar(
+                        select(ScheduledJobClaim.id).where(ScheduledJobClaim.job_name == job.name)
                     )
+                    if exists is not None:
+                        await db.rollback()
+                        return False
+                    db.add(ScheduledJobClaim(job_name=job.name, slot=slot, claimed_by=self.instance_id))
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    await db.rollback()
+                    return False
+        except Exception as e:
+            # Jobs need the database anyway; try again at the next slot
+            logger.warning(f"Could not claim {job.name} at {slot.isoformat()}: {e}")
+            return False
+        return True
+
+    async def _run_due_recurring(self, now: datetime) -> Optional[datetime]:
+        """Fire jobs whose slot has come; returns the next slot across all jobs."""
+        next_wake = None
+        for job in list(self.recurring_jobs.values()):
+            if job.next_run is None:
+                job.next_run = job.schedule.next_after(now)
+            elif job.next_run <= now:
+                # One run per slot; slots missed while asleep are not replayed
+                if await self._claim_slot(job, job.next_run):
+                    await self._fire_recurring(job)
+                else:
+                    self.stats["recurring_claimed_elsewhere"] += 1
+                job.next_run = job.schedule.next_after(now)
+            if next_wake is None or job.next_run < next_wake:
+                next_wake = job.next_run
+        return next_wake
 
-                # Daily at midnight: cleanup tasks
-                if now.hour == 0 and now.minute == 0 and now.second < 5:
-                    await self.schedule(
-                        "cleanup_expired_tokens",
-                        "Cleanup expired API tokens",
-                        priority=TaskPriority.LOW
-                    )
-                    await self.schedule(
-                        "update_api_analytics",
-                        "Update API analytics",
-                        priority=TaskPriority.LOW
-                    )
+    async def _scheduler(self):
+        """Scheduler for recurring tasks; sleeps until the next cron slot."""
+        logger.info("Task scheduler started")
 
-                await asyncio.sleep(5)
+        while self.running:
+            try:
+                self._schedule_changed.clear()
+                next_wake = await self._run_due_recurring(datetime.now(timezone.utc))
+                timeout = None
+                if next_wake is not None:
+                    timeout = max(0.0, (next_wake - datetime.now(timezone.utc)).total_seconds())
+                try:
+                    await asyncio.wait_for(self._schedule_changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
 
             except asyncio.CancelledError:
                 break
@@ -360,6 +655,18 @@ class BackgroundWorkerManager:
 
         logger.info("Task scheduler stopped")
 
+    @contextmanager
+    def _sync_db(self):
+        """Sync ``Session`` for services that call ``db.execute`` without awaiting it."""
+        db = self.sync_session_factory()
+        try:
+            yield db
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
     # =============================================================================
     # TASK HANDLERS
     # =============================================================================
@@ -391,12 +698,13 @@ class BackgroundWorkerManager:
         total_sent = 0
         total_failed = 0
 
-        for venue_id in venue_ids:
-            service = ReviewAutomationService(db)
-            result = await service.process_pending_requests(venue_id)
-            total_processed += result.get("processed", 0)
-            total_sent += result.get("sent", 0)
-            total_failed += result.get("failed", 0)
+        with self._sync_db() as sync_db:
+            service = ReviewAutomationService(sync_db)
+            for venue_id in venue_ids:
+                result = await service.process_pending_requests(venue_id)
+                total_processed += result.get("processed", 0)
+                total_sent += result.get("sent", 0)
+                total_failed += result.get("failed", 0)
 
         return {
             "venues_processed": len(venue_ids),
@@ -422,14 +730,14 @@ class BackgroundWorkerManager:
         """Sync with 7shifts."""
         from app.services.third_party_integrations_service import SevenShiftsIntegration
         from app.models.gap_features_models import IntegrationCredential
-        from sqlalchemy import select
+        from sqlalchemy import select, and_
 
         # Get all venues with 7shifts integration
         result = await db.execute(
             select(IntegrationCredential).where(
                 and_(
                     IntegrationCredential.integration_type == "7shifts",
-                    IntegrationCredential.is_active == True
+                    IntegrationCredential.is_active.is_(True)
                 )
             )
         )
@@ -438,22 +746,23 @@ class BackgroundWorkerManager:
         synced = 0
         failed = 0
 
-        for cred in credentials:
-            try:
-                integration = SevenShiftsIntegration(db)
-                integration.api_key = cred.credentials.get("api_key")
-                integration.company_id = cred.credentials.get("company_id")
-
-                await integration.sync_employees(cred.venue_id)
-                await integration.sync_shifts(
-                    cred.venue_id,
-                    datetime.now(timezone.utc),
-                    datetime.now(timezone.utc) + timedelta(days=14)
-                )
-                synced += 1
-            except Exception as e:
-                logger.error(f"7shifts sync failed for venue {cred.venue_id}: {e}")
-                failed += 1
+        with self._sync_db() as sync_db:
+            for cred in credentials:
+                try:
+                    integration = SevenShiftsIntegration(sync_db)
+                    integration.api_key = cred.credentials.get("api_key")
+                    integration.company_id = cred.credentials.get("company_id")
+
+                    await integration.sync_employees(cred.venue_id)
+                    await integration.sync_shifts(
+                        cred.venue_id,
+                        datetime.now(timezone.utc),
+                        datetime.now(timezone.utc) + timedelta(days=14)
+                    )
+                    synced += 1
+                except Exception as e:
+                    logger.error(f"7shifts sync failed for venue {cred.venue_id}: {e}")
+                    failed += 1
 
         return {"synced": synced, "failed": failed}
 
@@ -465,32 +774,33 @@ class BackgroundWorkerManager:
         """Sync with Homebase."""
         from app.services.third_party_integrations_service import HomebaseIntegration
         from app.models.gap_features_models import IntegrationCredential
-        from sqlalchemy import select
+        from sqlalchemy import select, and_
 
         result = await db.execute(
             select(IntegrationCredential).where(
                 and_(
                     IntegrationCredential.integration_type == "homebase",
-                    IntegrationCredential.is_active == True
+                    IntegrationCredential.is_active.is_(True)
                 )
             )
         )
         credentials = result.scalars().all()
 
         synced = 0
-        for cred in credentials:
-            try:
-                integration = HomebaseIntegration(db)
-                integration.api_key = cred.credentials.get("api_key")
-                integration.location_id = cred.credentials.get("location_id")
-                await integration.sync_timesheets(
-                    cred.venue_id,
-                    datetime.now(timezone.utc) - timedelta(days=1),
-                    datetime.now(timezone.utc)
-                )
-                synced += 1
-            except Exception as e:
-                logger.error(f"Homebase sync failed: {e}")
+        with self._sync_db() as sync_db:
+            for cred in credentials:
+                try:
+                    integration = HomebaseIntegration(sync_db)
+                    integration.api_key = cred.credentials.get("api_key")
+                    integration.location_id = cred.credentials.get("location_id")
+                    await integration.sync_timesheets(
+                        cred.venue_id,
+                        datetime.now(timezone.utc) - timedelta(days=1),
+                        datetime.now(timezone.utc)
+                    )
+                    synced += 1
+                except Exception as e:
+                    logger.error(f"Homebase sync failed: {e}")
 
         return {"synced": synced}
 
@@ -502,32 +812,33 @@ class BackgroundWorkerManager:
         """Sync with MarginEdge."""
         from app.services.third_party_integrations_service import MarginEdgeIntegration
         from app.models.gap_features_models import IntegrationCredential
-        from sqlalchemy import select
+        from sqlalchemy import select, and_
 
         result = await db.execute(
             select(IntegrationCredential).where(
                 and_(
                     IntegrationCredential.integration_type == "marginedge",
-                    IntegrationCredential.is_active == True
+                    IntegrationCredential.is_active.is_(True)
                 )
             )
         )
         credentials = result.scalars().all()
 
         synced = 0
-        for cred in credentials:
-            try:
-                integration = MarginEdgeIntegration(db)
-                integration.api_key = cred.credentials.get("api_key")
-                integration.restaurant_id = cred.credentials.get("restaurant_id")
-                await integration.sync_invoices(
-                    cred.venue_id,
-                    datetime.now(timezone.utc) - timedelta(days=7),
-                    datetime.now(timezone.utc)
-                )
-                synced += 1
-            except Exception as e:
-                logger.error(f"MarginEdge sync failed: {e}")
+        with self._sync_db() as sync_db:
+            for cred in credentials:
+                try:
+                    integration = MarginEdgeIntegration(sync_db)
+                    integration.api_key = cred.credentials.get("api_key")
+                    integration.restaurant_id = cred.credentials.get("restaurant_id")
+                    await integration.sync_invoices(
+                        cred.venue_id,
+                        datetime.now(timezone.utc) - timedelta(days=7),
+                        datetime.now(timezone.utc)
+                    )
+                    synced += 1
+                except Exception as e:
+                    logger.error(f"MarginEdge sync failed: {e}")
 
         return {"synced": synced}
 
@@ -539,31 +850,32 @@ class BackgroundWorkerManager:
         """Sync with accounting systems (QuickBooks, Xero)."""
         from app.services.third_party_integrations_service import AccountingSyncService
         from app.models.gap_features_models import IntegrationCredential
-        from sqlalchemy import select
+        from sqlalchemy import select, and_
 
         result = await db.execute(
             select(IntegrationCredential).where(
                 and_(
                     IntegrationCredential.integration_type.in_(["quickbooks", "xero"]),
-                    IntegrationCredential.is_active == True
+                    IntegrationCredential.is_active.is_(True)
                 )
             )
         )
         credentials = result.scalars().all()
 
         synced = 0
-        for cred in credentials:
-            try:
-                service = AccountingSyncService(db)
-                await service.sync_sales(
-                    cred.venue_id,
-                    cred.integration_type,
-                    datetime.now(timezone.utc) - timedelta(days=1),
-                    datetime.now(timezone.utc)
-                )
-                synced += 1
-            except Exception as e:
-                logger.error(f"Accounting sync failed: {e}")
+        with self._sync_db() as sync_db:
+            for cred in credentials:
+                try:
+                    service = AccountingSyncService(sync_db)
+                    await service.sync_sales(
+                        cred.venue_id,
+                        cred.integration_type,
+                        datetime.now(timezone.utc) - timedelta(days=1),
+                        datetime.now(timezone.utc)
+                    )
+                    synced += 1
+                except Exception as e:
+                    logger.error(f"Accounting sync failed: {e}")
 
         return {"synced": synced}
 
@@ -585,21 +897,22 @@ class BackgroundWorkerManager:
         experiments = result.scalars().all()
 
         significant = 0
-        for exp in experiments:
-            service = ABTestingService(db)
-            results = await service.get_experiment_results(exp.id)
-
-            if results.get("statistical_significance"):
-                significant += 1
-                # Emit WebSocket event
-                from app.services.websocket_service import emit_experiment_significance
-                await emit_experiment_significance(
-                    venue_id=exp.venue_id,
-                    experiment_id=str(exp.id),
-                    experiment_name=exp.name,
-                    is_significant=True,
-                    confidence_level=0.95
-                )
+        with self._sync_db() as sync_db:
+            for exp in experiments:
+                service = ABTestingService(sync_db)
+                results = await service.get_experiment_results(exp.id)
+
+                if results.get("statistical_significance"):
+                    significant += 1
+                    # Emit WebSocket event
+                    from app.services.websocket_service import emit_experiment_significance
+                    await emit_experiment_significance(
+                        venue_id=exp.venue_id,
+                        experiment_id=str(exp.id),
+                        experiment_name=exp.name,
+                        is_significant=True,
+                        confidence_level=0.95
+                    )
 
         return {"experiments_checked": len(experiments), "significant": significant}
 
@@ -627,16 +940,17 @@ class BackgroundWorkerManager:
         experiments = result.scalars().all()
 
         completed = 0
-        for exp in experiments:
-            service = ABTestingService(db)
-            results = await service.get_experiment_results(exp.id)
-
-            # Determine winner based on target metric
-            variants = results.get("variants", [])
-            if variants:
-                winner = max(variants, key=lambda v: v.get("conversion_rate", 0))
-                await service.complete_experiment(exp.id, winner.get("id"))
-                completed += 1
+        with self._sync_db() as sync_db:
+            for exp in experiments:
+                service = ABTestingService(sync_db)
+                results = await service.get_experiment_results(exp.id)
+
+                # Determine winner based on target metric
+                variants = results.get("variants", [])
+                if variants:
+                    winner = max(variants, key=lambda v: v.get("conversion_rate", 0))
+                    await service.complete_experiment(exp.id, winner.get("id"))
+                    completed += 1
 
         return {"experiments_completed": completed}
 
@@ -680,7 +994,6 @@ class BackgroundWorkerManager:
         task: BackgroundTask
     ) -> Dict[str, Any]:
         """Deliver a webhook to a registered endpoint."""
-        import aiohttp
         import hmac
         import hashlib
         from app.services.websocket_service import emit_webhook_delivery
@@ -701,8 +1014,8 @@ class BackgroundWorkerManager:
         ).hexdigest()
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
+            async with http_client("webhooks", timeout=30) as client:
+                response = await client.post(
                     endpoint_url,
                     json=data,
                     headers={
@@ -710,24 +1023,23 @@ class BackgroundWorkerManager:
                         "X-Webhook-Signature": signature,
                         "X-Webhook-Event": event_type
                     },
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    success = 200 <= response.status < 300
-
-                    if task.venue_id:
-                        await emit_webhook_delivery(
-                            venue_id=task.venue_id,
-                            webhook_id=webhook_id,
-                            endpoint_url=endpoint_url,
-                            event_type=event_type,
-                            success=success,
-                            response_status=response.status
-                        )
+                )
+            success = 200 <= response.status_code < 300
 
-                    return {
-                        "success": success,
-                        "status_code": response.status
-                    }
+            if task.venue_id:
+                await emit_webhook_delivery(
+                    venue_id=task.venue_id,
+                    webhook_id=webhook_id,
+                    endpoint_url=endpoint_url,
+                    event_type=event_type,
+                    success=success,
+                    response_status=response.status_code
+                )
+
+            return {
+                "success": success,
+                "status_code": response.status_code
+            }
 
         except Exception as e:
             if task.venue_id:
@@ -799,12 +1111,13 @@ class BackgroundWorkerManager:
         if not venue_id or not transactions:
             return {"processed": 0}
 
-        service = MobileOfflineService(db)
-        result = await service.process_offline_transactions(
-            venue_id=venue_id,
-            device_id=device_id,
-            transactions=transactions
-        )
+        with self._sync_db() as sync_db:
+            service = MobileOfflineService(sync_db)
+            result = await service.process_offline_transactions(
+                venue_id=venue_id,
+                device_id=device_id,
+                transactions=transactions
+            )
 
         return result
 
@@ -831,21 +1144,22 @@ class BackgroundWorkerManager:
         notifications = result.scalars().all()
 
         sent = 0
-        for notif in notifications:
-            service = PushNotificationService(db)
-            try:
-                await service.send_notification(
-                    device_token=notif.device_token,
-                    title=notif.title,
-                    body=notif.body,
-                    data=notif.data
-                )
-                notif.status = "sent"
-                notif.sent_at = now
-                sent += 1
-            except Exception as e:
-                notif.status = "failed"
-                notif.error_message = str(e)
+        with self._sync_db() as sync_db:
+            for notif in notifications:
+                service = PushNotificationService(sync_db)
+                try:
+                    await service.send_notification(
+                        device_token=notif.device_token,
+                        title=notif.title,
+                        body=notif.body,
+                        data=notif.data
+                    )
+                    notif.status = "sent"
+                    notif.sent_at = now
+                    sent += 1
+                except Exception as e:
+                    notif.status = "failed"
+                    notif.error_message = str(e)
 
         await db.commit()
         return {"sent": sent}
@@ -914,13 +1228,14 @@ class BackgroundWorkerManager:
         transactions = result.scalars().all()
 
         captured = 0
-        for txn in transactions:
-            service = BNPLService(db)
-            try:
-                await service.capture_payment(txn.id)
-                captured += 1
-            except Exception as e:
-                logger.error(f"BNPL capture failed: {e}")
+        with self._sync_db() as sync_db:
+            for txn in transactions:
+                service = BNPLService(sync_db)
+                try:
+                    await service.capture_payment(txn.id)
+                    captured += 1
+                except Exception as e:
+                    logger.error(f"BNPL capture failed: {e}")
 
         return {"captured": captured}
 
@@ -978,6 +1293,7 @@ class BackgroundWorkerManager:
 
 # Global worker manager instance
 worker_manager = BackgroundWorkerManager()
+metrics.register_collector(worker_manager.prometheus_lines)
 
 
 # =============================================================================
@@ -12,16 +12,10 @@ from dataclasses import dataclass
 from enum import Enum
 from urllib.parse import urlencode
 from app.core.config import settings
+from app.core.http_client import sync_http_client
 
 logger = logging.getLogger(__name__)
 
-# Optional imports
-try:
-    import requests
-    HAS_REQUESTS = True
-except ImportError:
-    HAS_REQUESTS = False
-
 
 class PaymentStatus(str, Enum):
     PENDING = "pending"
@@ -81,7 +75,7 @@ class BoricaService:
 
     @property
     def is_available(self) -> bool:
-        return self._initialized and HAS_REQUESTS
+        return self._initialized
 
     def create_payment(
         self,
@@ -373,7 +367,7 @@ class EPayService:
 
     @property
     def is_available(self) -> bool:
-        return self._initialized and HAS_REQUESTS
+        return self._initialized
 
     def create_payment(
         self,
@@ -527,14 +521,14 @@ class EPayService:
             encoded = base64.b64encode(data.encode()).decode()
             checksum = self._calculate_checksum(encoded)
 
-            response = requests.post(
-                f"{self._base_url}/api/check",
-                data={
-                    "encoded": encoded,
-                    "checksum": checksum
-                },
-                timeout=10
-            )
+            with sync_http_client("epay", timeout=10) as client:
+                response = client.post(
+                    f"{self._base_url}/api/check",
+                    data={
+                        "encoded": encoded,
+                        "checksum": checksum
+                    },
+                )
 
             if response.status_code == 200:
                 result = self._parse_status_response(response.text)
@@ -1,7 +1,6 @@
 """Email & SMS Communication Service - for marketing, PO sending, and notifications."""
 
 import smtplib
-import httpx
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.application import MIMEApplication
@@ -10,6 +9,7 @@ from typing import Optional, List, Dict, Any
 from jinja2 import Template
 
 from app.core.config import settings
+from app.core.http_client import http_client
 
 
 class EmailService:
@@ -242,7 +242,7 @@ class SMSService:
         try:
             url = f"{self.api_url}/Accounts/{self.account_sid}/Messages.json"
 
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("messaging", timeout=30) as client:
                 response = await client.post(
                     url,
                     auth=(self.account_sid, self.auth_token),
@@ -22,6 +22,7 @@ from typing import Dict, Any, List, Optional, Union
 from decimal import Decimal
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -170,9 +171,8 @@ class FPGateDriver(DatecsPrinterDriver):
         self.printer_id = config.fpgate_printer_id
 
     async def _request(self, command: Union[str, Dict], params: Dict = None) -> Dict[str, Any]:
-        import httpx
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
+            async with http_client("fiscal", timeout=self.config.timeout) as client:
                 if isinstance(command, str):
                     payload = {
                         "printer": self.printer_id,
@@ -297,9 +297,8 @@ class FPGateDriver(DatecsPrinterDriver):
 
     async def process_card_payment(self, amount: Decimal, reference: str = "") -> Dict[str, Any]:
         """Process card payment via PLINK (BC 50MX only)"""
-        import httpx
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
+            async with http_client("fiscal", timeout=120.0) as client:
                 response = await client.post(
                     f"{self.base_url}/print/",
                     json={
@@ -337,9 +336,8 @@ class ErpNetFPDriver(DatecsPrinterDriver):
         self.printer_id: Optional[str] = None
 
     async def _request(self, method: str, endpoint: str, data: Dict = None) -> Dict[str, Any]:
-        import httpx
         try:
-            async with httpx.AsyncClient(timeout=self.config.timeout) as client:
+            async with http_client("fiscal", timeout=self.config.timeout) as client:
                 if method == "GET":
                     response = await client.get(f"{self.base_url}{endpoint}")
                 else:
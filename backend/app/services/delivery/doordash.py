@@ -5,9 +5,8 @@ import hmac
 import logging
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import http_client
 from app.services.delivery.base import DeliveryProvider
 
 logger = logging.getLogger(__name__)
@@ -40,7 +39,7 @@ class DoorDashProvider(DeliveryProvider):
     async def accept_order(self, order_id: str) -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "DoorDash not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("doordash") as client:
             resp = await client.post(
                 f"{DOORDASH_API_BASE}/drive/v2/deliveries/{order_id}/accept",
                 headers=self._headers(),
@@ -51,7 +50,7 @@ class DoorDashProvider(DeliveryProvider):
     async def reject_order(self, order_id: str, reason: str = "") -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "DoorDash not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("doordash") as client:
             resp = await client.post(
                 f"{DOORDASH_API_BASE}/drive/v2/deliveries/{order_id}/cancel",
                 headers=self._headers(),
@@ -67,7 +66,7 @@ class DoorDashProvider(DeliveryProvider):
             "preparing": "confirmed",
             "ready_for_pickup": "picked_up",
         }
-        async with httpx.AsyncClient() as client:
+        async with http_client("doordash") as client:
             resp = await client.patch(
                 f"{DOORDASH_API_BASE}/drive/v2/deliveries/{order_id}",
                 headers=self._headers(),
@@ -82,7 +81,7 @@ class DoorDashProvider(DeliveryProvider):
         params = {}
         if status:
             params["status"] = status
-        async with httpx.AsyncClient() as client:
+        async with http_client("doordash") as client:
             resp = await client.get(
                 f"{DOORDASH_API_BASE}/drive/v2/deliveries",
                 headers=self._headers(),
@@ -94,7 +93,7 @@ class DoorDashProvider(DeliveryProvider):
     async def sync_menu(self, menu_items: List[Dict[str, Any]]) -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "DoorDash not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("doordash") as client:
             resp = await client.put(
                 f"{DOORDASH_API_BASE}/drive/v2/stores/{self._store_id}/menu",
                 headers=self._headers(),
@@ -3,9 +3,8 @@
 import logging
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import http_client
 from app.services.delivery.base import DeliveryProvider
 
 logger = logging.getLogger(__name__)
@@ -32,7 +31,7 @@ class GlovoProvider(DeliveryProvider):
     async def accept_order(self, order_id: str) -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "Glovo not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("glovo") as client:
             resp = await client.put(
                 f"{GLOVO_API_BASE}/webhook/stores/{self._store_id}/orders/{order_id}",
                 headers=self._headers(),
@@ -44,7 +43,7 @@ class GlovoProvider(DeliveryProvider):
     async def reject_order(self, order_id: str, reason: str = "") -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "Glovo not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("glovo") as client:
             resp = await client.put(
                 f"{GLOVO_API_BASE}/webhook/stores/{self._store_id}/orders/{order_id}",
                 headers=self._headers(),
@@ -56,7 +55,7 @@ class GlovoProvider(DeliveryProvider):
     async def update_order_status(self, order_id: str, status: str) -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "Glovo not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("glovo") as client:
             resp = await client.put(
                 f"{GLOVO_API_BASE}/webhook/stores/{self._store_id}/orders/{order_id}",
                 headers=self._headers(),
@@ -68,7 +67,7 @@ class GlovoProvider(DeliveryProvider):
     async def get_orders(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
         if not self.is_configured:
             return []
-        async with httpx.AsyncClient() as client:
+        async with http_client("glovo") as client:
             resp = await client.get(
                 f"{GLOVO_API_BASE}/webhook/stores/{self._store_id}/orders",
                 headers=self._headers(),
@@ -79,7 +78,7 @@ class GlovoProvider(DeliveryProvider):
     async def sync_menu(self, menu_items: List[Dict[str, Any]]) -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "Glovo not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("glovo") as client:
             resp = await client.put(
                 f"{GLOVO_API_BASE}/webhook/stores/{self._store_id}/menu",
                 headers=self._headers(),
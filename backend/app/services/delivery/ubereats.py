@@ -3,9 +3,8 @@
 import logging
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import http_client
 from app.services.delivery.base import DeliveryProvider
 
 logger = logging.getLogger(__name__)
@@ -32,7 +31,7 @@ class UberEatsProvider(DeliveryProvider):
     async def _ensure_token(self):
         if self._access_token:
             return
-        async with httpx.AsyncClient() as client:
+        async with http_client("ubereats") as client:
             resp = await client.post(
                 "https://login.uber.com/oauth/v2/token",
                 data={
@@ -55,7 +54,7 @@ class UberEatsProvider(DeliveryProvider):
         if not self.is_configured:
             return {"error": "UberEats not configured"}
         await self._ensure_token()
-        async with httpx.AsyncClient() as client:
+        async with http_client("ubereats") as client:
             resp = await client.post(
                 f"{UBEREATS_API_BASE}/orders/{order_id}/accept_pos_order",
                 headers=self._headers(),
@@ -68,7 +67,7 @@ class UberEatsProvider(DeliveryProvider):
         if not self.is_configured:
             return {"error": "UberEats not configured"}
         await self._ensure_token()
-        async with httpx.AsyncClient() as client:
+        async with http_client("ubereats") as client:
             resp = await client.post(
                 f"{UBEREATS_API_BASE}/orders/{order_id}/deny_pos_order",
                 headers=self._headers(),
@@ -81,7 +80,7 @@ class UberEatsProvider(DeliveryProvider):
         if not self.is_configured:
             return {"error": "UberEats not configured"}
         await self._ensure_token()
-        async with httpx.AsyncClient() as client:
+        async with http_client("ubereats") as client:
             resp = await client.post(
                 f"{UBEREATS_API_BASE}/orders/{order_id}/ready_for_pickup",
                 headers=self._headers(),
@@ -93,7 +92,7 @@ class UberEatsProvider(DeliveryProvider):
         if not self.is_configured:
             return []
         await self._ensure_token()
-        async with httpx.AsyncClient() as client:
+        async with http_client("ubereats") as client:
             resp = await client.get(
                 f"{UBEREATS_API_BASE}/stores/{self._store_id}/orders",
                 headers=self._headers(),
@@ -105,7 +104,7 @@ class UberEatsProvider(DeliveryProvider):
         if not self.is_configured:
             return {"error": "UberEats not configured"}
         await self._ensure_token()
-        async with httpx.AsyncClient() as client:
+        async with http_client("ubereats") as client:
             resp = await client.put(
                 f"{UBEREATS_API_BASE}/stores/{self._store_id}/menus",
                 headers=self._headers(),
@@ -3,9 +3,8 @@
 import logging
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import http_client
 from app.services.delivery.base import DeliveryProvider
 
 logger = logging.getLogger(__name__)
@@ -32,7 +31,7 @@ class WoltProvider(DeliveryProvider):
     async def accept_order(self, order_id: str) -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "Wolt not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("wolt") as client:
             resp = await client.post(
                 f"{WOLT_API_BASE}/orders/{order_id}/accept", headers=self._headers()
             )
@@ -42,7 +41,7 @@ class WoltProvider(DeliveryProvider):
     async def reject_order(self, order_id: str, reason: str = "") -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "Wolt not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("wolt") as client:
             resp = await client.post(
                 f"{WOLT_API_BASE}/orders/{order_id}/reject",
                 headers=self._headers(),
@@ -54,7 +53,7 @@ class WoltProvider(DeliveryProvider):
     async def update_order_status(self, order_id: str, status: str) -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "Wolt not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("wolt") as client:
             resp = await client.put(
                 f"{WOLT_API_BASE}/orders/{order_id}/status",
                 headers=self._headers(),
@@ -69,7 +68,7 @@ class WoltProvider(DeliveryProvider):
         params = {"venue_id": self._venue_id}
         if status:
             params["status"] = status
-        async with httpx.AsyncClient() as client:
+        async with http_client("wolt") as client:
             resp = await client.get(
                 f"{WOLT_API_BASE}/orders", headers=self._headers(), params=params
             )
@@ -79,7 +78,7 @@ class WoltProvider(DeliveryProvider):
     async def sync_menu(self, menu_items: List[Dict[str, Any]]) -> Dict[str, Any]:
         if not self.is_configured:
             return {"error": "Wolt not configured"}
-        async with httpx.AsyncClient() as client:
+        async with http_client("wolt") as client:
             resp = await client.put(
                 f"{WOLT_API_BASE}/venues/{self._venue_id}/menu",
                 headers=self._headers(),
@@ -2,7 +2,6 @@
 Delivery Platform Integrations
 UberEats, DoorDash, OpenTable, Resy API integrations
 """
-import httpx
 import hmac
 import hashlib
 import logging
@@ -12,6 +11,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 from decimal import Decimal
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -109,7 +109,7 @@ class UberEatsService:
         if self._access_token and self._token_expires and datetime.now(timezone.utc) < self._token_expires:
             return self._access_token
 
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("delivery", timeout=30) as client:
             response = await client.post(
                 "https://login.uber.com/oauth/v2/token",
                 data={
@@ -132,7 +132,7 @@ class UberEatsService:
         """Get all active orders from UberEats"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.get(
                     f"{self.BASE_URL}/stores/{self.store_id}/orders",
                     headers={"Authorization": f"Bearer {token}"},
@@ -158,7 +158,7 @@ class UberEatsService:
         """Accept an incoming order"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/orders/{order_id}/accept",
                     headers={"Authorization": f"Bearer {token}"},
@@ -181,7 +181,7 @@ class UberEatsService:
         """Deny an incoming order"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/orders/{order_id}/deny",
                     headers={"Authorization": f"Bearer {token}"},
@@ -210,7 +210,7 @@ class UberEatsService:
 
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/orders/{order_id}/status",
                     headers={"Authorization": f"Bearer {token}"},
@@ -229,7 +229,7 @@ class UberEatsService:
         """Cancel an order"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/orders/{order_id}/cancel",
                     headers={"Authorization": f"Bearer {token}"},
@@ -253,7 +253,7 @@ class UberEatsService:
         """Sync menu items to UberEats"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.put(
                     f"{self.BASE_URL}/stores/{self.store_id}/menus",
                     headers={"Authorization": f"Bearer {token}"},
@@ -272,7 +272,7 @@ class UberEatsService:
         """Set store online/offline status"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/stores/{self.store_id}/status",
                     headers={"Authorization": f"Bearer {token}"},
@@ -383,7 +383,7 @@ class DoorDashService:
         """Get active orders from DoorDash"""
         try:
             token = self._create_jwt()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.get(
                     f"{self.BASE_URL}/drive/v2/deliveries",
                     headers={"Authorization": f"Bearer {token}"},
@@ -405,7 +405,7 @@ class DoorDashService:
         """Accept a DoorDash order"""
         try:
             token = self._create_jwt()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.patch(
                     f"{self.BASE_URL}/drive/v2/deliveries/{order_id}",
                     headers={"Authorization": f"Bearer {token}"},
@@ -427,7 +427,7 @@ class DoorDashService:
         """Cancel a DoorDash order"""
         try:
             token = self._create_jwt()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.patch(
                     f"{self.BASE_URL}/drive/v2/deliveries/{order_id}",
                     headers={"Authorization": f"Bearer {token}"},
@@ -454,7 +454,7 @@ class DoorDashService:
 
         try:
             token = self._create_jwt()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.patch(
                     f"{self.BASE_URL}/drive/v2/deliveries/{order_id}",
                     headers={"Authorization": f"Bearer {token}"},
@@ -480,7 +480,7 @@ class DoorDashService:
         """Create a DoorDash Drive delivery (for your own orders)"""
         try:
             token = self._create_jwt()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/drive/v2/deliveries",
                     headers={"Authorization": f"Bearer {token}"},
@@ -512,7 +512,7 @@ class DoorDashService:
         """Get delivery quote from DoorDash Drive"""
         try:
             token = self._create_jwt()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/drive/v2/quotes",
                     headers={"Authorization": f"Bearer {token}"},
@@ -615,7 +615,7 @@ class OpenTableService:
         if self._access_token and self._token_expires and datetime.now(timezone.utc) < self._token_expires:
             return self._access_token
 
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("delivery", timeout=30) as client:
             response = await client.post(
                 "https://oauth.opentable.com/api/v2/oauth/token",
                 data={
@@ -648,7 +648,7 @@ class OpenTableService:
             if status:
                 params["status"] = status
 
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.get(
                     f"{self.BASE_URL}/reservations",
                     headers={"Authorization": f"Bearer {token}"},
@@ -670,7 +670,7 @@ class OpenTableService:
         """Get a specific reservation"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.get(
                     f"{self.BASE_URL}/reservations/{reservation_id}",
                     headers={"Authorization": f"Bearer {token}"}
@@ -691,7 +691,7 @@ class OpenTableService:
         """Confirm a reservation"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/reservations/{reservation_id}/confirm",
                     headers={"Authorization": f"Bearer {token}"}
@@ -709,7 +709,7 @@ class OpenTableService:
         """Cancel a reservation"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/reservations/{reservation_id}/cancel",
                     headers={"Authorization": f"Bearer {token}"},
@@ -728,7 +728,7 @@ class OpenTableService:
         """Mark reservation as seated"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/reservations/{reservation_id}/seat",
                     headers={"Authorization": f"Bearer {token}"},
@@ -747,7 +747,7 @@ class OpenTableService:
         """Mark reservation as completed"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/reservations/{reservation_id}/complete",
                     headers={"Authorization": f"Bearer {token}"}
@@ -765,7 +765,7 @@ class OpenTableService:
         """Update availability for a date"""
         try:
             token = await self._get_access_token()
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.put(
                     f"{self.BASE_URL}/availability",
                     headers={"Authorization": f"Bearer {token}"},
@@ -855,7 +855,7 @@ class ResyService:
             if date:
                 params["day"] = date
 
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.get(
                     f"{self.BASE_URL}/venue/{self.venue_id}/reservations",
                     headers={
@@ -879,7 +879,7 @@ class ResyService:
     async def get_reservation(self, reservation_id: str) -> IntegrationResult:
         """Get a specific reservation"""
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.get(
                     f"{self.BASE_URL}/reservation/{reservation_id}",
                     headers={
@@ -902,7 +902,7 @@ class ResyService:
     async def confirm_reservation(self, reservation_id: str) -> IntegrationResult:
         """Confirm a reservation"""
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/reservation/{reservation_id}/confirm",
                     headers={
@@ -922,7 +922,7 @@ class ResyService:
     async def cancel_reservation(self, reservation_id: str, reason: str) -> IntegrationResult:
         """Cancel a reservation"""
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/reservation/{reservation_id}/cancel",
                     headers={
@@ -943,7 +943,7 @@ class ResyService:
     async def seat_reservation(self, reservation_id: str, table_number: str) -> IntegrationResult:
         """Mark reservation as seated"""
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/reservation/{reservation_id}/seat",
                     headers={
@@ -964,7 +964,7 @@ class ResyService:
     async def no_show(self, reservation_id: str) -> IntegrationResult:
         """Mark reservation as no-show"""
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.post(
                     f"{self.BASE_URL}/reservation/{reservation_id}/noshow",
                     headers={
@@ -984,7 +984,7 @@ class ResyService:
     async def get_availability(self, date: str, party_size: int) -> IntegrationResult:
         """Get availability for a date"""
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("delivery", timeout=30) as client:
                 response = await client.get(
                     f"{self.BASE_URL}/venue/{self.venue_id}/calendar",
                     headers={
@@ -14,6 +14,7 @@ from app.models.delivery import (
     DeliveryPlatform, DeliveryOrderStatus
 )
 from app.models.product import Product
+from app.core.http_client import http_client
 
 
 class DeliveryAggregatorService:
@@ -231,7 +232,7 @@ class DeliveryAggregatorService:
         url = url_template.format(order_id=order.platform_order_id)
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_client("delivery", timeout=10.0) as client:
                 response = await client.put(
                     url,
                     json=status_payload,
@@ -436,7 +437,7 @@ class MenuSyncService:
         )
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_client("delivery", timeout=10.0) as client:
                 response = await client.patch(
                     url,
                     json=availability_payload,
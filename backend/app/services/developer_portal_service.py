@@ -17,6 +17,7 @@ from app.models.gap_features_models import (
     Developer, APIKey, APILog, MarketplaceApp, AppInstallation,
     AppReview, AppStatus, PricingType
 )
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -794,8 +795,6 @@ class MarketplaceService:
         payload: Dict[str, Any]
     ) -> bool:
         """Trigger a webhook for an installed app."""
-        import httpx
-
         app = await self.get_app(installation.app_id)
         if not app or not app.webhook_url:
             return False
@@ -809,7 +808,7 @@ class MarketplaceService:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
+            async with http_client("webhooks", timeout=30) as client:
                 response = await client.post(
                     app.webhook_url,
                     json=webhook_payload,
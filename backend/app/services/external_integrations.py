@@ -9,17 +9,7 @@ from enum import Enum
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
-# Try importing aiohttp, fall back to httpx if not available
-try:
-    import aiohttp
-    HAS_AIOHTTP = True
-except ImportError:
-    HAS_AIOHTTP = False
-    try:
-        import httpx
-        HAS_HTTPX = True
-    except ImportError:
-        HAS_HTTPX = False
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -99,41 +89,29 @@ class BaseIntegration(ABC):
 
     def __init__(self, credentials: IntegrationCredentials):
         self.credentials = credentials
-        self.session = None
         self.client = None
 
     async def connect(self):
-        """Initialize connection"""
-        if HAS_AIOHTTP and not self.session:
-            self.session = aiohttp.ClientSession()
-        elif HAS_HTTPX and not self.client:
-            self.client = httpx.AsyncClient(timeout=30)
+        """Initialize connection (a client on the shared connection pool)"""
+        if not self.client:
+            self.client = http_client("external", timeout=30)
 
     async def disconnect(self):
         """Close connection"""
-        if self.session:
-            await self.session.close()
-            self.session = None
         if self.client:
             await self.client.aclose()
             self.client = None
 
     async def _get(self, url: str, headers: Dict = None) -> Dict:
         """Make GET request"""
-        if HAS_AIOHTTP and self.session:
-            async with self.session.get(url, headers=headers) as response:
-                return {"status": response.status, "data": await response.json() if response.status == 200 else None}
-        elif HAS_HTTPX and self.client:
+        if self.client:
             response = await self.client.get(url, headers=headers)
             return {"status": response.status_code, "data": response.json() if response.status_code == 200 else None}
         return {"status": 503, "data": None}
 
     async def _post(self, url: str, headers: Dict = None, json_data: Dict = None) -> Dict:
         """Make POST request"""
-        if HAS_AIOHTTP and self.session:
-            async with self.session.post(url, headers=headers, json=json_data) as response:
-                return {"status": response.status, "data": await response.json() if response.status in [200, 201] else None}
-        elif HAS_HTTPX and self.client:
+        if self.client:
             response = await self.client.post(url, headers=headers, json=json_data)
             return {"status": response.status_code, "data": response.json() if response.status_code in [200, 201] else None}
         return {"status": 503, "data": None}
@@ -200,18 +178,18 @@ class QuickBooksIntegration(AccountingIntegration):
         try:
             await self.connect()
             headers = {"Authorization": f"Bearer {self.credentials.access_token}"}
-            async with self.session.get(
+            response = await self.client.get(
                 f"{self.BASE_URL}/{self.credentials.tenant_id}/companyinfo/{self.credentials.tenant_id}",
                 headers=headers
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return IntegrationResult(
-                        success=True,
-                        data={"company_name": data.get("CompanyInfo", {}).get("CompanyName")},
-                        integration_type=IntegrationType.QUICKBOOKS
-                    )
-                return IntegrationResult(success=False, error=f"Status: {response.status}")
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return IntegrationResult(
+                    success=True,
+                    data={"company_name": data.get("CompanyInfo", {}).get("CompanyName")},
+                    integration_type=IntegrationType.QUICKBOOKS
+                )
+            return IntegrationResult(success=False, error=f"Status: {response.status_code}")
         except Exception as e:
             return IntegrationResult(success=False, error=str(e))
         finally:
@@ -278,13 +256,13 @@ class XeroIntegration(AccountingIntegration):
                 "Authorization": f"Bearer {self.credentials.access_token}",
                 "Xero-Tenant-Id": self.credentials.tenant_id
             }
-            async with self.session.get(
+            response = await self.client.get(
                 f"{self.BASE_URL}/Organisation",
                 headers=headers
-            ) as response:
-                if response.status == 200:
-                    return IntegrationResult(success=True, data={"connected": True})
-                return IntegrationResult(success=False, error=f"Status: {response.status}")
+            )
+            if response.status_code == 200:
+                return IntegrationResult(success=True, data={"connected": True})
+            return IntegrationResult(success=False, error=f"Status: {response.status_code}")
         except Exception as e:
             return IntegrationResult(success=False, error=str(e))
         finally:
@@ -451,13 +429,13 @@ class APISupplierIntegration(SupplierIntegration):
         try:
             await self.connect()
             headers = {"Authorization": f"Bearer {self.credentials.api_key}"}
-            async with self.session.get(
+            response = await self.client.get(
                 f"{self.base_url}/status",
                 headers=headers
-            ) as response:
-                if response.status == 200:
-                    return IntegrationResult(success=True, data={"connected": True})
-                return IntegrationResult(success=False, error=f"Status: {response.status}")
+            )
+            if response.status_code == 200:
+                return IntegrationResult(success=True, data={"connected": True})
+            return IntegrationResult(success=False, error=f"Status: {response.status_code}")
         except Exception as e:
             return IntegrationResult(success=False, error=str(e))
         finally:
@@ -471,15 +449,15 @@ class APISupplierIntegration(SupplierIntegration):
         try:
             await self.connect()
             headers = {"Authorization": f"Bearer {self.credentials.api_key}"}
-            async with self.session.post(
+            response = await self.client.post(
                 f"{self.base_url}/orders",
                 headers=headers,
                 json=order_data
-            ) as response:
-                if response.status in [200, 201]:
-                    data = await response.json()
-                    return IntegrationResult(success=True, data=data)
-                return IntegrationResult(success=False, error=f"Status: {response.status}")
+            )
+            if response.status_code in [200, 201]:
+                data = response.json()
+                return IntegrationResult(success=True, data=data)
+            return IntegrationResult(success=False, error=f"Status: {response.status_code}")
         except Exception as e:
             return IntegrationResult(success=False, error=str(e))
         finally:
@@ -490,14 +468,14 @@ class APISupplierIntegration(SupplierIntegration):
         try:
             await self.connect()
             headers = {"Authorization": f"Bearer {self.credentials.api_key}"}
-            async with self.session.get(
+            response = await self.client.get(
                 f"{self.base_url}/catalog",
                 headers=headers
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return IntegrationResult(success=True, data=data)
-                return IntegrationResult(success=False, error=f"Status: {response.status}")
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return IntegrationResult(success=True, data=data)
+            return IntegrationResult(success=False, error=f"Status: {response.status_code}")
         except Exception as e:
             return IntegrationResult(success=False, error=str(e))
         finally:
@@ -508,15 +486,15 @@ class APISupplierIntegration(SupplierIntegration):
         try:
             await self.connect()
             headers = {"Authorization": f"Bearer {self.credentials.api_key}"}
-            async with self.session.post(
+            response = await self.client.post(
                 f"{self.base_url}/prices",
                 headers=headers,
                 json={"product_ids": product_ids}
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return IntegrationResult(success=True, data=data)
-                return IntegrationResult(success=False, error=f"Status: {response.status}")
+            )
+            if response.status_code == 200:
+                data = response.json()
+                return IntegrationResult(success=True, data=data)
+            return IntegrationResult(success=False, error=f"Status: {response.status_code}")
         except Exception as e:
             return IntegrationResult(success=False, error=str(e))
         finally:
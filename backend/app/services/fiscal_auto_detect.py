@@ -22,6 +22,7 @@ import re
 import glob as glob_module
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass, field
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -390,8 +391,7 @@ class FiscalAutoDetectService:
         fpgate_ports = [4444, 8080, 8443]
         for port in fpgate_ports:
             try:
-                import httpx
-                async with httpx.AsyncClient(timeout=2.0) as client:
+                async with http_client("fiscal", timeout=2.0) as client:
                     try:
                         response = await client.get(f"http://localhost:{port}/")
                         if response.status_code in [200, 404]:
@@ -410,8 +410,7 @@ class FiscalAutoDetectService:
 
         # Check ErpNet.FP port
         try:
-            import httpx
-            async with httpx.AsyncClient(timeout=2.0) as client:
+            async with http_client("fiscal", timeout=2.0) as client:
                 try:
                     response = await client.get("http://localhost:8001/printers")
                     if response.status_code == 200:
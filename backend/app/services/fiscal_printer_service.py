@@ -6,6 +6,7 @@ import httpx
 from typing import Dict, Any, List, Optional
 from decimal import Decimal
 import logging
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +36,7 @@ class FiscalPrinterService:
     async def check_printer_status(self) -> Dict[str, Any]:
         """Check if printer is connected and ready"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with http_client("fiscal", timeout=self.timeout) as client:
                 response = await client.post(
                     f"{self.fpgate_url}/print/",
                     json={
@@ -129,7 +130,7 @@ class FiscalPrinterService:
             })
 
             # Send to FPGate
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with http_client("fiscal", timeout=self.timeout) as client:
                 response = await client.post(
                     f"{self.fpgate_url}/print/",
                     json={
@@ -177,7 +178,7 @@ class FiscalPrinterService:
         try:
             command = "PrintDailyReport" if zero_report else "PrintXReport"
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with http_client("fiscal", timeout=self.timeout) as client:
                 response = await client.post(
                     f"{self.fpgate_url}/print/",
                     json={
@@ -204,7 +205,7 @@ class FiscalPrinterService:
     async def void_receipt(self) -> Dict[str, Any]:
         """Cancel/void the current open receipt"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with http_client("fiscal", timeout=self.timeout) as client:
                 response = await client.post(
                     f"{self.fpgate_url}/print/",
                     json={
@@ -252,7 +253,7 @@ class FiscalPrinterService:
 
             commands.append({"command": "CloseNonFiscalReceipt"})
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with http_client("fiscal", timeout=self.timeout) as client:
                 response = await client.post(
                     f"{self.fpgate_url}/print/",
                     json={
@@ -301,7 +302,7 @@ class FiscalPrinterService:
         try:
             # PLINK command for card payment via FPGate
             # Command: StartPayment - initiates card payment on PinPad
-            async with httpx.AsyncClient(timeout=120.0) as client:  # Longer timeout for card payments
+            async with http_client("fiscal", timeout=120.0) as client:  # Longer timeout for card payments
                 response = await client.post(
                     f"{self.fpgate_url}/print/",
                     json={
@@ -369,7 +370,7 @@ class FiscalPrinterService:
     async def cancel_card_payment(self) -> Dict[str, Any]:
         """Cancel ongoing card payment on PinPad"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
+            async with http_client("fiscal", timeout=10.0) as client:
                 response = await client.post(
                     f"{self.fpgate_url}/print/",
                     json={
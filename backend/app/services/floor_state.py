@@ -0,0 +1,450 @@
+"""In-memory per-venue floor state for the waiter terminal.
+
+The floor plan used to cost up to three queries per table (active session,
+open order, server) on every handheld refresh. Each venue's floor is now
+loaded with one joined query (``floor_query``) and kept as a projection of
+one row per table. Waiter terminal mutations (seat, transfer, clear, order
+and tab changes) call ``refresh`` after commit. That re-reads only the
+touched tables with the same query and records every changed row as a
+delta.
+
+Every change bumps the venue's ``version``. Deltas are pushed to the
+``floor`` WebSocket channel and the last ``floor_state_delta_log`` of them
+are kept, so a handheld that reconnects can ask for ``changes_since`` its
+version instead of refetching the floor. ``epoch`` identifies one
+projection; versions are only comparable within an epoch, and a client with
+an unknown epoch or a version older than the log gets a full snapshot.
+
+Writes from anywhere else are caught by session hooks: every commit that
+touches a table, table session, order, guest order or reservation marks the
+referenced tables dirty in each loaded venue and announces them on the
+WebSocket event bus (``floor_state`` target), so the other workers mark them
+too. Dirty tables are re-read with the same query on the next read, and by
+a flush on the event loop that pushes their deltas to handhelds straight
+away.
+
+A venue is also reloaded after ``floor_state_resync_seconds``, in case an
+announcement was lost. The reload is diffed against the old projection, so
+it emits deltas and keeps the version sequence.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """DateTime columns come back naive; they are stored as UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def floor_query(venue_id: int, table_ids: Optional[Iterable[int]] = None):
+    """Tables of a venue with their active session, open order and server, in one statement."""
+    from app.models import Order, StaffUser, Table, TableSession
+    from app.models.platform_compat import OrderStatus
+
+    active = aliased(TableSession, select(TableSession).where(TableSession.status == "active").subquery())
+    open_order = aliased(Order, select(Order).where(
+        Order.status.notin_([OrderStatus.SERVED, OrderStatus.CANCELLED])
+    ).subquery())
+
+    stmt = (
+        select(
+            Table.id, Table.number, Table.capacity, Table.status, Table.area,
+            active.id, active.guest_count, active.started_at, active.waiter_id,
+            StaffUser.full_name, open_order.id, open_order.total,
+        )
+        .select_from(Table)
+        .outerjoin(active, active.table_id == Table.id)
+        .outerjoin(open_order, open_order.session_id == active.id)
+        .outerjoin(StaffUser, StaffUser.id == active.waiter_id)
+        .where(or_(Table.location_id == venue_id, Table.location_id.is_(None)))
+        .order_by(Table.id, active.id, open_order.id)
+    )
+    if table_ids is not None:
+        stmt = stmt.where(Table.id.in_(list(table_ids)))
+    return stmt
+
+
+def table_rows(rows) -> Dict[int, Dict[str, Any]]:
+    """One display row per table from ``floor_query`` results (first session/order wins)."""
+    tables: Dict[int, Dict[str, Any]] = {}
+    for (table_id, number, capacity, table_status, area, session_id, guest_count, started_at,
+         waiter_id, waiter_name, order_id, order_total) in rows:
+        if table_id in tables:
+            continue
+        seated_at = _as_utc(started_at) if session_id is not None else None
+        if session_id is not None:
+            status = "occupied"
+        else:
+            status = "reserved" if table_status == "reserved" else "available"
+        tables[table_id] = {
+            "table_id": table_id,
+            "table_name": f"Table {number}",
+            "capacity": capacity or 4,
+            "area": area,
+            "status": status,
+            "session_id": session_id,
+            "current_check_id": order_id,
+            "guest_count": guest_count if session_id is not None else None,
+            "server_id": waiter_id,
+            "server_name": waiter_name,
+            "seated_at": seated_at.isoformat() if seated_at else None,
+            "current_total": float(order_total or 0) if order_id is not None else None,
+        }
+    return tables
+
+
+class VenueFloorState:
+    """Projected table rows of one venue with a bounded, versioned delta log."""
+
+    def __init__(self, venue_id: int, tables: Dict[int, Dict[str, Any]], loaded_at: float, log_size: int):
+        self.venue_id = venue_id
+        self.loaded_at = loaded_at
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        self.tables = tables
+        self.log: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=log_size)
+        # Tables written elsewhere since they were last read
+        self.dirty: Set[int] = set()
+
+    def merge(self, tables: Dict[int, Dict[str, Any]], table_ids: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Replace rows for ``table_ids`` (all tables if None); returns deltas for rows that changed."""
+        ids = set(self.tables) | set(tables) if table_ids is None else set(table_ids)
+        deltas = []
+        for table_id in sorted(ids):
+            row = tables.get(table_id)
+            if row == self.tables.get(table_id):
+                continue
+            if row is None:
+                self.tables.pop(table_id, None)
+                deltas.append(self._record("table_removed", {"table_id": table_id}))
+            else:
+                self.tables[table_id] = row
+                deltas.append(self._record("table_updated", row))
+        return deltas
+
+    def _record(self, action: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        self.version += 1
+        delta = {
+            "type": "floor",
+            "action": action,
+            "venue_id": self.venue_id,
+            "epoch": self.epoch,
+            "version": self.version,
+            "data": data,
+        }
+        self.log.append((self.version, delta))
+        return delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "venue_id": self.venue_id,
+            "epoch": self.epoch,
+            "version": self.version,
+            "full": True,
+            "tables": [dict(row) for row in self.tables.values()],
+        }
+
+    def changes_since(self, epoch: Optional[str], version: int) -> Optional[Dict[str, Any]]:
+        """Deltas after ``version``, or None when they are not all retained."""
+        if epoch != self.epoch or version > self.version:
+            return None
+        if version < self.version and (not self.log or self.log[0][0] > version + 1):
+            return None
+        return {
+            "venue_id": self.venue_id,
+            "epoch": self.epoch,
+            "version": self.version,
+            "full": False,
+            "changes": [delta for v, delta in self.log if v > version],
+        }
+
+
+class FloorStateRegistry:
+    """Loads venue floors on first use and pushes their deltas to WebSocket handhelds."""
+
+    BUS_TARGET = "floor_state"
+
+    def __init__(self, resync_seconds: float = 30.0, log_size: int = 500):
+        self.resync_seconds = resync_seconds
+        self.log_size = log_size
+        self._venues: Dict[int, VenueFloorState] = {}
+        self._lock = threading.RLock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._broadcast: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None
+        self._bus = None
+        self._flush_pending = False
+        self._sends = set()
+        self.stats = {"loads": 0, "refreshes": 0, "deltas": 0}
+
+    def _fresh(self, venue_id: int) -> Optional[VenueFloorState]:
+        state = self._venues.get(venue_id)
+        if state is None or time.monotonic() - state.loaded_at > self.resync_seconds:
+            return None
+        return state
+
+    def _take_dirty(self, venue_id: int) -> Tuple[Optional[VenueFloorState], Set[int]]:
+        with self._lock:
+            state = self._fresh(venue_id)
+            if state is None:
+                return None, set()
+            dirty, state.dirty = state.dirty, set()
+            return state, dirty
+
+    def venue(self, db: Session, venue_id: int) -> VenueFloorState:
+        """The venue's floor, loading it if missing or stale. Hold ``lock`` while reading it."""
+        state, dirty = self._take_dirty(venue_id)
+        if state is None:
+            state = self._install(venue_id, table_rows(db.execute(floor_query(venue_id)).all()))
+        elif dirty:
+            self._merge(venue_id, table_rows(db.execute(floor_query(venue_id, dirty)).all()), dirty)
+        return state
+
+    async def venue_async(self, db, venue_id: int) -> VenueFloorState:
+        """``venue`` for an ``AsyncSession``."""
+        state, dirty = self._take_dirty(venue_id)
+        if state is None:
+            result = await db.execute(floor_query(venue_id))
+            state = self._install(venue_id, table_rows(result.all()))
+        elif dirty:
+            result = await db.execute(floor_query(venue_id, dirty))
+            self._merge(venue_id, table_rows(result.all()), dirty)
+        return state
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    def _install(self, venue_id: int, tables: Dict[int, Dict[str, Any]]) -> VenueFloorState:
+        with self._lock:
+            previous = self._venues.get(venue_id)
+            self.stats["loads"] += 1
+            if previous is None:
+                state = self._venues[venue_id] = VenueFloorState(venue_id, tables, time.monotonic(), self.log_size)
+                logger.debug(f"Loaded floor state for venue {venue_id}: {len(tables)} tables")
+                return state
+            # Resync: keep the epoch and version sequence, emit what changed meanwhile
+            deltas = previous.merge(tables)
+            previous.loaded_at = time.monotonic()
+        self.publish(deltas)
+        return previous
+
+    def refresh(self, db: Session, venue_id: int, table_ids: Iterable[Optional[int]]) -> None:
+        """Re-read committed tables of a loaded venue and push what changed."""
+        ids = {table_id for table_id in table_ids if table_id is not None}
+        with self._lock:
+            state = self._venues.get(venue_id)
+            if state is not None:
+                # Re-read now, so a pending flush has nothing left to do
+                ids |= state.dirty
+                state.dirty = set()
+        if not ids or state is None:
+            return
+        try:
+            tables = table_rows(db.execute(floor_query(venue_id, ids)).all())
+        except Exception as e:
+            # The next read reloads the venue
+            logger.warning(f"Floor state refresh failed for venue {venue_id}: {e}")
+            self.invalidate(venue_id)
+            return
+        self._merge(venue_id, tables, ids)
+
+    def _merge(self, venue_id: int, tables: Dict[int, Dict[str, Any]], ids: Set[int]) -> None:
+        with self._lock:
+            state = self._venues.get(venue_id)
+            if state is None:
+                return
+            self.stats["refreshes"] += 1
+            deltas = state.merge(tables, ids)
+        self.publish(deltas)
+
+    def mark_dirty(self, table_ids: Iterable[int], announce: bool = True) -> None:
+        """Flag tables written outside ``refresh`` in every loaded venue; safe from any thread.
+
+        The floor query filters by venue, so a table of another venue simply
+        yields no row and no delta.
+        """
+        ids = set(table_ids)
+        if not ids:
+            return
+        with self._lock:
+            for state in self._venues.values():
+                state.dirty |= ids
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._schedule_flush)
+            if announce and self._bus is not None:
+                message = {"table_ids": sorted(ids)}
+                self._loop.call_soon_threadsafe(lambda: self._spawn(self._bus.publish(self.BUS_TARGET, message)))
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    def _on_remote_change(self, data: Dict[str, Any]) -> None:
+        self.mark_dirty(data.get("table_ids") or [], announce=False)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_pending or self._loop is None:
+            return
+        self._flush_pending = True
+        self._spawn(self._flush())
+
+    async def _flush(self) -> None:
+        self._flush_pending = False
+        try:
+            await asyncio.to_thread(self.flush_dirty)
+        except Exception as e:
+            logger.warning(f"Floor state flush failed: {e}")
+
+    def flush_dirty(self) -> None:
+        """Re-read the dirty tables of every loaded venue and push their deltas."""
+        from app.db.session import SessionLocal
+
+        with self._lock:
+            venue_ids = [venue_id for venue_id, state in self._venues.items() if state.dirty]
+        if not venue_ids:
+            return
+        db = SessionLocal()
+        try:
+            for venue_id in venue_ids:
+                self.refresh(db, venue_id, [])
+        finally:
+            db.close()
+
+    def invalidate(self, venue_id: Optional[int] = None) -> None:
+        """Drop loaded state (one venue or all) so the next read reloads it."""
+        with self._lock:
+            if venue_id is None:
+                self._venues.clear()
+            else:
+                self._venues.pop(venue_id, None)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "venues": {
+                    venue_id: {"tables": len(s.tables), "version": s.version, "epoch": s.epoch}
+                    for venue_id, s in self._venues.items()
+                },
+            }
+
+    # ----- WebSocket push -----
+
+    def publish(self, deltas: List[Dict[str, Any]]) -> None:
+        """Send deltas to the floor channel; safe to call from any thread."""
+        if not deltas:
+            return
+        self.stats["deltas"] += len(deltas)
+        if self._loop is None or self._broadcast is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._send, deltas)
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    def _send(self, deltas: List[Dict[str, Any]]) -> None:
+        for delta in deltas:
+            self._spawn(self._broadcast(delta))
+
+    def _spawn(self, coro) -> None:
+        task = self._loop.create_task(coro)
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+
+    def start(self, broadcast: Callable[[Dict[str, Any]], Awaitable[Any]], bus=None) -> None:
+        """Push deltas through ``broadcast``; call from the event loop.
+
+        With an event ``bus``, dirty tables are announced to the other
+        workers and theirs are marked dirty here.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._broadcast = broadcast
+        if bus is not None:
+            self._bus = bus
+            bus.add_handler(self.BUS_TARGET, self._on_remote_change)
+
+    async def flush(self) -> None:
+        """Wait until pending flushes, deltas and announcements are done."""
+        await asyncio.sleep(0)  # Runs the callbacks queued by call_soon_threadsafe
+        while self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+
+    def stop(self) -> None:
+        self._broadcast = None
+        self._bus = None
+        self._loop = None
+
+
+floor_state = FloorStateRegistry(
+    resync_seconds=settings.floor_state_resync_seconds,
+    log_size=settings.floor_state_delta_log,
+)
+
+
+# ==================== SESSION HOOKS ====================
+
+_PENDING = "floor_state_tables"
+
+# Column referencing the floor's tables, per mapped table written
+_TABLE_REFS = {
+    "tables": "id",
+    "table_sessions": "table_id",
+    "orders": "table_id",
+    "guest_orders": "table_id",
+    "reservations": "table_ids",
+}
+
+
+def _referenced_tables(obj, column: str) -> Set[int]:
+    """Current and previous table ids ``obj`` points at."""
+    if column == "id":
+        return {obj.id} if obj.id is not None else set()
+    history = inspect(obj).attrs[column].history
+    ids = set()
+    for value in chain(history.added, history.unchanged, history.deleted):
+        for table_id in value if isinstance(value, (list, tuple)) else [value]:
+            if table_id is not None:
+                ids.add(int(table_id))
+    return ids
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_floor_changes(session: Session, flush_context) -> None:
+    """Remember the tables this flush touched."""
+    pending = session.info.setdefault(_PENDING, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        column = _TABLE_REFS.get(getattr(obj, "__tablename__", None))
+        if column is not None:
+            pending |= _referenced_tables(obj, column)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_floor_changes(session: Session) -> None:
+    table_ids = session.info.pop(_PENDING, None)
+    if table_ids:
+        floor_state.mark_dirty(table_ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_floor_changes(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
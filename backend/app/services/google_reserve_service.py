@@ -13,6 +13,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 import httpx
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -96,7 +97,8 @@ class GoogleReserveService:
     async def _get_client(self) -> httpx.AsyncClient:
         """Get HTTP client for Google API calls."""
         if self._client is None:
-            self._client = httpx.AsyncClient(
+            self._client = http_client(
+                "google_reserve",
                 base_url=self.GOOGLE_API_BASE,
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
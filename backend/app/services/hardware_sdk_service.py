@@ -11,6 +11,7 @@ from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 from sqlalchemy import select, and_, or_, func, desc
 from sqlalchemy.orm import Session
+from app.core.http_client import http_client
 
 
 class HardwareDevice:
@@ -641,7 +642,6 @@ class BNPLService:
     ) -> Dict[str, Any]:
         """Create a BNPL checkout session."""
         from app.models.gap_features_models import BNPLTransaction, BNPLConfiguration
-        import httpx
 
         # Get provider config
         result = self.db.execute(
@@ -711,7 +711,6 @@ class BNPLService:
         cancel_url: Optional[str]
     ) -> Dict[str, Any]:
         """Create Klarna checkout session."""
-        import httpx
         import base64
 
         api_key = credentials.get("api_key")
@@ -720,7 +719,7 @@ class BNPLService:
 
         base_url = credentials.get("base_url", "https://api.klarna.com")
 
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("bnpl", timeout=30) as client:
             response = await client.post(
                 f"{base_url}/payments/v1/sessions",
                 headers={
@@ -761,13 +760,11 @@ class BNPLService:
         cancel_url: Optional[str]
     ) -> Dict[str, Any]:
         """Create Affirm checkout session."""
-        import httpx
-
         public_key = credentials.get("public_key")
         private_key = credentials.get("private_key")
         base_url = credentials.get("base_url", "https://api.affirm.com")
 
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("bnpl", timeout=30) as client:
             response = await client.post(
                 f"{base_url}/api/v1/checkout",
                 auth=(public_key, private_key),
@@ -797,13 +794,11 @@ class BNPLService:
         cancel_url: Optional[str]
     ) -> Dict[str, Any]:
         """Create Afterpay checkout session."""
-        import httpx
-
         merchant_id = credentials.get("merchant_id")
         secret_key = credentials.get("secret_key")
         base_url = credentials.get("base_url", "https://api.afterpay.com")
 
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("bnpl", timeout=30) as client:
             response = await client.post(
                 f"{base_url}/v2/checkouts",
                 auth=(merchant_id, secret_key),
@@ -6,9 +6,18 @@ from datetime import datetime, date, timedelta, timezone
 from decimal import Decimal
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, case, update
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
+# Flow meter alert thresholds (% of container capacity remaining)
+FLOW_LOW_LEVEL_PCT = 15
+FLOW_EMPTY_PCT = 2
+# Running totals further than this from the readings table are corrected
+FLOW_DRIFT_TOLERANCE_ML = 1.0
+
 
 class IoTService:
     """Service for IoT device management and sensor data processing."""
@@ -169,71 +178,48 @@ class IoTService:
         unit: str = "C",
         humidity: Optional[Decimal] = None
     ) -> Dict[str, Any]:
-        """Record temperature reading from a sensor."""
-        from app.models.advanced_features_v9 import IoTDevice, TemperatureLog
-        
-        device = db.query(IoTDevice).filter(IoTDevice.id == device_id).first()
-        if not device:
-            raise ValueError(f"Device {device_id} not found")
-        
-        if device.device_type != "temperature_sensor":
-            raise ValueError(f"Device {device_id} is not a temperature sensor")
-        
-        # Get thresholds from device configuration
-        config = device.configuration or {}
-        min_temp = Decimal(str(config.get("min_temp", -25)))
-        max_temp = Decimal(str(config.get("max_temp", 5)))
-        
-        # Determine if alert needed
-        alert_triggered = temperature < min_temp or temperature > max_temp
-        alert_type = None
-        if temperature < min_temp:
-            alert_type = "below_minimum"
-        elif temperature > max_temp:
-            alert_type = "above_maximum"
-        
-        log = TemperatureLog(
-            device_id=device_id,
-            venue_id=device.venue_id,
-            location=device.location,
-            temperature=temperature,
-            temperature_unit=unit,
-            humidity=humidity,
-            min_threshold=min_temp,
-            max_threshold=max_temp,
-            alert_triggered=alert_triggered,
-            alert_type=alert_type,
-            acknowledged=False
-        )
-        db.add(log)
-        
-        # Update device last seen
-        device.last_seen = datetime.now(timezone.utc)
-        
-        db.commit()
-        db.refresh(log)
-        
-        result = {
-            "id": log.id,
-            "device_id": device_id,
-            "location": device.location,
-            "temperature": float(temperature),
-            "unit": unit,
-            "humidity": float(humidity) if humidity else None,
-            "recorded_at": log.created_at.isoformat(),
-            "within_range": not alert_triggered
+        """Record temperature reading from a sensor.
+
+        Goes through the telemetry pipeline: the reading is queued for a bulk
+        write unless it opens an alert, in which case it is stored immediately.
+        """
+        from app.services.iot_telemetry import temperature_telemetry
+
+        return temperature_telemetry.ingest(db, device_id, temperature, unit, humidity)
+
+    @staticmethod
+    def record_temperature_readings(
+        db: Session,
+        venue_id: int,
+        readings: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Record a batch of temperature readings (e.g. from a sensor gateway).
+
+        Each reading takes device_id, temperature and optionally unit, humidity
+        and recorded_at. All devices are validated, and the whole batch must
+        fit in the telemetry queue, before any reading is taken.
+        """
+        from app.services.iot_telemetry import temperature_telemetry
+
+        temperature_telemetry.check_capacity(len(readings))
+        for device_id in {r["device_id"] for r in readings}:
+            sensor = temperature_telemetry.registry.get(db, device_id)
+            if sensor is None or sensor.venue_id != venue_id:
+                raise ValueError(f"Device {device_id} not found")
+
+        results = [
+            temperature_telemetry.ingest(
+                db, r["device_id"], r["temperature"], r.get("unit") or "C",
+                r.get("humidity"), r.get("recorded_at"), venue_id=venue_id
+            )
+            for r in readings
+        ]
+
+        return {
+            "accepted": len(results),
+            "alerts": [dict(r["alert"], id=r["id"], device_id=r["device_id"]) for r in results if "alert" in r]
         }
-        
-        if alert_triggered:
-            result["alert"] = {
-                "type": alert_type,
-                "message": f"Temperature {temperature}°{unit} is outside safe range ({min_temp}-{max_temp}°{unit})",
-                "severity": "critical",
-                "requires_action": True
-            }
-        
-        return result
-    
+
     @staticmethod
     def get_temperature_history(
         db: Session,
@@ -242,42 +228,90 @@ class IoTService:
         location: Optional[str] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        alerts_only: bool = False
+        alerts_only: bool = False,
+        resolution: str = "auto"
     ) -> Dict[str, Any]:
-        """Get temperature history for HACCP compliance."""
-        from app.models.advanced_features_v9 import TemperatureLog
-        
-        query = db.query(TemperatureLog).filter(TemperatureLog.venue_id == venue_id)
-        
+        """Get temperature history for HACCP compliance.
+
+        Served from the minute or hour rollups ("auto" picks minutes for up to
+        a day, hours beyond). Alerts and resolution="raw" read the raw readings,
+        which are only kept for the retention period.
+        """
+        from app.models.advanced_features_v9 import TemperatureLog, TemperatureRollup
+        from app.services.iot_telemetry import as_utc
+
+        end_date = as_utc(end_date) or datetime.now(timezone.utc)
+        start_date = as_utc(start_date)
+
+        raw_query = db.query(TemperatureLog).filter(
+            TemperatureLog.venue_id == venue_id,
+            TemperatureLog.recorded_at <= end_date
+        )
         if device_id:
-            query = query.filter(TemperatureLog.device_id == device_id)
+            raw_query = raw_query.filter(TemperatureLog.device_id == device_id)
         if location:
-            query = query.filter(TemperatureLog.location == location)
+            raw_query = raw_query.filter(TemperatureLog.location == location)
         if start_date:
-            query = query.filter(TemperatureLog.created_at >= start_date)
-        if end_date:
-            query = query.filter(TemperatureLog.created_at <= end_date)
-        if alerts_only:
-            query = query.filter(TemperatureLog.alert_triggered == True)
-        
-        logs = query.order_by(TemperatureLog.created_at.desc()).limit(1000).all()
-        
+            raw_query = raw_query.filter(TemperatureLog.recorded_at >= start_date)
+        alerts_query = raw_query.filter(TemperatureLog.alert_triggered.is_(True))
+
+        if alerts_only or resolution == "raw":
+            query = alerts_query if alerts_only else raw_query
+            logs = query.order_by(TemperatureLog.recorded_at.desc()).limit(1000).all()
+
+            return {
+                "venue_id": venue_id,
+                "resolution": "raw",
+                "total_readings": len(logs),
+                "alerts_count": sum(1 for log in logs if log.alert_triggered),
+                "readings": [{
+                    "id": log.id,
+                    "device_id": log.device_id,
+                    "location": log.location,
+                    "temperature": float(log.temperature),
+                    "unit": log.temperature_unit,
+                    "humidity": float(log.humidity) if log.humidity else None,
+                    "recorded_at": log.recorded_at.isoformat(),
+                    "alert_triggered": log.alert_triggered,
+                    "alert_type": log.alert_type,
+                    "acknowledged": log.alert_acknowledged
+                } for log in logs]
+            }
+
+        if start_date is None:
+            start_date = end_date - timedelta(days=1)
+        if resolution not in ("minute", "hour"):
+            resolution = "minute" if end_date - start_date <= timedelta(days=1) else "hour"
+
+        query = db.query(TemperatureRollup).filter(
+            TemperatureRollup.venue_id == venue_id,
+            TemperatureRollup.resolution == resolution,
+            TemperatureRollup.bucket_start >= start_date,
+            TemperatureRollup.bucket_start <= end_date
+        )
+        if device_id:
+            query = query.filter(TemperatureRollup.device_id == device_id)
+        if location:
+            query = query.filter(TemperatureRollup.location == location)
+
+        buckets = query.order_by(TemperatureRollup.bucket_start.desc()).limit(1000).all()
+
         return {
             "venue_id": venue_id,
-            "total_readings": len(logs),
-            "alerts_count": sum(1 for l in logs if l.alert_triggered),
+            "resolution": resolution,
+            "unit": "C",
+            "total_readings": sum(b.reading_count for b in buckets),
+            "alerts_count": alerts_query.filter(TemperatureLog.recorded_at >= start_date).count(),
             "readings": [{
-                "id": l.id,
-                "device_id": l.device_id,
-                "location": l.location,
-                "temperature": float(l.temperature),
-                "unit": l.temperature_unit,
-                "humidity": float(l.humidity) if l.humidity else None,
-                "recorded_at": l.created_at.isoformat(),
-                "alert_triggered": l.alert_triggered,
-                "alert_type": l.alert_type,
-                "acknowledged": l.acknowledged
-            } for l in logs]
+                "device_id": b.device_id,
+                "location": b.location,
+                "bucket_start": b.bucket_start.isoformat(),
+                "readings": b.reading_count,
+                "min_temp": round(b.min_celsius, 2),
+                "max_temp": round(b.max_celsius, 2),
+                "avg_temp": round(b.sum_celsius / b.reading_count, 2) if b.reading_count else None,
+                "out_of_range": b.out_of_range_count
+            } for b in buckets]
         }
     
     @staticmethod
@@ -294,7 +328,7 @@ class IoTService:
         if not log:
             raise ValueError(f"Temperature log {log_id} not found")
         
-        log.acknowledged = True
+        log.alert_acknowledged = True
         log.acknowledged_by = acknowledged_by
         log.acknowledged_at = datetime.now(timezone.utc)
         log.corrective_action = corrective_action
@@ -318,60 +352,73 @@ class IoTService:
         start_date: date,
         end_date: date
     ) -> Dict[str, Any]:
-        """Generate HACCP compliance report for inspections."""
-        from app.models.advanced_features_v9 import TemperatureLog, IoTDevice
-        
-        start_dt = datetime.combine(start_date, datetime.min.time())
-        end_dt = datetime.combine(end_date, datetime.max.time())
-        
-        # Get all readings in period
-        logs = db.query(TemperatureLog).filter(
-            TemperatureLog.venue_id == venue_id,
-            TemperatureLog.created_at >= start_dt,
-            TemperatureLog.created_at <= end_dt
-        ).all()
+        """Generate HACCP compliance report for inspections.
+
+        Reading statistics come from the hourly rollups, alerts from the alert
+        rows, which are exempt from raw-reading retention.
+        """
+        from app.models.advanced_features_v9 import TemperatureLog, TemperatureRollup
+        
+        start_dt = datetime.combine(start_date, datetime.min.time(), tzinfo=timezone.utc)
+        end_dt = datetime.combine(end_date, datetime.max.time(), tzinfo=timezone.utc)
+        
+        stats = db.query(
+            TemperatureRollup.location,
+            func.sum(TemperatureRollup.reading_count).label("readings"),
+            func.sum(TemperatureRollup.out_of_range_count).label("out_of_range"),
+            func.min(TemperatureRollup.min_celsius).label("min_temp"),
+            func.max(TemperatureRollup.max_celsius).label("max_temp"),
+            func.sum(TemperatureRollup.sum_celsius).label("sum_temp")
+        ).filter(
+            TemperatureRollup.venue_id == venue_id,
+            TemperatureRollup.resolution == "hour",
+            TemperatureRollup.bucket_start >= start_dt,
+            TemperatureRollup.bucket_start <= end_dt
+        ).group_by(TemperatureRollup.location).all()
+        
+        alerts = {
+            row.location: (row.alerts, row.acknowledged or 0)
+            for row in db.query(
+                TemperatureLog.location,
+                func.count(TemperatureLog.id).label("alerts"),
+                func.sum(case((TemperatureLog.alert_acknowledged.is_(True), 1), else_=0)).label("acknowledged")
+            ).filter(
+                TemperatureLog.venue_id == venue_id,
+                TemperatureLog.alert_triggered.is_(True),
+                TemperatureLog.recorded_at >= start_dt,
+                TemperatureLog.recorded_at <= end_dt
+            ).group_by(TemperatureLog.location)
+        }
         
         # Group by location
         by_location = {}
-        for log in logs:
-            if log.location not in by_location:
-                by_location[log.location] = {
-                    "readings": 0,
-                    "alerts": 0,
-                    "acknowledged_alerts": 0,
-                    "min_temp": float(log.temperature),
-                    "max_temp": float(log.temperature),
-                    "avg_temp": 0
-                }
-            
-            loc = by_location[log.location]
-            loc["readings"] += 1
-            loc["min_temp"] = min(loc["min_temp"], float(log.temperature))
-            loc["max_temp"] = max(loc["max_temp"], float(log.temperature))
-            
-            if log.alert_triggered:
-                loc["alerts"] += 1
-                if log.alert_acknowledged:
-                    loc["acknowledged_alerts"] += 1
-        
-        # Calculate averages
-        for loc in by_location.values():
-            # Simplified - would calculate actual average
-            loc["avg_temp"] = (loc["min_temp"] + loc["max_temp"]) / 2
+        for row in stats:
+            location_alerts, location_acknowledged = alerts.get(row.location, (0, 0))
+            by_location[row.location] = {
+                "readings": row.readings,
+                "out_of_range_readings": row.out_of_range,
+                "alerts": location_alerts,
+                "acknowledged_alerts": location_acknowledged,
+                "min_temp": round(row.min_temp, 2),
+                "max_temp": round(row.max_temp, 2),
+                "avg_temp": round(row.sum_temp / row.readings, 2) if row.readings else 0
+            }
         
-        total_readings = len(logs)
-        total_alerts = sum(1 for l in logs if l.alert_triggered)
-        acknowledged_alerts = sum(1 for l in logs if l.alert_triggered and l.alert_acknowledged)
+        total_readings = sum(row.readings or 0 for row in stats)
+        out_of_range = sum(row.out_of_range or 0 for row in stats)
+        total_alerts = sum(a for a, _ in alerts.values())
+        acknowledged_alerts = sum(ack for _, ack in alerts.values())
         
         compliance_score = 100
-        if total_alerts > 0:
-            compliance_score = max(0, 100 - (total_alerts / total_readings * 100))
+        if total_readings > 0:
+            compliance_score = max(0, 100 - (out_of_range / total_readings * 100))
         
         return {
             "venue_id": venue_id,
             "report_period": {"start": str(start_date), "end": str(end_date)},
             "summary": {
                 "total_readings": total_readings,
+                "out_of_range_readings": out_of_range,
                 "total_alerts": total_alerts,
                 "acknowledged_alerts": acknowledged_alerts,
                 "unacknowledged_alerts": total_alerts - acknowledged_alerts,
@@ -1005,97 +1052,353 @@ class IoTService:
         tap_number: Optional[int] = None
     ) -> Dict[str, Any]:
         """Record a flow meter reading for bulk liquid tracking."""
-        from app.models.advanced_features_v9 import FlowMeterReading, IoTDevice, KegTracking
+        [result] = IoTService._apply_flow_readings(db, venue_id, [{
+            "device_id": device_id,
+            "meter_type": meter_type,
+            "flow_volume_ml": flow_volume_ml,
+            "container_id": container_id,
+            "stock_item_id": stock_item_id,
+            "flow_rate_ml_per_sec": flow_rate_ml_per_sec,
+            "temperature_celsius": temperature_celsius,
+            "pressure_psi": pressure_psi,
+            "order_id": order_id,
+            "staff_user_id": staff_user_id,
+            "tap_number": tap_number,
+        }])
+        db.commit()
+        return result
 
-        # Validate device
-        device = db.query(IoTDevice).filter(IoTDevice.id == device_id).first()
-        if not device:
-            raise ValueError(f"Device {device_id} not found")
+    @staticmethod
+    def record_flow_meter_readings(
+        db: Session,
+        venue_id: int,
+        readings: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Record a batch of flow meter readings (e.g. from a gateway) in one transaction.
 
-        # Get current totals if tracking a container
-        total_dispensed = flow_volume_ml
-        remaining = None
-        capacity = None
-        fill_pct = None
+        Each reading takes the keyword arguments of record_flow_meter_reading,
+        plus an optional recorded_at. Nothing is stored if any reading is rejected.
+        """
+        if not readings:
+            return {"accepted": 0, "readings": []}
 
-        if container_id:
-            # Get previous readings for this container
-            prev_readings = db.query(func.sum(FlowMeterReading.flow_volume_ml)).filter(
-                FlowMeterReading.container_id == container_id
-            ).scalar() or 0
-            total_dispensed = prev_readings + flow_volume_ml
-
-            # Check for keg tracking
-            keg = db.query(KegTracking).filter(KegTracking.keg_id == container_id).first()
-            if keg:
-                capacity = keg.initial_volume_ml
-                remaining = capacity - total_dispensed
-                fill_pct = (remaining / capacity * 100) if capacity > 0 else 0
-
-                # Update keg tracking
-                keg.current_volume_ml = max(0, remaining)
-                keg.dispensed_volume_ml = total_dispensed
-                keg.pours_count += 1
-
-                if fill_pct <= 10:
-                    keg.status = "low"
-                if fill_pct <= 0:
-                    keg.status = "empty"
-                    keg.empty_date = datetime.now(timezone.utc)
-
-        # Determine low/empty alerts
-        is_low = fill_pct is not None and fill_pct <= 15
-        is_empty = fill_pct is not None and fill_pct <= 2
-
-        reading = FlowMeterReading(
-            venue_id=venue_id,
-            device_id=device_id,
-            meter_type=meter_type,
-            stock_item_id=stock_item_id,
-            container_id=container_id,
-            flow_volume_ml=flow_volume_ml,
-            flow_rate_ml_per_sec=flow_rate_ml_per_sec,
-            total_dispensed_ml=total_dispensed,
-            remaining_volume_ml=remaining,
-            container_capacity_ml=capacity,
-            fill_percentage=fill_pct,
-            temperature_celsius=temperature_celsius,
-            pressure_psi=pressure_psi,
-            order_id=order_id,
-            staff_user_id=staff_user_id,
-            tap_number=tap_number,
-            is_low_level=is_low,
-            is_empty=is_empty,
-            alert_sent=False
-        )
-        db.add(reading)
+        try:
+            results = IoTService._apply_flow_readings(db, venue_id, readings)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
 
-        # Update device last seen
-        device.last_seen = datetime.now(timezone.utc)
+        return {
+            "accepted": len(results),
+            "readings": results,
+            "alerts": [r["alert"] for r in results if "alert" in r]
+        }
 
-        db.commit()
-        db.refresh(reading)
+    @staticmethod
+    def _apply_flow_readings(
+        db: Session,
+        venue_id: int,
+        readings: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Insert flow readings and advance container running totals (no commit).
+
+        Totals are incremented in SQL, one UPDATE per container, so the cost of
+        a reading does not grow with the container's history and concurrent
+        ingests cannot lose each other's pours.
+        """
+        from app.models.advanced_features_v9 import (
+            BulkTankLevel, FlowMeterReading, IoTDevice, KegTracking,
+        )
 
-        result = {
-            "reading_id": reading.id,
-            "container_id": container_id,
-            "flow_volume_ml": flow_volume_ml,
-            "total_dispensed_ml": total_dispensed,
-            "recorded_at": reading.recorded_at.isoformat()
+        now = datetime.now(timezone.utc)
+        readings = [{**r, "recorded_at": IoTService._as_utc(r.get("recorded_at")) or now} for r in readings]
+
+        # Validate devices
+        device_ids = {r["device_id"] for r in readings}
+        devices = {
+            d.id: d for d in db.query(IoTDevice).filter(
+                IoTDevice.id.in_(device_ids),
+                IoTDevice.venue_id == venue_id
+            )
         }
+        missing = device_ids - devices.keys()
+        if missing:
+            raise ValueError(f"Device {min(missing)} not found")
 
-        if remaining is not None:
-            result["remaining_ml"] = remaining
-            result["fill_percentage"] = round(fill_pct, 1)
+        by_container: Dict[str, List[Dict[str, Any]]] = {}
+        for r in readings:
+            if r.get("container_id"):
+                by_container.setdefault(r["container_id"], []).append(r)
+
+        # Container id -> row id (the newest row when an id has been reused)
+        kegs: Dict[str, int] = {}
+        tanks: Dict[str, int] = {}
+        if by_container:
+            kegs = dict(db.query(KegTracking.keg_id, KegTracking.id).filter(
+                KegTracking.venue_id == venue_id,
+                KegTracking.keg_id.in_(by_container.keys())
+            ).order_by(KegTracking.id).all())
+        if by_container.keys() - kegs.keys():
+            tanks = dict(db.query(BulkTankLevel.tank_id, BulkTankLevel.id).filter(
+                BulkTankLevel.venue_id == venue_id,
+                BulkTankLevel.tank_id.in_(by_container.keys() - kegs.keys())
+            ).order_by(BulkTankLevel.id).all())
+
+        # Per reading: (total dispensed, remaining ml, capacity ml)
+        totals: Dict[int, tuple] = {}
+
+        # Sorted so concurrent batches lock containers in the same order
+        for container_id in sorted(by_container):
+            group = by_container[container_id]
+            batch_ml = sum(r["flow_volume_ml"] for r in group)
+            last = max(group, key=lambda r: r["recorded_at"])
+
+            if container_id in kegs:
+                dispensed = func.coalesce(KegTracking.dispensed_volume_ml, 0) + batch_ml
+                remaining = KegTracking.initial_volume_ml - dispensed
+                newer = or_(KegTracking.last_reading_at.is_(None), KegTracking.last_reading_at <= last["recorded_at"])
+                row = db.execute(
+                    update(KegTracking)
+                    .where(KegTracking.id == kegs[container_id])
+                    .values(
+                        dispensed_volume_ml=dispensed,
+                        current_volume_ml=case((remaining > 0, remaining), else_=0),
+                        pours_count=func.coalesce(KegTracking.pours_count, 0) + len(group),
+                        status=case(
+                            (remaining <= 0, "empty"),
+                            (remaining <= KegTracking.initial_volume_ml * 0.1, "low"),
+                            else_=KegTracking.status
+                        ),
+                        empty_date=case(
+                            (and_(remaining <= 0, KegTracking.empty_date.is_(None)), now),
+                            else_=KegTracking.empty_date
+                        ),
+                        last_reading_at=case((newer, last["recorded_at"]), else_=KegTracking.last_reading_at),
+                        last_reading_ml=case((newer, last["flow_volume_ml"]), else_=KegTracking.last_reading_ml),
+                    )
+                    .returning(KegTracking.dispensed_volume_ml, KegTracking.initial_volume_ml)
+                    .execution_options(synchronize_session=False)
+                ).one()
+                total, capacity = row.dispensed_volume_ml - batch_ml, row.initial_volume_ml
+                for r in group:
+                    total += r["flow_volume_ml"]
+                    totals[id(r)] = (total, capacity - total, capacity)
+
+            elif container_id in tanks:
+                level_ml = BulkTankLevel.current_level_liters * 1000 - batch_ml
+                level = case((level_ml > 0, level_ml / 1000), else_=0)
+                fill_pct = case(
+                    (BulkTankLevel.capacity_liters > 0, level / BulkTankLevel.capacity_liters * 100),
+                    else_=0
+                )
+                newer = or_(BulkTankLevel.last_reading_at.is_(None), BulkTankLevel.last_reading_at <= last["recorded_at"])
+                row = db.execute(
+                    update(BulkTankLevel)
+                    .where(BulkTankLevel.id == tanks[container_id])
+                    .values(
+                        current_level_liters=level,
+                        fill_percentage=fill_pct,
+                        dispensed_volume_ml=func.coalesce(BulkTankLevel.dispensed_volume_ml, 0) + batch_ml,
+                        pours_count=func.coalesce(BulkTankLevel.pours_count, 0) + len(group),
+                        status=case(
+                            (fill_pct <= 5, "critical"),
+                            (and_(BulkTankLevel.min_level_liters.isnot(None),
+                                  level <= BulkTankLevel.min_level_liters), "low"),
+                            else_=BulkTankLevel.status
+                        ),
+                        last_reading_at=case((newer, last["recorded_at"]), else_=BulkTankLevel.last_reading_at),
+                        last_reading_ml=case((newer, last["flow_volume_ml"]), else_=BulkTankLevel.last_reading_ml),
+                    )
+                    .returning(
+                        BulkTankLevel.dispensed_volume_ml,
+                        BulkTankLevel.current_level_liters,
+                        BulkTankLevel.capacity_liters
+                    )
+                    .execution_options(synchronize_session=False)
+                ).one()
+                total = row.dispensed_volume_ml - batch_ml
+                remaining = row.current_level_liters * 1000 + batch_ml
+                for r in group:
+                    total += r["flow_volume_ml"]
+                    remaining -= r["flow_volume_ml"]
+                    totals[id(r)] = (total, remaining, row.capacity_liters * 1000)
+
+            else:
+                # Untracked container: continue from its latest reading
+                total = db.query(FlowMeterReading.total_dispensed_ml).filter(
+                    FlowMeterReading.container_id == container_id,
+                    FlowMeterReading.venue_id == venue_id
+                ).order_by(
+                    FlowMeterReading.recorded_at.desc(), FlowMeterReading.id.desc()
+                ).limit(1).scalar() or 0
+                for r in group:
+                    total += r["flow_volume_ml"]
+                    totals[id(r)] = (total, None, None)
+
+        rows = []
+        for r in readings:
+            total, remaining, capacity = totals.get(id(r), (r["flow_volume_ml"], None, None))
+            fill_pct = (remaining / capacity * 100 if capacity > 0 else 0) if remaining is not None else None
+
+            rows.append(FlowMeterReading(
+                venue_id=venue_id,
+                device_id=r["device_id"],
+                meter_type=r["meter_type"],
+                stock_item_id=r.get("stock_item_id"),
+                container_id=r.get("container_id"),
+                flow_volume_ml=r["flow_volume_ml"],
+                flow_rate_ml_per_sec=r.get("flow_rate_ml_per_sec"),
+                total_dispensed_ml=total,
+                remaining_volume_ml=remaining,
+                container_capacity_ml=capacity,
+                fill_percentage=fill_pct,
+                temperature_celsius=r.get("temperature_celsius"),
+                pressure_psi=r.get("pressure_psi"),
+                order_id=r.get("order_id"),
+                staff_user_id=r.get("staff_user_id"),
+                tap_number=r.get("tap_number"),
+                is_low_level=fill_pct is not None and fill_pct <= FLOW_LOW_LEVEL_PCT,
+                is_empty=fill_pct is not None and fill_pct <= FLOW_EMPTY_PCT,
+                alert_sent=False,
+                recorded_at=r["recorded_at"]
+            ))
+        db.add_all(rows)
 
-        if is_low or is_empty:
-            result["alert"] = {
-                "type": "empty" if is_empty else "low_level",
-                "message": f"Container {container_id} is {'empty' if is_empty else 'running low'}",
-                "fill_percentage": round(fill_pct, 1) if fill_pct else 0
+        # Update device last seen
+        for device in devices.values():
+            device.last_seen = now
+
+        db.flush()
+
+        results = []
+        for reading in rows:
+            result = {
+                "reading_id": reading.id,
+                "container_id": reading.container_id,
+                "flow_volume_ml": reading.flow_volume_ml,
+                "total_dispensed_ml": reading.total_dispensed_ml,
+                "recorded_at": reading.recorded_at.isoformat()
             }
 
-        return result
+            if reading.remaining_volume_ml is not None:
+                result["remaining_ml"] = reading.remaining_volume_ml
+                result["fill_percentage"] = round(reading.fill_percentage, 1)
+
+            if reading.is_low_level or reading.is_empty:
+                result["alert"] = {
+                    "type": "empty" if reading.is_empty else "low_level",
+                    "message": f"Container {reading.container_id} is {'empty' if reading.is_empty else 'running low'}",
+                    "fill_percentage": round(reading.fill_percentage, 1) if reading.fill_percentage else 0
+                }
+            results.append(result)
+
+        return results
+
+    @staticmethod
+    def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+
+    @staticmethod
+    def reconcile_flow_totals(
+        db: Session,
+        venue_id: Optional[int] = None,
+        tolerance_ml: float = FLOW_DRIFT_TOLERANCE_ML
+    ) -> Dict[str, Any]:
+        """Recompute keg and tank running totals from the readings table.
+
+        Kegs are compared against the readings of their current cycle (since
+        they were tapped, or received if never tapped), tanks against the
+        readings since their last refill. The difference found is stored in
+        totals_drift_ml and, beyond the tolerance, the totals are corrected.
+
+        Each container is reconciled in its own transaction: its row is
+        locked while its readings are summed, so an ingest for that container
+        either commits first or waits, and ingests for every other container
+        carry on.
+        """
+        from app.models.advanced_features_v9 import BulkTankLevel, FlowMeterReading, KegTracking
+
+        now = datetime.now(timezone.utc)
+        drifted = []
+
+        keg_ids = db.query(KegTracking.id).filter(KegTracking.status != "returned")
+        tank_ids = db.query(BulkTankLevel.id)
+        if venue_id is not None:
+            keg_ids = keg_ids.filter(KegTracking.venue_id == venue_id)
+            tank_ids = tank_ids.filter(BulkTankLevel.venue_id == venue_id)
+        keg_ids = [row.id for row in keg_ids.order_by(KegTracking.id)]
+        tank_ids = [row.id for row in tank_ids.order_by(BulkTankLevel.id)]
+        db.commit()
+
+        def readings(container_venue_id, container_id, since):
+            query = db.query(
+                func.sum(FlowMeterReading.flow_volume_ml),
+                func.count(FlowMeterReading.id)
+            ).filter(
+                FlowMeterReading.venue_id == container_venue_id,
+                FlowMeterReading.container_id == container_id
+            )
+            if since:
+                # recorded_at comes from the database clock, which may only
+                # have second precision
+                query = query.filter(FlowMeterReading.recorded_at >= since.replace(microsecond=0))
+            total, pours = query.one()
+            return total or 0, pours
+
+        kegs_checked = 0
+        for keg_pk in keg_ids:
+            keg = db.query(KegTracking).filter(KegTracking.id == keg_pk).with_for_update().first()
+            if keg is None or keg.status == "returned":
+                db.rollback()
+                continue
+            total, pours = readings(keg.venue_id, keg.keg_id, keg.tapped_date or keg.received_date)
+            drift = (keg.dispensed_volume_ml or 0) - total
+            keg.totals_drift_ml = round(drift, 1)
+            keg.reconciled_at = now
+            if abs(drift) > tolerance_ml or (keg.pours_count or 0) != pours:
+                drifted.append({"container_id": keg.keg_id, "type": "keg", "drift_ml": round(drift, 1),
+                                "pours_count": keg.pours_count, "expected_pours": pours})
+                keg.dispensed_volume_ml = total
+                keg.pours_count = pours
+                keg.current_volume_ml = max(0, keg.initial_volume_ml - total)
+            db.commit()
+            kegs_checked += 1
+
+        tanks_checked = 0
+        for tank_pk in tank_ids:
+            tank = db.query(BulkTankLevel).filter(BulkTankLevel.id == tank_pk).with_for_update().first()
+            if tank is None:
+                db.rollback()
+                continue
+            total, pours = readings(tank.venue_id, tank.tank_id, tank.last_refill_date)
+            drift = (tank.dispensed_volume_ml or 0) - total
+            tank.totals_drift_ml = round(drift, 1)
+            tank.reconciled_at = now
+            if abs(drift) > tolerance_ml or (tank.pours_count or 0) != pours:
+                drifted.append({"container_id": tank.tank_id, "type": "tank", "drift_ml": round(drift, 1),
+                                "pours_count": tank.pours_count, "expected_pours": pours})
+                tank.dispensed_volume_ml = total
+                tank.pours_count = pours
+            db.commit()
+            tanks_checked += 1
+
+        for item in drifted:
+            logger.warning(
+                f"Flow totals drift on {item['type']} {item['container_id']}: "
+                f"{item['drift_ml']} ml, {item['pours_count']} pours recorded vs {item['expected_pours']} readings"
+            )
+
+        return {
+            "kegs_checked": kegs_checked,
+            "tanks_checked": tanks_checked,
+            "drifted": drifted,
+            "reconciled_at": now.isoformat()
+        }
 
     @staticmethod
     def register_keg(
@@ -1254,9 +1557,11 @@ class IoTService:
             usage = old_level - current_level_liters
             # Could update daily average here
         elif current_level_liters > old_level:
-            # Refill detected
+            # Refill detected; running totals restart from the refill
             tank.last_refill_date = datetime.now(timezone.utc)
             tank.last_refill_amount = current_level_liters - old_level
+            tank.dispensed_volume_ml = 0
+            tank.pours_count = 0
 
         # Determine status
         if tank.fill_percentage <= 5:
@@ -1412,3 +1717,13 @@ RFIDService = IoTService
 FlowMeterService = IoTService
 KegTrackingService = IoTService
 
+
+def run_flow_totals_reconciliation() -> Dict[str, Any]:
+    """Standalone function to reconcile flow totals (called from background scheduler)."""
+    from app.db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        return IoTService.reconcile_flow_totals(db)
+    finally:
+        db.close()
+
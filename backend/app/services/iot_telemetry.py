@@ -0,0 +1,760 @@
+"""Temperature telemetry ingestion.
+
+Fridge, freezer and hot-hold sensors report every few seconds, so a reading
+must not cost a device lookup and a commit of its own. ``temperature_telemetry``
+keeps:
+
+- a registry of sensor locations and thresholds, cached for
+  ``iot_sensor_cache_ttl_seconds`` and invalidated when a device changes;
+- the alert state of every sensor. Thresholds are evaluated in memory with
+  hysteresis: an alert opens when a reading leaves the safe range and clears
+  only once a reading is ``iot_temperature_hysteresis_c`` back inside it, so a
+  sensor hovering at the limit raises one alert instead of one per reading;
+- a bounded queue of raw rows, bulk-inserted every
+  ``iot_telemetry_flush_interval_ms`` or ``iot_telemetry_batch_size`` rows
+  together with the batch's minute and hour rollups and one ``last_seen``
+  update per device. When the queue is full, ingest raises
+  ``TelemetryBackpressure`` (HTTP 503 with Retry-After) instead of taking a
+  reading it cannot store. A batch that fails to write is retried, then
+  written row by row; rows that still fail are logged and counted in
+  ``dropped``.
+
+A reading that opens an alert skips the queue and is written immediately, so
+the alert row can be acknowledged as soon as it is reported. Outside the
+application lifespan (scripts, tests without it) every reading is written
+synchronously.
+
+Temperature history and HACCP reports read the rollups. Raw readings are
+purged after ``iot_raw_retention_days`` (alert rows are kept as HACCP records),
+minute rollups after ``iot_minute_rollup_retention_days``; hour rollups are
+kept.
+
+Hysteresis is evaluated per process, but the open alert itself is claimed on
+the device row (``iot_devices.alert_type``) with a conditional UPDATE: when
+several workers see the same excursion, or a restarted worker sees one that
+is still open, only the first claim writes an alert row. A worker seeds its
+state from the device row the first time it sees a sensor, and releases the
+claim when the reading comes back inside the hysteresis band.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, bindparam, case, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.session import SessionLocal
+from app.models.advanced_features_v9 import IoTDevice, TemperatureLog, TemperatureRollup
+
+logger = logging.getLogger(__name__)
+
+# Safe range (Celsius) for sensors without configured thresholds
+DEFAULT_MIN_C = -25.0
+DEFAULT_MAX_C = 5.0
+
+ROLLUP_RESOLUTIONS = ("minute", "hour")
+
+
+def to_celsius(value: float, unit: str) -> float:
+    return (value - 32) * 5 / 9 if unit.upper() == "F" else value
+
+
+def from_celsius(value: float, unit: str) -> float:
+    return value * 9 / 5 + 32 if unit.upper() == "F" else value
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    if resolution == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(second=0, microsecond=0)
+
+
+class TelemetryBackpressure(Exception):
+    """The write queue is full; the sender should retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Temperature telemetry queue is full, retry later")
+        self.retry_after = retry_after
+
+
+@dataclass(frozen=True)
+class SensorInfo:
+    id: int
+    venue_id: int
+    device_type: str
+    location: Optional[str]
+    min_c: Optional[float]
+    max_c: Optional[float]
+    alert_type: Optional[str] = None
+    alert_since: Optional[datetime] = None
+
+
+class SensorRegistry:
+    """Device id -> location/thresholds, re-read from the DB after ``ttl`` seconds."""
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._sensors: Dict[int, Tuple[float, SensorInfo]] = {}
+        self._ids_by_serial: Dict[Tuple[int, str], int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, device_id: int) -> Optional[SensorInfo]:
+        with self._lock:
+            entry = self._sensors.get(device_id)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        device = db.query(IoTDevice).filter(IoTDevice.id == device_id).first()
+        if device is None:
+            self.invalidate(device_id)
+            return None
+        return self._store(device)
+
+    def get_by_serial(self, db: Session, venue_id: int, serial: str) -> Optional[SensorInfo]:
+        """Look a sensor up by the identifier it reports (serial number or device_id)."""
+        with self._lock:
+            device_id = self._ids_by_serial.get((venue_id, serial))
+        if device_id is not None:
+            return self.get(db, device_id)
+
+        device = db.query(IoTDevice).filter(
+            IoTDevice.venue_id == venue_id,
+            or_(IoTDevice.serial_number == serial, IoTDevice.device_id == serial)
+        ).first()
+        if device is None:
+            return None
+        with self._lock:
+            self._ids_by_serial[(venue_id, serial)] = device.id
+        return self._store(device)
+
+    def invalidate(self, device_id: Optional[int] = None) -> None:
+        with self._lock:
+            if device_id is None:
+                self._sensors.clear()
+                self._ids_by_serial.clear()
+                return
+            self._sensors.pop(device_id, None)
+            for key in [k for k, v in self._ids_by_serial.items() if v == device_id]:
+                del self._ids_by_serial[key]
+
+    def _store(self, device: IoTDevice) -> SensorInfo:
+        config = device.configuration or device.config_json or {}
+        unit = str(config.get("unit", "C"))
+        min_temp, max_temp = config.get("min_temp"), config.get("max_temp")
+        sensor = SensorInfo(
+            id=device.id,
+            venue_id=device.venue_id,
+            device_type=device.device_type,
+            location=device.location or device.location_description,
+            min_c=to_celsius(float(min_temp), unit) if min_temp is not None else None,
+            max_c=to_celsius(float(max_temp), unit) if max_temp is not None else None,
+            alert_type=device.alert_type,
+            alert_since=as_utc(device.alert_since),
+        )
+        with self._lock:
+            self._sensors[device.id] = (time.monotonic(), sensor)
+        return sensor
+
+
+class TemperatureTelemetry:
+    """Evaluates temperature readings on arrival and bulk-writes them with their rollups."""
+
+    def __init__(
+        self,
+        max_queue_size: int = 20000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        hysteresis_c: float = 0.5,
+        registry: Optional[SensorRegistry] = None,
+    ):
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.hysteresis_c = hysteresis_c
+        self.registry = registry or SensorRegistry()
+        self._queue: Deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._alerts: Dict[int, Dict[str, Any]] = {}
+        self._latest: Dict[int, Dict[str, Any]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "received": 0,
+            "rejected": 0,
+            "written": 0,
+            "dropped": 0,
+            "write_errors": 0,
+            "batches": 0,
+            "alerts_opened": 0,
+            "alerts_cleared": 0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ==================== INGEST ====================
+
+    def ingest(
+        self,
+        db: Session,
+        device_id: int,
+        temperature: float,
+        unit: str = "C",
+        humidity: Optional[float] = None,
+        recorded_at: Optional[datetime] = None,
+        venue_id: Optional[int] = None,
+        default_thresholds: Optional[Tuple[float, float, str]] = None,
+    ) -> Dict[str, Any]:
+        """Evaluate one reading and queue it (or write it now if it opens an alert).
+
+        ``default_thresholds`` (min, max, unit) apply when the device has no
+        min_temp/max_temp configured. Raises ValueError for unknown devices,
+        devices of another venue and devices that are not temperature sensors,
+        and TelemetryBackpressure when the write queue is full.
+        """
+        self.check_capacity()
+        sensor = self.registry.get(db, device_id)
+        if sensor is None or (venue_id is not None and sensor.venue_id != venue_id):
+            raise ValueError(f"Device {device_id} not found")
+        if sensor.device_type != "temperature_sensor":
+            raise ValueError(f"Device {device_id} is not a temperature sensor")
+
+        min_c, max_c = sensor.min_c, sensor.max_c
+        if default_thresholds is not None:
+            default_min, default_max, default_unit = default_thresholds
+            min_c = min_c if min_c is not None else to_celsius(default_min, default_unit)
+            max_c = max_c if max_c is not None else to_celsius(default_max, default_unit)
+        min_c = min_c if min_c is not None else DEFAULT_MIN_C
+        max_c = max_c if max_c is not None else DEFAULT_MAX_C
+
+        temperature = float(temperature)
+        humidity = float(humidity) if humidity is not None else None
+        temp_c = to_celsius(temperature, unit)
+        recorded_at = as_utc(recorded_at) or datetime.now(timezone.utc)
+
+        excursion, opened, cleared = self._evaluate(sensor, temp_c, min_c, max_c, recorded_at)
+        if opened:
+            # Another worker may already hold this excursion's alert
+            opened = self._claim_alert(db, sensor.id, excursion, recorded_at)
+            if opened:
+                with self._lock:
+                    self._stats["alerts_opened"] += 1
+        elif cleared:
+            self._release_alert(db, sensor.id)
+
+        row = {
+            "venue_id": sensor.venue_id,
+            "device_id": sensor.id,
+            "location": sensor.location,
+            "location_name": sensor.location,
+            "temperature": temperature,
+            "temperature_celsius": temp_c,
+            "temperature_unit": unit,
+            "humidity": humidity,
+            "humidity_percent": humidity,
+            "min_threshold": round(from_celsius(min_c, unit), 2),
+            "max_threshold": round(from_celsius(max_c, unit), 2),
+            "is_in_range": excursion is None,
+            "alert_triggered": opened,
+            "alert_type": excursion,
+            "alert_acknowledged": False,
+            "recorded_at": recorded_at,
+            "created_at": recorded_at,
+        }
+
+        log_id = None
+        if opened or not self.submit(row):
+            log = TemperatureLog(**row)
+            db.add(log)
+            self._write_aggregates(db, [row])
+            db.commit()
+            log_id = log.id
+
+        result = {
+            "id": log_id,
+            "device_id": sensor.id,
+            "location": sensor.location,
+            "temperature": temperature,
+            "unit": unit,
+            "humidity": humidity,
+            "recorded_at": recorded_at.isoformat(),
+            "within_range": excursion is None,
+            "min_threshold": row["min_threshold"],
+            "max_threshold": row["max_threshold"],
+            "queued": log_id is None,
+        }
+
+        if opened:
+            result["alert"] = {
+                "type": excursion,
+                "message": (
+                    f"Temperature {temperature}°{unit} is outside safe range "
+                    f"({row['min_threshold']}-{row['max_threshold']}°{unit})"
+                ),
+                "severity": "critical",
+                "requires_action": True,
+            }
+        elif cleared:
+            result["alert_cleared"] = True
+
+        return result
+
+    def check_capacity(self, readings: int = 1) -> None:
+        """Raise TelemetryBackpressure if ``readings`` more rows do not fit in the queue."""
+        if not self.running:
+            return
+        with self._lock:
+            full = len(self._queue) + readings > self.max_queue_size
+            if full:
+                self._stats["rejected"] += readings
+        if full:
+            raise TelemetryBackpressure(retry_after=max(1, math.ceil(self.flush_interval)))
+
+    @staticmethod
+    def _claim_alert(db: Session, device_id: int, excursion: str, recorded_at: datetime) -> bool:
+        """Mark the excursion open on the device row; False if it already was (no commit)."""
+        devices = IoTDevice.__table__
+        claimed = db.execute(
+            update(devices).where(
+                devices.c.id == device_id,
+                or_(devices.c.alert_type.is_(None), devices.c.alert_type != excursion)
+            ).values(alert_type=excursion, alert_since=recorded_at)
+        ).rowcount
+        return claimed == 1
+
+    @staticmethod
+    def _release_alert(db: Session, device_id: int) -> None:
+        devices = IoTDevice.__table__
+        db.execute(
+            update(devices).where(devices.c.id == device_id, devices.c.alert_type.isnot(None)).values(
+                alert_type=None, alert_since=None
+            )
+        )
+        db.commit()
+
+    def _evaluate(
+        self,
+        sensor: SensorInfo,
+        temp_c: float,
+        min_c: float,
+        max_c: float,
+        recorded_at: datetime,
+    ) -> Tuple[Optional[str], bool, bool]:
+        """Returns (excursion type or None, alert opened, alert cleared)."""
+        excursion = None
+        if temp_c < min_c:
+            excursion = "below_minimum"
+        elif temp_c > max_c:
+            excursion = "above_maximum"
+        margin = min(self.hysteresis_c, (max_c - min_c) / 2)
+
+        opened = cleared = False
+        with self._lock:
+            self._stats["received"] += 1
+            if sensor.id not in self._latest and sensor.alert_type and sensor.id not in self._alerts:
+                # First reading seen here: pick up an alert opened by another worker
+                self._alerts[sensor.id] = {
+                    "device_id": sensor.id,
+                    "venue_id": sensor.venue_id,
+                    "location": sensor.location,
+                    "type": sensor.alert_type,
+                    "since": sensor.alert_since.isoformat() if sensor.alert_since else recorded_at.isoformat(),
+                }
+            active = self._alerts.get(sensor.id)
+            if excursion and (active is None or active["type"] != excursion):
+                self._alerts[sensor.id] = active = {
+                    "device_id": sensor.id,
+                    "venue_id": sensor.venue_id,
+                    "location": sensor.location,
+                    "type": excursion,
+                    "since": recorded_at.isoformat(),
+                }
+                opened = True
+            elif active and excursion is None and min_c + margin <= temp_c <= max_c - margin:
+                del self._alerts[sensor.id]
+                self._stats["alerts_cleared"] += 1
+                active = None
+                cleared = True
+
+            if active is not None:
+                active["temperature_celsius"] = round(temp_c, 2)
+            self._latest[sensor.id] = {
+                "device_id": sensor.id,
+                "venue_id": sensor.venue_id,
+                "location": sensor.location,
+                "temperature_celsius": round(temp_c, 2),
+                "in_range": excursion is None,
+                "alert_active": active is not None,
+                "recorded_at": recorded_at.isoformat(),
+            }
+        return excursion, opened, cleared
+
+    def current_readings(self, venue_id: int) -> List[Dict[str, Any]]:
+        """Latest reading per sensor seen by this process."""
+        with self._lock:
+            return [dict(r) for r in self._latest.values() if r["venue_id"] == venue_id]
+
+    def active_alerts(self, venue_id: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(a) for a in self._alerts.values() if a["venue_id"] == venue_id]
+
+    # ==================== BATCHED WRITES ====================
+
+    def submit(self, row: dict) -> bool:
+        """Queue one raw row.
+
+        Returns False when the pipeline is not running, or the queue filled
+        up since ``check_capacity``, so the caller writes the row itself.
+        """
+        if not self.running:
+            return False
+        with self._lock:
+            if len(self._queue) >= self.max_queue_size:
+                return False
+            self._queue.append(row)
+            wake = len(self._queue) >= self.batch_size
+        if wake:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return True
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Temperature telemetry started (batch {self.batch_size} rows / "
+            f"{self.flush_interval * 1000:.0f}ms, queue limit {self.max_queue_size})"
+        )
+
+    async def stop(self) -> None:
+        """Stop the drain task and flush whatever is still queued."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write every queued row; returns the number of rows taken off the queue."""
+        taken = 0
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return taken
+            taken += len(batch)
+            await asyncio.to_thread(self._write_batch, batch)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Temperature telemetry flush failed: {e}")
+
+    def _take_batch(self) -> List[dict]:
+        with self._lock:
+            count = min(len(self._queue), self.batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    def _write_rows(self, rows: List[dict]) -> Optional[Exception]:
+        """Insert rows with their aggregates in one transaction; returns the error, if any."""
+        db = SessionLocal()
+        try:
+            db.execute(insert(TemperatureLog), rows)
+            self._write_aggregates(db, rows)
+            db.commit()
+            return None
+        except Exception as e:
+            db.rollback()
+            return e
+        finally:
+            db.close()
+
+    def _write_batch(self, batch: List[dict]) -> None:
+        # The retry covers another worker inserting one of the batch's new
+        # rollup buckets first (IntegrityError) and transient connection errors
+        error = self._write_rows(batch)
+        if error is not None:
+            error = self._write_rows(batch)
+        if error is None:
+            with self._lock:
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+            return
+
+        # Row by row, so one bad reading does not take the batch down with it
+        logger.warning(f"Writing {len(batch)} temperature readings failed ({error}), retrying row by row")
+        written, failed = 0, []
+        for row in batch:
+            row_error = self._write_rows([row])
+            if row_error is None:
+                written += 1
+            else:
+                failed.append((row, row_error))
+
+        with self._lock:
+            self._stats["write_errors"] += 1
+            self._stats["written"] += written
+            self._stats["dropped"] += len(failed)
+        for row, row_error in failed:
+            logger.error(
+                f"Dropped temperature reading of device {row['device_id']} at "
+                f"{row['recorded_at'].isoformat()}: {row_error}"
+            )
+
+    def _write_aggregates(self, db: Session, rows: List[dict]) -> None:
+        """Fold rows into their minute/hour rollups and bump device last_seen (no commit)."""
+        merge_rollups(db, rows)
+
+        last_seen: Dict[int, datetime] = {}
+        for row in rows:
+            seen = last_seen.get(row["device_id"])
+            if seen is None or row["recorded_at"] > seen:
+                last_seen[row["device_id"]] = row["recorded_at"]
+        devices = IoTDevice.__table__
+        db.execute(
+            update(devices).where(devices.c.id == bindparam("touched_id")).values(last_seen=bindparam("seen_at")),
+            [{"touched_id": device_id, "seen_at": seen} for device_id, seen in last_seen.items()]
+        )
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "queue_depth": len(self._queue),
+                "active_alerts": len(self._alerts),
+                "running": self.running,
+            }
+
+    def prometheus_lines(self) -> List[str]:
+        stats = self.get_stats()
+        lines = []
+        for name in ("received", "rejected", "written", "dropped", "write_errors", "alerts_opened", "alerts_cleared"):
+            lines.append(f"# HELP iot_temperature_{name}_total Temperature readings telemetry: {name.replace('_', ' ')}")
+            lines.append(f"# TYPE iot_temperature_{name}_total counter")
+            lines.append(f"iot_temperature_{name}_total {stats[name]}")
+        lines.append("# HELP iot_temperature_queue_depth Temperature readings waiting to be written")
+        lines.append("# TYPE iot_temperature_queue_depth gauge")
+        lines.append(f"iot_temperature_queue_depth {stats['queue_depth']}")
+        lines.append("# HELP iot_temperature_active_alerts Sensors currently in an open temperature alert")
+        lines.append("# TYPE iot_temperature_active_alerts gauge")
+        lines.append(f"iot_temperature_active_alerts {stats['active_alerts']}")
+        return lines
+
+
+# ==================== ROLLUPS & RETENTION ====================
+
+def merge_rollups(db: Session, rows: List[dict]) -> None:
+    """Add raw rows to their minute and hour rollups (no commit).
+
+    Existing buckets are incremented in SQL so concurrent writers cannot lose
+    each other's readings; new buckets are inserted.
+    """
+    buckets: Dict[Tuple[int, str, datetime], Dict[str, Any]] = {}
+    for row in rows:
+        ts = as_utc(row["recorded_at"])
+        temp_c = row["temperature_celsius"]
+        out = 0 if row["is_in_range"] else 1
+        for resolution in ROLLUP_RESOLUTIONS:
+            key = (row["device_id"], resolution, bucket_start(ts, resolution))
+            agg = buckets.get(key)
+            if agg is None:
+                buckets[key] = {
+                    "venue_id": row["venue_id"], "location": row["location"],
+                    "count": 1, "min": temp_c, "max": temp_c, "sum": temp_c, "out": out,
+                }
+            else:
+                agg["count"] += 1
+                agg["min"] = min(agg["min"], temp_c)
+                agg["max"] = max(agg["max"], temp_c)
+                agg["sum"] += temp_c
+                agg["out"] += out
+    if not buckets:
+        return
+
+    rollups = TemperatureRollup.__table__
+    existing = {
+        (r.device_id, r.resolution, as_utc(r.bucket_start)): r.id
+        for r in db.execute(
+            select(rollups.c.id, rollups.c.device_id, rollups.c.resolution, rollups.c.bucket_start).where(
+                rollups.c.device_id.in_({k[0] for k in buckets}),
+                rollups.c.bucket_start.in_({k[2] for k in buckets})
+            )
+        )
+    }
+
+    updates, inserts = [], []
+    for (device_id, resolution, start), agg in buckets.items():
+        rollup_id = existing.get((device_id, resolution, start))
+        if rollup_id is not None:
+            updates.append({
+                "rollup_id": rollup_id, "add_count": agg["count"], "add_sum": agg["sum"],
+                "add_out": agg["out"], "batch_min": agg["min"], "batch_max": agg["max"],
+            })
+        else:
+            inserts.append({
+                "venue_id": agg["venue_id"], "device_id": device_id, "location": agg["location"],
+                "resolution": resolution, "bucket_start": start, "reading_count": agg["count"],
+                "min_celsius": agg["min"], "max_celsius": agg["max"], "sum_celsius": agg["sum"],
+                "out_of_range_count": agg["out"],
+            })
+
+    if updates:
+        batch_min = bindparam("batch_min", type_=Float)
+        batch_max = bindparam("batch_max", type_=Float)
+        db.execute(
+            update(rollups).where(rollups.c.id == bindparam("rollup_id")).values(
+                reading_count=rollups.c.reading_count + bindparam("add_count"),
+                sum_celsius=rollups.c.sum_celsius + bindparam("add_sum", type_=Float),
+                out_of_range_count=rollups.c.out_of_range_count + bindparam("add_out"),
+                min_celsius=case((rollups.c.min_celsius <= batch_min, rollups.c.min_celsius), else_=batch_min),
+                max_celsius=case((rollups.c.max_celsius >= batch_max, rollups.c.max_celsius), else_=batch_max),
+            ),
+            updates
+        )
+    if inserts:
+        db.execute(insert(rollups), inserts)
+
+
+def rebuild_temperature_rollups(
+    db: Session,
+    venue_id: int,
+    start: datetime,
+    end: datetime,
+    chunk_size: int = 5000
+) -> Dict[str, Any]:
+    """Recompute a venue's rollups from the raw readings still on record.
+
+    Used once for readings stored before rollups existed. The range is widened
+    to whole hours so no bucket is rebuilt from part of its readings.
+    """
+    start = bucket_start(as_utc(start), "hour")
+    end = bucket_start(as_utc(end), "hour") + timedelta(hours=1)
+
+    db.query(TemperatureRollup).filter(
+        TemperatureRollup.venue_id == venue_id,
+        TemperatureRollup.bucket_start >= start,
+        TemperatureRollup.bucket_start < end
+    ).delete(synchronize_session=False)
+
+    query = db.query(
+        TemperatureLog.venue_id,
+        TemperatureLog.device_id,
+        TemperatureLog.location,
+        TemperatureLog.recorded_at,
+        TemperatureLog.temperature_celsius,
+        TemperatureLog.temperature,
+        TemperatureLog.temperature_unit,
+        TemperatureLog.is_in_range,
+        TemperatureLog.alert_triggered,
+    ).filter(
+        TemperatureLog.venue_id == venue_id,
+        TemperatureLog.recorded_at >= start,
+        TemperatureLog.recorded_at < end
+    ).order_by(TemperatureLog.id)
+
+    readings = 0
+    chunk: List[dict] = []
+    for r in query.yield_per(chunk_size):
+        temp_c = r.temperature_celsius
+        if temp_c is None:
+            temp_c = to_celsius(r.temperature, r.temperature_unit or "C")
+        chunk.append({
+            "venue_id": r.venue_id,
+            "device_id": r.device_id,
+            "location": r.location,
+            "recorded_at": r.recorded_at,
+            "temperature_celsius": temp_c,
+            "is_in_range": r.is_in_range if r.is_in_range is not None else not r.alert_triggered,
+        })
+        if len(chunk) >= chunk_size:
+            merge_rollups(db, chunk)
+            readings += len(chunk)
+            chunk = []
+    merge_rollups(db, chunk)
+    readings += len(chunk)
+
+    db.commit()
+    return {"venue_id": venue_id, "start": start.isoformat(), "end": end.isoformat(), "readings": readings}
+
+
+def purge_expired_telemetry(
+    db: Session,
+    raw_retention_days: Optional[int] = None,
+    minute_retention_days: Optional[int] = None
+) -> Dict[str, int]:
+    """Delete raw readings and minute rollups past their retention period."""
+    if raw_retention_days is None:
+        raw_retention_days = settings.iot_raw_retention_days
+    if minute_retention_days is None:
+        minute_retention_days = settings.iot_minute_rollup_retention_days
+    now = datetime.now(timezone.utc)
+
+    raw = db.query(TemperatureLog).filter(
+        TemperatureLog.recorded_at < now - timedelta(days=raw_retention_days),
+        or_(TemperatureLog.alert_triggered.is_(False), TemperatureLog.alert_triggered.is_(None))
+    ).delete(synchronize_session=False)
+    minute = db.query(TemperatureRollup).filter(
+        TemperatureRollup.resolution == "minute",
+        TemperatureRollup.bucket_start < now - timedelta(days=minute_retention_days)
+    ).delete(synchronize_session=False)
+    db.commit()
+
+    return {"raw_readings": raw, "minute_rollups": minute}
+
+
+def run_telemetry_retention() -> Dict[str, int]:
+    """Standalone function to purge expired telemetry (called from background scheduler)."""
+    db = SessionLocal()
+    try:
+        result = purge_expired_telemetry(db)
+        if result["raw_readings"] or result["minute_rollups"]:
+            logger.info(
+                f"Telemetry retention: purged {result['raw_readings']} raw readings, "
+                f"{result['minute_rollups']} minute rollups"
+            )
+        return result
+    finally:
+        db.close()
+
+
+# Global instance
+temperature_telemetry = TemperatureTelemetry(
+    max_queue_size=settings.iot_telemetry_queue_max_size,
+    batch_size=settings.iot_telemetry_batch_size,
+    flush_interval=settings.iot_telemetry_flush_interval_ms / 1000,
+    hysteresis_c=settings.iot_temperature_hysteresis_c,
+    registry=SensorRegistry(ttl=settings.iot_sensor_cache_ttl_seconds),
+)
+metrics.register_collector(temperature_telemetry.prometheus_lines)
@@ -26,15 +26,40 @@ class IoTTemperatureService:
         db: Session, venue_id: int, sensor_id: str,
         temperature: float, location: str, equipment_type: str = None
     ) -> Dict[str, Any]:
-        """Store IoT sensor reading and check thresholds."""
+        """Store IoT sensor reading and check thresholds.
+
+        Readings from registered sensors go through the telemetry pipeline
+        (batched writes, rollups, alert hysteresis); unregistered sensors are
+        only evaluated.
+        """
+        from app.services.iot_telemetry import temperature_telemetry
+
         thresholds = IoTTemperatureService.DEFAULT_THRESHOLDS.get(
             equipment_type, {"min": 33, "max": 165, "unit": "F"}
         )
 
         in_range = thresholds["min"] <= temperature <= thresholds["max"]
         alert = None
+        stored = False
+        recorded_at = datetime.now(timezone.utc).isoformat()
 
-        if not in_range:
+        sensor = temperature_telemetry.registry.get_by_serial(db, venue_id, sensor_id)
+        if sensor is not None and sensor.device_type == "temperature_sensor":
+            result = temperature_telemetry.ingest(
+                db, sensor.id, temperature, thresholds["unit"],
+                default_thresholds=(thresholds["min"], thresholds["max"], thresholds["unit"])
+            )
+            thresholds = {"min": result["min_threshold"], "max": result["max_threshold"], "unit": thresholds["unit"]}
+            in_range = result["within_range"]
+            location = sensor.location or location
+            recorded_at = result["recorded_at"]
+            stored = True
+            raise_alert = "alert" in result
+        else:
+            logger.debug(f"Temperature reading from unregistered sensor {sensor_id} not stored")
+            raise_alert = not in_range
+
+        if raise_alert:
             alert = {
                 "type": "temperature_out_of_range",
                 "sensor_id": sensor_id,
@@ -52,25 +77,33 @@ class IoTTemperatureService:
             "in_range": in_range,
             "thresholds": thresholds,
             "alert": alert,
-            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "stored": stored,
+            "recorded_at": recorded_at,
         }
 
     @staticmethod
     def get_current_readings(db: Session, venue_id: int) -> List[Dict[str, Any]]:
         """Get latest reading from all sensors."""
-        return []
+        from app.services.iot_telemetry import temperature_telemetry
+
+        return temperature_telemetry.current_readings(venue_id)
 
     @staticmethod
     def get_alerts(db: Session, venue_id: int) -> List[Dict[str, Any]]:
         """Get active temperature alerts."""
-        return []
+        from app.services.iot_telemetry import temperature_telemetry
+
+        return temperature_telemetry.active_alerts(venue_id)
 
     @staticmethod
     def get_sensor_history(
         db: Session, venue_id: int, sensor_id: str, hours: int = 24
     ) -> Dict[str, Any]:
-        """Get historical readings for a sensor."""
-        return {
+        """Get historical readings for a sensor (per-minute rollups, Celsius)."""
+        from app.services.iot_service import IoTService
+        from app.services.iot_telemetry import temperature_telemetry
+
+        history = {
             "sensor_id": sensor_id,
             "period_hours": hours,
             "readings": [],
@@ -79,15 +112,50 @@ class IoTTemperatureService:
             "avg_temp": None,
         }
 
+        sensor = temperature_telemetry.registry.get_by_serial(db, venue_id, sensor_id)
+        if sensor is None:
+            return history
+
+        end = datetime.now(timezone.utc)
+        rollups = IoTService.get_temperature_history(
+            db, venue_id, device_id=sensor.id, start_date=end - timedelta(hours=hours),
+            end_date=end, resolution="minute"
+        )
+        buckets = rollups["readings"]
+        if buckets:
+            count = sum(b["readings"] for b in buckets)
+            history.update(
+                readings=buckets,
+                unit="C",
+                min_temp=min(b["min_temp"] for b in buckets),
+                max_temp=max(b["max_temp"] for b in buckets),
+                avg_temp=round(sum(b["avg_temp"] * b["readings"] for b in buckets) / count, 2),
+            )
+        return history
+
     @staticmethod
     def configure_thresholds(
         db: Session, venue_id: int, sensor_id: str,
         min_temp: float, max_temp: float
     ) -> Dict[str, Any]:
         """Set alert thresholds for a sensor."""
+        from app.models.advanced_features_v9 import IoTDevice
+        from app.services.iot_telemetry import temperature_telemetry
+
+        sensor = temperature_telemetry.registry.get_by_serial(db, venue_id, sensor_id)
+        if sensor is not None:
+            device = db.query(IoTDevice).filter(IoTDevice.id == sensor.id).first()
+            device.configuration = {
+                **(device.configuration or {}),
+                "min_temp": min_temp, "max_temp": max_temp, "unit": "F",
+            }
+            db.commit()
+            temperature_telemetry.registry.invalidate(sensor.id)
+
         return {
             "sensor_id": sensor_id,
             "min_temp": min_temp,
             "max_temp": max_temp,
+            "stored": sensor is not None,
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
@@ -13,17 +13,22 @@ Features:
 - Priority ordering
 - Recall orders
 - Performance metrics
+
+Screens are served from the in-memory kitchen state (see kitchen_state.py):
+every mutation here applies the committed ticket to it and pushes a delta to
+the ``kitchen`` WebSocket channel, so polling no longer hits the database.
 """
 
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 import uuid
 import enum
 from collections import defaultdict
 import logging
 
+from app.services.kitchen_state import KitchenTicket, kitchen_state
+
 logger = logging.getLogger(__name__)
 
 
@@ -90,6 +95,20 @@ class KitchenDisplayService:
     def __init__(self, db: Session):
         self.db = db
 
+    def _sync_state(
+        self,
+        venue_id: int,
+        tickets: List[KitchenTicket],
+        station_loads: Optional[Dict[int, int]] = None
+    ) -> None:
+        """Apply committed tickets to the in-memory kitchen state and push deltas"""
+        try:
+            kitchen_state.apply(self.db, venue_id, tickets, station_loads)
+        except Exception as e:
+            # The next read reloads the venue from the database
+            kitchen_state.invalidate(venue_id)
+            logger.warning(f"Failed to update kitchen state for venue {venue_id}: {e}")
+
     def _ensure_default_stations(self, venue_id: int) -> None:
         """Ensure default stations exist for venue"""
         from app.models.missing_features_models import KDSStation
@@ -115,6 +134,7 @@ class KitchenDisplayService:
 
             try:
                 self.db.commit()
+                kitchen_state.invalidate(venue_id)
                 logger.info(f"Created default KDS stations for venue {venue_id}")
             except Exception as e:
                 self.db.rollback()
@@ -154,6 +174,7 @@ class KitchenDisplayService:
                 self.db.add(station)
                 self.db.commit()
                 self.db.refresh(station)
+                kitchen_state.invalidate(venue_id)
                 logger.info(f"Created KDS station: {station_code} for venue {venue_id}")
             except Exception as e:
                 self.db.rollback()
@@ -203,6 +224,8 @@ class KitchenDisplayService:
             station_items[station_code].append(item)
 
         created_tickets = []
+        snapshots = []
+        now = datetime.now(timezone.utc)
 
         try:
             for station_code, sitems in station_items.items():
@@ -225,13 +248,15 @@ class KitchenDisplayService:
                     is_rush=is_rush,
                     priority=2 if is_rush else 1,
                     notes=notes,
-                    course=sitems[0].get("course", "main")
+                    course=sitems[0].get("course", "main"),
+                    created_at=now
                 )
 
                 self.db.add(ticket)
 
                 # Update station load
                 station.current_load = (station.current_load or 0) + 1
+                snapshots.append(KitchenTicket.from_model(ticket))
 
                 created_tickets.append({
                     "ticket_code": ticket_code,
@@ -239,8 +264,10 @@ class KitchenDisplayService:
                     "station_name": station.name
                 })
 
+            station_loads = {s.id: s.current_load for s in stations}
             self.db.commit()
             logger.info(f"Created {len(created_tickets)} KDS tickets for order {order_id}")
+            self._sync_state(venue_id, snapshots, station_loads)
 
             return {
                 "success": True,
@@ -288,7 +315,10 @@ class KitchenDisplayService:
             return {"success": False, "error": "Ticket already bumped"}
 
         now = datetime.now(timezone.utc)
-        cook_time_seconds = int((now - ticket.created_at).total_seconds())
+        created_at = ticket.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        cook_time_seconds = int((now - created_at).total_seconds())
 
         # Update ticket
         ticket.status = TicketStatus.BUMPED.value
@@ -304,6 +334,10 @@ class KitchenDisplayService:
         if station:
             station.current_load = max(0, (station.current_load or 1) - 1)
 
+        venue_id = ticket.venue_id
+        snapshot = KitchenTicket.from_model(ticket)
+        station_loads = {station.id: station.current_load} if station else None
+
         # Create bump history record
         bump_record = KDSBumpHistory(
             venue_id=ticket.venue_id,
@@ -322,6 +356,7 @@ class KitchenDisplayService:
         try:
             self.db.commit()
             logger.info(f"Bumped ticket {ticket_code}, cook time: {cook_time_seconds}s")
+            self._sync_state(venue_id, [snapshot], station_loads)
 
             return {
                 "success": True,
@@ -362,9 +397,14 @@ class KitchenDisplayService:
         if station:
             station.current_load = (station.current_load or 0) + 1
 
+        venue_id = ticket.venue_id
+        snapshot = KitchenTicket.from_model(ticket)
+        station_loads = {station.id: station.current_load} if station else None
+
         try:
             self.db.commit()
             logger.info(f"Recalled ticket {ticket_code}")
+            self._sync_state(venue_id, [snapshot], station_loads)
 
             return {
                 "success": True,
@@ -392,16 +432,18 @@ class KitchenDisplayService:
         ).all()
 
         now = datetime.now(timezone.utc)
-        fired_count = 0
+        fired = []
 
         for ticket in tickets:
             if ticket.status in [TicketStatus.NEW.value, TicketStatus.IN_PROGRESS.value]:
                 ticket.fired_at = now
-                fired_count += 1
+                fired.append(KitchenTicket.from_model(ticket))
+        fired_count = len(fired)
 
         try:
             self.db.commit()
             logger.info(f"Fired {fired_count} tickets for order {order_id}, course: {course}")
+            self._sync_state(venue_id, fired)
 
             return {
                 "success": True,
@@ -433,8 +475,12 @@ class KitchenDisplayService:
         ticket.started_at = datetime.now(timezone.utc)
         ticket.started_by = staff_id
 
+        venue_id = ticket.venue_id
+        snapshot = KitchenTicket.from_model(ticket)
+
         try:
             self.db.commit()
+            self._sync_state(venue_id, [snapshot])
             return {
                 "success": True,
                 "ticket_code": ticket_code,
@@ -465,15 +511,21 @@ class KitchenDisplayService:
         ticket.notes = f"{ticket.notes or ''}\nVOIDED: {reason}" if reason else ticket.notes
 
         # Update station load if ticket was active
+        station_loads = None
         if was_active:
             station = self.db.query(KDSStation).filter(
                 KDSStation.id == ticket.station_id
             ).first()
             if station:
                 station.current_load = max(0, (station.current_load or 1) - 1)
+                station_loads = {station.id: station.current_load}
+
+        venue_id = ticket.venue_id
+        snapshot = KitchenTicket.from_model(ticket)
 
         try:
             self.db.commit()
+            self._sync_state(venue_id, [snapshot], station_loads)
             return {
                 "success": True,
                 "ticket_code": ticket_code,
@@ -489,112 +541,21 @@ class KitchenDisplayService:
         station_code: str
     ) -> Dict[str, Any]:
         """Get all active tickets for a station"""
-        from app.models.missing_features_models import KDSStation, KDSTicket
-
-        station = self.db.query(KDSStation).filter(
-            KDSStation.venue_id == venue_id,
-            KDSStation.station_code == station_code
-        ).first()
-
-        if not station:
-            return {"success": False, "error": "Station not found"}
-
-        # Get active tickets for this station
-        active_statuses = [
-            TicketStatus.NEW.value,
-            TicketStatus.IN_PROGRESS.value,
-            TicketStatus.RECALLED.value
-        ]
-
-        tickets = self.db.query(KDSTicket).filter(
-            KDSTicket.station_id == station.id,
-            KDSTicket.status.in_(active_statuses)
-        ).order_by(
-            KDSTicket.priority.desc(),
-            KDSTicket.created_at.asc()
-        ).all()
-
         now = datetime.now(timezone.utc)
-        target_time_seconds = (station.avg_cook_time_minutes or 10) * 60
-
-        ticket_list = []
-        overdue_count = 0
-
-        for ticket in tickets:
-            wait_seconds = int((now - ticket.created_at).total_seconds())
-            wait_minutes = wait_seconds // 60
-            is_overdue = wait_seconds > target_time_seconds * 1.5
-
-            if is_overdue:
-                overdue_count += 1
-
-            ticket_list.append({
-                "ticket_code": ticket.ticket_code,
-                "order_id": ticket.order_id,
-                "items": ticket.items,
-                "item_count": ticket.item_count,
-                "table_number": ticket.table_number,
-                "server_name": ticket.server_name,
-                "status": ticket.status,
-                "is_rush": ticket.is_rush,
-                "priority": ticket.priority,
-                "course": ticket.course,
-                "notes": ticket.notes,
-                "created_at": ticket.created_at.isoformat(),
-                "started_at": ticket.started_at.isoformat() if ticket.started_at else None,
-                "fired_at": ticket.fired_at.isoformat() if ticket.fired_at else None,
-                "wait_time_seconds": wait_seconds,
-                "wait_time_minutes": wait_minutes,
-                "is_overdue": is_overdue
-            })
+        state = kitchen_state.venue(self.db, venue_id, now)
+        with kitchen_state.lock:
+            display = state.station_display(station_code, now)
 
-        return {
-            "success": True,
-            "station": {
-                "id": station.id,
-                "station_code": station.station_code,
-                "name": station.name,
-                "station_type": station.station_type,
-                "categories": station.categories or [],
-                "avg_cook_time_minutes": station.avg_cook_time_minutes,
-                "max_capacity": station.max_capacity,
-                "current_load": station.current_load,
-                "is_active": station.is_active
-            },
-            "tickets": ticket_list,
-            "ticket_count": len(ticket_list),
-            "overdue_count": overdue_count
-        }
+        if display is None:
+            return {"success": False, "error": "Station not found"}
+        return display
 
     def get_expo_display(self, venue_id: int) -> Dict[str, Any]:
         """Get expo screen display - shows orders ready for pickup"""
-        from app.models.missing_features_models import KDSTicket
-
-        # Get recently bumped tickets (last 30 minutes)
-        cutoff = datetime.now(timezone.utc) - timedelta(minutes=30)
-
-        tickets = self.db.query(KDSTicket).filter(
-            KDSTicket.venue_id == venue_id,
-            KDSTicket.status == TicketStatus.BUMPED.value,
-            KDSTicket.bumped_at >= cutoff
-        ).order_by(KDSTicket.bumped_at.asc()).all()
-
-        # Group by order
-        orders_dict = defaultdict(list)
-        for ticket in tickets:
-            orders_dict[ticket.order_id].append(ticket)
-
-        expo_list = []
-        for order_id, order_tickets in orders_dict.items():
-            first_ticket = order_tickets[0]
-            expo_list.append({
-                "order_id": order_id,
-                "table_number": first_ticket.table_number,
-                "server_name": first_ticket.server_name,
-                "tickets_ready": len(order_tickets),
-                "ready_at": min(t.bumped_at for t in order_tickets).isoformat(),
-                "total_items": sum(t.item_count for t in order_tickets)
-            })
+        now = datetime.now(timezone.utc)
+        state = kitchen_state.venue(self.db, venue_id, now)
+        with kitchen_state.lock:
+            expo_list = state.expo(now)
 
         return {
             "success": True,
@@ -608,109 +569,22 @@ class KitchenDisplayService:
         station_code: Optional[str] = None
     ) -> Dict[str, Any]:
         """Get tickets approaching/past target cook time"""
-        from app.models.missing_features_models import KDSStation, KDSTicket
-
-        # Build query
-        query = self.db.query(KDSTicket, KDSStation).join(
-            KDSStation, KDSTicket.station_id == KDSStation.id
-        ).filter(
-            KDSTicket.venue_id == venue_id,
-            KDSTicket.status.in_([
-                TicketStatus.NEW.value,
-                TicketStatus.IN_PROGRESS.value,
-                TicketStatus.RECALLED.value
-            ])
-        )
-
-        if station_code:
-            query = query.filter(KDSStation.station_code == station_code)
-
-        results = query.all()
-
         now = datetime.now(timezone.utc)
-        alerts = []
-
-        for ticket, station in results:
-            elapsed = (now - ticket.created_at).total_seconds()
-            target_time = (station.avg_cook_time_minutes or 10) * 60
-
-            if elapsed > target_time:
-                alerts.append({
-                    "ticket_code": ticket.ticket_code,
-                    "order_id": ticket.order_id,
-                    "station_code": station.station_code,
-                    "overdue_seconds": int(elapsed - target_time),
-                    "alert_type": "overdue",
-                    "severity": "critical" if elapsed > target_time * 2 else "warning"
-                })
-            elif elapsed > target_time * 0.8:
-                alerts.append({
-                    "ticket_code": ticket.ticket_code,
-                    "order_id": ticket.order_id,
-                    "station_code": station.station_code,
-                    "remaining_seconds": int(target_time - elapsed),
-                    "alert_type": "warning",
-                    "severity": "info"
-                })
-
-        # Sort by severity
-        severity_order = {"critical": 0, "warning": 1, "info": 2}
-        alerts.sort(key=lambda x: severity_order.get(x.get("severity", "info"), 3))
+        state = kitchen_state.venue(self.db, venue_id, now)
+        with kitchen_state.lock:
+            alerts = state.alerts(station_code, now)
 
         return {"success": True, "alerts": alerts}
 
     def get_kitchen_overview(self, venue_id: int) -> Dict[str, Any]:
         """Get overview of all stations"""
-        from app.models.missing_features_models import KDSStation, KDSTicket
-
-        # Ensure default stations exist
-        self._ensure_default_stations(venue_id)
-
-        stations = self.db.query(KDSStation).filter(
-            KDSStation.venue_id == venue_id,
-            KDSStation.is_active == True
-        ).all()
-
-        station_list = []
-        now = datetime.now(timezone.utc)
-
-        for station in stations:
-            # Count active tickets
-            active_count = self.db.query(func.count(KDSTicket.id)).filter(
-                KDSTicket.station_id == station.id,
-                KDSTicket.status.in_([
-                    TicketStatus.NEW.value,
-                    TicketStatus.IN_PROGRESS.value,
-                    TicketStatus.RECALLED.value
-                ])
-            ).scalar() or 0
-
-            # Count overdue tickets
-            target_time = (station.avg_cook_time_minutes or 10) * 60 * 1.5
-            cutoff = now - timedelta(seconds=target_time)
-
-            overdue_count = self.db.query(func.count(KDSTicket.id)).filter(
-                KDSTicket.station_id == station.id,
-                KDSTicket.status.in_([
-                    TicketStatus.NEW.value,
-                    TicketStatus.IN_PROGRESS.value,
-                    TicketStatus.RECALLED.value
-                ]),
-                KDSTicket.created_at < cutoff
-            ).scalar() or 0
-
-            utilization = round((active_count / station.max_capacity) * 100, 1) if station.max_capacity > 0 else 0
-
-            station_list.append({
-                "station_code": station.station_code,
-                "name": station.name,
-                "station_type": station.station_type,
-                "current_load": active_count,
-                "max_capacity": station.max_capacity,
-                "utilization": utilization,
-                "overdue_count": overdue_count,
-                "is_active": station.is_active
-            })
+        state = kitchen_state.venue(self.db, venue_id)
+        if not state.stations:
+            # Ensure default stations exist (reloads the venue when created)
+            self._ensure_default_stations(venue_id)
+            state = kitchen_state.venue(self.db, venue_id)
+        with kitchen_state.lock:
+            station_list = state.overview()
 
         return {"success": True, "stations": station_list}
 
@@ -793,6 +667,8 @@ class KitchenDisplayService:
 
         try:
             self.db.commit()
+            # Targets and routing may have changed; reload on next read
+            kitchen_state.invalidate(venue_id)
             return {
                 "success": True,
                 "station_code": station_code,
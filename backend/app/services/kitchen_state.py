@@ -0,0 +1,581 @@
+"""In-memory per-venue Kitchen Display state.
+
+KitchenDisplayService used to rebuild every screen from the database on each
+poll. Instead, each venue is loaded once (stations, active tickets and the
+last 30 minutes of bumped tickets) and then kept current by the service's
+mutations (create, start, fire, bump, recall, void), which apply the
+committed ticket here. Each change is pushed as a delta to the ``kitchen``
+WebSocket channel, so screens only need a full read when they connect.
+
+Active tickets are kept per station in (priority desc, created_at asc)
+order. Cook-time stages are driven by a timer wheel instead of being
+recomputed on every read: a ticket enters ``warning`` at 80% of its
+station's target time, ``overdue`` at 100%, ``late`` (flagged on the station
+screen and in the overview) at 150% and ``critical`` at 200%. The background
+task started in the lifespan advances the wheels every second and pushes the
+transitions; reads also advance them, so results are correct without it.
+
+State is per process. Every local change announces the venue on the
+WebSocket event bus (``kitchen_state`` target), and the other workers drop
+their copy of that venue so their next read reloads it. A venue is also
+reloaded after ``kds_state_resync_seconds``, in case an announcement was
+lost.
+
+The registry lock guards in-memory work only. Venues are loaded from the
+database with the lock released, so the event-loop tick never waits on a
+query running in a request thread.
+"""
+
+import asyncio
+import bisect
+import logging
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("new", "in_progress", "recalled")
+BUMPED_STATUS = "bumped"
+
+# Expo shows tickets bumped within this window
+EXPO_WINDOW = timedelta(minutes=30)
+
+STAGE_OK, STAGE_WARNING, STAGE_OVERDUE, STAGE_LATE, STAGE_CRITICAL = range(5)
+STAGE_NAMES = ("ok", "warning", "overdue", "late", "critical")
+# Fraction of the station target cook time at which a ticket enters stages 1..4
+STAGE_THRESHOLDS = (0.8, 1.0, 1.5, 2.0)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """DateTime columns come back naive; they are stored as UTC."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return _as_utc(value).isoformat() if value else None
+
+
+class TimerWheel:
+    """Hashed timer wheel with one-second ticks.
+
+    ``schedule`` and ``advance`` are O(1) per entry; entries further out than
+    one revolution simply stay in their slot until their tick comes round.
+    Cancellation is lazy: callers tag entries and ignore stale ones.
+    """
+
+    def __init__(self, slots: int = 512):
+        self._slots: List[List[Tuple[int, Any]]] = [[] for _ in range(slots)]
+        self._tick: Optional[int] = None
+
+    def schedule(self, deadline: float, key: Any) -> None:
+        tick = math.ceil(deadline)
+        if self._tick is not None:
+            tick = max(tick, self._tick + 1)
+        self._slots[tick % len(self._slots)].append((tick, key))
+
+    def advance(self, now: float) -> List[Any]:
+        """Keys whose deadline is at or before ``now``, in deadline order."""
+        target = int(now)
+        if self._tick is None:
+            # First advance: everything scheduled so far up to now is due
+            self._tick = min((tick for slot in self._slots for tick, _ in slot), default=target) - 1
+        if target <= self._tick:
+            return []
+        size = len(self._slots)
+        first = max(self._tick + 1, target - size + 1)
+        expired: List[Tuple[int, Any]] = []
+        for tick in range(first, target + 1):
+            slot = self._slots[tick % size]
+            if not slot:
+                continue
+            keep = []
+            for entry in slot:
+                (expired if entry[0] <= target else keep).append(entry)
+            self._slots[tick % size] = keep
+        self._tick = target
+        expired.sort(key=lambda entry: entry[0])
+        return [key for _, key in expired]
+
+
+class KitchenTicket:
+    """Display fields of one ticket plus its place in the station queue."""
+
+    __slots__ = ("data", "station_id", "created", "bumped", "stage", "generation")
+
+    def __init__(self, data: Dict[str, Any], station_id: int, created: datetime,
+                 bumped: Optional[datetime] = None):
+        self.data = data
+        self.station_id = station_id
+        self.created = created
+        self.bumped = bumped
+        self.stage = STAGE_OK
+        self.generation = 0
+
+    @classmethod
+    def from_model(cls, ticket) -> "KitchenTicket":
+        """Snapshot a KDSTicket row (taken before commit expires its attributes)."""
+        created = _as_utc(ticket.created_at) or datetime.now(timezone.utc)
+        return cls(
+            {
+                "ticket_code": ticket.ticket_code,
+                "order_id": ticket.order_id,
+                "items": ticket.items,
+                "item_count": ticket.item_count or 0,
+                "table_number": ticket.table_number,
+                "server_name": ticket.server_name,
+                "status": ticket.status,
+                "is_rush": bool(ticket.is_rush),
+                "priority": ticket.priority or 1,
+                "course": ticket.course,
+                "notes": ticket.notes,
+                "created_at": created.isoformat(),
+                "started_at": _isoformat(ticket.started_at),
+                "fired_at": _isoformat(ticket.fired_at),
+            },
+            station_id=ticket.station_id,
+            created=created,
+            bumped=_as_utc(ticket.bumped_at),
+        )
+
+    @property
+    def code(self) -> str:
+        return self.data["ticket_code"]
+
+    @property
+    def status(self) -> str:
+        return self.data["status"]
+
+    @property
+    def sort_key(self) -> tuple:
+        return (-self.data["priority"], self.created, self.code)
+
+
+def _station_data(station) -> Dict[str, Any]:
+    return {
+        "id": station.id,
+        "station_code": station.station_code,
+        "name": station.name,
+        "station_type": station.station_type,
+        "categories": station.categories or [],
+        "avg_cook_time_minutes": station.avg_cook_time_minutes,
+        "max_capacity": station.max_capacity,
+        "current_load": station.current_load,
+        "is_active": station.is_active,
+    }
+
+
+class VenueKitchenState:
+    """Stations, ordered active tickets and recent bumps of one venue."""
+
+    def __init__(self, venue_id: int, stations: List[Dict[str, Any]], loaded_at: float):
+        self.venue_id = venue_id
+        self.loaded_at = loaded_at
+        self.stations: Dict[int, Dict[str, Any]] = {s["id"]: s for s in stations}
+        self.station_ids: Dict[str, int] = {s["station_code"]: s["id"] for s in stations}
+        self.tickets: Dict[str, KitchenTicket] = {}
+        self.queues: Dict[int, List[tuple]] = defaultdict(list)
+        # Bumped tickets in bump order, pruned to EXPO_WINDOW on read
+        self.bumped: Dict[str, KitchenTicket] = {}
+        self.wheel = TimerWheel()
+        self._generation = 0
+
+    # ----- Mutations -----
+
+    def apply(self, ticket: KitchenTicket, now: datetime) -> List[Dict[str, Any]]:
+        """Upsert one ticket snapshot; returns the deltas to push."""
+        previous = self._remove_active(ticket.code)
+        self.bumped.pop(ticket.code, None)
+        station_code = self.station_code(ticket.station_id)
+
+        if ticket.status in ACTIVE_STATUSES:
+            self._add_active(ticket, now)
+            action = "ticket_updated" if previous is not None else "ticket_added"
+            return [self._delta(action, station_code, self._display(ticket, now))]
+
+        if ticket.status == BUMPED_STATUS and ticket.bumped is not None:
+            self.bumped[ticket.code] = ticket
+        return [self._delta("ticket_removed", station_code, {
+            "ticket_code": ticket.code,
+            "order_id": ticket.data["order_id"],
+            "status": ticket.status,
+        })]
+
+    def set_station_load(self, station_id: int, load: int) -> None:
+        station = self.stations.get(station_id)
+        if station is not None:
+            station["current_load"] = load
+
+    def advance(self, now: datetime) -> List[Dict[str, Any]]:
+        """Move tickets whose stage deadline has passed; returns stage deltas."""
+        deltas = []
+        for code, generation in self.wheel.advance(now.timestamp()):
+            ticket = self.tickets.get(code)
+            if ticket is None or ticket.generation != generation:
+                continue
+            stage = self._stage_at(ticket, now)
+            self._schedule_next(ticket, stage)
+            if stage == ticket.stage:
+                continue
+            ticket.stage = stage
+            deltas.append(self._delta("ticket_stage", self.station_code(ticket.station_id), {
+                "ticket_code": code,
+                "order_id": ticket.data["order_id"],
+                "stage": STAGE_NAMES[ticket.stage],
+                "wait_time_seconds": int((now - ticket.created).total_seconds()),
+            }))
+        return deltas
+
+    def _add_active(self, ticket: KitchenTicket, now: datetime) -> None:
+        self.tickets[ticket.code] = ticket
+        bisect.insort(self.queues[ticket.station_id], ticket.sort_key)
+        # Wheel entries of the ticket's earlier snapshots become stale
+        self._generation += 1
+        ticket.generation = self._generation
+        ticket.stage = self._stage_at(ticket, now)
+        self._schedule_next(ticket, ticket.stage)
+
+    def _remove_active(self, code: str) -> Optional[KitchenTicket]:
+        ticket = self.tickets.pop(code, None)
+        if ticket is not None:
+            queue = self.queues[ticket.station_id]
+            index = bisect.bisect_left(queue, ticket.sort_key)
+            if index < len(queue) and queue[index] == ticket.sort_key:
+                del queue[index]
+        return ticket
+
+    def _target_seconds(self, station_id: int) -> int:
+        station = self.stations.get(station_id) or {}
+        return (station.get("avg_cook_time_minutes") or 10) * 60
+
+    def _stage_at(self, ticket: KitchenTicket, now: datetime) -> int:
+        elapsed = (now - ticket.created).total_seconds()
+        target = self._target_seconds(ticket.station_id)
+        return sum(1 for fraction in STAGE_THRESHOLDS if elapsed > target * fraction)
+
+    def _schedule_next(self, ticket: KitchenTicket, stage: int) -> None:
+        if stage >= len(STAGE_THRESHOLDS):
+            return
+        target = self._target_seconds(ticket.station_id)
+        deadline = ticket.created.timestamp() + target * STAGE_THRESHOLDS[stage]
+        self.wheel.schedule(deadline, (ticket.code, ticket.generation))
+
+    # ----- Reads -----
+
+    def station_code(self, station_id: int) -> Optional[str]:
+        station = self.stations.get(station_id)
+        return station["station_code"] if station else None
+
+    def active_tickets(self, station_id: int) -> List[KitchenTicket]:
+        return [self.tickets[key[2]] for key in self.queues.get(station_id, [])]
+
+    def _display(self, ticket: KitchenTicket, now: datetime) -> Dict[str, Any]:
+        wait_seconds = int((now - ticket.created).total_seconds())
+        return {
+            **ticket.data,
+            "station_code": self.station_code(ticket.station_id),
+            "wait_time_seconds": wait_seconds,
+            "wait_time_minutes": wait_seconds // 60,
+            "stage": STAGE_NAMES[ticket.stage],
+            "is_overdue": ticket.stage >= STAGE_LATE,
+        }
+
+    def station_display(self, station_code: str, now: datetime) -> Optional[Dict[str, Any]]:
+        station_id = self.station_ids.get(station_code)
+        if station_id is None:
+            return None
+        tickets = [self._display(t, now) for t in self.active_tickets(station_id)]
+        return {
+            "success": True,
+            "station": dict(self.stations[station_id]),
+            "tickets": tickets,
+            "ticket_count": len(tickets),
+            "overdue_count": sum(1 for t in tickets if t["is_overdue"]),
+        }
+
+    def expo(self, now: datetime) -> List[Dict[str, Any]]:
+        cutoff = now - EXPO_WINDOW
+        for code in [c for c, t in self.bumped.items() if t.bumped < cutoff]:
+            del self.bumped[code]
+
+        orders: Dict[int, List[KitchenTicket]] = defaultdict(list)
+        for ticket in sorted(self.bumped.values(), key=lambda t: t.bumped):
+            orders[ticket.data["order_id"]].append(ticket)
+        return [
+            {
+                "order_id": order_id,
+                "table_number": tickets[0].data["table_number"],
+                "server_name": tickets[0].data["server_name"],
+                "tickets_ready": len(tickets),
+                "ready_at": tickets[0].bumped.isoformat(),
+                "total_items": sum(t.data["item_count"] for t in tickets),
+            }
+            for order_id, tickets in orders.items()
+        ]
+
+    def alerts(self, station_code: Optional[str], now: datetime) -> List[Dict[str, Any]]:
+        alerts = []
+        for ticket in self.tickets.values():
+            if ticket.stage < STAGE_WARNING:
+                continue
+            code = self.station_code(ticket.station_id)
+            if station_code and code != station_code:
+                continue
+            elapsed = (now - ticket.created).total_seconds()
+            target = self._target_seconds(ticket.station_id)
+            if ticket.stage >= STAGE_OVERDUE:
+                alerts.append({
+                    "ticket_code": ticket.code,
+                    "order_id": ticket.data["order_id"],
+                    "station_code": code,
+                    "overdue_seconds": int(elapsed - target),
+                    "alert_type": "overdue",
+                    "severity": "critical" if ticket.stage >= STAGE_CRITICAL else "warning",
+                })
+            else:
+                alerts.append({
+                    "ticket_code": ticket.code,
+                    "order_id": ticket.data["order_id"],
+                    "station_code": code,
+                    "remaining_seconds": int(target - elapsed),
+                    "alert_type": "warning",
+                    "severity": "info",
+                })
+        severity_order = {"critical": 0, "warning": 1, "info": 2}
+        alerts.sort(key=lambda x: severity_order.get(x.get("severity", "info"), 3))
+        return alerts
+
+    def overview(self) -> List[Dict[str, Any]]:
+        result = []
+        for station in self.stations.values():
+            if not station["is_active"]:
+                continue
+            tickets = self.active_tickets(station["id"])
+            active_count = len(tickets)
+            max_capacity = station["max_capacity"] or 0
+            result.append({
+                "station_code": station["station_code"],
+                "name": station["name"],
+                "station_type": station["station_type"],
+                "current_load": active_count,
+                "max_capacity": station["max_capacity"],
+                "utilization": round((active_count / max_capacity) * 100, 1) if max_capacity > 0 else 0,
+                "overdue_count": sum(1 for t in tickets if t.stage >= STAGE_LATE),
+                "is_active": station["is_active"],
+            })
+        return result
+
+    def _delta(self, action: str, station_code: Optional[str], data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "type": "kds",
+            "action": action,
+            "venue_id": self.venue_id,
+            "station_code": station_code,
+            "data": data,
+        }
+
+
+class KitchenStateRegistry:
+    """Loads venues on first use and pushes their deltas to WebSocket screens."""
+
+    BUS_TARGET = "kitchen_state"
+
+    def __init__(self, resync_seconds: float = 30.0, tick_interval: float = 1.0):
+        self.resync_seconds = resync_seconds
+        self.tick_interval = tick_interval
+        self._venues: Dict[int, VenueKitchenState] = {}
+        # Changes per venue; a load that overlaps one may have missed it
+        self._changes: Dict[int, int] = defaultdict(int)
+        # Held for in-memory work only, never across a database query
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._broadcast: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None
+        self._bus = None
+        self._task: Optional[asyncio.Task] = None
+        self._sends: Set[asyncio.Task] = set()
+
+    @property
+    def lock(self) -> threading.Lock:
+        return self._lock
+
+    def venue(self, db: Session, venue_id: int, now: Optional[datetime] = None) -> VenueKitchenState:
+        """The venue's state, loading it from the database if missing or stale.
+
+        Also advances the venue's timer wheel to ``now`` and pushes any stage
+        transitions, so callers always read current stages. Call it without
+        holding ``lock``, then hold ``lock`` while using the returned state.
+        """
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            state = self._venues.get(venue_id)
+            fresh = state is not None and time.monotonic() - state.loaded_at <= self.resync_seconds
+            changes = self._changes[venue_id]
+        if not fresh:
+            started = time.monotonic()
+            loaded = self._load(db, venue_id, now, started)
+            with self._lock:
+                state = self._venues.get(venue_id)
+                if state is None or state.loaded_at < started:
+                    state = self._venues[venue_id] = loaded
+                    if self._changes[venue_id] != changes:
+                        # Changed while loading: serve this copy, reload on the next read
+                        state.loaded_at = -math.inf
+        with self._lock:
+            deltas = state.advance(now)
+        self.publish(deltas)
+        return state
+
+    def apply(
+        self,
+        db: Session,
+        venue_id: int,
+        tickets: List[KitchenTicket],
+        station_loads: Optional[Dict[int, int]] = None,
+    ) -> None:
+        """Apply committed ticket snapshots and push the resulting deltas."""
+        now = datetime.now(timezone.utc)
+        state = self.venue(db, venue_id, now)
+        with self._lock:
+            self._changes[venue_id] += 1
+            deltas = []
+            for ticket in tickets:
+                deltas.extend(state.apply(ticket, now))
+            for station_id, load in (station_loads or {}).items():
+                state.set_station_load(station_id, load)
+        self.publish(deltas)
+        self._announce(venue_id)
+
+    def invalidate(self, venue_id: Optional[int] = None) -> None:
+        """Drop loaded state (one venue or all) here and on the other workers."""
+        self._drop(venue_id)
+        self._announce(venue_id)
+
+    def _drop(self, venue_id: Optional[int]) -> None:
+        with self._lock:
+            venue_ids = set(self._venues) | set(self._changes) if venue_id is None else {venue_id}
+            for dropped in venue_ids:
+                self._changes[dropped] += 1
+                self._venues.pop(dropped, None)
+
+    def _load(self, db: Session, venue_id: int, now: datetime, loaded_at: float) -> VenueKitchenState:
+        from app.models.missing_features_models import KDSStation, KDSTicket
+
+        stations = db.query(KDSStation).filter(KDSStation.venue_id == venue_id).all()
+        state = VenueKitchenState(venue_id, [_station_data(s) for s in stations], loaded_at)
+
+        tickets = db.query(KDSTicket).filter(
+            KDSTicket.venue_id == venue_id,
+            KDSTicket.status.in_(ACTIVE_STATUSES),
+        ).all()
+        bumped = db.query(KDSTicket).filter(
+            KDSTicket.venue_id == venue_id,
+            KDSTicket.status == BUMPED_STATUS,
+            KDSTicket.bumped_at >= now - EXPO_WINDOW,
+        ).order_by(KDSTicket.bumped_at.asc()).all()
+
+        for ticket in tickets:
+            state.apply(KitchenTicket.from_model(ticket), now)
+        for ticket in bumped:
+            state.apply(KitchenTicket.from_model(ticket), now)
+        logger.debug(
+            f"Loaded kitchen state for venue {venue_id}: {len(stations)} stations, "
+            f"{len(tickets)} active tickets"
+        )
+        return state
+
+    # ----- WebSocket push -----
+
+    def publish(self, deltas: List[Dict[str, Any]]) -> None:
+        """Send deltas to the kitchen channel; safe to call from any thread."""
+        if not deltas or self._loop is None or self._broadcast is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._send, deltas)
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    def _send(self, deltas: List[Dict[str, Any]]) -> None:
+        for delta in deltas:
+            self._spawn(self._broadcast(delta))
+
+    def _spawn(self, coro) -> None:
+        task = self._loop.create_task(coro)
+        self._sends.add(task)
+        task.add_done_callback(self._sends.discard)
+
+    # ----- Cross-worker invalidation -----
+
+    def _announce(self, venue_id: Optional[int]) -> None:
+        """Tell the other workers to drop the venue; safe to call from any thread."""
+        if self._bus is None or self._loop is None:
+            return
+        message = {"venue_id": venue_id}
+        try:
+            self._loop.call_soon_threadsafe(lambda: self._spawn(self._bus.publish(self.BUS_TARGET, message)))
+        except RuntimeError:
+            pass
+
+    def _on_remote_change(self, data: Dict[str, Any]) -> None:
+        self._drop(data.get("venue_id"))
+
+    async def start(
+        self,
+        broadcast: Callable[[Dict[str, Any]], Awaitable[Any]],
+        bus=None,
+    ) -> None:
+        """Push deltas through ``broadcast`` and advance timer wheels every tick.
+
+        With an event ``bus``, local changes are announced to the other
+        workers and theirs invalidate the venue here.
+        """
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._broadcast = broadcast
+        if bus is not None:
+            self._bus = bus
+            bus.add_handler(self.BUS_TARGET, self._on_remote_change)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Kitchen display state publisher started")
+
+    async def flush(self) -> None:
+        """Wait until queued deltas and announcements have been sent."""
+        await asyncio.sleep(0)  # Runs the callbacks queued by call_soon_threadsafe
+        while self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._broadcast = None
+        self._bus = None
+        self._loop = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            try:
+                now = datetime.now(timezone.utc)
+                with self._lock:
+                    deltas = [d for state in self._venues.values() for d in state.advance(now)]
+                self.publish(deltas)
+            except Exception as e:
+                logger.warning(f"Kitchen state tick failed: {e}")
+
+
+kitchen_state = KitchenStateRegistry(resync_seconds=settings.kds_state_resync_seconds)
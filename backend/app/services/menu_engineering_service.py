@@ -10,6 +10,7 @@ from app.models.analytics import MenuAnalysis, ServerPerformance, DailyMetrics,
 from app.models.product import Product
 from app.models.pos import PosSalesLine
 from app.models.recipe import Recipe, RecipeLine
+from app.services.sales_rollup import orders_by_channel, sales_totals
 
 
 class MenuEngineeringService:
@@ -421,8 +422,23 @@ class DailyMetricsService:
             )
             self.db.add(metrics)
 
-        # Update metrics
-        metrics.total_orders = sales.order_count or 0
+        # Update metrics: closed guest orders and checks from the hourly sales
+        # cube, plus imported POS lines
+        day_start = start.replace(tzinfo=timezone.utc)
+        totals = sales_totals(self.db, day_start, day_start + timedelta(days=1), location_id)
+        channels = orders_by_channel(self.db, day_start, day_start + timedelta(days=1), location_id)
+
+        metrics.total_orders = totals["orders"] + (sales.order_count or 0)
+        metrics.dine_in_orders = channels.get("dine-in", 0)
+        metrics.takeout_orders = channels.get("takeout", 0)
+        metrics.delivery_orders = channels.get("delivery", 0)
+        metrics.total_revenue = totals["revenue"]
+        metrics.total_tips = totals["tips"]
+        metrics.avg_ticket = totals["revenue"] / totals["orders"] if totals["orders"] else None
+        if totals["item_revenue"] > 0:
+            metrics.food_cost = totals["cost"]
+            metrics.food_cost_percent = float(totals["cost"] / totals["item_revenue"] * 100)
+            metrics.gross_profit = totals["item_revenue"] - totals["cost"]
 
         # Calculate comparisons
         last_week = self.db.query(DailyMetrics).filter(
@@ -14,6 +14,7 @@ from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.http_client import http_client
 from app.models.gap_features_models import (
     PushToken, PushNotification, EmployeeAppSession, CustomerAppSession
 )
@@ -712,13 +713,11 @@ class PushNotificationService:
         data: Optional[Dict[str, Any]]
     ) -> None:
         """Send via Firebase Cloud Messaging."""
-        import httpx
-
         fcm_key = getattr(settings, 'FCM_SERVER_KEY', None)
         if not fcm_key:
             return
 
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("messaging", timeout=30) as client:
             response = await client.post(
                 "https://fcm.googleapis.com/fcm/send",
                 headers={
@@ -766,9 +765,7 @@ class PushNotificationService:
         data: Optional[Dict[str, Any]]
     ) -> None:
         """Send via Expo Push Notification service."""
-        import httpx
-
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("messaging", timeout=30) as client:
             response = await client.post(
                 "https://exp.host/--/api/v2/push/send",
                 json={
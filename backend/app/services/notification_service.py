@@ -7,6 +7,7 @@ from typing import List, Optional
 from dataclasses import dataclass
 import httpx
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +57,7 @@ class NotificationService:
 
     async def _get_client(self) -> httpx.AsyncClient:
         if self._http_client is None:
-            self._http_client = httpx.AsyncClient(timeout=30.0)
+            self._http_client = http_client("messaging", timeout=30.0)
         return self._http_client
 
     async def send_sms(
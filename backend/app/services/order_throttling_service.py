@@ -19,6 +19,7 @@ from sqlalchemy.orm import Session
 from enum import Enum
 import statistics
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -522,7 +523,7 @@ class OrderThrottlingService:
                 "Content-Type": "application/json"
             }
 
-            async with httpx.AsyncClient(timeout=10) as client:
+            async with http_client("delivery", timeout=10) as client:
                 if paused:
                     response = await client.post(
                         f"{base_url}/{store_id}/status",
@@ -587,7 +588,7 @@ class OrderThrottlingService:
                 "Content-Type": "application/json"
             }
 
-            async with httpx.AsyncClient(timeout=10) as client:
+            async with http_client("delivery", timeout=10) as client:
                 if paused:
                     response = await client.patch(
                         f"{base_url}/stores/{store_id}",
@@ -651,7 +652,7 @@ class OrderThrottlingService:
                 "Content-Type": "application/json"
             }
 
-            async with httpx.AsyncClient(timeout=10) as client:
+            async with http_client("delivery", timeout=10) as client:
                 if paused:
                     response = await client.put(
                         f"{base_url}/stores/{store_id}/status",
@@ -716,7 +717,7 @@ class OrderThrottlingService:
                 "Content-Type": "application/json"
             }
 
-            async with httpx.AsyncClient(timeout=10) as client:
+            async with http_client("delivery", timeout=10) as client:
                 if paused:
                     response = await client.put(
                         f"{base_url}/venues/{venue_id}/availability",
@@ -20,9 +20,8 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlencode
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -78,7 +77,7 @@ class PayPalService:
         ):
             return self._access_token
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.post(
                 f"{self._base_url}/v1/oauth2/token",
                 data={"grant_type": "client_credentials"},
@@ -174,7 +173,7 @@ class PayPalService:
         headers = await self._headers()
         headers["PayPal-Request-Id"] = reference_id or f"order-{datetime.now(timezone.utc).isoformat()}"
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/checkout/orders",
                 json=body,
@@ -201,7 +200,7 @@ class PayPalService:
         headers = await self._headers()
         headers["PayPal-Request-Id"] = f"capture-{order_id}"
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/checkout/orders/{order_id}/capture",
                 headers=headers,
@@ -230,7 +229,7 @@ class PayPalService:
         self._require_configured()
         headers = await self._headers()
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/checkout/orders/{order_id}/authorize",
                 headers=headers,
@@ -258,7 +257,7 @@ class PayPalService:
         self._require_configured()
         headers = await self._headers()
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.get(
                 f"{self._base_url}/v2/checkout/orders/{order_id}",
                 headers=headers,
@@ -291,7 +290,7 @@ class PayPalService:
         if note:
             body["note_to_payer"] = note
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/payments/captures/{capture_id}/refund",
                 json=body if body else None,
@@ -331,7 +330,7 @@ class PayPalService:
             },
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.post(
                 f"{self._base_url}/v1/billing/plans",
                 json=body,
@@ -364,7 +363,7 @@ class PayPalService:
         if custom_id:
             body["custom_id"] = custom_id
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.post(
                 f"{self._base_url}/v1/billing/subscriptions",
                 json=body,
@@ -406,7 +405,7 @@ class PayPalService:
             "items": items,
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.post(
                 f"{self._base_url}/v1/payments/payouts",
                 json=body,
@@ -446,7 +445,7 @@ class PayPalService:
             "webhook_event": json.loads(body),
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.post(
                 f"{self._base_url}/v1/notifications/verify-webhook-signature",
                 json=verification_body,
@@ -489,7 +488,7 @@ class PayPalService:
         if dispute_state:
             params["dispute_state"] = dispute_state
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.get(
                 f"{self._base_url}/v1/customer/disputes",
                 params=params,
@@ -503,7 +502,7 @@ class PayPalService:
         self._require_configured()
         headers = await self._headers()
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("paypal") as client:
             resp = await client.get(
                 f"{self._base_url}/v1/customer/disputes/{dispute_id}",
                 headers=headers,
@@ -4,11 +4,13 @@ Supports Epson, Star Micronics, and other ESC/POS compatible printers.
 Connections: Network (TCP/IP), USB (via system print queue).
 """
 
-import logging
-import socket
 import asyncio
+import itertools
+import logging
+import time
+from collections import deque
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any, Union
+from typing import Deque, Optional, List, Dict, Any, Union
 from dataclasses import dataclass, field
 from enum import Enum
 from io import BytesIO
@@ -160,12 +162,75 @@ class Receipt:
     receipt_type: str = "customer"  # customer, kitchen, bar
 
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    PRINTED = "printed"
+    SPOOLED = "spooled"  # Printer offline; kept and retried until it prints
+    FAILED = "failed"
+
+
+@dataclass
+class PrintJob:
+    """One payload queued for a printer."""
+    id: str
+    data: bytes
+    kind: str = "raw"
+    spool: bool = False
+    attempts: int = 0
+    status: JobStatus = JobStatus.QUEUED
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    error: Optional[str] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def finish(self, status: JobStatus, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+        self.done.set()
+
+    async def wait(self) -> JobStatus:
+        """Wait until the job printed, failed or was spooled."""
+        await self.done.wait()
+        return self.status
+
+
 class PrinterService:
-    """Service for printing receipts via ESC/POS printers."""
+    """Service for printing receipts via ESC/POS printers.
+
+    Network printers use a persistent asyncio stream connection. Before it
+    is reused after an idle period, the connection is checked with a DLE EOT
+    status request. Jobs go through a per-printer queue drained by one
+    writer task, so a printer's jobs never interleave and an offline
+    printer never blocks the event loop.
+
+    A failed job is retried with backoff. After ``JOB_ATTEMPTS`` failures:
+    - a spooling job (kitchen tickets) stays at the head of the queue and is
+      retried until the printer is back
+    - any other job (receipts, drawer kicks, test pages) fails
+    """
+
+    CONNECT_TIMEOUT = 3.0  # seconds
+    WRITE_TIMEOUT = 5.0
+    STATUS_TIMEOUT = 1.0
+    IDLE_HEALTH_CHECK = 30.0  # probe connections idle longer than this
+    JOB_ATTEMPTS = 3
+    RETRY_BACKOFF = (0.5, 1.0, 2.0)
+    SPOOL_RETRY_MAX = 60.0
+    MAX_QUEUED_JOBS = 500
 
     def __init__(self, config: PrinterConfig):
         self.config = config
-        self._socket: Optional[socket.socket] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._last_io: float = 0.0
+        self._jobs: Deque[PrintJob] = deque()
+        self._job_ready = asyncio.Event()
+        self._job_ids = itertools.count(1)
+        self._worker: Optional[asyncio.Task] = None
+        self.offline = False
+        self.last_success_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[datetime] = None
+        self.stats = {"printed": 0, "failed": 0, "retries": 0, "reconnects": 0}
 
     def _get_charset_command(self) -> bytes:
         """Get the charset command based on config."""
@@ -529,6 +594,12 @@ class PrinterService:
 
         return data.getvalue()
 
+    # ----- Transport -----
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
     async def connect(self) -> bool:
         """Connect to the printer."""
         if self.config.connection_type == ConnectionType.NETWORK:
@@ -536,15 +607,21 @@ class PrinterService:
                 logger.error("No IP address configured for network printer")
                 return False
 
+            await self.disconnect()
             try:
-                self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                self._socket.settimeout(5.0)
-                self._socket.connect((self.config.ip_address, self.config.port))
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.config.ip_address, self.config.port),
+                    timeout=self.CONNECT_TIMEOUT,
+                )
+                self._last_io = time.monotonic()
+                self.offline = False
+                self.stats["reconnects"] += 1
                 logger.info(f"Connected to printer at {self.config.ip_address}:{self.config.port}")
                 return True
-            except Exception as e:
-                logger.error(f"Failed to connect to printer: {e}")
-                self._socket = None
+            except (OSError, asyncio.TimeoutError) as e:
+                self._record_error(f"connect failed: {e or 'timed out'}")
+                logger.error(f"Failed to connect to printer {self.config.name}: {e or 'timed out'}")
+                self._reader = self._writer = None
                 return False
         else:
             # USB/serial would use system print queue
@@ -553,60 +630,176 @@ class PrinterService:
 
     async def disconnect(self):
         """Disconnect from the printer."""
-        if self._socket:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
             try:
-                self._socket.close()
+                writer.close()
+                await asyncio.wait_for(writer.wait_closed(), timeout=self.STATUS_TIMEOUT)
             except Exception as e:
-                logger.warning(f"Failed to close printer socket for {self.config.name}: {e}")
-            self._socket = None
+                logger.debug(f"Printer connection for {self.config.name} did not close cleanly: {e}")
 
-    async def print_raw(self, data: bytes) -> bool:
-        """Send raw data to the printer."""
-        if self.config.connection_type == ConnectionType.NETWORK:
-            if not self._socket:
-                if not await self.connect():
-                    return False
+    async def _healthy(self) -> bool:
+        """Whether the open connection can be reused."""
+        if not self.connected or self._reader.at_eof():
+            return False
+        if time.monotonic() - self._last_io < self.IDLE_HEALTH_CHECK:
+            return True
+        # Idle connection: ask for printer status (DLE EOT 1); any reply means alive
+        try:
+            self._writer.write(ESC.DLE + ESC.EOT + b'\x01')
+            await asyncio.wait_for(self._writer.drain(), timeout=self.STATUS_TIMEOUT)
+            reply = await asyncio.wait_for(self._reader.read(1), timeout=self.STATUS_TIMEOUT)
+            self._last_io = time.monotonic()
+            return bool(reply)
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+    async def _send_network(self, data: bytes):
+        if not await self._healthy():
+            if not await self.connect():
+                raise ConnectionError(self.last_error or "printer unreachable")
+        try:
+            self._writer.write(data)
+            await asyncio.wait_for(self._writer.drain(), timeout=self.WRITE_TIMEOUT)
+            self._last_io = time.monotonic()
+        except (OSError, asyncio.TimeoutError) as e:
+            await self.disconnect()
+            raise ConnectionError(f"write failed: {e or 'timed out'}") from e
+
+    async def _send_usb(self, data: bytes):
+        if not self.config.usb_device:
+            raise ConnectionError("No USB device configured")
+        # Write to USB device via the lp command
+        process = await asyncio.create_subprocess_exec(
+            "lp", "-d", self.config.usb_device, "-o", "raw", "-",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate(data)
+        if process.returncode != 0:
+            raise ConnectionError(f"lp command failed: {stderr.decode()}")
 
+    async def _send(self, data: bytes):
+        if self.config.connection_type == ConnectionType.NETWORK:
+            await self._send_network(data)
+        elif self.config.connection_type == ConnectionType.USB:
+            await self._send_usb(data)
+        else:
+            raise ConnectionError(f"Unsupported connection type: {self.config.connection_type.value}")
+
+    def _record_error(self, error: str):
+        self.last_error = error
+        self.last_error_at = datetime.now(timezone.utc)
+
+    # ----- Job queue -----
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._jobs)
+
+    @property
+    def status(self) -> str:
+        if self.offline:
+            return "offline"
+        if self.last_success_at is not None or self.connected:
+            return "online"
+        return "configured"
+
+    def submit(self, data: bytes, kind: str = "raw", spool: bool = False) -> PrintJob:
+        """Queue a payload for this printer without waiting for it to print."""
+        job = PrintJob(id=f"{self.config.name}-{next(self._job_ids)}", data=data, kind=kind, spool=spool)
+        if self.offline and not spool and self._jobs:
+            # Don't queue a receipt or drawer kick behind spooled tickets for a dead printer
+            job.finish(JobStatus.FAILED, self.last_error or "printer offline")
+            return job
+        if len(self._jobs) >= self.MAX_QUEUED_JOBS:
+            job.finish(JobStatus.FAILED, "print queue full")
+            logger.error(f"Print queue full for {self.config.name}; dropping {kind} job")
+            return job
+        self._jobs.append(job)
+        self._job_ready.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        return job
+
+    async def _run(self):
+        """Drain the job queue, one job at a time."""
+        while True:
+            if not self._jobs:
+                self._job_ready.clear()
+                await self._job_ready.wait()
+                continue
+            job = self._jobs[0]
             try:
-                self._socket.sendall(data)
-                return True
+                await self._send(job.data)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.error(f"Failed to send data to printer: {e}")
-                await self.disconnect()
-                return False
-
-        elif self.config.connection_type == ConnectionType.USB:
-            if not self.config.usb_device:
-                logger.error("No USB device configured")
-                return False
-
+                await self._job_failed(job, str(e))
+                continue
+
+            self._jobs.popleft()
+            self.offline = False
+            self.last_success_at = datetime.now(timezone.utc)
+            self.stats["printed"] += 1
+            job.attempts += 1
+            job.finish(JobStatus.PRINTED)
+
+    async def _job_failed(self, job: PrintJob, error: str):
+        job.attempts += 1
+        self._record_error(error)
+        # A printer already known to be offline gets one attempt for non-spooling jobs
+        if job.attempts < self.JOB_ATTEMPTS and (job.spool or not self.offline):
+            self.stats["retries"] += 1
+            await asyncio.sleep(self.RETRY_BACKOFF[min(job.attempts, len(self.RETRY_BACKOFF)) - 1])
+            return
+
+        self.offline = True
+        if job.spool:
+            if job.status != JobStatus.SPOOLED:
+                logger.warning(f"Printer {self.config.name} offline; spooling {job.kind} job {job.id}: {error}")
+                job.finish(JobStatus.SPOOLED, error)
+        else:
+            self._jobs.popleft()
+            self.stats["failed"] += 1
+            job.finish(JobStatus.FAILED, error)
+            logger.error(f"Print job {job.id} ({job.kind}) failed on {self.config.name}: {error}")
+
+        # Non-spooling jobs waiting behind a dead printer fail now
+        for waiting in [j for j in self._jobs if not j.spool]:
+            self._jobs.remove(waiting)
+            self.stats["failed"] += 1
+            waiting.finish(JobStatus.FAILED, error)
+
+        if self._jobs:
+            spooled_for = max(0, job.attempts - self.JOB_ATTEMPTS)
+            await asyncio.sleep(min(self.SPOOL_RETRY_MAX, self.RETRY_BACKOFF[-1] * 2 ** spooled_for))
+
+    async def close(self):
+        """Stop the job writer and close the connection."""
+        if self._worker is not None:
+            self._worker.cancel()
             try:
-                # Write to USB device or use lp command
-                import subprocess
-                process = await asyncio.create_subprocess_exec(
-                    "lp", "-d", self.config.usb_device, "-o", "raw", "-",
-                    stdin=asyncio.subprocess.PIPE,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-                stdout, stderr = await process.communicate(data)
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self.disconnect()
 
-                if process.returncode == 0:
-                    return True
-                else:
-                    logger.error(f"lp command failed: {stderr.decode()}")
-                    return False
+    async def print_raw(self, data: bytes, kind: str = "raw", spool: bool = False) -> bool:
+        """Send raw data to the printer.
 
-            except Exception as e:
-                logger.error(f"Failed to print via USB: {e}")
-                return False
-
-        return False
+        Returns True once printed, or, for spooling jobs, once spooled for
+        delivery when the printer comes back.
+        """
+        status = await self.submit(data, kind=kind, spool=spool).wait()
+        return status in (JobStatus.PRINTED, JobStatus.SPOOLED)
 
     async def print_receipt(self, receipt: Receipt) -> bool:
         """Print a receipt."""
         data = self.build_receipt(receipt)
-        return await self.print_raw(data)
+        return await self.print_raw(data, kind="receipt")
 
     async def print_kitchen_ticket(
         self,
@@ -615,18 +808,18 @@ class PrinterService:
         items: List[ReceiptItem],
         **kwargs
     ) -> bool:
-        """Print a kitchen ticket."""
+        """Print a kitchen ticket (spooled while the printer is offline)."""
         data = self.build_kitchen_ticket(
             order_number=order_number,
             table_number=table_number,
             items=items,
             **kwargs
         )
-        return await self.print_raw(data)
+        return await self.print_raw(data, kind="kitchen_ticket", spool=True)
 
     async def open_cash_drawer(self) -> bool:
         """Open the cash drawer."""
-        return await self.print_raw(ESC.DRAWER_KICK_2)
+        return await self.print_raw(ESC.DRAWER_KICK_2, kind="drawer")
 
     async def test_print(self) -> bool:
         """Print a test page."""
@@ -674,7 +867,7 @@ class PrinterService:
             data.write(ESC.FEED_LINES + b'\x03')
             data.write(ESC.CUT_PARTIAL)
 
-        return await self.print_raw(data.getvalue())
+        return await self.print_raw(data.getvalue(), kind="test")
 
 
 # ============================================================================
@@ -699,8 +892,12 @@ class PrinterManager:
 
     def remove_printer(self, printer_id: str):
         """Remove a printer."""
-        if printer_id in self.printers:
-            del self.printers[printer_id]
+        printer = self.printers.pop(printer_id, None)
+        if printer is not None:
+            try:
+                asyncio.get_running_loop().create_task(printer.close())
+            except RuntimeError:
+                pass  # No running loop, so no writer task to stop
 
     def list_printers(self) -> List[Dict[str, Any]]:
         """List all configured printers."""
@@ -712,14 +909,19 @@ class PrinterManager:
                 "connection": p.config.connection_type.value,
                 "ip_address": p.config.ip_address,
                 "port": p.config.port,
+                "status": p.status,
+                "queue_depth": p.queue_depth,
+                "spooled": sum(1 for job in p._jobs if job.status == JobStatus.SPOOLED),
+                "last_success_at": p.last_success_at.isoformat() if p.last_success_at else None,
+                "last_error": p.last_error,
             }
             for pid, p in self.printers.items()
         ]
 
     async def close_all(self):
-        """Close all printer connections."""
+        """Stop all job writers and close all printer connections."""
         for printer in self.printers.values():
-            await printer.disconnect()
+            await printer.close()
 
 
 # Singleton manager
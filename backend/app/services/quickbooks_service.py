@@ -8,6 +8,7 @@ from enum import Enum
 import json
 import httpx
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -105,7 +106,7 @@ class QuickBooksService:
         realm_id: str,
     ) -> Optional[QBOTokens]:
         """Exchange authorization code for access tokens."""
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("quickbooks", timeout=30) as client:
             try:
                 import base64
                 credentials = base64.b64encode(
@@ -149,7 +150,7 @@ class QuickBooksService:
         if not self._tokens or not self._tokens.refresh_token:
             return False
 
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("quickbooks", timeout=30) as client:
             try:
                 import base64
                 credentials = base64.b64encode(
@@ -205,7 +206,8 @@ class QuickBooksService:
             await self.refresh_tokens()
 
         if self._client is None:
-            self._client = httpx.AsyncClient(
+            self._client = http_client(
+                "quickbooks",
                 base_url=f"{self.api_base}/{self._tokens.realm_id}",
                 headers={
                     "Authorization": f"Bearer {self._tokens.access_token}",
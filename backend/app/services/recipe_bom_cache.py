@@ -0,0 +1,205 @@
+"""Compiled recipe (BOM) cache for stock deduction.
+
+Resolving a sold menu item to its ingredients costs a MenuItem query, up to
+four Recipe lookups and a Product query per recipe line. The cache keeps each
+menu item compiled into a flat ingredient list (product id + quantity per
+portion already converted to the product's stock unit) so a sale only has to
+lock and update StockOnHand rows.
+
+Invalidation:
+- Session hooks watch every flush for recipes, recipe lines, menu items and
+  new, deleted or renamed/re-unitized products. A transaction that wrote
+  one stores a new version token in ``app_settings`` (system /
+  recipe_bom_version) before it commits, and drops this process's entries
+  after it commits.
+- Every lookup reads that token (one indexed row), so edits committed by
+  other workers are picked up on their next deduction.
+- invalidate_recipe_bom_cache() drops this process's entries by hand.
+"""
+
+import logging
+import threading
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.models.operations import AppSetting
+from app.models.product import Product
+from app.models.recipe import Recipe, RecipeLine
+from app.models.restaurant import MenuItem
+
+logger = logging.getLogger(__name__)
+
+QTY_QUANTUM = Decimal("0.0001")
+
+
+@dataclass(frozen=True)
+class CompiledIngredient:
+    """One recipe line resolved against its product."""
+    product_id: int
+    recipe_unit: str
+    product_name: Optional[str] = None       # None when the product no longer exists
+    unit: Optional[str] = None               # Product (stock) unit
+    qty_per_portion: Optional[Decimal] = None  # None when units are incompatible
+    converted: bool = False                  # Recipe unit differs from stock unit
+
+    def qty_for(self, portions: Decimal) -> Decimal:
+        """Quantity to deduct in the stock unit for ``portions`` servings."""
+        qty = self.qty_per_portion * portions
+        return qty.quantize(QTY_QUANTUM) if self.converted else qty
+
+
+@dataclass(frozen=True)
+class CompiledMenuItem:
+    """A menu item with its recipe flattened to ingredients."""
+    menu_item_id: int
+    name: str
+    recipe_id: Optional[int] = None          # None when no recipe was found
+    ingredients: Tuple[CompiledIngredient, ...] = ()
+
+
+VERSION_CATEGORY = "system"
+VERSION_KEY = "recipe_bom_version"
+
+
+def _db_version(db: Session) -> Optional[str]:
+    """Token changed by every committed write a compiled BOM depends on."""
+    return db.scalar(select(AppSetting.value).where(
+        AppSetting.category == VERSION_CATEGORY,
+        AppSetting.key == VERSION_KEY,
+    ))
+
+
+class RecipeBomCache:
+    """Process-wide menu_item_id -> CompiledMenuItem cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[int, CompiledMenuItem] = {}
+        self._generation = 0
+        self._built_generation = 0
+        self._version: Optional[str] = None
+        self._hits = 0
+        self._misses = 0
+        self._rebuilds = 0
+
+    def invalidate(self) -> None:
+        """Drop all compiled entries on the next lookup."""
+        with self._lock:
+            self._generation += 1
+
+    def sync(self, db: Session) -> int:
+        """Clear entries if invalidated or the DB version changed.
+
+        Returns the generation token to pass to ``store``.
+        """
+        version = _db_version(db)
+        with self._lock:
+            if self._built_generation != self._generation or self._version != version:
+                if self._entries:
+                    self._rebuilds += 1
+                self._entries.clear()
+                self._built_generation = self._generation
+                self._version = version
+            return self._generation
+
+    def lookup(self, menu_item_ids: Iterable[int]) -> Tuple[Dict[int, CompiledMenuItem], List[int]]:
+        """Split ids into cached entries and ids that still need compiling."""
+        found: Dict[int, CompiledMenuItem] = {}
+        missing: List[int] = []
+        with self._lock:
+            for menu_item_id in menu_item_ids:
+                entry = self._entries.get(menu_item_id)
+                if entry is not None:
+                    found[menu_item_id] = entry
+                elif menu_item_id not in missing:
+                    missing.append(menu_item_id)
+            self._hits += len(found)
+            self._misses += len(missing)
+        return found, missing
+
+    def store(self, compiled: Dict[int, CompiledMenuItem], generation: int) -> None:
+        """Cache freshly compiled entries unless invalidated meanwhile."""
+        with self._lock:
+            if generation == self._generation == self._built_generation:
+                self._entries.update(compiled)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "generation": self._generation,
+                "hits": self._hits,
+                "misses": self._misses,
+                "rebuilds": self._rebuilds,
+            }
+
+
+# Global instance
+recipe_bom_cache = RecipeBomCache()
+
+
+def invalidate_recipe_bom_cache() -> None:
+    """Invalidate compiled recipes after recipe, recipe line or menu item edits."""
+    recipe_bom_cache.invalidate()
+
+
+# ==================== SESSION HOOKS ====================
+
+_CHANGED = "recipe_bom_changed"
+
+# Product columns a compiled ingredient depends on
+_PRODUCT_FIELDS = ("name", "unit")
+
+
+def _affects_bom(session: Session, obj) -> bool:
+    if isinstance(obj, (Recipe, RecipeLine, MenuItem)):
+        return True
+    if not isinstance(obj, Product):
+        return False
+    if obj in session.new or obj in session.deleted:
+        return True
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in _PRODUCT_FIELDS)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_bom_changes(session: Session, flush_context) -> None:
+    if session.info.get(_CHANGED):
+        return
+    if any(_affects_bom(session, obj) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[_CHANGED] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_bom_version(session: Session) -> None:
+    """Store a new version token inside the committing transaction."""
+    if session.in_nested_transaction():
+        return
+    session.flush()
+    if not session.info.get(_CHANGED):
+        return
+    token = uuid.uuid4().hex
+    updated = session.execute(update(AppSetting).where(
+        AppSetting.category == VERSION_CATEGORY,
+        AppSetting.key == VERSION_KEY,
+    ).values(value=token)).rowcount
+    if not updated:
+        session.add(AppSetting(category=VERSION_CATEGORY, key=VERSION_KEY, value=token))
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_compiled_boms(session: Session) -> None:
+    if session.info.pop(_CHANGED, None):
+        recipe_bom_cache.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_bom_changes(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_CHANGED, None)
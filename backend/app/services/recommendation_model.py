@@ -0,0 +1,550 @@
+"""
+Resident Recommendation Model
+
+Keeps a per-venue snapshot of everything the collaborative and content-based
+recommendation paths need, so upsell/kiosk requests are answered from memory
+instead of multi-join aggregate queries plus one image query per result row:
+
+- item-item co-occurrence (number of orders containing both items) and
+  customer-item order counts, stored as CSR arrays (indptr, indices, data);
+- each customer's top-k most similar customers (cosine over the distinct
+  items they ordered), also as CSR arrays;
+- per-item content vectors (category code, tag bitmap, price) scored with the
+  similarity rule the service always used: same category +40, price within
+  30% +20, +10 per shared tag;
+- item name, price, availability, image URL and rating, loaded in bulk.
+
+Freshness:
+- At most every ``recommendation_refresh_seconds`` a request checks for order
+  lines added since the snapshot was built and folds them in incrementally;
+  a changed menu signature (items, tags, ratings) rebuilds the snapshot.
+- ``rebuild_resident()`` (run by the scheduler every
+  ``recommendation_rebuild_seconds``) rebuilds every resident venue from
+  scratch, which picks up edited/voided lines and refreshes all neighbour
+  lists. ``recommendation_models.invalidate()`` forces a rebuild on next use.
+
+Usage:
+    from app.services.recommendation_model import recommendation_models
+
+    model = recommendation_models.get(db, venue_id)
+    for entry in model.item_based(item_id, limit=5):
+        ...
+"""
+
+import copy
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models import ItemTagLink, MenuItem, MenuItemRatingAggregate, Order, OrderItem, VenueStation
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_SCORE = 40
+PRICE_SCORE = 20
+TAG_SCORE = 10
+PRICE_MARGIN = 0.3
+
+_EMPTY_INT = np.zeros(0, dtype=np.int64)
+
+
+def _compress(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    vals: np.ndarray,
+    n_rows: int,
+    n_cols: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sum duplicate (row, col) entries into CSR ``(indptr, indices, data)``."""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    if rows.size:
+        keys, inverse = np.unique(rows * n_cols + cols, return_inverse=True)
+        data = np.bincount(inverse, weights=vals).astype(np.int32)
+        rows, cols = keys // n_cols, keys % n_cols
+    else:
+        data = np.zeros(0, dtype=np.int32)
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, cols.astype(np.int32), data
+
+
+def _expand_rows(indptr: np.ndarray) -> np.ndarray:
+    """Row index of every stored entry of a CSR matrix."""
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+def _pairs_within_groups(groups: np.ndarray, items: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Every ordered pair (a, b), a != b, of items sharing a group. ``groups`` must be sorted."""
+    if not len(groups):
+        return _EMPTY_INT, _EMPTY_INT
+    _, starts, sizes = np.unique(groups, return_index=True, return_counts=True)
+    pair_counts = np.repeat(sizes, sizes)
+    left = np.repeat(items, pair_counts)
+    block_starts = np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+    offsets = np.arange(int(pair_counts.sum())) - block_starts
+    right = items[np.repeat(np.repeat(starts, sizes), pair_counts) + offsets]
+    keep = left != right
+    return left[keep], right[keep]
+
+
+class RecommendationSnapshot:
+    """Query-ready recommendation data for one venue.
+
+    Item ``i`` is ``item_ids[i]``; customer ``c`` is ``customer_ids[c]``.
+    Row ``i`` of the co-occurrence matrix holds the items ordered together
+    with item ``i``; row ``c`` of the customer matrix holds the items customer
+    ``c`` ordered (data = number of orders) and row ``c`` of the neighbour
+    matrix their most similar customers (data = cosine similarity).
+    """
+
+    def __init__(self, venue_id: int, generation: int, neighbours: int):
+        self.venue_id = venue_id
+        self.generation = generation
+        self.neighbours = neighbours
+        self.built_at = time.monotonic()
+        self.checked_at = self.built_at
+        self.menu_signature: Tuple = ()
+        self.max_line_id = 0
+
+        self.item_ids = _EMPTY_INT
+        self.item_index: Dict[int, int] = {}
+        self.names: List[str] = []
+        self.image_urls: List[Optional[str]] = []
+        self.prices = np.zeros(0, dtype=np.float64)
+        self.available = np.zeros(0, dtype=bool)
+        self.categories = _EMPTY_INT  # -1 when the item has no category
+        self.ratings = np.zeros(0, dtype=np.float64)  # NaN when unrated
+        self.tags = np.zeros((0, 0), dtype=np.uint8)
+        self.order_counts = np.zeros(0, dtype=np.int64)
+
+        self.co_indptr = np.zeros(1, dtype=np.int64)
+        self.co_indices = np.zeros(0, dtype=np.int32)
+        self.co_data = np.zeros(0, dtype=np.int32)
+
+        self.customer_ids: List[int] = []
+        self.customer_index: Dict[int, int] = {}
+        self.cust_indptr = np.zeros(1, dtype=np.int64)
+        self.cust_indices = np.zeros(0, dtype=np.int32)
+        self.cust_data = np.zeros(0, dtype=np.int32)
+
+        self.nb_indptr = np.zeros(1, dtype=np.int64)
+        self.nb_indices = np.zeros(0, dtype=np.int32)
+        self.nb_scores = np.zeros(0, dtype=np.float32)
+
+    @property
+    def item_count(self) -> int:
+        return int(len(self.item_ids))
+
+    @property
+    def customer_count(self) -> int:
+        return len(self.customer_ids)
+
+    # ==================== QUERIES ====================
+
+    def describe(self, i: int) -> Dict[str, Any]:
+        rating = self.ratings[i]
+        return {
+            'item_id': int(self.item_ids[i]),
+            'name': self.names[i],
+            'price': float(self.prices[i]),
+            'image_url': self.image_urls[i],
+            'avg_rating': None if np.isnan(rating) else float(rating),
+        }
+
+    def item_based(self, item_id: int, limit: int = 5) -> List[Dict[str, Any]]:
+        """Items most often ordered together with ``item_id``."""
+        i = self.item_index.get(item_id)
+        if i is None:
+            return []
+        start, end = self.co_indptr[i], self.co_indptr[i + 1]
+        return self._ranked(self.co_indices[start:end], self.co_data[start:end], 'co_occurrence', limit)
+
+    def cart_based(self, cart_item_ids: Iterable[int], limit: int = 5) -> List[Dict[str, Any]]:
+        """Items most often ordered together with any item in the cart."""
+        rows = [self.item_index[i] for i in cart_item_ids if i in self.item_index]
+        if not rows:
+            return []
+        candidates = np.concatenate([self.co_indices[self.co_indptr[r]:self.co_indptr[r + 1]] for r in rows])
+        counts = np.concatenate([self.co_data[self.co_indptr[r]:self.co_indptr[r + 1]] for r in rows])
+        candidates, inverse = np.unique(candidates, return_inverse=True)
+        frequency = np.bincount(inverse, weights=counts).astype(np.int64)
+        keep = ~np.isin(candidates, rows)
+        return self._ranked(candidates[keep], frequency[keep], 'frequency', limit)
+
+    def user_based(self, customer_id: int, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """Items the customer's nearest neighbours ordered and the customer has not.
+
+        Returns None when the customer has no order history or no neighbours.
+        """
+        c = self.customer_index.get(customer_id)
+        if c is None:
+            return None
+        neighbours = self.nb_indices[self.nb_indptr[c]:self.nb_indptr[c + 1]]
+        if not len(neighbours):
+            return None
+
+        items = np.concatenate([self.cust_indices[self.cust_indptr[n]:self.cust_indptr[n + 1]] for n in neighbours])
+        orders = np.concatenate([self.cust_data[self.cust_indptr[n]:self.cust_indptr[n + 1]] for n in neighbours])
+        items, inverse, customer_counts = np.unique(items, return_inverse=True, return_counts=True)
+        order_counts = np.bincount(inverse, weights=orders).astype(np.int64)
+
+        own = self.cust_indices[self.cust_indptr[c]:self.cust_indptr[c + 1]]
+        keep = ~np.isin(items, own) & self.available[items]
+        items, customer_counts, order_counts = items[keep], customer_counts[keep], order_counts[keep]
+
+        ratings = np.nan_to_num(self.ratings[items], nan=-1.0)
+        order = np.lexsort((-order_counts, -ratings, -customer_counts))[:limit]
+        results = []
+        for k in order:
+            entry = self.describe(items[k])
+            entry['customer_count'] = int(customer_counts[k])
+            entry['order_count'] = int(order_counts[k])
+            results.append(entry)
+        return results
+
+    def similar_items(self, item_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+        """Items closest to ``item_id`` by category, price band and shared tags."""
+        i = self.item_index.get(item_id)
+        if i is None:
+            return []
+
+        if self.tags.shape[1]:
+            shared_tags = self.tags @ self.tags[i].astype(np.int64)
+        else:
+            shared_tags = np.zeros(self.item_count, dtype=np.int64)
+        same_category = (self.categories == self.categories[i]) & (self.categories[i] >= 0)
+        margin = self.prices[i] * PRICE_MARGIN
+        similar_price = np.abs(self.prices - self.prices[i]) <= margin
+        scores = CATEGORY_SCORE * same_category + PRICE_SCORE * similar_price + TAG_SCORE * shared_tags
+
+        scores[i] = 0
+        candidates = np.flatnonzero((scores > 0) & self.available)
+        order = candidates[np.argsort(-scores[candidates], kind="stable")][:limit]
+        results = []
+        for k in order:
+            entry = self.describe(k)
+            entry['similarity_score'] = int(scores[k])
+            entry['shared_tags'] = int(shared_tags[k])
+            results.append(entry)
+        return results
+
+    def _ranked(self, items: np.ndarray, counts: np.ndarray, count_key: str, limit: int) -> List[Dict[str, Any]]:
+        keep = self.available[items]
+        items, counts = items[keep], counts[keep]
+        ratings = np.nan_to_num(self.ratings[items], nan=-1.0)
+        order = np.lexsort((-ratings, -counts))[:limit]
+        results = []
+        for k in order:
+            entry = self.describe(items[k])
+            entry[count_key] = int(counts[k])
+            results.append(entry)
+        return results
+
+    # ==================== CUSTOMER NEIGHBOURS ====================
+
+    def _item_customers(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Transpose of the customer-item matrix: item -> customers (CSR indptr, indices)."""
+        rows = _expand_rows(self.cust_indptr)
+        order = np.argsort(self.cust_indices, kind="stable")
+        indptr = np.zeros(self.item_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.cust_indices, minlength=self.item_count), out=indptr[1:])
+        return indptr, rows[order]
+
+    def _customer_neighbours(
+        self,
+        c: int,
+        item_indptr: np.ndarray,
+        item_customers: np.ndarray,
+        degrees: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        items = self.cust_indices[self.cust_indptr[c]:self.cust_indptr[c + 1]]
+        if not len(items):
+            return _EMPTY_INT, np.zeros(0, dtype=np.float32)
+        others = np.concatenate([item_customers[item_indptr[i]:item_indptr[i + 1]] for i in items])
+        others, common = np.unique(others, return_counts=True)
+        keep = others != c
+        others, common = others[keep], common[keep]
+        scores = common / np.sqrt(degrees[c] * degrees[others])
+        if len(others) > self.neighbours:
+            top = np.argpartition(-scores, self.neighbours)[:self.neighbours]
+            others, scores = others[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return others[order], scores[order].astype(np.float32)
+
+    def _compute_neighbours(self, customers: Optional[Iterable[int]] = None) -> None:
+        """(Re)compute the neighbour lists of ``customers`` (all when None)."""
+        item_indptr, item_customers = self._item_customers()
+        degrees = np.diff(self.cust_indptr).astype(np.float64)
+
+        lists: List[Tuple[np.ndarray, np.ndarray]] = [
+            (self.nb_indices[self.nb_indptr[c]:self.nb_indptr[c + 1]], self.nb_scores[self.nb_indptr[c]:self.nb_indptr[c + 1]])
+            for c in range(len(self.nb_indptr) - 1)
+        ]
+        lists.extend((_EMPTY_INT, np.zeros(0, dtype=np.float32)) for _ in range(self.customer_count - len(lists)))
+        for c in (range(self.customer_count) if customers is None else customers):
+            lists[c] = self._customer_neighbours(c, item_indptr, item_customers, degrees)
+
+        self.nb_indptr = np.zeros(self.customer_count + 1, dtype=np.int64)
+        np.cumsum([len(n) for n, _ in lists], out=self.nb_indptr[1:])
+        self.nb_indices = np.concatenate([n for n, _ in lists]).astype(np.int32) if lists else np.zeros(0, dtype=np.int32)
+        self.nb_scores = np.concatenate([s for _, s in lists]).astype(np.float32) if lists else np.zeros(0, dtype=np.float32)
+
+
+class RecommendationModels:
+    """Process-resident holder of one RecommendationSnapshot per venue."""
+
+    def __init__(self, refresh_seconds: float = 30.0, neighbours: int = 10):
+        self.refresh_seconds = refresh_seconds
+        self.neighbours = neighbours
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._snapshots: Dict[int, RecommendationSnapshot] = {}
+
+    def invalidate(self) -> None:
+        """Mark every resident snapshot stale; the next ``get`` rebuilds it."""
+        with self._lock:
+            self._generation += 1
+
+    def get(self, db: Session, venue_id: int) -> RecommendationSnapshot:
+        """Return the venue's snapshot, folding in new orders at most every ``refresh_seconds``."""
+        snapshot = self._snapshots.get(venue_id)
+        if (
+            snapshot is not None
+            and snapshot.generation == self._generation
+            and time.monotonic() - snapshot.checked_at < self.refresh_seconds
+        ):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshots.get(venue_id)
+            if snapshot is None or snapshot.generation != self._generation:
+                snapshot = self._build(db, venue_id, self._generation)
+            elif time.monotonic() - snapshot.checked_at >= self.refresh_seconds:
+                snapshot = self._refresh(db, snapshot)
+            self._snapshots[venue_id] = snapshot
+        return snapshot
+
+    def rebuild_resident(self, db: Session) -> int:
+        """Rebuild every resident venue snapshot from scratch; returns the number rebuilt."""
+        with self._lock:
+            venue_ids = list(self._snapshots)
+        for venue_id in venue_ids:
+            snapshot = self._build(db, venue_id, self._generation)
+            with self._lock:
+                self._snapshots[venue_id] = snapshot
+        return len(venue_ids)
+
+    def get_stats(self) -> dict:
+        """Describe the resident snapshots (for status endpoints)."""
+        now = time.monotonic()
+        return {
+            "generation": self._generation,
+            "venues": {
+                venue_id: {
+                    "items": s.item_count,
+                    "customers": s.customer_count,
+                    "co_occurrence_pairs": int(len(s.co_indices)),
+                    "age_seconds": round(now - s.built_at, 1),
+                    "stale": s.generation != self._generation,
+                }
+                for venue_id, s in list(self._snapshots.items())
+            },
+        }
+
+    # ==================== BUILD ====================
+
+    @staticmethod
+    def _menu_signature(db: Session) -> Tuple:
+        items = db.query(func.count(MenuItem.id), func.max(MenuItem.updated_at)).one()
+        tags = db.query(func.count(ItemTagLink.id), func.max(ItemTagLink.id)).one()
+        ratings = db.query(func.count(MenuItemRatingAggregate.id), func.max(MenuItemRatingAggregate.updated_at)).one()
+        return tuple(items) + tuple(tags) + tuple(ratings)
+
+    @staticmethod
+    def _venue_lines(db: Session, venue_id: int):
+        """(line id, order id, menu item id, customer id) of the venue's order lines."""
+        return db.query(
+            OrderItem.id, OrderItem.order_id, OrderItem.menu_item_id, Order.customer_id
+        ).join(
+            Order, OrderItem.order_id == Order.id
+        ).outerjoin(
+            VenueStation, Order.station_id == VenueStation.id
+        ).filter(
+            or_(Order.venue_id == venue_id, VenueStation.venue_id == venue_id)
+        )
+
+    def _build(self, db: Session, venue_id: int, generation: int) -> RecommendationSnapshot:
+        snapshot = RecommendationSnapshot(venue_id, generation, self.neighbours)
+        snapshot.menu_signature = self._menu_signature(db)
+
+        # Items with category, price, availability and image URL in one query
+        items = db.query(
+            MenuItem.id, MenuItem.name, MenuItem.price, MenuItem.available,
+            MenuItem.category_id, MenuItem.category, MenuItem.image_url
+        ).filter(MenuItem.not_deleted()).order_by(MenuItem.id).all()
+
+        n = len(items)
+        snapshot.item_ids = np.array([r.id for r in items], dtype=np.int64)
+        snapshot.item_index = {int(item_id): i for i, item_id in enumerate(snapshot.item_ids)}
+        snapshot.names = [r.name for r in items]
+        snapshot.image_urls = [r.image_url for r in items]
+        snapshot.prices = np.array([float(r.price or 0) for r in items], dtype=np.float64)
+        snapshot.available = np.array([bool(r.available) for r in items], dtype=bool)
+        category_keys = [
+            f"id:{r.category_id}" if r.category_id is not None else f"name:{r.category}" if r.category else ""
+            for r in items
+        ]
+        codes: Dict[str, int] = {"": -1}
+        snapshot.categories = np.array([codes.setdefault(k, len(codes) - 1) for k in category_keys], dtype=np.int64)
+
+        snapshot.ratings = np.full(n, np.nan)
+        for item_id, rating in db.query(
+            MenuItemRatingAggregate.menu_item_id, MenuItemRatingAggregate.average_rating
+        ).filter(MenuItemRatingAggregate.total_reviews > 0):
+            if item_id in snapshot.item_index:
+                snapshot.ratings[snapshot.item_index[item_id]] = rating
+
+        tag_links = [
+            (snapshot.item_index[item_id], tag_id)
+            for item_id, tag_id in db.query(ItemTagLink.item_id, ItemTagLink.tag_id)
+            if item_id in snapshot.item_index
+        ]
+        tag_ids = sorted({tag_id for _, tag_id in tag_links})
+        tag_columns = {tag_id: j for j, tag_id in enumerate(tag_ids)}
+        snapshot.tags = np.zeros((n, len(tag_ids)), dtype=np.uint8)
+        for i, tag_id in tag_links:
+            snapshot.tags[i, tag_columns[tag_id]] = 1
+
+        # Distinct (order, item) pairs with the ordering customer
+        lines = self._venue_lines(db, venue_id).all()
+        snapshot.max_line_id = max((r[0] for r in lines), default=0)
+        known = [(r[1], snapshot.item_index[r[2]], r[3]) for r in lines if r[2] in snapshot.item_index]
+        if known:
+            orders = np.array([k[0] for k in known], dtype=np.int64)
+            item_rows = np.array([k[1] for k in known], dtype=np.int64)
+            customers = np.array([k[2] if k[2] is not None else -1 for k in known], dtype=np.int64)
+            _, first = np.unique(orders * n + item_rows, return_index=True)
+            orders, item_rows, customers = orders[first], item_rows[first], customers[first]
+        else:
+            orders = item_rows = customers = _EMPTY_INT
+
+        snapshot.order_counts = np.bincount(item_rows, minlength=n).astype(np.int64)
+        left, right = _pairs_within_groups(orders, item_rows)
+        snapshot.co_indptr, snapshot.co_indices, snapshot.co_data = _compress(left, right, np.ones(len(left)), n, n)
+
+        has_customer = customers >= 0
+        snapshot.customer_ids = sorted({int(c) for c in customers[has_customer]})
+        snapshot.customer_index = {c: k for k, c in enumerate(snapshot.customer_ids)}
+        customer_rows = np.array([snapshot.customer_index[int(c)] for c in customers[has_customer]], dtype=np.int64)
+        snapshot.cust_indptr, snapshot.cust_indices, snapshot.cust_data = _compress(
+            customer_rows, item_rows[has_customer], np.ones(len(customer_rows)), snapshot.customer_count, n
+        )
+        snapshot._compute_neighbours()
+
+        logger.info(
+            f"Built recommendation model for venue {venue_id}: {n} items, "
+            f"{len(snapshot.co_indices)} co-occurrence pairs, {snapshot.customer_count} customers"
+        )
+        return snapshot
+
+    def _refresh(self, db: Session, snapshot: RecommendationSnapshot) -> RecommendationSnapshot:
+        """Fold order lines added since the snapshot was built into it.
+
+        Rebuilds instead when the menu changed or a new line references an
+        item the snapshot does not know.
+        """
+        if self._menu_signature(db) != snapshot.menu_signature:
+            return self._build(db, snapshot.venue_id, snapshot.generation)
+
+        touched_orders = db.query(OrderItem.order_id).filter(OrderItem.id > snapshot.max_line_id)
+        lines = self._venue_lines(db, snapshot.venue_id).filter(OrderItem.order_id.in_(touched_orders)).all()
+        snapshot.checked_at = time.monotonic()
+        new_lines = [r for r in lines if r[0] > snapshot.max_line_id]
+        if not new_lines:
+            return snapshot
+        if any(r[2] not in snapshot.item_index for r in new_lines):
+            return self._build(db, snapshot.venue_id, snapshot.generation)
+
+        # Readers may hold the current snapshot, so the update goes to a copy
+        snapshot = copy.copy(snapshot)
+        snapshot.customer_ids = list(snapshot.customer_ids)
+        snapshot.customer_index = dict(snapshot.customer_index)
+        snapshot.order_counts = snapshot.order_counts.copy()
+
+        # Per touched order: distinct items before and after the new lines
+        before: Dict[int, set] = {}
+        after: Dict[int, set] = {}
+        customer_of: Dict[int, Optional[int]] = {}
+        for line_id, order_id, item_id, customer_id in lines:
+            i = snapshot.item_index.get(item_id)
+            if i is None:
+                continue
+            after.setdefault(order_id, set()).add(i)
+            if line_id <= snapshot.max_line_id:
+                before.setdefault(order_id, set()).add(i)
+            customer_of[order_id] = customer_id
+
+        co_left, co_right, cust_rows, cust_items = [], [], [], []
+        touched_customers = set()
+        for order_id, items in after.items():
+            old = before.get(order_id, set())
+            added = items - old
+            for a in items:
+                for b in items:
+                    if a != b and (a in added or b in added):
+                        co_left.append(a)
+                        co_right.append(b)
+            customer_id = customer_of[order_id]
+            if customer_id is not None and added:
+                if customer_id not in snapshot.customer_index:
+                    snapshot.customer_index[customer_id] = len(snapshot.customer_ids)
+                    snapshot.customer_ids.append(customer_id)
+                c = snapshot.customer_index[customer_id]
+                touched_customers.add(c)
+                cust_rows.extend([c] * len(added))
+                cust_items.extend(added)
+            for i in added:
+                snapshot.order_counts[i] += 1
+
+        n = snapshot.item_count
+        snapshot.co_indptr, snapshot.co_indices, snapshot.co_data = _compress(
+            np.concatenate([_expand_rows(snapshot.co_indptr), np.array(co_left, dtype=np.int64)]),
+            np.concatenate([snapshot.co_indices, np.array(co_right, dtype=np.int64)]),
+            np.concatenate([snapshot.co_data, np.ones(len(co_left), dtype=np.int32)]),
+            n, n
+        )
+        snapshot.cust_indptr, snapshot.cust_indices, snapshot.cust_data = _compress(
+            np.concatenate([_expand_rows(snapshot.cust_indptr), np.array(cust_rows, dtype=np.int64)]),
+            np.concatenate([snapshot.cust_indices, np.array(cust_items, dtype=np.int64)]),
+            np.concatenate([snapshot.cust_data, np.ones(len(cust_rows), dtype=np.int32)]),
+            snapshot.customer_count, n
+        )
+        # Only the touched customers' neighbour lists are refreshed; the rest
+        # catch up on the next full rebuild
+        snapshot._compute_neighbours(touched_customers)
+        snapshot.max_line_id = max(r[0] for r in new_lines)
+        return snapshot
+
+
+# Singleton instance
+recommendation_models = RecommendationModels(
+    refresh_seconds=settings.recommendation_refresh_seconds,
+    neighbours=settings.recommendation_neighbours,
+)
+
+
+def run_recommendation_model_rebuild() -> int:
+    """Standalone function to rebuild resident models (called from background scheduler)."""
+    from app.db.session import SessionLocal
+    db = SessionLocal()
+    try:
+        return recommendation_models.rebuild_resident(db)
+    finally:
+        db.close()
@@ -0,0 +1,231 @@
+"""Streaming report export (CSV, XLSX, PDF, JSON).
+
+Report exports used to load the whole dataset (capped at 1000 rows) into
+lists and render it in one buffer. Here rows come from a server-side cursor
+(``stream_rows``) and each encoder is a generator of byte chunks. The
+generators are meant to be handed to a ``StreamingResponse``, so memory does
+not grow with the number of rows:
+
+- CSV is written in chunks of about ``chunk_size`` bytes
+- XLSX uses an openpyxl write-only workbook, which writes rows to a temporary
+  file as they come. The finished file is read back in chunks.
+- PDF pages are drawn straight onto a reportlab canvas (no flowables).
+  Capped at ``PDF_MAX_ROWS``, since a PDF of millions of lines is not
+  readable anyway.
+- JSON writes the ``data`` array one row at a time.
+"""
+
+import csv
+import io
+import json
+import logging
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 2000  # Rows fetched per server-side cursor round trip
+EXPORT_CHUNK_SIZE = 64 * 1024  # Bytes per streamed chunk
+PDF_MAX_ROWS = 20000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+    "json": "application/json",
+}
+
+# Accepted spellings of each export format
+FORMAT_ALIASES = {"csv": "csv", "excel": "xlsx", "xlsx": "xlsx", "pdf": "pdf", "json": "json"}
+
+
+def stream_rows(
+    bind: Engine,
+    stmt,
+    row_factory: Optional[Callable[[Any], Sequence[Any]]] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Sequence[Any]]:
+    """Yield the rows of ``stmt`` from a server-side cursor.
+
+    Runs on its own connection, checked out when iteration starts and
+    released when the generator finishes or is closed. A streamed response
+    outlives the request's ``DbSession``. Only ``batch_size`` rows are
+    buffered at a time.
+    """
+    with bind.connect() as conn:
+        result = conn.execution_options(yield_per=batch_size).execute(stmt)
+        for row in result:
+            yield row_factory(row) if row_factory else tuple(row)
+
+
+def _cell(value: Any) -> Any:
+    """Plain value for an encoder: Decimals as floats, dates as ISO strings."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_csv(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """CSV encoded as UTF-8 in chunks of about ``chunk_size`` bytes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow([_cell(value) for value in row])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _read_chunks(fileobj, chunk_size: int) -> Iterator[bytes]:
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_xlsx(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    title: str = "Report",
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """XLSX from a write-only workbook. Rows are spooled to disk and never held in memory."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=title[:31])  # Max 31 chars
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = Font(bold=True)
+        header_cells.append(cell)
+    ws.append(header_cells)
+    for row in rows:
+        ws.append([_cell(value) for value in row])
+
+    with tempfile.SpooledTemporaryFile(max_size=chunk_size * 16) as out:
+        wb.save(out)
+        yield from _read_chunks(out, chunk_size)
+
+
+def iter_pdf(
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    title: str = "Report",
+    max_rows: int = PDF_MAX_ROWS,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """A landscape PDF table drawn page by page, truncated after ``max_rows`` rows."""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen import canvas
+
+    page_width, page_height = landscape(A4)
+    margin, line_height, font_size = 1.5 * cm, 14, 8
+    col_width = (page_width - 2 * margin) / max(len(headers), 1)
+    max_chars = max(int(col_width / (font_size * 0.5)), 4)
+
+    def fit(value: Any) -> str:
+        text = "" if value is None else str(_cell(value))
+        return text if len(text) <= max_chars else text[: max_chars - 3] + "..."
+
+    with tempfile.SpooledTemporaryFile(max_size=chunk_size * 16) as out:
+        pdf = canvas.Canvas(out, pagesize=(page_width, page_height))
+        pdf.setTitle(title)
+        page = 0
+        y = 0.0
+
+        def start_page():
+            nonlocal page, y
+            page += 1
+            y = page_height - margin
+            if page == 1:
+                pdf.setFont("Helvetica-Bold", 14)
+                pdf.drawString(margin, y, title)
+                y -= 2 * line_height
+            pdf.setFont("Helvetica-Bold", font_size)
+            for col, header in enumerate(headers):
+                pdf.drawString(margin + col * col_width, y, fit(header))
+            y -= line_height
+            pdf.setFont("Helvetica", font_size)
+
+        start_page()
+        written = 0
+        truncated = False
+        for row in rows:
+            if written >= max_rows:
+                truncated = True
+                break
+            if y < margin:
+                pdf.showPage()
+                start_page()
+            for col, value in enumerate(row):
+                pdf.drawString(margin + col * col_width, y, fit(value))
+            y -= line_height
+            written += 1
+        if truncated:
+            if y < margin:
+                pdf.showPage()
+                start_page()
+            pdf.setFont("Helvetica-Oblique", font_size)
+            pdf.drawString(margin, y, f"Truncated after {max_rows} rows - export as CSV or Excel for the full data.")
+        pdf.save()
+        yield from _read_chunks(out, chunk_size)
+
+
+def iter_json(
+    envelope: Dict[str, Any],
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """``{**envelope, "headers": [...], "data": [[...], ...]}`` with the data array streamed."""
+    head = json.dumps({**envelope, "headers": list(headers)}, default=str)
+    parts: List[str] = [head[:-1], ', "data": [']
+    size = 0
+    first = True
+    for row in rows:
+        encoded = json.dumps([_cell(value) for value in row], default=str)
+        parts.append(encoded if first else "," + encoded)
+        first = False
+        size += len(encoded)
+        if size >= chunk_size:
+            yield "".join(parts).encode("utf-8")
+            parts, size = [], 0
+    parts.append("]}")
+    yield "".join(parts).encode("utf-8")
+
+
+def encode_rows(
+    format: str,
+    headers: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    title: str,
+    envelope: Optional[Dict[str, Any]] = None,
+) -> Iterator[bytes]:
+    """The chunk generator for a normalised format (see ``FORMAT_ALIASES``)."""
+    if format == "csv":
+        return iter_csv(headers, rows)
+    if format == "xlsx":
+        return iter_xlsx(headers, rows, title=title)
+    if format == "pdf":
+        return iter_pdf(headers, rows, title=title)
+    return iter_json(envelope or {}, headers, rows)
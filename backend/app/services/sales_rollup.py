@@ -0,0 +1,618 @@
+"""Incrementally maintained hourly sales cube.
+
+Dashboards, KPIs and sales reports used to load every guest order or check
+of the period and sum totals and JSON line items in Python. ``sales_rollups``
+holds the same measures pre-aggregated per hour x location x channel x
+staff x menu item, so those endpoints read a few grouped rows instead.
+
+A sale is booked in the hour the reports already attribute it to: the hour
+a guest order was placed, or the hour a check was closed. Each order or
+check has a ``SalesRollupPosting`` with the cube rows it currently
+contributes. ``sync_guest_order`` / ``sync_check`` rebuild an order's rows
+from its current state and apply the difference to the cube, so a repeated
+call is a no-op. They are not called from the routes: session hooks below
+collect every guest order, check and check item a flush writes and sync the
+ones that are or were closed just before the commit. Any code path that
+closes, voids, refunds or edits an order (waiter, kitchen bump, payments,
+background jobs) therefore moves the cube in the same transaction.
+
+- closed (served / completed / paid guest order, closed check): one "order"
+  row (order count, order total, discount, tips) and one "item" row per line
+  (quantity, revenue, cost at base price, estimated cost)
+- voided: nothing, the posted rows are reversed
+- refunded: the sale is reversed and a refund is recorded on the order row
+
+``rebuild_sales_rollups`` (scripts/rebuild_sales_rollups.py) recomputes a
+range from the raw orders, e.g. for orders stored before the cube existed.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import chain
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, event, func, insert, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.analytics import SalesRollup, SalesRollupPosting
+from app.models.restaurant import Check, CheckItem, GuestOrder, MenuItem
+
+logger = logging.getLogger(__name__)
+
+SOURCE_GUEST_ORDER = "guest_order"
+SOURCE_CHECK = "check"
+
+DIMENSIONS = (
+    "source", "kind", "bucket_hour", "location_id", "channel",
+    "staff_id", "menu_item_id", "item_name", "category",
+)
+COUNT_MEASURES = ("order_count", "quantity", "refund_count")
+MONEY_MEASURES = ("revenue", "cost", "cost_estimate", "discount", "tips", "refunds")
+MEASURES = COUNT_MEASURES + MONEY_MEASURES
+
+CLOSED_ORDER_STATUSES = ("served", "completed", "closed")
+# Cost assumed for lines without a menu item base price (turnover report)
+COST_ESTIMATE_RATE = Decimal("0.35")
+_PLACES = Decimal("0.0001")
+
+Fact = Dict[str, Any]
+Key = Tuple[Any, ...]
+
+
+def _as_utc(value: Optional[datetime]) -> datetime:
+    """DateTime columns come back naive; they are stored as UTC."""
+    if value is None:
+        return datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def hour_start(value: datetime) -> datetime:
+    return _as_utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+def _money(value: Any) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+def _fact(dims: Dict[str, Any], **measures: Any) -> Fact:
+    """A cube row as stored in a posting (JSON: ISO hour, money as strings)."""
+    fact = dict(dims)
+    for name in COUNT_MEASURES:
+        fact[name] = int(measures.get(name, 0))
+    for name in MONEY_MEASURES:
+        fact[name] = str(_money(measures.get(name)).quantize(_PLACES))
+    return fact
+
+
+def _menu_items(db: Session, ids: Iterable[Any]) -> Dict[int, Any]:
+    """Price, base price and category of the given menu items, in one query."""
+    wanted = set()
+    for value in ids:
+        try:
+            wanted.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    if not wanted:
+        return {}
+    rows = db.execute(
+        select(MenuItem.id, MenuItem.price, MenuItem.base_price, MenuItem.category).where(MenuItem.id.in_(wanted))
+    ).all()
+    return {row.id: row for row in rows}
+
+
+def _line_costs(menu_item, quantity: int, revenue: Decimal) -> Tuple[Decimal, Decimal]:
+    """(cost at base price or 0, cost estimated at 35% where there is no base price)."""
+    if menu_item is None:
+        return Decimal("0"), revenue * COST_ESTIMATE_RATE
+    if menu_item.base_price:
+        cost = _money(menu_item.base_price) * quantity
+        return cost, cost
+    return Decimal("0"), _money(menu_item.price) * COST_ESTIMATE_RATE * quantity
+
+
+def _guest_item_menu_id(item: dict) -> Any:
+    return item.get("menu_item_id") or item.get("id")
+
+
+# ==================== FACTS ====================
+
+def guest_order_state(order: GuestOrder) -> str:
+    if order.payment_status == "refunded":
+        return "refunded"
+    if order.status == "cancelled":
+        return "voided"
+    if order.status in CLOSED_ORDER_STATUSES or order.payment_status == "paid":
+        return "closed"
+    return "open"
+
+
+def guest_order_facts(order: GuestOrder, state: str, menu_items: Dict[int, Any]) -> List[Fact]:
+    if state not in ("closed", "refunded"):
+        return []
+    dims = {
+        "source": SOURCE_GUEST_ORDER,
+        "bucket_hour": hour_start(order.created_at).isoformat(),
+        "location_id": order.location_id,
+        "channel": order.order_type or "dine-in",
+        "staff_id": None,
+    }
+    order_dims = {**dims, "kind": "order", "menu_item_id": None, "item_name": None, "category": None}
+    if state == "refunded":
+        return [_fact(order_dims, refund_count=1, refunds=order.total)]
+
+    facts = [_fact(order_dims, order_count=1, revenue=order.total, tips=order.tip_amount)]
+    for item in order.items or []:
+        if item.get("status") == "cancelled":
+            continue
+        quantity = int(item.get("quantity", 1) or 0)
+        revenue = _money(item.get("price")) * quantity
+        try:
+            menu_item = menu_items.get(int(_guest_item_menu_id(item)))
+        except (TypeError, ValueError):
+            menu_item = None
+        cost, cost_estimate = _line_costs(menu_item, quantity, revenue)
+        facts.append(_fact(
+            {
+                **dims,
+                "kind": "item",
+                "menu_item_id": menu_item.id if menu_item else None,
+                "item_name": item.get("name", "Unknown"),
+                "category": item.get("category") or (menu_item.category if menu_item else None) or "Other",
+            },
+            quantity=quantity, revenue=revenue, cost=cost, cost_estimate=cost_estimate,
+        ))
+    return facts
+
+
+def check_state(check: Check) -> str:
+    if check.status == "closed":
+        return "closed"
+    if check.status == "voided":
+        return "voided"
+    return "open"
+
+
+def check_facts(check: Check, state: str, menu_items: Dict[int, Any]) -> List[Fact]:
+    if state != "closed":
+        return []
+    dims = {
+        "source": SOURCE_CHECK,
+        "bucket_hour": hour_start(check.closed_at or check.opened_at).isoformat(),
+        "location_id": check.location_id,
+        "channel": "dine-in",
+        "staff_id": check.server_id,
+    }
+    facts = [_fact(
+        {**dims, "kind": "order", "menu_item_id": None, "item_name": None, "category": None},
+        order_count=1, revenue=check.total, discount=check.discount,
+    )]
+    for item in check.items:
+        if item.status == "voided":
+            continue
+        quantity = item.quantity or 0
+        revenue = _money(item.total or _money(item.price) * quantity)
+        menu_item = menu_items.get(item.menu_item_id)
+        cost, cost_estimate = _line_costs(menu_item, quantity, revenue)
+        facts.append(_fact(
+            {
+                **dims,
+                "kind": "item",
+                "menu_item_id": item.menu_item_id if menu_item else None,
+                "item_name": item.name,
+                "category": (menu_item.category if menu_item else None) or "Other",
+            },
+            quantity=quantity, revenue=revenue, cost=cost, cost_estimate=cost_estimate,
+        ))
+    return facts
+
+
+# ==================== CUBE MAINTENANCE ====================
+
+def _accumulate(deltas: Dict[Key, Dict[str, Any]], facts: Iterable[Fact], sign: int) -> None:
+    for fact in facts:
+        key = tuple(fact[d] for d in DIMENSIONS)
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = {name: 0 for name in COUNT_MEASURES}
+            delta.update({name: Decimal("0") for name in MONEY_MEASURES})
+        for name in COUNT_MEASURES:
+            delta[name] += sign * int(fact[name])
+        for name in MONEY_MEASURES:
+            delta[name] += sign * _money(fact[name])
+
+
+def _bucket_key(key: Key) -> str:
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()
+
+
+def apply_deltas(db: Session, deltas: Dict[Key, Dict[str, Any]]) -> None:
+    """Add measure deltas to their cube rows (no commit).
+
+    Existing rows are incremented in SQL so concurrent writers cannot lose
+    each other's sales; missing rows are inserted.
+    """
+    changed = {
+        _bucket_key(key): (key, delta)
+        for key, delta in deltas.items()
+        if any(delta[name] for name in MEASURES)
+    }
+    if not changed:
+        return
+
+    rollups = SalesRollup.__table__
+    existing = dict(db.execute(
+        select(rollups.c.bucket_key, rollups.c.id).where(rollups.c.bucket_key.in_(list(changed)))
+    ).all())
+
+    updates, inserts = [], []
+    for bucket_key, (key, delta) in changed.items():
+        if bucket_key in existing:
+            updates.append({"rollup_id": existing[bucket_key], **{f"d_{name}": delta[name] for name in MEASURES}})
+        else:
+            row = dict(zip(DIMENSIONS, key))
+            row["bucket_hour"] = datetime.fromisoformat(row["bucket_hour"])
+            inserts.append({"bucket_key": bucket_key, **row, **delta})
+
+    if updates:
+        db.execute(
+            update(rollups).where(rollups.c.id == bindparam("rollup_id")).values(
+                **{name: rollups.c[name] + bindparam(f"d_{name}", type_=rollups.c[name].type) for name in MEASURES}
+            ),
+            updates
+        )
+    if inserts:
+        try:
+            with db.begin_nested():
+                db.execute(insert(rollups), inserts)
+        except IntegrityError:
+            # Another transaction created some of these rows first
+            apply_deltas(db, {key: delta for key, delta in changed.values() if _bucket_key(key) not in existing})
+
+
+def _posting(db: Session, source: str, order_id: int) -> Optional[SalesRollupPosting]:
+    return db.query(SalesRollupPosting).filter(
+        SalesRollupPosting.source == source,
+        SalesRollupPosting.order_id == order_id
+    ).first()
+
+
+def _post(
+    db: Session,
+    posting: Optional[SalesRollupPosting],
+    source: str,
+    order_id: int,
+    state: str,
+    facts: List[Fact]
+) -> None:
+    deltas: Dict[Key, Dict[str, Any]] = {}
+    if posting is not None:
+        _accumulate(deltas, posting.facts or [], -1)
+    _accumulate(deltas, facts, 1)
+    apply_deltas(db, deltas)
+    if posting is None:
+        db.add(SalesRollupPosting(source=source, order_id=order_id, state=state, facts=facts))
+        # Sessions do not autoflush: a second sync before commit must find this posting
+        db.flush()
+    else:
+        posting.state = state
+        posting.facts = facts
+
+
+def sync_guest_order(db: Session, order: GuestOrder) -> None:
+    """Bring the cube in line with a guest order's current state (call before commit)."""
+    if order.id is None:
+        db.flush()
+    state = guest_order_state(order)
+    posting = _posting(db, SOURCE_GUEST_ORDER, order.id)
+    if posting is None and state == "open":
+        return
+    menu_items = _menu_items(db, (_guest_item_menu_id(item) for item in order.items or []))
+    _post(db, posting, SOURCE_GUEST_ORDER, order.id, state, guest_order_facts(order, state, menu_items))
+
+
+def sync_check(db: Session, check: Check) -> None:
+    """Bring the cube in line with a check's current state (call before commit)."""
+    if check.id is None:
+        db.flush()
+    state = check_state(check)
+    posting = _posting(db, SOURCE_CHECK, check.id)
+    if posting is None and state == "open":
+        return
+    menu_items = _menu_items(db, (item.menu_item_id for item in check.items))
+    _post(db, posting, SOURCE_CHECK, check.id, state, check_facts(check, state, menu_items))
+
+
+# ==================== SESSION HOOKS ====================
+
+_PENDING = "sales_rollup_pending"
+_SYNCING = "sales_rollup_syncing"
+
+# What a flush recorded for an order, strongest first
+_DELETED, _CHANGED, _ITEMS_CHANGED = 3, 2, 1
+
+_STATE_FIELDS = {GuestOrder: ("status", "payment_status"), Check: ("status",)}
+_STATE_OF = {GuestOrder: guest_order_state, Check: check_state}
+_SOURCES = {GuestOrder: SOURCE_GUEST_ORDER, Check: SOURCE_CHECK}
+
+
+def _may_be_posted(session: Session, obj: Any) -> bool:
+    """False for an order that was open before this flush and still is: it has no posting."""
+    model = type(obj)
+    state_of = _STATE_OF[model]
+    if state_of(obj) != "open":
+        return True
+    if obj in session.new:
+        return False
+    attrs = inspect(obj).attrs
+    before = SimpleNamespace(**{
+        name: (attrs[name].history.deleted or [getattr(obj, name)])[0] for name in _STATE_FIELDS[model]
+    })
+    return state_of(before) != "open"
+
+
+def _mark(pending: Dict[Tuple[str, int], int], key: Tuple[str, int], change: int) -> None:
+    if change > pending.get(key, 0):
+        pending[key] = change
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_sales_changes(session: Session, flush_context) -> None:
+    """Remember the guest orders and checks this flush wrote."""
+    pending = session.info.setdefault(_PENDING, {})
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (GuestOrder, Check)):
+            key = (_SOURCES[type(obj)], obj.id)
+            if obj in session.deleted:
+                _mark(pending, key, _DELETED)
+            elif _may_be_posted(session, obj):
+                _mark(pending, key, _CHANGED)
+        elif isinstance(obj, CheckItem):
+            # Moving a line to another check (merge) changes both checks
+            history = inspect(obj).attrs.check_id.history
+            for check_id in chain(history.deleted, [obj.check_id]):
+                if check_id is not None:
+                    _mark(pending, (SOURCE_CHECK, check_id), _ITEMS_CHANGED)
+
+
+@event.listens_for(Session, "before_commit")
+def _sync_sales_changes(session: Session) -> None:
+    """Post the collected orders to the cube inside the committing transaction."""
+    if session.info.get(_SYNCING) or session.in_nested_transaction():
+        return
+    session.info[_SYNCING] = True
+    try:
+        session.flush()
+        for (source, order_id), change in session.info.pop(_PENDING, {}).items():
+            model = GuestOrder if source == SOURCE_GUEST_ORDER else Check
+            order = None if change == _DELETED else session.get(model, order_id)
+            if order is None:
+                posting = _posting(session, source, order_id)
+                if posting is not None:
+                    _post(session, posting, source, order_id, "voided", [])
+            elif model is GuestOrder:
+                sync_guest_order(session, order)
+            elif change == _CHANGED or check_state(order) != "open":
+                # Lines may have been added by check_id without touching the collection
+                session.expire(order, ["items"])
+                sync_check(session, order)
+    finally:
+        session.info.pop(_SYNCING, None)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_sales_changes(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING, None)
+
+
+def rebuild_sales_rollups(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location_id: Optional[int] = None,
+    chunk_size: int = 1000
+) -> Dict[str, Any]:
+    """Recompute the cube and postings from raw guest orders and checks.
+
+    The range is widened to whole hours so no bucket is rebuilt from part of
+    its sales; without a range everything is rebuilt. Loaded orders are
+    expunged between chunks, so use a session of its own.
+    """
+    start = hour_start(start) if start else None
+    end = hour_start(end) + timedelta(hours=1) if end else None
+
+    def in_range(query, column, location_column):
+        if start is not None:
+            query = query.filter(column >= start)
+        if end is not None:
+            query = query.filter(column < end)
+        if location_id is not None:
+            query = query.filter(location_column == location_id)
+        return query
+
+    in_range(db.query(SalesRollup), SalesRollup.bucket_hour, SalesRollup.location_id).delete(synchronize_session=False)
+
+    check_time = func.coalesce(Check.closed_at, Check.opened_at)
+    sources = (
+        (SOURCE_GUEST_ORDER, GuestOrder, GuestOrder.created_at, GuestOrder.location_id, (),
+         guest_order_state, guest_order_facts,
+         lambda orders: (_guest_item_menu_id(i) for o in orders for i in o.items or [])),
+        (SOURCE_CHECK, Check, check_time, Check.location_id, (selectinload(Check.items),),
+         check_state, check_facts,
+         lambda checks: (i.menu_item_id for c in checks for i in c.items)),
+    )
+
+    counts = {}
+    for source, model, time_column, location_column, options, state_of, facts_of, menu_ids in sources:
+        order_ids = in_range(db.query(model.id), time_column, location_column)
+        db.query(SalesRollupPosting).filter(
+            SalesRollupPosting.source == source,
+            SalesRollupPosting.order_id.in_(order_ids.scalar_subquery())
+        ).delete(synchronize_session=False)
+
+        query = in_range(db.query(model), time_column, location_column).options(*options)
+        posted, last_id = 0, 0
+        while True:
+            orders = query.filter(model.id > last_id).order_by(model.id).limit(chunk_size).all()
+            if not orders:
+                break
+            last_id = orders[-1].id
+            menu_items = _menu_items(db, menu_ids(orders))
+            deltas: Dict[Key, Dict[str, Any]] = {}
+            postings = []
+            for order in orders:
+                state = state_of(order)
+                if state == "open":
+                    continue
+                facts = facts_of(order, state, menu_items)
+                _accumulate(deltas, facts, 1)
+                postings.append({"source": source, "order_id": order.id, "state": state, "facts": facts})
+            apply_deltas(db, deltas)
+            if postings:
+                db.execute(insert(SalesRollupPosting), postings)
+            posted += len(postings)
+            db.expunge_all()
+        counts[source] = posted
+
+    db.commit()
+    logger.info(f"Rebuilt sales rollups ({start} - {end}, location {location_id}): {counts}")
+    return {
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "location_id": location_id,
+        "guest_orders": counts[SOURCE_GUEST_ORDER],
+        "checks": counts[SOURCE_CHECK],
+    }
+
+
+# ==================== QUERIES ====================
+
+def _filters(
+    start: Optional[datetime],
+    end: Optional[datetime],
+    location_id: Optional[int],
+    source: Optional[str]
+) -> list:
+    """Rows whose hour overlaps [start, end)."""
+    filters = []
+    if start is not None:
+        filters.append(SalesRollup.bucket_hour >= hour_start(start))
+    if end is not None:
+        filters.append(SalesRollup.bucket_hour < _as_utc(end))
+    if location_id:
+        filters.append(SalesRollup.location_id == location_id)
+    if source:
+        filters.append(SalesRollup.source == source)
+    return filters
+
+
+def sales_totals(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location_id: Optional[int] = None,
+    source: Optional[str] = None
+) -> Dict[str, Any]:
+    """Order and line totals for a period.
+
+    ``revenue`` is the sum of order totals (tax included, as charged);
+    ``item_revenue`` the sum of line prices x quantities.
+    """
+    rows = db.query(
+        SalesRollup.kind,
+        *(func.coalesce(func.sum(getattr(SalesRollup, name)), 0).label(name) for name in MEASURES)
+    ).filter(*_filters(start, end, location_id, source)).group_by(SalesRollup.kind).all()
+    by_kind = {row.kind: row for row in rows}
+    order, item = by_kind.get("order"), by_kind.get("item")
+
+    def measure(row, name):
+        return _money(getattr(row, name)) if row is not None else Decimal("0")
+
+    return {
+        "orders": int(order.order_count) if order else 0,
+        "revenue": measure(order, "revenue"),
+        "discount": measure(order, "discount"),
+        "tips": measure(order, "tips"),
+        "refund_count": int(order.refund_count) if order else 0,
+        "refunds": measure(order, "refunds"),
+        "items_sold": int(item.quantity) if item else 0,
+        "item_revenue": measure(item, "revenue"),
+        "cost": measure(item, "cost"),
+        "cost_estimate": measure(item, "cost_estimate"),
+    }
+
+
+def item_sales(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location_id: Optional[int] = None,
+    source: Optional[str] = None,
+    category: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Quantity, revenue and costs per item name and category, by revenue."""
+    filters = _filters(start, end, location_id, source) + [SalesRollup.kind == "item"]
+    if category:
+        filters.append(SalesRollup.category == category)
+    revenue = func.sum(SalesRollup.revenue)
+    rows = db.query(
+        SalesRollup.item_name,
+        SalesRollup.category,
+        func.sum(SalesRollup.quantity).label("quantity"),
+        revenue.label("revenue"),
+        func.sum(SalesRollup.cost).label("cost"),
+        func.sum(SalesRollup.cost_estimate).label("cost_estimate"),
+    ).filter(*filters).group_by(SalesRollup.item_name, SalesRollup.category).order_by(revenue.desc()).all()
+    return [
+        {
+            "name": row.item_name,
+            "category": row.category,
+            "quantity": int(row.quantity or 0),
+            "revenue": _money(row.revenue),
+            "cost": _money(row.cost),
+            "cost_estimate": _money(row.cost_estimate),
+        }
+        for row in rows
+        if row.quantity or row.revenue
+    ]
+
+
+def hourly_sales(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location_id: Optional[int] = None,
+    source: Optional[str] = None
+) -> List[Tuple[datetime, int, Decimal]]:
+    """(hour, orders, order revenue) per hour with sales, in time order."""
+    rows = db.query(
+        SalesRollup.bucket_hour,
+        func.sum(SalesRollup.order_count).label("orders"),
+        func.sum(SalesRollup.revenue).label("revenue"),
+    ).filter(
+        *_filters(start, end, location_id, source), SalesRollup.kind == "order"
+    ).group_by(SalesRollup.bucket_hour).order_by(SalesRollup.bucket_hour).all()
+    return [(_as_utc(row.bucket_hour), int(row.orders or 0), _money(row.revenue)) for row in rows if row.orders]
+
+
+def orders_by_channel(
+    db: Session,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location_id: Optional[int] = None,
+    source: Optional[str] = None
+) -> Dict[str, int]:
+    """Closed orders per channel (dine-in, takeout, delivery, ...)."""
+    rows = db.query(
+        SalesRollup.channel, func.sum(SalesRollup.order_count).label("orders")
+    ).filter(
+        *_filters(start, end, location_id, source), SalesRollup.kind == "order"
+    ).group_by(SalesRollup.channel).all()
+    return {row.channel: int(row.orders or 0) for row in rows}
@@ -7,10 +7,11 @@ Supports daily, weekly, and monthly reports in PDF and Excel formats.
 import logging
 import asyncio
 from datetime import datetime, date, time, timedelta, timezone
-from typing import Optional, List, Dict, Any, Callable
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 from io import BytesIO
+from itertools import chain, islice
 import json
 
 logger = logging.getLogger(__name__)
@@ -89,6 +90,23 @@ class ReportRun:
     error_message: Optional[str] = None
 
 
+def _table_section(section_data: Any) -> Optional[Tuple[List[str], Iterator[List[Any]]]]:
+    """Headers and row iterator for a section of dicts (a list or any iterator).
+
+    Generators are consumed row by row, so a generator can feed a large
+    section without being materialised.
+    """
+    if isinstance(section_data, (dict, str, bytes)) or not isinstance(section_data, Iterable):
+        return None
+    items = iter(section_data)
+    first = next(items, None)
+    if not isinstance(first, dict):
+        return None
+    headers = list(first.keys())
+    rows = ([item.get(h, '') for h in headers] for item in chain([first], items))
+    return headers, rows
+
+
 class ScheduledReportsService:
     """Service for managing scheduled reports."""
 
@@ -415,29 +433,30 @@ class ScheduledReportsService:
                 story.append(Paragraph(f"<b>{section}</b>", styles['Heading2']))
                 story.append(Spacer(1, 6))
 
-                if isinstance(section_data, list) and section_data:
-                    # Create table from list of dicts
-                    if isinstance(section_data[0], dict):
-                        headers = list(section_data[0].keys())
-                        table_data = [headers]
-                        for row in section_data[:50]:  # Limit rows
-                            table_data.append([str(row.get(h, '')) for h in headers])
-
-                        t = Table(table_data)
-                        t.setStyle(TableStyle([
-                            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                            ('FONTSIZE', (0, 0), (-1, 0), 10),
-                            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                        ]))
-                        story.append(t)
-                    else:
-                        for item in section_data[:20]:
-                            story.append(Paragraph(f"• {item}", styles['Normal']))
+                table = _table_section(section_data)
+                if table:
+                    # Create table from the section's dicts
+                    headers, rows = table
+                    table_data = [headers]
+                    for row in islice(rows, 50):  # Limit rows
+                        table_data.append([str(value) for value in row])
+
+                    t = Table(table_data)
+                    t.setStyle(TableStyle([
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                        ('FONTSIZE', (0, 0), (-1, 0), 10),
+                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                    ]))
+                    story.append(t)
+
+                elif isinstance(section_data, list):
+                    for item in section_data[:20]:
+                        story.append(Paragraph(f"• {item}", styles['Normal']))
 
                 elif isinstance(section_data, dict):
                     for key, value in section_data.items():
@@ -460,54 +479,51 @@ class ScheduledReportsService:
         data: Dict[str, Any],
         report_type: ReportType,
     ) -> bytes:
-        """Generate Excel report."""
+        """Generate Excel report.
+
+        Uses a write-only workbook: rows go to a temporary file as they are
+        appended instead of being kept as cell objects.
+        """
         try:
             from openpyxl import Workbook
+            from openpyxl.cell import WriteOnlyCell
             from openpyxl.styles import Font, PatternFill
 
-            wb = Workbook()
-            ws = wb.active
-            ws.title = report_type.value[:31]  # Max 31 chars
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(title=report_type.value[:31])  # Max 31 chars
 
-            row = 1
+            def styled(value, **style):
+                cell = WriteOnlyCell(ws, value=value)
+                for name, setting in style.items():
+                    setattr(cell, name, setting)
+                return cell
+
+            header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
 
             # Title
-            ws.cell(row=row, column=1, value=f"{report_type.value.replace('_', ' ').title()} Report")
-            ws.cell(row=row, column=1).font = Font(bold=True, size=14)
-            row += 2
+            ws.append([styled(f"{report_type.value.replace('_', ' ').title()} Report", font=Font(bold=True, size=14))])
+            ws.append([])
 
             # Generated timestamp
-            ws.cell(row=row, column=1, value=f"Generated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}")
-            row += 2
+            ws.append([f"Generated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}"])
+            ws.append([])
 
             # Data sections
             for section, section_data in data.items():
-                ws.cell(row=row, column=1, value=section)
-                ws.cell(row=row, column=1).font = Font(bold=True)
-                row += 1
-
-                if isinstance(section_data, list) and section_data:
-                    if isinstance(section_data[0], dict):
-                        headers = list(section_data[0].keys())
-                        for col, header in enumerate(headers, 1):
-                            ws.cell(row=row, column=col, value=header)
-                            ws.cell(row=row, column=col).fill = PatternFill(
-                                start_color="CCCCCC", end_color="CCCCCC", fill_type="solid"
-                            )
-                        row += 1
-
-                        for item in section_data:
-                            for col, header in enumerate(headers, 1):
-                                ws.cell(row=row, column=col, value=item.get(header, ''))
-                            row += 1
+                ws.append([styled(section, font=Font(bold=True))])
+
+                table = _table_section(section_data)
+                if table:
+                    headers, rows = table
+                    ws.append([styled(header, fill=header_fill) for header in headers])
+                    for row in rows:
+                        ws.append(row)
 
                 elif isinstance(section_data, dict):
                     for key, value in section_data.items():
-                        ws.cell(row=row, column=1, value=key)
-                        ws.cell(row=row, column=2, value=str(value))
-                        row += 1
+                        ws.append([key, str(value)])
 
-                row += 1
+                ws.append([])
 
             buffer = BytesIO()
             wb.save(buffer)
@@ -524,22 +540,23 @@ class ScheduledReportsService:
     ) -> bytes:
         """Generate CSV report."""
         import csv
+        from io import StringIO
 
-        buffer = BytesIO()
+        buffer = StringIO()
         writer = csv.writer(buffer)
 
         for section, section_data in data.items():
             writer.writerow([f"=== {section} ==="])
 
-            if isinstance(section_data, list) and section_data:
-                if isinstance(section_data[0], dict):
-                    headers = list(section_data[0].keys())
-                    writer.writerow(headers)
-                    for item in section_data:
-                        writer.writerow([item.get(h, '') for h in headers])
-                else:
-                    for item in section_data:
-                        writer.writerow([item])
+            table = _table_section(section_data)
+            if table:
+                headers, rows = table
+                writer.writerow(headers)
+                writer.writerows(rows)
+
+            elif isinstance(section_data, list):
+                for item in section_data:
+                    writer.writerow([item])
 
             elif isinstance(section_data, dict):
                 for key, value in section_data.items():
@@ -547,7 +564,7 @@ class ScheduledReportsService:
 
             writer.writerow([])
 
-        return buffer.getvalue()
+        return buffer.getvalue().encode("utf-8")
 
     async def _send_report_email(
         self,
@@ -20,9 +20,8 @@ import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -120,7 +119,7 @@ class SquareService:
         if tip_cents > 0:
             body["tip_money"] = {"amount": tip_cents, "currency": currency.upper()}
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/payments",
                 json=body,
@@ -145,7 +144,7 @@ class SquareService:
         """Complete a delayed-capture payment."""
         self._require_configured()
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/payments/{payment_id}/complete",
                 json={},
@@ -161,7 +160,7 @@ class SquareService:
         """Cancel a pending payment."""
         self._require_configured()
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/payments/{payment_id}/cancel",
                 json={},
@@ -177,7 +176,7 @@ class SquareService:
         """Retrieve payment details."""
         self._require_configured()
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.get(
                 f"{self._base_url}/v2/payments/{payment_id}",
                 headers=self._headers(),
@@ -203,7 +202,7 @@ class SquareService:
         if self._location_id:
             params["location_id"] = self._location_id
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.get(
                 f"{self._base_url}/v2/payments",
                 params=params,
@@ -243,7 +242,7 @@ class SquareService:
         if reason:
             body["reason"] = reason
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/refunds",
                 json=body,
@@ -297,7 +296,7 @@ class SquareService:
             "order": order,
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/orders",
                 json=body,
@@ -342,7 +341,7 @@ class SquareService:
         if reference_id:
             body["reference_id"] = reference_id
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/customers",
                 json=body,
@@ -383,7 +382,7 @@ class SquareService:
         elif filters:
             body["query"] = {"filter": filters[0] if len(filters) == 1 else {"and": filters}}
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/customers/search",
                 json=body,
@@ -431,7 +430,7 @@ class SquareService:
             "checkout": checkout,
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/terminals/checkouts",
                 json=body,
@@ -497,7 +496,7 @@ class SquareService:
             "object": obj,
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/catalog/object",
                 json=body,
@@ -527,7 +526,7 @@ class SquareService:
         if cursor:
             params["cursor"] = cursor
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.get(
                 f"{self._base_url}/v2/catalog/list",
                 params=params,
@@ -594,7 +593,7 @@ class SquareService:
             "changes": changes,
         }
 
-        async with httpx.AsyncClient() as client:
+        async with http_client("square") as client:
             resp = await client.post(
                 f"{self._base_url}/v2/inventory/changes/batch-create",
                 json=body,
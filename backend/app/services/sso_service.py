@@ -17,6 +17,7 @@ from sqlalchemy.orm import Session
 from app.models.gap_features_models import (
     SSOConfiguration, SSOSession, SSOProviderType
 )
+from app.core.http_client import http_client
 
 
 class SSOService:
@@ -277,8 +278,6 @@ class SSOService:
         redirect_uri: str
     ) -> Dict[str, Any]:
         """Handle OAuth callback and exchange code for tokens."""
-        import httpx
-
         provider_type = sso_config.provider_type.value
         config = sso_config.config
 
@@ -306,7 +305,7 @@ class SSOService:
             raise ValueError(f"Unsupported provider type: {provider_type}")
 
         # Exchange code for tokens
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("sso", timeout=30) as client:
             token_response = await client.post(
                 token_url,
                 data={
@@ -546,8 +545,6 @@ class SSOService:
         sso_config: SSOConfiguration
     ) -> SSOSession:
         """Refresh SSO session tokens."""
-        import httpx
-
         if not session.refresh_token:
             raise ValueError("No refresh token available")
 
@@ -570,7 +567,7 @@ class SSOService:
             raise ValueError(f"Token refresh not supported for {provider_type}")
 
         # Refresh tokens
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("sso", timeout=30) as client:
             response = await client.post(
                 token_url,
                 data={
@@ -6,16 +6,17 @@ from the stock on hand.
 
 Flow:
 1. Order placed (waiter POS, guest order, etc.)
-2. For each menu item in order:
-   a. Look up recipe (by menu_item.recipe_id or recipe.pos_item_id)
-   b. For each ingredient in recipe:
-      - Convert units if needed (g→kg, ml→L)
-      - Validate sufficient stock
-      - Deduct from StockOnHand
-      - Deduct from FIFO batches
-      - Create StockMovement record for audit
-3. Check auto-reorder triggers
-4. Return summary of deductions
+2. Resolve every menu item to its compiled recipe (recipe_bom_cache): the
+   recipe lookup (by menu_item.recipe_id or recipe.pos_item_id) and unit
+   conversion (g→kg, ml→L) happen once per menu item, not once per sale
+3. Lock all affected StockOnHand rows and FIFO batches in one query each
+4. For each menu item in order, for each ingredient:
+   - Validate sufficient stock
+   - Deduct from StockOnHand
+   - Deduct from FIFO batches
+   - Queue a StockMovement record for audit (one bulk insert per order)
+5. Check auto-reorder triggers
+6. Return summary of deductions
 
 Industry-standard patterns (Toast, Square, MarketMan, Revel):
 - Atomic stock deduction with rollback on partial failure
@@ -28,16 +29,17 @@ Industry-standard patterns (Toast, Square, MarketMan, Revel):
 
 import logging
 from decimal import Decimal
-from typing import List, Optional, Dict, Any
+from typing import Iterable, List, Optional, Dict, Any
 from datetime import datetime, timezone, timedelta
 
-from sqlalchemy import func, text
+from sqlalchemy import func, insert, text
 from sqlalchemy.orm import Session
 
 from app.models.stock import StockOnHand, StockMovement, MovementReason
 from app.models.recipe import Recipe, RecipeLine
 from app.models.restaurant import MenuItem
 from app.models.product import Product
+from app.services.recipe_bom_cache import CompiledIngredient, CompiledMenuItem, recipe_bom_cache
 
 logger = logging.getLogger(__name__)
 
@@ -98,6 +100,14 @@ class UnitConversionError(Exception):
         )
 
 
+def _as_menu_item_id(value: Any) -> Optional[int]:
+    """Order lines carry menu_item_id as int or numeric string."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
 class StockDeductionService:
     """Service for deducting stock when orders are placed."""
 
@@ -144,6 +154,20 @@ class StockDeductionService:
         # Use a savepoint for atomic deduction
         savepoint = self.db.begin_nested()
         try:
+            compiled_items = self._get_compiled_menu_items(
+                item.get("menu_item_id") for item in order_items
+            )
+            product_ids = {
+                ingredient.product_id
+                for compiled in compiled_items.values()
+                for ingredient in compiled.ingredients
+                if ingredient.unit is not None
+            }
+            # One locking read for all affected stock rows and FIFO batches
+            stock_rows = self._lock_stock_rows(product_ids, location_id)
+            batches = self._lock_fifo_batches(product_ids, location_id)
+            movements: List[Dict[str, Any]] = []
+
             for item in order_items:
                 menu_item_id = item.get("menu_item_id")
                 quantity = Decimal(str(item.get("quantity", 1)))
@@ -152,20 +176,17 @@ class StockDeductionService:
                     results["errors"].append({"error": "Missing menu_item_id", "item": item})
                     continue
 
-                # Get menu item
-                menu_item = self.db.query(MenuItem).filter(MenuItem.id == menu_item_id).first()
-                if not menu_item:
+                compiled = compiled_items.get(_as_menu_item_id(menu_item_id))
+                if not compiled:
                     results["warnings"].append({
                         "warning": f"Menu item {menu_item_id} not found",
                         "item": item
                     })
                     continue
 
-                # Find recipe for this menu item
-                recipe = self._find_recipe_for_menu_item(menu_item)
-                if not recipe:
+                if compiled.recipe_id is None:
                     results["warnings"].append({
-                        "warning": f"No recipe found for '{menu_item.name}' (ID: {menu_item_id})",
+                        "warning": f"No recipe found for '{compiled.name}' (ID: {menu_item_id})",
                         "item": item
                     })
                     continue
@@ -173,12 +194,12 @@ class StockDeductionService:
                 # Pre-validate all ingredients have sufficient stock
                 if not allow_negative:
                     validation = self._validate_sufficient_stock(
-                        recipe, quantity, location_id
+                        compiled, quantity, stock_rows
                     )
                     if not validation["sufficient"]:
                         results["errors"].append({
                             "error": "Insufficient stock",
-                            "menu_item": menu_item.name,
+                            "menu_item": compiled.name,
                             "menu_item_id": menu_item_id,
                             "shortages": validation["shortages"],
                         })
@@ -186,17 +207,18 @@ class StockDeductionService:
                         continue
 
                 # Deduct each ingredient
-                for line in recipe.lines:
+                for ingredient in compiled.ingredients:
                     deduction_result = self._deduct_ingredient(
-                        product_id=line.product_id,
-                        recipe_qty=line.qty,
-                        recipe_unit=line.unit,
+                        ingredient=ingredient,
                         order_qty=quantity,
                         location_id=location_id,
+                        stock_rows=stock_rows,
+                        batches=batches,
+                        movements=movements,
                         reference_type=reference_type,
                         reference_id=reference_id,
                         created_by=created_by,
-                        menu_item_name=menu_item.name,
+                        menu_item_name=compiled.name,
                         allow_negative=allow_negative,
                     )
 
@@ -210,6 +232,8 @@ class StockDeductionService:
                 results["total_items_processed"] += 1
 
             if results["success"]:
+                if movements:
+                    self.db.execute(insert(StockMovement), movements)
                 savepoint.commit()
                 self.db.flush()
                 # Check auto-reorder triggers after successful deduction
@@ -225,46 +249,114 @@ class StockDeductionService:
 
         return results
 
+    # ===== COMPILED RECIPES (BOM CACHE) =====
+
+    def _get_compiled_menu_items(self, menu_item_ids: Iterable[Any]) -> Dict[int, CompiledMenuItem]:
+        """Compiled recipes for the given menu items, from the process-wide cache."""
+        ids = [i for i in (_as_menu_item_id(v) for v in menu_item_ids) if i is not None]
+        if not ids:
+            return {}
+
+        generation = recipe_bom_cache.sync(self.db)
+        compiled, missing = recipe_bom_cache.lookup(ids)
+        if missing:
+            fresh = self._compile_menu_items(missing)
+            recipe_bom_cache.store(fresh, generation)
+            compiled.update(fresh)
+        return compiled
+
+    def _compile_menu_items(self, menu_item_ids: List[int]) -> Dict[int, CompiledMenuItem]:
+        """Resolve menu items to recipes and flatten lines into stock-unit quantities."""
+        menu_items = self.db.query(MenuItem).filter(MenuItem.id.in_(menu_item_ids)).all()
+        recipes = {menu_item.id: self._find_recipe_for_menu_item(menu_item) for menu_item in menu_items}
+
+        recipe_ids = {recipe.id for recipe in recipes.values() if recipe}
+        lines_by_recipe: Dict[int, List[CompiledIngredient]] = {rid: [] for rid in recipe_ids}
+        if recipe_ids:
+            rows = self.db.query(RecipeLine, Product).outerjoin(
+                Product, Product.id == RecipeLine.product_id
+            ).filter(
+                RecipeLine.recipe_id.in_(recipe_ids)
+            ).order_by(RecipeLine.recipe_id, RecipeLine.id).all()
+
+            for line, product in rows:
+                lines_by_recipe[line.recipe_id].append(self._compile_line(line, product))
+
+        compiled = {}
+        for menu_item in menu_items:
+            recipe = recipes[menu_item.id]
+            compiled[menu_item.id] = CompiledMenuItem(
+                menu_item_id=menu_item.id,
+                name=menu_item.name,
+                recipe_id=recipe.id if recipe else None,
+                ingredients=tuple(lines_by_recipe[recipe.id]) if recipe else (),
+            )
+        return compiled
+
+    def _compile_line(self, line: RecipeLine, product: Optional[Product]) -> CompiledIngredient:
+        """Convert one recipe line to a per-portion quantity in the product's unit."""
+        if product is None:
+            return CompiledIngredient(product_id=line.product_id, recipe_unit=line.unit)
+
+        # Converting one unit gives the factor; quantization happens per deduction
+        factor = self._convert_units(Decimal("1"), line.unit, product.unit, quantize=False)
+        return CompiledIngredient(
+            product_id=product.id,
+            recipe_unit=line.unit,
+            product_name=product.name,
+            unit=product.unit,
+            qty_per_portion=line.qty * factor if factor is not None else None,
+            converted=line.unit.lower().strip() != product.unit.lower().strip(),
+        )
+
+    def _lock_stock_rows(self, product_ids: Iterable[int], location_id: int) -> Dict[int, StockOnHand]:
+        """Load and row-lock StockOnHand for all products in one query.
+
+        Rows are locked in product_id order so concurrent orders can't deadlock.
+        """
+        product_ids = sorted(product_ids)
+        if not product_ids:
+            return {}
+        rows = self.db.query(StockOnHand).filter(
+            StockOnHand.product_id.in_(product_ids),
+            StockOnHand.location_id == location_id,
+        ).order_by(StockOnHand.product_id).with_for_update().all()
+        return {row.product_id: row for row in rows}
+
     def _validate_sufficient_stock(
         self,
-        recipe: Recipe,
+        compiled: CompiledMenuItem,
         quantity: Decimal,
-        location_id: int,
+        stock_rows: Dict[int, StockOnHand],
     ) -> Dict[str, Any]:
         """Pre-validate that sufficient stock exists for all recipe ingredients."""
         shortages = []
-        for line in recipe.lines:
-            product = self.db.query(Product).filter(Product.id == line.product_id).first()
-            if not product:
+        for ingredient in compiled.ingredients:
+            if ingredient.unit is None:
                 continue
 
-            total_qty = line.qty * quantity
-            deduct_qty = self._convert_units(total_qty, line.unit, product.unit)
-            if deduct_qty is None:
+            if ingredient.qty_per_portion is None:
                 shortages.append({
-                    "product_id": product.id,
-                    "product_name": product.name,
-                    "error": f"Cannot convert {line.unit} to {product.unit}",
+                    "product_id": ingredient.product_id,
+                    "product_name": ingredient.product_name,
+                    "error": f"Cannot convert {ingredient.recipe_unit} to {ingredient.unit}",
                 })
                 continue
+            deduct_qty = ingredient.qty_for(quantity)
 
-            stock = self.db.query(StockOnHand).filter(
-                StockOnHand.product_id == line.product_id,
-                StockOnHand.location_id == location_id,
-            ).first()
-
+            stock = stock_rows.get(ingredient.product_id)
             available = stock.qty if stock else Decimal("0")
             # Account for reserved quantity
-            reserved = getattr(stock, 'reserved_qty', Decimal("0")) or Decimal("0") if stock else Decimal("0")
+            reserved = (stock.reserved_qty or Decimal("0")) if stock else Decimal("0")
             effective_available = available - reserved
 
             if effective_available < deduct_qty:
                 shortages.append({
-                    "product_id": product.id,
-                    "product_name": product.name,
+                    "product_id": ingredient.product_id,
+                    "product_name": ingredient.product_name,
                     "available": float(effective_available),
                     "needed": float(deduct_qty),
-                    "unit": product.unit,
+                    "unit": ingredient.unit,
                     "shortage": float(deduct_qty - effective_available),
                 })
 
@@ -313,53 +405,47 @@ class StockDeductionService:
 
     def _deduct_ingredient(
         self,
-        product_id: int,
-        recipe_qty: Decimal,
-        recipe_unit: str,
+        ingredient: CompiledIngredient,
         order_qty: Decimal,
         location_id: int,
+        stock_rows: Dict[int, StockOnHand],
+        batches: Dict[int, list],
+        movements: List[Dict[str, Any]],
         reference_type: str,
         reference_id: Optional[int],
         created_by: Optional[int],
         menu_item_name: str,
         allow_negative: bool = False,
     ) -> Dict[str, Any]:
-        """Deduct a single ingredient from stock."""
-        # Get product
-        product = self.db.query(Product).filter(Product.id == product_id).first()
-        if not product:
+        """Deduct a single compiled ingredient from the pre-locked stock rows.
+
+        The StockMovement row is appended to ``movements`` for one bulk insert.
+        """
+        product_id = ingredient.product_id
+        if ingredient.unit is None:
             return {
                 "success": False,
                 "error": f"Product {product_id} not found",
                 "product_id": product_id,
             }
 
-        # Calculate total quantity to deduct
-        total_qty = recipe_qty * order_qty
-
-        # Convert units with validation
-        deduct_qty = self._convert_units(total_qty, recipe_unit, product.unit)
-        if deduct_qty is None:
+        if ingredient.qty_per_portion is None:
             return {
                 "success": False,
-                "error": f"Cannot convert {recipe_unit} to {product.unit} for '{product.name}'",
+                "error": f"Cannot convert {ingredient.recipe_unit} to {ingredient.unit} for '{ingredient.product_name}'",
                 "product_id": product_id,
-                "product_name": product.name,
+                "product_name": ingredient.product_name,
             }
+        deduct_qty = ingredient.qty_for(order_qty)
 
-        # Get or create StockOnHand record (row-level lock for concurrent safety)
-        stock = self.db.query(StockOnHand).filter(
-            StockOnHand.product_id == product_id,
-            StockOnHand.location_id == location_id,
-        ).with_for_update().first()
-
+        stock = stock_rows.get(product_id)
         if not stock:
             if not allow_negative:
                 return {
                     "success": False,
-                    "error": f"No stock record for '{product.name}' at location {location_id}",
+                    "error": f"No stock record for '{ingredient.product_name}' at location {location_id}",
                     "product_id": product_id,
-                    "product_name": product.name,
+                    "product_name": ingredient.product_name,
                 }
             stock = StockOnHand(
                 product_id=product_id,
@@ -367,19 +453,19 @@ class StockDeductionService:
                 qty=Decimal("0"),
             )
             self.db.add(stock)
-            self.db.flush()
+            stock_rows[product_id] = stock
 
         old_qty = stock.qty
-        reserved = getattr(stock, 'reserved_qty', Decimal("0")) or Decimal("0")
+        reserved = stock.reserved_qty or Decimal("0")
         effective_available = old_qty - reserved
 
         # Negative stock prevention
         if not allow_negative and effective_available < deduct_qty:
             return {
                 "success": False,
-                "error": f"Insufficient stock for '{product.name}': need {deduct_qty}, have {effective_available} {product.unit}",
+                "error": f"Insufficient stock for '{ingredient.product_name}': need {deduct_qty}, have {effective_available} {ingredient.unit}",
                 "product_id": product_id,
-                "product_name": product.name,
+                "product_name": ingredient.product_name,
                 "available": float(effective_available),
                 "needed": float(deduct_qty),
             }
@@ -387,108 +473,118 @@ class StockDeductionService:
         new_qty = old_qty - deduct_qty
         warning = None
         if new_qty < 0:
-            warning = f"Stock for '{product.name}' went negative: {new_qty} {product.unit}"
+            warning = f"Stock for '{ingredient.product_name}' went negative: {new_qty} {ingredient.unit}"
 
         # Update stock
         stock.qty = new_qty
 
         # FIFO: Deduct from oldest batches first (mandatory)
-        batch_result = self._deduct_from_batches_fifo(product_id, location_id, deduct_qty)
+        batch_result = self._consume_batches_fifo(batches.get(product_id), deduct_qty)
         if batch_result and batch_result.get("warning"):
             warning = batch_result["warning"]
 
-        # Create movement record
-        movement = StockMovement(
-            product_id=product_id,
-            location_id=location_id,
-            qty_delta=-deduct_qty,
-            reason=MovementReason.SALE.value,
-            ref_type=reference_type,
-            ref_id=reference_id,
-            notes=f"Sale: {menu_item_name} x{order_qty}",
-            created_by=created_by,
-        )
-        self.db.add(movement)
+        movements.append({
+            "product_id": product_id,
+            "location_id": location_id,
+            "qty_delta": -deduct_qty,
+            "reason": MovementReason.SALE.value,
+            "ref_type": reference_type,
+            "ref_id": reference_id,
+            "notes": f"Sale: {menu_item_name} x{order_qty}",
+            "created_by": created_by,
+        })
 
         return {
             "success": True,
             "product_id": product_id,
-            "product_name": product.name,
+            "product_name": ingredient.product_name,
             "qty_deducted": float(deduct_qty),
-            "unit": product.unit,
+            "unit": ingredient.unit,
             "old_qty": float(old_qty),
             "new_qty": float(new_qty),
             "warning": warning,
             "menu_item": menu_item_name,
         }
 
-    def _deduct_from_batches_fifo(
-        self,
-        product_id: int,
-        location_id: int,
-        qty_to_deduct: Decimal,
-    ) -> Optional[Dict[str, Any]]:
-        """
-        Deduct from inventory batches using FIFO (First In, First Out).
-        Oldest batches (by received_date) are consumed first.
-        Also checks for expired batches and marks them.
+    def _lock_fifo_batches(self, product_ids: Iterable[int], location_id: int) -> Dict[int, list]:
+        """Load and lock active FIFO batches for all products in one query.
 
-        FIFO is mandatory when batches exist. Returns warning if batch
-        quantity is insufficient (stock still deducted from StockOnHand).
+        Returns product_id -> non-expired batches, oldest first. Expired
+        batches are marked as such.
         """
+        product_ids = sorted(product_ids)
+        if not product_ids:
+            return {}
         try:
             from app.models.advanced_features import InventoryBatch
             from datetime import date as date_type
 
-            # Get non-expired batches ordered by received date (oldest first = FIFO)
-            # Use FOR UPDATE row-level locks to prevent concurrent deduction races
-            batches = self.db.query(InventoryBatch).filter(
-                InventoryBatch.product_id == product_id,
+            rows = self.db.query(InventoryBatch).filter(
+                InventoryBatch.product_id.in_(product_ids),
                 InventoryBatch.location_id == location_id,
                 InventoryBatch.current_quantity > 0,
                 InventoryBatch.is_quarantined == False,
-            ).order_by(InventoryBatch.received_date.asc()).with_for_update().all()
-
-            if not batches:
-                return None  # No batch tracking for this product
-
-            # Mark expired batches
-            today = date_type.today()
-            for batch in batches:
-                if batch.expiration_date and batch.expiration_date < today:
-                    batch.is_expired = True
-
-            # Filter to non-expired only for deduction
-            active_batches = [b for b in batches if not b.is_expired]
+            ).order_by(
+                InventoryBatch.product_id,
+                InventoryBatch.received_date.asc(),
+                InventoryBatch.id,
+            ).with_for_update().all()
+        except Exception as e:
+            # InventoryBatch table may not exist yet - log and continue
+            logger.debug(f"Batch tracking unavailable: {e}")
+            return {}
+
+        today = date_type.today()
+        batches: Dict[int, list] = {}
+        for batch in rows:
+            if batch.expiration_date and batch.expiration_date < today:
+                batch.is_expired = True
+            # An empty list (only expired batches) still reports a FIFO shortage
+            active = batches.setdefault(batch.product_id, [])
+            if not batch.is_expired:
+                active.append(batch)
+        return batches
+
+    def _consume_batches_fifo(
+        self,
+        active_batches: Optional[list],
+        qty_to_deduct: Decimal,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Deduct from inventory batches using FIFO (First In, First Out).
+        ``active_batches`` are the product's non-expired batches, oldest first,
+        as loaded by ``_lock_fifo_batches``; ``None`` means no batch tracking.
 
-            remaining = qty_to_deduct
-            for batch in active_batches:
-                if remaining <= 0:
-                    break
+        FIFO is mandatory when batches exist. Returns warning if batch
+        quantity is insufficient (stock still deducted from StockOnHand).
+        """
+        if active_batches is None:
+            return None
 
-                deduct_from_batch = min(remaining, batch.current_quantity)
-                batch.current_quantity -= deduct_from_batch
-                remaining -= deduct_from_batch
+        remaining = qty_to_deduct
+        for batch in active_batches:
+            if remaining <= 0:
+                break
 
-            if remaining > 0:
-                total_batch_qty = sum(b.current_quantity for b in active_batches)
-                return {
-                    "warning": f"FIFO batch shortage: {remaining} units could not be matched to batches "
-                               f"(total batch qty: {total_batch_qty}). StockOnHand still deducted."
-                }
+            deduct_from_batch = min(remaining, batch.current_quantity)
+            batch.current_quantity -= deduct_from_batch
+            remaining -= deduct_from_batch
 
-            return None
+        if remaining > 0:
+            total_batch_qty = sum(b.current_quantity for b in active_batches)
+            return {
+                "warning": f"FIFO batch shortage: {remaining} units could not be matched to batches "
+                           f"(total batch qty: {total_batch_qty}). StockOnHand still deducted."
+            }
 
-        except Exception as e:
-            # InventoryBatch table may not exist yet - log and continue
-            logger.debug(f"Batch tracking unavailable: {e}")
-            return None
+        return None
 
     def _convert_units(
         self,
         qty: Decimal,
         from_unit: str,
         to_unit: str,
+        quantize: bool = True,
     ) -> Optional[Decimal]:
         """Convert quantity between units. Returns None if incompatible."""
         from_unit = from_unit.lower().strip()
@@ -520,7 +616,7 @@ class StockDeductionService:
         # convert to target unit
         result = base_qty / to_factor
 
-        return result.quantize(Decimal("0.0001"))
+        return result.quantize(Decimal("0.0001")) if quantize else result
 
     def _get_unit_type(self, unit: str) -> str:
         """Get the type of unit (weight, volume, count)."""
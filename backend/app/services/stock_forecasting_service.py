@@ -9,6 +9,12 @@ Algorithms:
 3. Trend detection (growing vs declining items)
 4. Safety stock calculation (service level based)
 5. EOQ (Economic Order Quantity) calculation
+
+Location-wide views (reorder suggestions, demand trends, dashboard) load the
+daily sale totals of every product in one grouped query into a
+product x day matrix (DailyUsageMatrix) and compute moving averages,
+std-dev, safety stock and reorder points as NumPy arrays, instead of two
+queries per product.
 """
 
 from __future__ import annotations
@@ -20,6 +26,7 @@ from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
 
@@ -39,6 +46,73 @@ _Z_SCORES: Dict[float, float] = {
 }
 
 
+def _as_date(day_val: Any) -> date:
+    """func.date() yields a str on SQLite and a date on PostgreSQL."""
+    if isinstance(day_val, str):
+        return date.fromisoformat(day_val)
+    if isinstance(day_val, datetime):
+        return day_val.date()
+    return day_val
+
+
+class DailyUsageMatrix:
+    """Daily SALE usage of many products as a (products x days) array.
+
+    Mirrors ``_get_daily_usage`` per product: each product's series spans
+    from its first to its last day with sales, gaps filled with zeros.
+    """
+
+    def __init__(self, product_ids: List[int], rows: List[Tuple[int, Any, Any]]):
+        self.index = {pid: i for i, pid in enumerate(product_ids)}
+        n = len(product_ids)
+        days = [(self.index.get(pid), _as_date(day), float(total or 0)) for pid, day, total in rows]
+        days = [d for d in days if d[0] is not None]
+
+        if days:
+            start = min(d[1] for d in days)
+            width = (max(d[1] for d in days) - start).days + 1
+        else:
+            start, width = date.today(), 0
+
+        self.values = np.zeros((n, width))
+        self.first = np.full(n, -1, dtype=np.int64)
+        self.last = np.full(n, -1, dtype=np.int64)
+        if days:
+            rows_idx = np.array([d[0] for d in days], dtype=np.int64)
+            cols_idx = np.array([(d[1] - start).days for d in days], dtype=np.int64)
+            self.values[rows_idx, cols_idx] = [d[2] for d in days]
+            self.first[:] = width
+            np.minimum.at(self.first, rows_idx, cols_idx)
+            np.maximum.at(self.last, rows_idx, cols_idx)
+            self.first[self.first == width] = -1
+
+        self.has_data = self.last >= 0
+        # Number of days in each product's gap-filled series
+        self.data_days = np.where(self.has_data, self.last - self.first + 1, 0)
+        # Cumulative sums let every window be read with two lookups
+        self._cumsum = np.concatenate([np.zeros((n, 1)), np.cumsum(self.values, axis=1)], axis=1)
+
+    def moving_average(self, window: int) -> np.ndarray:
+        """Mean of each product's most recent *window* days (0 without data)."""
+        rows = np.arange(len(self.last))
+        lo = np.maximum(self.first, self.last - window + 1)
+        count = np.where(self.has_data, self.last - lo + 1, 1)
+        hi = np.where(self.has_data, self.last + 1, 0)
+        lo = np.where(self.has_data, lo, 0)
+        totals = self._cumsum[rows, hi] - self._cumsum[rows, lo]
+        return np.where(self.has_data, totals / count, 0.0)
+
+    def std_deviation(self) -> np.ndarray:
+        """Sample std-dev over each product's series (0 below two days)."""
+        cols = np.arange(self.values.shape[1])
+        in_span = (cols >= self.first[:, None]) & (cols <= self.last[:, None])
+        n = self.data_days
+        safe_n = np.maximum(n, 1)
+        mean = np.where(in_span, self.values, 0.0).sum(axis=1) / safe_n
+        squares = np.where(in_span, (self.values - mean[:, None]) ** 2, 0.0).sum(axis=1)
+        return np.where(n >= 2, np.sqrt(squares / np.maximum(n - 1, 1)), 0.0)
+
+
 class StockForecastingService:
     """Demand forecasting and reorder optimization."""
 
@@ -265,52 +339,101 @@ class StockForecastingService:
     ) -> List[Dict[str, Any]]:
         """For every active product at *location_id*, compute a reorder
         suggestion if current stock is at or below the reorder point."""
-        products = (
-            self.db.query(Product)
-            .filter(Product.active == True)  # noqa: E712
-            .all()
-        )
+        products = self._get_active_products()
+        usage = self._get_daily_usage_matrix(products, location_id, lookback_days=60)
+        return self._build_reorder_suggestions(products, location_id, usage)
+
+    def get_demand_trends(
+        self,
+        location_id: int,
+        top_n: int = 20,
+    ) -> Dict[str, Any]:
+        """Identify products trending up vs down by comparing recent vs
+        prior period average usage."""
+        products = self._get_active_products()
+        usage = self._get_daily_usage_matrix(products, location_id, lookback_days=60)
+        return self._build_demand_trends(products, location_id, usage, top_n)
+
+    def get_dashboard(self, location_id: int) -> Dict[str, Any]:
+        """Full forecasting dashboard for a location."""
+        products = self._get_active_products()
+        usage = self._get_daily_usage_matrix(products, location_id, lookback_days=60)
+        suggestions = self._build_reorder_suggestions(products, location_id, usage)
+        trends = self._build_demand_trends(products, location_id, usage, top_n=10)
+
+        critical = [s for s in suggestions if s["urgency"] == "critical"]
+        high = [s for s in suggestions if s["urgency"] == "high"]
+
+        return {
+            "location_id": location_id,
+            "reorder_suggestions": {
+                "total": len(suggestions),
+                "critical": len(critical),
+                "high": len(high),
+                "items": suggestions[:30],
+            },
+            "demand_trends": trends,
+            "summary": {
+                "products_needing_reorder": len(suggestions),
+                "critical_items": len(critical),
+                "trending_up_count": len(trends.get("trending_up", [])),
+                "trending_down_count": len(trends.get("trending_down", [])),
+            },
+        }
+
+    # ------------------------------------------------------------------
+    # Location-wide (bulk) computations
+    # ------------------------------------------------------------------
+
+    def _build_reorder_suggestions(
+        self,
+        products: List[Product],
+        location_id: int,
+        usage: DailyUsageMatrix,
+    ) -> List[Dict[str, Any]]:
+        current_by_product = self._get_current_stock_bulk(location_id)
+        current = np.array([current_by_product.get(p.id, 0.0) for p in products], dtype=float)
+        lead_time = np.array([p.lead_time_days or 1 for p in products], dtype=float)
+
+        avg_daily = usage.moving_average(window=14)
+        std_daily = usage.std_deviation()
+        z_score = _Z_SCORES.get(0.95, 1.645)
+
+        safety_stock = z_score * std_daily * np.sqrt(lead_time)
+        reorder_point = (avg_daily * lead_time) + safety_stock
+        needs_reorder = (avg_daily > 0) & (current <= reorder_point)
 
         suggestions: List[Dict[str, Any]] = []
-        for product in products:
-            current = float(self._get_current_stock(product.id, location_id))
-
-            daily_usage = self._get_daily_usage(product.id, location_id, lookback_days=60)
-            avg_daily = self._moving_average(daily_usage, window=14)
-            if avg_daily <= 0:
-                continue
-
-            std_daily = self._std_deviation(daily_usage)
-            lead_time = product.lead_time_days or 1
-            z_score = _Z_SCORES.get(0.95, 1.645)
-
-            safety_stock = z_score * std_daily * math.sqrt(lead_time)
-            reorder_point = (avg_daily * lead_time) + safety_stock
-
-            if current <= reorder_point:
-                # How much to order: bring up to par or target stock
-                target = float(product.target_stock) if product.target_stock else reorder_point * 2
-                order_qty = max(0, target - current)
-
-                days_until_stockout = current / avg_daily if avg_daily > 0 else 999
-                urgency = "critical" if days_until_stockout <= 1 else (
-                    "high" if days_until_stockout <= lead_time else "normal"
-                )
-
-                suggestions.append({
-                    "product_id": product.id,
-                    "product_name": product.name,
-                    "supplier_id": product.supplier_id,
-                    "current_stock": current,
-                    "reorder_point": round(reorder_point, 1),
-                    "safety_stock": round(safety_stock, 1),
-                    "suggested_order_qty": round(order_qty, 1),
-                    "avg_daily_demand": round(avg_daily, 2),
-                    "lead_time_days": lead_time,
-                    "days_until_stockout": round(days_until_stockout, 1),
-                    "urgency": urgency,
-                    "unit": product.unit,
-                })
+        for i in np.flatnonzero(needs_reorder):
+            product = products[i]
+            avg = float(avg_daily[i])
+            stock = float(current[i])
+            rop = float(reorder_point[i])
+            lead = product.lead_time_days or 1
+
+            # How much to order: bring up to par or target stock
+            target = float(product.target_stock) if product.target_stock else rop * 2
+            order_qty = max(0, target - stock)
+
+            days_until_stockout = stock / avg if avg > 0 else 999
+            urgency = "critical" if days_until_stockout <= 1 else (
+                "high" if days_until_stockout <= lead else "normal"
+            )
+
+            suggestions.append({
+                "product_id": product.id,
+                "product_name": product.name,
+                "supplier_id": product.supplier_id,
+                "current_stock": stock,
+                "reorder_point": round(rop, 1),
+                "safety_stock": round(float(safety_stock[i]), 1),
+                "suggested_order_qty": round(order_qty, 1),
+                "avg_daily_demand": round(avg, 2),
+                "lead_time_days": lead,
+                "days_until_stockout": round(days_until_stockout, 1),
+                "urgency": urgency,
+                "unit": product.unit,
+            })
 
         # Sort by urgency: critical first, then high, then normal
         urgency_order = {"critical": 0, "high": 1, "normal": 2}
@@ -318,31 +441,22 @@ class StockForecastingService:
 
         return suggestions
 
-    def get_demand_trends(
+    def _build_demand_trends(
         self,
+        products: List[Product],
         location_id: int,
-        top_n: int = 20,
+        usage: DailyUsageMatrix,
+        top_n: int,
     ) -> Dict[str, Any]:
-        """Identify products trending up vs down by comparing recent vs
-        prior period average usage."""
-        products = (
-            self.db.query(Product)
-            .filter(Product.active == True)  # noqa: E712
-            .all()
-        )
+        recent_avg = usage.moving_average(window=7)
+        prior_avg = usage.moving_average(window=30)
+        analyzed = usage.has_data & (prior_avg > 0)
 
         trends: List[Dict[str, Any]] = []
-        for product in products:
-            daily_usage = self._get_daily_usage(product.id, location_id, lookback_days=60)
-            if not daily_usage:
-                continue
-
-            recent = self._moving_average(daily_usage, window=7)
-            prior = self._moving_average(daily_usage, window=30)
-
-            if prior <= 0:
-                continue
-
+        for i in np.flatnonzero(analyzed):
+            product = products[i]
+            recent = float(recent_avg[i])
+            prior = float(prior_avg[i])
             change_pct = ((recent - prior) / prior) * 100
 
             trends.append({
@@ -376,31 +490,6 @@ class StockForecastingService:
             "total_analyzed": len(trends),
         }
 
-    def get_dashboard(self, location_id: int) -> Dict[str, Any]:
-        """Full forecasting dashboard for a location."""
-        suggestions = self.generate_reorder_suggestions(location_id)
-        trends = self.get_demand_trends(location_id, top_n=10)
-
-        critical = [s for s in suggestions if s["urgency"] == "critical"]
-        high = [s for s in suggestions if s["urgency"] == "high"]
-
-        return {
-            "location_id": location_id,
-            "reorder_suggestions": {
-                "total": len(suggestions),
-                "critical": len(critical),
-                "high": len(high),
-                "items": suggestions[:30],
-            },
-            "demand_trends": trends,
-            "summary": {
-                "products_needing_reorder": len(suggestions),
-                "critical_items": len(critical),
-                "trending_up_count": len(trends.get("trending_up", [])),
-                "trending_down_count": len(trends.get("trending_down", [])),
-            },
-        }
-
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
@@ -432,12 +521,7 @@ class StockForecastingService:
 
         result: Dict[date, float] = {}
         for row in rows:
-            day_val = row.day
-            if isinstance(day_val, str):
-                day_val = date.fromisoformat(day_val)
-            elif isinstance(day_val, datetime):
-                day_val = day_val.date()
-            result[day_val] = float(row.total or 0)
+            result[_as_date(row.day)] = float(row.total or 0)
 
         # Fill gaps with zeros
         if result:
@@ -451,6 +535,31 @@ class StockForecastingService:
 
         return result
 
+    def _get_daily_usage_matrix(
+        self,
+        products: List[Product],
+        location_id: int,
+        lookback_days: int = 90,
+    ) -> DailyUsageMatrix:
+        """``_get_daily_usage`` for all *products* in one grouped query."""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+
+        rows = (
+            self.db.query(
+                StockMovement.product_id,
+                func.date(StockMovement.ts).label("day"),
+                func.sum(func.abs(StockMovement.qty_delta)).label("total"),
+            )
+            .filter(
+                StockMovement.location_id == location_id,
+                StockMovement.reason == "sale",
+                StockMovement.ts >= cutoff,
+            )
+            .group_by(StockMovement.product_id, func.date(StockMovement.ts))
+            .all()
+        )
+        return DailyUsageMatrix([p.id for p in products], rows)
+
     def _moving_average(
         self, daily_usage: Dict[date, float], window: int = 7,
     ) -> float:
@@ -511,3 +620,23 @@ class StockForecastingService:
         if stock:
             return stock.qty - stock.reserved_qty
         return Decimal("0")
+
+    def _get_current_stock_bulk(self, location_id: int) -> Dict[int, float]:
+        """Available stock (qty - reserved) of every product at a location."""
+        result: Dict[int, float] = {}
+        rows = (
+            self.db.query(StockOnHand.product_id, StockOnHand.qty, StockOnHand.reserved_qty)
+            .filter(StockOnHand.location_id == location_id)
+            .order_by(StockOnHand.id)
+            .all()
+        )
+        for product_id, qty, reserved_qty in rows:
+            result.setdefault(product_id, float(qty - reserved_qty))
+        return result
+
+    def _get_active_products(self) -> List[Product]:
+        return (
+            self.db.query(Product)
+            .filter(Product.active == True)  # noqa: E712
+            .all()
+        )
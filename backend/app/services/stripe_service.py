@@ -7,6 +7,7 @@ from dataclasses import dataclass
 from enum import Enum
 import httpx
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -74,7 +75,8 @@ class StripeService:
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client."""
         if self._client is None:
-            self._client = httpx.AsyncClient(
+            self._client = http_client(
+                "stripe",
                 base_url=self.STRIPE_API_BASE,
                 auth=(self.secret_key, ""),
                 headers={
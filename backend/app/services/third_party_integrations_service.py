@@ -16,6 +16,7 @@ from sqlalchemy.orm import Session
 from app.models.gap_features_models import (
     IntegrationCredential, ZapierWebhook
 )
+from app.core.http_client import http_client
 
 
 class IntegrationCredentialService:
@@ -162,8 +163,6 @@ class SevenShiftsIntegration:
 
     async def _get_client(self):
         """Get authenticated HTTP client."""
-        import httpx
-
         credentials = await self.credential_service.get_credential(
             self.venue_id,
             "7shifts"
@@ -171,7 +170,8 @@ class SevenShiftsIntegration:
         if not credentials:
             raise ValueError("7shifts integration not configured")
 
-        return httpx.AsyncClient(
+        return http_client(
+            "third_party",
             base_url=self.BASE_URL,
             headers={
                 "Authorization": f"Bearer {credentials['access_token']}",
@@ -268,8 +268,6 @@ class HomebaseIntegration:
 
     async def _get_client(self):
         """Get authenticated HTTP client."""
-        import httpx
-
         credentials = await self.credential_service.get_credential(
             self.venue_id,
             "homebase"
@@ -277,7 +275,8 @@ class HomebaseIntegration:
         if not credentials:
             raise ValueError("Homebase integration not configured")
 
-        return httpx.AsyncClient(
+        return http_client(
+            "third_party",
             base_url=self.BASE_URL,
             headers={
                 "Authorization": f"Bearer {credentials['access_token']}",
@@ -346,8 +345,6 @@ class MarginEdgeIntegration:
 
     async def _get_client(self):
         """Get authenticated HTTP client."""
-        import httpx
-
         credentials = await self.credential_service.get_credential(
             self.venue_id,
             "marginedge"
@@ -355,7 +352,8 @@ class MarginEdgeIntegration:
         if not credentials:
             raise ValueError("MarginEdge integration not configured")
 
-        return httpx.AsyncClient(
+        return http_client(
+            "third_party",
             base_url=self.BASE_URL,
             headers={
                 "Authorization": f"Bearer {credentials['access_token']}",
@@ -420,8 +418,6 @@ class MarginEdgeIntegration:
         filename: str
     ) -> Dict[str, Any]:
         """Upload an invoice for processing."""
-        import httpx
-
         credentials = await self.credential_service.get_credential(
             self.venue_id,
             "marginedge"
@@ -429,7 +425,7 @@ class MarginEdgeIntegration:
         if not credentials:
             raise ValueError("MarginEdge integration not configured")
 
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("third_party", timeout=30) as client:
             response = await client.post(
                 f"{self.BASE_URL}/invoices/upload",
                 headers={"Authorization": f"Bearer {credentials['access_token']}"},
@@ -517,8 +513,6 @@ class ZapierService:
         payload: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Trigger all webhooks for an event type."""
-        import httpx
-
         result = self.db.execute(
             select(ZapierWebhook).where(
                 and_(
@@ -554,7 +548,7 @@ class ZapierService:
             ).hexdigest()
 
             try:
-                async with httpx.AsyncClient(timeout=30) as client:
+                async with http_client("third_party", timeout=30) as client:
                     response = await client.post(
                         webhook.webhook_url,
                         json=signed_payload,
@@ -714,8 +708,6 @@ class AccountingSyncService:
         end_date: datetime
     ) -> Dict[str, Any]:
         """Sync sales data to QuickBooks."""
-        import httpx
-
         credentials = await self.credential_service.get_credential(
             self.venue_id,
             "quickbooks"
@@ -750,7 +742,7 @@ class AccountingSyncService:
 
         # Push to QuickBooks
         synced = 0
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("third_party", timeout=30) as client:
             for day, data in daily_sales.items():
                 response = await client.post(
                     f"https://quickbooks.api.intuit.com/v3/company/{credentials['realm_id']}/salesreceipt",
@@ -785,8 +777,6 @@ class AccountingSyncService:
         end_date: datetime
     ) -> Dict[str, Any]:
         """Sync purchase invoices to Xero."""
-        import httpx
-
         credentials = await self.credential_service.get_credential(
             self.venue_id,
             "xero"
@@ -809,7 +799,7 @@ class AccountingSyncService:
         purchase_orders = result.scalars().all()
 
         synced = 0
-        async with httpx.AsyncClient(timeout=30) as client:
+        async with http_client("third_party", timeout=30) as client:
             for po in purchase_orders:
                 response = await client.post(
                     "https://api.xero.com/api.xro/2.0/Invoices",
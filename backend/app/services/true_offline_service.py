@@ -21,6 +21,8 @@ import hashlib
 import uuid
 import base64
 
+from app.core.http_client import sync_http_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -118,7 +120,6 @@ class TrueOfflineService:
     
     def _check_payment_gateway(self) -> bool:
         """Check payment gateway connectivity"""
-        import requests
 
         # Get payment gateway config from settings or environment
         # This would be configured per installation (Stripe, Square, etc.)
@@ -129,7 +130,8 @@ class TrueOfflineService:
 
         for endpoint in gateway_endpoints:
             try:
-                response = requests.get(endpoint, timeout=3)
+                with sync_http_client("connectivity", timeout=3) as client:
+                    response = client.get(endpoint)
                 if response.status_code in [200, 404]:  # 404 is ok, means we reached the server
                     return True
             except Exception as e:
@@ -162,7 +164,6 @@ class TrueOfflineService:
     
     def _check_fiscal_service(self) -> bool:
         """Check Bulgarian NRA fiscal service connectivity"""
-        import requests
 
         # Bulgarian NRA fiscal device/service endpoints
         # This would be configured based on the fiscal printer/service being used
@@ -174,7 +175,8 @@ class TrueOfflineService:
 
         for endpoint in fiscal_endpoints:
             try:
-                response = requests.get(endpoint, timeout=2)
+                with sync_http_client("connectivity", timeout=2) as client:
+                    response = client.get(endpoint)
                 if response.status_code == 200:
                     return True
             except Exception as e:
@@ -186,7 +188,6 @@ class TrueOfflineService:
     
     def _check_cloud_services(self) -> bool:
         """Check cloud services (AI, analytics, etc.)"""
-        import requests
 
         # Check cloud services availability (these are non-critical)
         cloud_endpoints = [
@@ -197,7 +198,8 @@ class TrueOfflineService:
         available_count = 0
         for endpoint in cloud_endpoints:
             try:
-                response = requests.head(endpoint, timeout=2)
+                with sync_http_client("connectivity", timeout=2) as client:
+                    response = client.head(endpoint)
                 if response.status_code in [200, 401, 403]:  # Service is up, even if auth fails
                     available_count += 1
             except Exception as e:
@@ -30,6 +30,7 @@ from .registry import (
     get_printer_by_model
 )
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +50,7 @@ class DatecsFPGateDriver(FiscalPrinterDriver):
 
     async def connect(self) -> bool:
         try:
-            self._client = httpx.AsyncClient(timeout=30.0)
+            self._client = http_client("fiscal", timeout=30.0)
             status = await self.get_status()
             self._connected = status.is_online
             return self._connected
@@ -294,7 +295,7 @@ class DatecsErpNetDriver(FiscalPrinterDriver):
 
     async def connect(self) -> bool:
         try:
-            self._client = httpx.AsyncClient(timeout=30.0)
+            self._client = http_client("fiscal", timeout=30.0)
             response = await self._client.get(f"{self.base_url}/printers")
             self._connected = response.status_code == 200
             return self._connected
@@ -523,7 +524,7 @@ class TremolZFPLabDriver(FiscalPrinterDriver):
 
     async def connect(self) -> bool:
         try:
-            self._client = httpx.AsyncClient(timeout=30.0)
+            self._client = http_client("fiscal", timeout=30.0)
             response = await self._client.get(f"{self.base_url}/api/status")
             self._connected = response.status_code == 200
             return self._connected
@@ -684,7 +685,7 @@ class DaisyFiscalDriver(FiscalPrinterDriver):
 
     async def connect(self) -> bool:
         try:
-            self._client = httpx.AsyncClient(timeout=30.0)
+            self._client = http_client("fiscal", timeout=30.0)
             response = await self._client.get(f"{self.base_url}/status")
             self._connected = response.status_code == 200
             return self._connected
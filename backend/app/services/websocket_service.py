@@ -11,6 +11,9 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 from fastapi import WebSocket
 
+from app.services.ws_event_bus import EventBus, event_bus
+from app.services.ws_fanout import ws_fanout
+
 logger = logging.getLogger(__name__)
 
 
@@ -135,9 +138,15 @@ class ConnectionManager:
     """
     Manages WebSocket connections and message broadcasting.
     Supports channels for targeted message delivery.
+
+    Broadcasts also go out on the event bus so sockets held by other
+    workers receive them; the offline replay buffer lives in the bus.
     """
 
-    def __init__(self):
+    def __init__(self, bus: EventBus = None):
+        self.bus = bus or event_bus
+        self.bus.add_handler("venue", self._deliver)
+
         # Active connections by venue
         self.venue_connections: Dict[int, Set[WebSocket]] = {}
 
@@ -147,9 +156,6 @@ class ConnectionManager:
         # Connection metadata
         self.connection_info: Dict[WebSocket, Dict] = {}
 
-        # Message queue for offline clients
-        self.message_queue: Dict[int, List[WebSocketMessage]] = {}
-
         # Statistics
         self.stats = {
             "total_connections": 0,
@@ -166,10 +172,12 @@ class ConnectionManager:
     ):
         """Accept a new WebSocket connection"""
         await websocket.accept()
+        ws_fanout.register(websocket, on_close=self.disconnect)
 
         # Add to venue connections
         if venue_id not in self.venue_connections:
             self.venue_connections[venue_id] = set()
+            self.bus.set_presence(str(venue_id), True)
         self.venue_connections[venue_id].add(websocket)
 
         # Add to channel connections
@@ -201,11 +209,9 @@ class ConnectionManager:
             venue_id=venue_id
         ))
 
-        # Send queued messages
-        if venue_id in self.message_queue:
-            for msg in self.message_queue[venue_id][-50:]:  # Last 50
-                await self.send_personal(websocket, msg)
-            self.message_queue[venue_id] = []
+        # Replay events raised while no worker had a socket for this venue
+        for payload in await self.bus.buffer_drain(str(venue_id)):
+            ws_fanout.send(websocket, payload)
 
         logger.info(f"WebSocket connected: venue={venue_id}, channels={channels}")
 
@@ -220,6 +226,7 @@ class ConnectionManager:
             self.venue_connections[venue_id].discard(websocket)
             if not self.venue_connections[venue_id]:
                 del self.venue_connections[venue_id]
+                self.bus.set_presence(str(venue_id), False)
 
         # Remove from channel connections
         for channel in channels:
@@ -232,75 +239,72 @@ class ConnectionManager:
         # Remove connection info
         if websocket in self.connection_info:
             del self.connection_info[websocket]
+        ws_fanout.unregister(websocket)
 
         logger.info(f"WebSocket disconnected: venue={venue_id}")
 
     async def send_personal(self, websocket: WebSocket, message: WebSocketMessage):
-        """Send message to a specific connection"""
-        try:
-            await websocket.send_text(message.to_json())
+        """Queue a message for a specific connection"""
+        if ws_fanout.send(websocket, message.to_json()):
             self.stats["messages_sent"] += 1
-        except Exception as e:
-            logger.error(f"Failed to send message: {e}")
-            self.disconnect(websocket)
 
-    async def broadcast_venue(self, venue_id: int, message: WebSocketMessage):
-        """Broadcast message to all connections for a venue"""
+    async def broadcast_venue(
+        self,
+        venue_id: int,
+        message: WebSocketMessage,
+        coalesce_key: str = None
+    ):
+        """Broadcast message to all connections for a venue, on every worker"""
         message.venue_id = venue_id
-        connections = self.venue_connections.get(venue_id, set()).copy()
-
-        if not connections:
-            # Queue message for later
-            if venue_id not in self.message_queue:
-                self.message_queue[venue_id] = []
-            self.message_queue[venue_id].append(message)
-            # Keep only last 100 messages
-            self.message_queue[venue_id] = self.message_queue[venue_id][-100:]
+        payload = message.to_json()
+        data = {"venue_id": venue_id, "channel": None, "payload": payload, "key": coalesce_key}
+        delivered = self._deliver(data)
+        await self.bus.publish("venue", data)
+
+        if not delivered and not await self.bus.has_presence(str(venue_id)):
+            # Nobody is connected anywhere: keep it for the next client
+            await self.bus.buffer_append(str(venue_id), payload)
             return
 
-        disconnected = []
-        for websocket in connections:
-            try:
-                await websocket.send_text(message.to_json())
-            except Exception as e:
-                logger.warning(f"Failed to send broadcast message to WebSocket client for venue {venue_id}: {e}")
-                disconnected.append(websocket)
-
-        # Clean up disconnected
-        for ws in disconnected:
-            self.disconnect(ws)
-
         self.stats["messages_broadcast"] += 1
 
     async def broadcast_channel(
         self,
         venue_id: int,
         channel: str,
-        message: WebSocketMessage
+        message: WebSocketMessage,
+        coalesce_key: str = None
     ):
-        """Broadcast message to a specific channel"""
+        """Broadcast message to a specific channel, on every worker"""
         message.venue_id = venue_id
-        channel_key = f"{venue_id}:{channel}"
-        connections = self.channel_connections.get(channel_key, set()).copy()
-
-        disconnected = []
-        for websocket in connections:
-            try:
-                await websocket.send_text(message.to_json())
-            except Exception as e:
-                logger.warning(f"Failed to send channel '{channel}' message to WebSocket client for venue {venue_id}: {e}")
-                disconnected.append(websocket)
+        data = {"venue_id": venue_id, "channel": channel, "payload": message.to_json(), "key": coalesce_key}
+        self._deliver(data)
+        await self.bus.publish("venue", data)
+
+    def _deliver(self, data: Dict[str, Any]) -> int:
+        """Queue a serialized broadcast to this worker's sockets"""
+        if data["channel"] is None:
+            connections = self.venue_connections.get(data["venue_id"])
+        else:
+            connections = self.channel_connections.get(f"{data['venue_id']}:{data['channel']}")
+        if not connections:
+            return 0
+        # Serialized once; each connection's writer task sends it
+        return ws_fanout.publish(connections, data["payload"], data["key"])
 
-        for ws in disconnected:
-            self.disconnect(ws)
+    def get_connection_count(self) -> int:
+        """Number of open WebSocket connections across all venues"""
+        return sum(len(c) for c in self.venue_connections.values())
 
     def get_stats(self) -> Dict:
         """Get connection statistics"""
         return {
             **self.stats,
             "active_venues": len(self.venue_connections),
-            "active_connections": sum(len(c) for c in self.venue_connections.values()),
-            "active_channels": len(self.channel_connections)
+            "active_connections": self.get_connection_count(),
+            "active_channels": len(self.channel_connections),
+            "fanout": ws_fanout.get_stats(),
+            "event_bus": self.bus.get_stats()
         }
 
 
@@ -375,7 +379,7 @@ async def emit_keg_update(
             "status": status,
             "tap_number": tap_number
         }
-    ))
+    ), coalesce_key=f"keg:{keg_id}")
 
 
 async def emit_tank_update(
@@ -396,7 +400,7 @@ async def emit_tank_update(
             "fill_percentage": fill_percentage,
             "status": status
         }
-    ))
+    ), coalesce_key=f"tank:{tank_id}")
 
 
 async def emit_temperature_alert(
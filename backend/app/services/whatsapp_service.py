@@ -15,9 +15,8 @@ import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -432,7 +431,7 @@ class WhatsAppService:
 
     async def _send(self, body: Dict[str, Any]) -> Dict[str, Any]:
         """Send a message via WhatsApp API."""
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with http_client("messaging", timeout=15.0) as client:
             resp = await client.post(
                 self._messages_url,
                 json=body,
@@ -0,0 +1,365 @@
+"""
+Cross-worker WebSocket event bus.
+
+Each uvicorn worker holds only its own sockets. Broadcasts are delivered to
+local sockets immediately and published on the bus. Every other worker
+receives the envelope and delivers it to its own sockets. Envelopes carry
+the publishing worker's origin id, so a worker never delivers its own event
+twice.
+
+Two more things are shared through the bus backend:
+
+- presence: which workers currently hold sockets for a venue
+- the offline replay buffer: venue events raised while no worker had a
+  socket for that venue, replayed to the next client that connects
+
+Backends:
+
+- ``InProcessBackend``: a hub in this process. Tests can simulate several
+  workers by giving each EventBus its own InProcessBackend on one hub.
+- ``RedisBackend``: Redis pub/sub for envelopes, a sorted set per venue for
+  presence (scored by expiry and refreshed on a heartbeat, so a crashed
+  worker ages out) and a capped list per venue for the replay buffer.
+
+Selected by ``ws_event_bus_backend``: "auto" uses Redis when ``redis_url``
+is set.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from typing import Callable, Dict, List, Optional, Set
+from uuid import uuid4
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Offline replay buffer bounds (per venue)
+REPLAY_BUFFER_SIZE = 100
+REPLAY_ON_CONNECT = 50
+
+
+class InProcessHub:
+    """Shared state for every InProcessBackend attached to it."""
+
+    def __init__(self):
+        self.backends: List["InProcessBackend"] = []
+        self.presence: Dict[str, Set[str]] = {}
+        self.buffers: Dict[str, List[str]] = {}
+
+
+class InProcessBackend:
+    """Bus transport within one process."""
+
+    def __init__(self, hub: Optional[InProcessHub] = None):
+        self.hub = hub or InProcessHub()
+        self._receive: Optional[Callable[[str], None]] = None
+
+    async def start(self, receive: Callable[[str], None]) -> None:
+        self._receive = receive
+        if self not in self.hub.backends:
+            self.hub.backends.append(self)
+
+    async def stop(self) -> None:
+        if self in self.hub.backends:
+            self.hub.backends.remove(self)
+        self._receive = None
+
+    async def publish(self, raw: str) -> None:
+        for backend in list(self.hub.backends):
+            if backend._receive is not None:
+                backend._receive(raw)
+
+    async def set_presence(self, key: str, origin: str, present: bool) -> None:
+        origins = self.hub.presence.setdefault(key, set())
+        if present:
+            origins.add(origin)
+        else:
+            origins.discard(origin)
+            if not origins:
+                del self.hub.presence[key]
+
+    async def refresh_presence(self, keys: Set[str], origin: str) -> None:
+        pass  # In-process presence cannot go stale
+
+    async def has_presence(self, key: str) -> bool:
+        return bool(self.hub.presence.get(key))
+
+    async def buffer_append(self, key: str, payload: str) -> None:
+        buffer = self.hub.buffers.setdefault(key, [])
+        buffer.append(payload)
+        del buffer[:-REPLAY_BUFFER_SIZE]
+
+    async def buffer_drain(self, key: str) -> List[str]:
+        return self.hub.buffers.pop(key, [])[-REPLAY_ON_CONNECT:]
+
+
+class RedisBackend:
+    """Bus transport over Redis pub/sub, sorted sets and lists."""
+
+    def __init__(self, redis_url: str, channel: str, presence_ttl: float = 30.0):
+        import redis.asyncio as aioredis
+
+        self._redis = aioredis.from_url(redis_url, socket_connect_timeout=2, decode_responses=True)
+        self.channel = channel
+        self.presence_ttl = presence_ttl
+        self._receive: Optional[Callable[[str], None]] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"{self.channel}:{kind}:{key}"
+
+    async def start(self, receive: Callable[[str], None]) -> None:
+        await self._redis.ping()
+        self._receive = receive
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        await self._redis.aclose()
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message" and self._receive is not None:
+                        self._receive(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket event bus subscription lost, resubscribing: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def publish(self, raw: str) -> None:
+        await self._redis.publish(self.channel, raw)
+
+    async def set_presence(self, key: str, origin: str, present: bool) -> None:
+        presence_key = self._key("presence", key)
+        if present:
+            await self._redis.zadd(presence_key, {origin: time.time() + self.presence_ttl})
+            await self._redis.expire(presence_key, int(self.presence_ttl * 2))
+        else:
+            await self._redis.zrem(presence_key, origin)
+
+    async def refresh_presence(self, keys: Set[str], origin: str) -> None:
+        expires_at = time.time() + self.presence_ttl
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                presence_key = self._key("presence", key)
+                pipe.zadd(presence_key, {origin: expires_at})
+                pipe.expire(presence_key, int(self.presence_ttl * 2))
+            await pipe.execute()
+
+    async def has_presence(self, key: str) -> bool:
+        return await self._redis.zcount(self._key("presence", key), time.time(), "+inf") > 0
+
+    async def buffer_append(self, key: str, payload: str) -> None:
+        buffer_key = self._key("replay", key)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(buffer_key, payload)
+            pipe.ltrim(buffer_key, -REPLAY_BUFFER_SIZE, -1)
+            pipe.expire(buffer_key, 86400)
+            await pipe.execute()
+
+    async def buffer_drain(self, key: str) -> List[str]:
+        buffer_key = self._key("replay", key)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.lrange(buffer_key, -REPLAY_ON_CONNECT, -1)
+            pipe.delete(buffer_key)
+            payloads, _ = await pipe.execute()
+        return payloads
+
+
+class EventBus:
+    """
+    Front end the connection managers talk to.
+
+    Managers register one handler per target ("venue", "app"). The backend
+    can be swapped at startup without re-registering handlers.
+    """
+
+    def __init__(self, backend=None):
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.backend = backend or InProcessBackend()
+        self._handlers: Dict[str, Callable[[dict], None]] = {}
+        self._present: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+        self.stats = {"published": 0, "received": 0, "publish_errors": 0}
+
+    def add_handler(self, target: str, handler: Callable[[dict], None]) -> None:
+        self._handlers[target] = handler
+
+    async def start(self, backend=None) -> None:
+        """Attach (or switch to) a backend and start receiving."""
+        if backend is not None and backend is not self.backend:
+            try:
+                await self.backend.stop()
+            except Exception as e:
+                logger.debug(f"Previous WebSocket event bus backend did not stop cleanly: {e}")
+            self.backend = backend
+        await self.backend.start(self._receive)
+        for key in self._present:
+            await self.backend.set_presence(key, self.origin, True)
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._refresh_presence())
+
+    async def stop(self) -> None:
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        for key in list(self._present):
+            try:
+                await self.backend.set_presence(key, self.origin, False)
+            except Exception:
+                pass
+        await self.backend.stop()
+
+    async def _refresh_presence(self) -> None:
+        interval = settings.ws_event_bus_presence_ttl_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not self._present:
+                continue
+            try:
+                await self.backend.refresh_presence(set(self._present), self.origin)
+            except Exception as e:
+                logger.warning(f"WebSocket presence refresh failed: {e}")
+
+    # ----- Events -----
+
+    async def publish(self, target: str, data: dict) -> None:
+        """Send an event to every other worker; local delivery is the caller's job."""
+        raw = json.dumps({"origin": self.origin, "target": target, "data": data})
+        try:
+            await self.backend.publish(raw)
+            self.stats["published"] += 1
+        except Exception as e:
+            self.stats["publish_errors"] += 1
+            logger.warning(f"WebSocket event bus publish failed: {e}")
+
+    def _receive(self, raw: str) -> None:
+        try:
+            envelope = json.loads(raw)
+        except (TypeError, ValueError):
+            return
+        if envelope.get("origin") == self.origin:
+            return
+        handler = self._handlers.get(envelope.get("target"))
+        if handler is None:
+            return
+        self.stats["received"] += 1
+        try:
+            handler(envelope["data"])
+        except Exception as e:
+            logger.warning(f"WebSocket event bus handler failed: {e}")
+
+    # ----- Presence -----
+
+    def set_presence(self, key: str, present: bool) -> None:
+        """Record whether this worker holds sockets for ``key`` (non-blocking)."""
+        if present == (key in self._present):
+            return
+        if present:
+            self._present.add(key)
+        else:
+            self._present.discard(key)
+        self._spawn(self.backend.set_presence(key, self.origin, present))
+
+    async def has_presence(self, key: str) -> bool:
+        """Whether any worker holds sockets for ``key``."""
+        if key in self._present:
+            return True
+        try:
+            return await self.backend.has_presence(key)
+        except Exception as e:
+            logger.debug(f"WebSocket presence lookup failed: {e}")
+            return False
+
+    # ----- Offline replay buffer -----
+
+    async def buffer_append(self, key: str, payload: str) -> None:
+        try:
+            await self.backend.buffer_append(key, payload)
+        except Exception as e:
+            logger.warning(f"WebSocket replay buffer append failed: {e}")
+
+    async def buffer_drain(self, key: str) -> List[str]:
+        try:
+            return await self.backend.buffer_drain(key)
+        except Exception as e:
+            logger.warning(f"WebSocket replay buffer drain failed: {e}")
+            return []
+
+    async def flush(self) -> None:
+        """Wait until presence updates queued by ``set_presence`` reached the backend."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self, coro) -> None:
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()  # No running loop (shutdown)
+            return
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "backend": type(self.backend).__name__,
+            "present_keys": len(self._present),
+        }
+
+    def prometheus_lines(self) -> List[str]:
+        lines = []
+        for name in ("published", "received", "publish_errors"):
+            lines.append(f"# HELP ws_event_bus_{name}_total WebSocket bus envelopes {name.replace('_', ' ')}")
+            lines.append(f"# TYPE ws_event_bus_{name}_total counter")
+            lines.append(f"ws_event_bus_{name}_total {self.stats[name]}")
+        return lines
+
+
+def create_backend():
+    """Backend selected by settings ("auto", "redis" or "memory")."""
+    choice = settings.ws_event_bus_backend
+    if choice == "redis" or (choice == "auto" and settings.redis_url):
+        return RedisBackend(
+            settings.redis_url,
+            channel=settings.ws_event_bus_channel,
+            presence_ttl=settings.ws_event_bus_presence_ttl_seconds,
+        )
+    return InProcessBackend()
+
+
+async def start_event_bus() -> None:
+    """Start the global bus, falling back to in-process delivery if Redis is unreachable."""
+    try:
+        await event_bus.start(create_backend())
+    except Exception as e:
+        logger.warning(f"WebSocket event bus backend unavailable, events stay on this worker: {e}")
+        await event_bus.start(InProcessBackend())
+    logger.info(f"WebSocket event bus started ({type(event_bus.backend).__name__})")
+
+
+# Global instance shared by both WebSocket connection managers
+event_bus = EventBus()
+metrics.register_collector(event_bus.prometheus_lines)
@@ -0,0 +1,269 @@
+"""
+WebSocket fan-out engine.
+
+Broadcasts are serialized once by the caller and enqueued to every target
+connection without awaiting any socket. Each connection owns a bounded
+outbound queue drained by its own writer task, so one slow tablet only
+delays itself.
+
+When a queue is full the engine applies the configured slow-client policy:
+
+- ``drop_oldest``: discard the oldest queued frame
+- ``coalesce``: replace a queued frame with the same coalesce key (e.g. the
+  same ticket), otherwise discard the oldest frame
+- ``disconnect``: close the connection with 1013 (try again later)
+
+A send that does not complete within ``send_timeout`` also closes the
+connection. Delivery lag (enqueue to send completion), queue depth and drop
+counts are exported on /metrics.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import WebSocket, status
+
+from app.core.config import settings
+from app.core.metrics import DURATION_BUCKETS, Histogram, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SlowClientPolicy(str, Enum):
+    """What to do when a connection's outbound queue is full"""
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    DISCONNECT = "disconnect"
+
+
+class ClientSender:
+    """Bounded outbound queue and writer task for one connection."""
+
+    def __init__(
+        self,
+        engine: "FanoutEngine",
+        websocket: WebSocket,
+        on_close: Optional[Callable[[WebSocket], None]] = None,
+    ):
+        self.engine = engine
+        self.websocket = websocket
+        self.on_close = on_close
+        # (payload, coalesce key, enqueued at)
+        self.queue: Deque[Tuple[str, Optional[str], float]] = deque()
+        self.closed = False
+        self._ready = asyncio.Event()
+        # Set while nothing is queued or being sent
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def enqueue(self, payload: str, key: Optional[str] = None) -> bool:
+        """Queue one frame; returns False if the connection was dropped."""
+        if self.closed:
+            return False
+        now = time.monotonic()
+        if len(self.queue) >= self.engine.queue_size:
+            policy = self.engine.policy
+            if policy == SlowClientPolicy.DISCONNECT:
+                self.engine.stats["slow_disconnects"] += 1
+                logger.warning("Closing slow WebSocket client: outbound queue full")
+                self.engine.close(self.websocket, code=status.WS_1013_TRY_AGAIN_LATER)
+                return False
+            if policy == SlowClientPolicy.COALESCE and key is not None:
+                for i, (_, queued_key, _) in enumerate(self.queue):
+                    if queued_key == key:
+                        self.queue[i] = (payload, key, now)
+                        self.engine.stats["coalesced"] += 1
+                        return True
+            self.queue.popleft()
+            self.engine.stats["dropped"] += 1
+        self.queue.append((payload, key, now))
+        self.idle.clear()
+        self._ready.set()
+        return True
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                if not self.queue:
+                    self._ready.clear()
+                    self.idle.set()
+                    await self._ready.wait()
+                    continue
+                payload, _, enqueued_at = self.queue.popleft()
+                await asyncio.wait_for(
+                    self.websocket.send_text(payload), timeout=self.engine.send_timeout
+                )
+                self.engine.observe_delivery(time.monotonic() - enqueued_at)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.engine.stats["send_timeouts"] += 1
+            logger.warning("Closing WebSocket client: send timed out")
+            self.engine.close(self.websocket, code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception as e:
+            self.engine.stats["send_errors"] += 1
+            logger.debug(f"WebSocket send failed: {e}")
+            self.engine.close(self.websocket)
+
+
+class FanoutEngine:
+    """Registry of per-connection senders with shared policy and statistics."""
+
+    def __init__(
+        self,
+        queue_size: int = 256,
+        policy: SlowClientPolicy = SlowClientPolicy.DROP_OLDEST,
+        send_timeout: float = 10.0,
+    ):
+        self.queue_size = queue_size
+        self.policy = SlowClientPolicy(policy)
+        self.send_timeout = send_timeout
+        self._senders: Dict[WebSocket, ClientSender] = {}
+        self.delivery_lag = Histogram()
+        self.stats = {
+            "enqueued": 0,
+            "delivered": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "slow_disconnects": 0,
+            "send_timeouts": 0,
+            "send_errors": 0,
+        }
+
+    def register(
+        self,
+        websocket: WebSocket,
+        on_close: Optional[Callable[[WebSocket], None]] = None,
+    ) -> ClientSender:
+        """Start a writer for an accepted connection (idempotent)."""
+        sender = self._senders.get(websocket)
+        if sender is None or sender.closed:
+            sender = self._senders[websocket] = ClientSender(self, websocket, on_close)
+        return sender
+
+    def unregister(self, websocket: WebSocket) -> None:
+        """Stop the writer; frames still queued are discarded."""
+        sender = self._senders.pop(websocket, None)
+        if sender is None:
+            return
+        sender.closed = True
+        sender.queue.clear()
+        sender.idle.set()
+        if sender.task is not asyncio.current_task():
+            sender.task.cancel()
+
+    def close(self, websocket: WebSocket, code: int = status.WS_1011_INTERNAL_ERROR) -> None:
+        """Drop a connection the engine gave up on and notify its manager."""
+        sender = self._senders.get(websocket)
+        if sender is None or sender.closed:
+            return
+        on_close = sender.on_close
+        self.unregister(websocket)
+        if on_close is not None:
+            try:
+                on_close(websocket)
+            except Exception as e:
+                logger.debug(f"WebSocket close callback failed: {e}")
+        asyncio.get_running_loop().create_task(self._close_socket(websocket, code))
+
+    @staticmethod
+    async def _close_socket(websocket: WebSocket, code: int) -> None:
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass  # Already closed by the peer
+
+    def send(self, websocket: WebSocket, payload: str, key: Optional[str] = None) -> bool:
+        """Queue a pre-serialized frame for one connection."""
+        sender = self._senders.get(websocket)
+        if sender is None:
+            return False
+        if sender.enqueue(payload, key):
+            self.stats["enqueued"] += 1
+            return True
+        return False
+
+    def publish(
+        self,
+        connections: Iterable[WebSocket],
+        payload: str,
+        key: Optional[str] = None,
+    ) -> int:
+        """Queue one serialized frame for many connections; returns how many accepted it."""
+        delivered = 0
+        for websocket in list(connections):
+            if self.send(websocket, payload, key):
+                delivered += 1
+        return delivered
+
+    async def drain(self, websockets: Optional[Iterable[WebSocket]] = None) -> None:
+        """Wait until the given connections (default: all) have sent everything queued.
+
+        A connection that is dropped meanwhile counts as drained.
+        """
+        if websockets is None:
+            senders = list(self._senders.values())
+        else:
+            senders = [self._senders[ws] for ws in websockets if ws in self._senders]
+        for sender in senders:
+            await sender.idle.wait()
+
+    def observe_delivery(self, lag: float) -> None:
+        self.stats["delivered"] += 1
+        self.delivery_lag.observe(lag)
+
+    def is_registered(self, websocket: WebSocket) -> bool:
+        return websocket in self._senders
+
+    def queue_depths(self) -> List[int]:
+        return [len(sender.queue) for sender in self._senders.values()]
+
+    def get_stats(self) -> dict:
+        depths = self.queue_depths()
+        return {
+            **self.stats,
+            "clients": len(depths),
+            "queue_depth": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "policy": self.policy.value,
+        }
+
+    def prometheus_lines(self) -> List[str]:
+        stats = self.get_stats()
+        lines = []
+        for name in ("enqueued", "delivered", "dropped", "coalesced",
+                     "slow_disconnects", "send_timeouts", "send_errors"):
+            lines.append(f"# HELP ws_fanout_{name}_total WebSocket frames/clients {name.replace('_', ' ')}")
+            lines.append(f"# TYPE ws_fanout_{name}_total counter")
+            lines.append(f"ws_fanout_{name}_total {stats[name]}")
+        lines.append("# HELP ws_fanout_queue_depth Frames waiting in WebSocket outbound queues")
+        lines.append("# TYPE ws_fanout_queue_depth gauge")
+        lines.append(f"ws_fanout_queue_depth {stats['queue_depth']}")
+        lines.append("# HELP ws_fanout_max_queue_depth Deepest WebSocket outbound queue")
+        lines.append("# TYPE ws_fanout_max_queue_depth gauge")
+        lines.append(f"ws_fanout_max_queue_depth {stats['max_queue_depth']}")
+
+        lines.append("# HELP ws_fanout_delivery_lag_seconds Time from enqueue to completed send")
+        lines.append("# TYPE ws_fanout_delivery_lag_seconds histogram")
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, self.delivery_lag.counts):
+            cumulative += count
+            lines.append(f'ws_fanout_delivery_lag_seconds_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += self.delivery_lag.counts[-1]
+        lines.append(f'ws_fanout_delivery_lag_seconds_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"ws_fanout_delivery_lag_seconds_sum {self.delivery_lag.sum:.6f}")
+        lines.append(f"ws_fanout_delivery_lag_seconds_count {cumulative}")
+        return lines
+
+
+# Global instance shared by both WebSocket connection managers
+ws_fanout = FanoutEngine(
+    queue_size=settings.ws_send_queue_size,
+    policy=settings.ws_slow_client_policy,
+    send_timeout=settings.ws_send_timeout_seconds,
+)
+metrics.register_collector(ws_fanout.prometheus_lines)
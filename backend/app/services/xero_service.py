@@ -11,9 +11,8 @@ import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -53,7 +52,7 @@ class XeroService:
 
     async def exchange_code(self, code: str, redirect_uri: str) -> Dict[str, Any]:
         """Exchange authorization code for access/refresh tokens."""
-        async with httpx.AsyncClient() as client:
+        async with http_client("xero") as client:
             resp = await client.post(
                 XERO_TOKEN_URL,
                 data={
@@ -87,7 +86,7 @@ class XeroService:
         if not self._refresh_token:
             return False
         try:
-            async with httpx.AsyncClient() as client:
+            async with http_client("xero") as client:
                 resp = await client.post(
                     XERO_TOKEN_URL,
                     data={
@@ -115,7 +114,7 @@ class XeroService:
 
     async def get_accounts(self) -> List[Dict]:
         """Get chart of accounts."""
-        async with httpx.AsyncClient() as client:
+        async with http_client("xero") as client:
             resp = await client.get(f"{XERO_API_BASE}/Accounts", headers=self._headers())
             resp.raise_for_status()
             return resp.json().get("Accounts", [])
@@ -123,7 +122,7 @@ class XeroService:
     async def create_invoice(self, invoice_data: Dict[str, Any]) -> Dict:
         """Create a sales invoice in Xero."""
         payload = {"Invoices": [invoice_data]}
-        async with httpx.AsyncClient() as client:
+        async with http_client("xero") as client:
             resp = await client.post(
                 f"{XERO_API_BASE}/Invoices",
                 headers=self._headers(),
@@ -136,7 +135,7 @@ class XeroService:
     async def sync_contacts(self, contacts: List[Dict[str, Any]]) -> Dict:
         """Create or update contacts (customers/suppliers)."""
         payload = {"Contacts": contacts}
-        async with httpx.AsyncClient() as client:
+        async with http_client("xero") as client:
             resp = await client.post(
                 f"{XERO_API_BASE}/Contacts",
                 headers=self._headers(),
@@ -155,7 +154,7 @@ class XeroService:
         headers = self._headers()
         if modified_since:
             headers["If-Modified-Since"] = modified_since
-        async with httpx.AsyncClient() as client:
+        async with http_client("xero") as client:
             resp = await client.get(
                 f"{XERO_API_BASE}/Invoices", headers=headers, params=params
             )
@@ -15,9 +15,8 @@ import logging
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import httpx
-
 from app.core.config import settings
+from app.core.http_client import http_client
 
 logger = logging.getLogger(__name__)
 
@@ -262,7 +261,7 @@ class ZapierAutomationService:
             headers["X-BJS-Signature"] = f"sha256={signature}"
 
         try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
+            async with http_client("webhooks", timeout=15.0) as client:
                 resp = await client.post(sub.webhook_url, content=body, headers=headers)
                 sub.last_triggered_at = datetime.now(timezone.utc)
                 sub.trigger_count += 1
@@ -244,45 +244,45 @@ class Stage1Detector:
         # Run inference
         outputs = self.session.run(None, {"images": input_tensor})[0]
 
-        # Parse YOLO output (simplified)
-        detections = []
-        conf_threshold = self.config.get("conf_threshold", 0.5)
-
-        # YOLO output format: (batch, num_detections, 4 + num_classes)
-        for det in outputs[0]:
-            conf = det[4]
-            if conf < conf_threshold:
-                continue
+        # Parse YOLO output: (batch, num_detections, 4 + 1 + num_classes)
+        # Imported here: app.services loads the app settings, which the standalone CLI does not need
+        from app.services.ai.postprocess import decode_yolo, nms, yolo_predictions
 
-            # Get class
-            class_scores = det[5:]
-            class_id = np.argmax(class_scores)
-            class_conf = class_scores[class_id]
+        preds = yolo_predictions(outputs)
+        if preds is None:
+            logger.warning(f"Unknown ONNX output shape: {outputs.shape}")
+            return []
 
-            if class_conf < conf_threshold:
-                continue
+        boxes, scores, class_ids = decode_yolo(
+            preds, self.config.get("conf_threshold", 0.5), objectness=True
+        )
 
-            # Bbox (center format to corner)
-            cx, cy, bw, bh = det[:4]
-            x1 = int((cx - bw / 2) / scale)
-            y1 = int((cy - bh / 2) / scale)
-            x2 = int((cx + bw / 2) / scale)
-            y2 = int((cy + bh / 2) / scale)
+        # Class-aware NMS on arrays (same iou/max_det settings as the ultralytics path)
+        keep = nms(
+            boxes,
+            scores,
+            self.config.get("iou_threshold", 0.45),
+            class_ids=class_ids,
+            max_detections=self.config.get("max_detections", 50),
+        )
 
-            # Clamp
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(w, x2), min(h, y2)
+        # Bbox back to original image pixels, clamped
+        pixel_boxes = np.trunc(boxes[keep] / scale).astype(np.int64)
+        pixel_boxes[:, [0, 2]] = np.clip(pixel_boxes[:, [0, 2]], 0, w)
+        pixel_boxes[:, [1, 3]] = np.clip(pixel_boxes[:, [1, 3]], 0, h)
 
-            class_names = ["bottle", "can", "glass", "unknown_container"]
+        class_names = ["bottle", "can", "glass", "unknown_container"]
+        detections = []
+        for (x1, y1, x2, y2), score, class_id in zip(
+            pixel_boxes.tolist(), scores[keep].tolist(), class_ids[keep].tolist()
+        ):
             class_name = class_names[class_id] if class_id < len(class_names) else "unknown"
 
-            crop = image[y1:y2, x1:x2]
-
             detections.append(Detection(
                 bbox=(x1, y1, x2, y2),
                 class_name=class_name,
-                confidence=float(conf * class_conf),
-                crop=crop,
+                confidence=float(score),
+                crop=image[y1:y2, x1:x2],
             ))
 
         return detections
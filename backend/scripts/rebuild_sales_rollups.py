@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Rebuild the hourly sales cube from raw guest orders and checks.
+
+Run once after migration 032, or for a range whose cube rows are suspect.
+
+Usage:
+    python scripts/rebuild_sales_rollups.py
+    python scripts/rebuild_sales_rollups.py --start 2026-01-01 --end 2026-01-31
+    python scripts/rebuild_sales_rollups.py --location-id 2
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_day(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the hourly sales cube")
+    parser.add_argument("--start", type=parse_day, help="First day (YYYY-MM-DD, UTC); default: all history")
+    parser.add_argument("--end", type=parse_day, help="Last day, inclusive (YYYY-MM-DD, UTC)")
+    parser.add_argument("--location-id", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    from app.db.session import SessionLocal
+    from app.services.sales_rollup import rebuild_sales_rollups
+
+    end = args.end + timedelta(days=1) - timedelta(microseconds=1) if args.end else None
+    db = SessionLocal()
+    try:
+        result = rebuild_sales_rollups(db, args.start, end, args.location_id, args.chunk_size)
+    finally:
+        db.close()
+    print(f"Rebuilt {result['start'] or 'beginning'} - {result['end'] or 'now'}: "
+          f"{result['guest_orders']} guest orders, {result['checks']} checks")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,26 @@
 """Pytest configuration and fixtures."""
 
 import os
+import uuid
 import pytest
 from decimal import Decimal
 from typing import Generator
 
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
+from app.core.cache import invalidate_menu_cache
 from app.core.rbac import UserRole
 from app.core.security import get_password_hash, create_access_token
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.main import app
+from app.services.floor_state import floor_state
+from app.services.kitchen_state import kitchen_state
+from app.services.recipe_bom_cache import invalidate_recipe_bom_cache
 # Import all models to ensure they're registered with Base.metadata
 from app.models import *
 from app.models.user import User
@@ -22,21 +28,27 @@ from app.models.supplier import Supplier
 from app.models.product import Product
 from app.models.location import Location
 
-# Use in-memory SQLite for tests
-TEST_DATABASE_URL = "sqlite:///:memory:"
+# Use in-memory SQLite for tests. A named shared-cache database is used so the
+# async engine (aiosqlite) sees the same tables and rows as the sync one.
+TEST_DATABASE_URL = "sqlite:///file:test_{name}?mode=memory&cache=shared&uri=true"
 
 
 @pytest.fixture(scope="function")
 def db_engine():
     """Create a test database engine."""
     engine = create_engine(
-        TEST_DATABASE_URL,
+        TEST_DATABASE_URL.format(name=uuid.uuid4().hex),
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,
     )
     Base.metadata.create_all(bind=engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
+    # Process-wide caches are keyed by row ids / views the next test database reuses
+    invalidate_recipe_bom_cache()
+    invalidate_menu_cache()
+    kitchen_state.invalidate()
+    floor_state.invalidate()
 
 
 @pytest.fixture(scope="function")
@@ -51,7 +63,20 @@ def db_session(db_engine) -> Generator[Session, None, None]:
 
 
 @pytest.fixture(scope="function")
-def client(db_session: Session) -> Generator[TestClient, None, None]:
+def async_db_engine(db_engine):
+    """Async engine (aiosqlite) on the same in-memory database as db_engine.
+
+    Connections are not pooled: each one is opened and closed on the event
+    loop of the request using it, and db_engine keeps the database alive.
+    """
+    return create_async_engine(
+        db_engine.url.set(drivername="sqlite+aiosqlite"),
+        poolclass=NullPool,
+    )
+
+
+@pytest.fixture(scope="function")
+def client(db_session: Session, async_db_engine) -> Generator[TestClient, None, None]:
     """Create a test client with database override."""
     def override_get_db():
         try:
@@ -59,7 +84,14 @@ def client(db_session: Session) -> Generator[TestClient, None, None]:
         finally:
             pass
 
+    AsyncTestSession = async_sessionmaker(async_db_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestSession() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     # Disable rate limiters during tests to avoid flaky failures
     from app.core.rate_limit import limiter as global_limiter
     from app.api.routes.auth import limiter as auth_limiter
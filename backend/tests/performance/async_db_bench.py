@@ -0,0 +1,176 @@
+"""Event-loop lag and throughput of async handlers: sync Session vs AsyncSession.
+
+Seeds a temporary SQLite database with tables, open sessions and orders,
+then serves the same floor-plan style read (tables page, then the active
+session and open order per table) from two ``async def`` handlers:
+- "sync": ``db: Session = Depends(get_db)`` queries, which run on the
+  event loop and stall it for every round trip (the former handlers)
+- "async": ``AsyncDbSession`` queries awaited through aiosqlite
+
+Concurrent clients drive each handler in-process via httpx.ASGITransport
+while a probe task measures how late a 5 ms ``asyncio.sleep`` wakes up.
+Reports requests/second and event-loop lag median/p95/max per mode.
+
+Usage:
+    python tests/performance/async_db_bench.py [--requests 2000] [--concurrency 50] [--tables 40]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("DEBUG", "true")
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+PROBE_INTERVAL = 0.005
+
+
+def seed(url: str, tables: int):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db.base import Base
+    from app.models import Order, Table, TableSession
+
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        for n in range(tables):
+            table = Table(number=str(n + 1), capacity=4)
+            db.add(table)
+            db.flush()
+            if n % 2:
+                session = TableSession(table_id=table.id, venue_id=1, guest_count=2, status="active")
+                db.add(session)
+                db.flush()
+                db.add(Order(order_number=f"B-{n}", session_id=session.id, venue_id=1, total=25.0))
+        db.commit()
+    engine.dispose()
+
+
+def build_app(url: str, tables: int):
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import Session, sessionmaker
+
+    from app.db.session import async_database_url
+    from app.models import Order, Table, TableSession
+
+    sync_engine = create_engine(url, connect_args={"check_same_thread": False}, pool_size=20)
+    async_engine = create_async_engine(async_database_url(url), pool_size=20)
+    SyncSession = sessionmaker(bind=sync_engine)
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    def get_db():
+        with SyncSession() as db:
+            yield db
+
+    async def get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    bench_app = FastAPI()
+
+    @bench_app.get("/sync")
+    async def floor_plan_sync(db: Session = Depends(get_db)):
+        statuses = []
+        for table in db.query(Table).limit(tables).all():
+            session = db.query(TableSession).filter(
+                TableSession.table_id == table.id, TableSession.status == "active"
+            ).first()
+            order = db.query(Order).filter(Order.session_id == session.id).first() if session else None
+            statuses.append(order.total if order else None)
+        return {"tables": len(statuses)}
+
+    @bench_app.get("/async")
+    async def floor_plan_async(db=Depends(get_async_db)):
+        statuses = []
+        for table in (await db.scalars(select(Table).limit(tables))).all():
+            session = await db.scalar(select(TableSession).where(
+                TableSession.table_id == table.id, TableSession.status == "active"
+            ).limit(1))
+            order = await db.scalar(select(Order).where(Order.session_id == session.id).limit(1)) if session else None
+            statuses.append(order.total if order else None)
+        return {"tables": len(statuses)}
+
+    return bench_app, sync_engine, async_engine
+
+
+async def probe_lag(lags: list, stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append((loop.time() - start - PROBE_INTERVAL) * 1000)
+
+
+async def run_mode(app, path: str, count: int, concurrency: int) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(20):
+            await client.get(path)
+
+        remaining = iter(range(count))
+
+        async def user():
+            for _ in remaining:
+                response = await client.get(path)
+                assert response.status_code == 200, response.status_code
+
+        lags: list = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_lag(lags, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    lags.sort()
+    return {
+        "rps": count / elapsed,
+        "lag_median": statistics.median(lags) if lags else 0.0,
+        "lag_p95": lags[int(len(lags) * 0.95)] if lags else 0.0,
+        "lag_max": lags[-1] if lags else 0.0,
+        "probes": len(lags),
+    }
+
+
+def run_benchmark(count: int = 2000, concurrency: int = 50, tables: int = 40):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        seed(url, tables)
+        app, sync_engine, async_engine = build_app(url, tables)
+        try:
+            for mode in ("sync", "async"):
+                result = asyncio.run(run_mode(app, f"/{mode}", count, concurrency))
+                logger.info(
+                    f"{mode:>5}: {result['rps']:8.1f} req/s | event-loop lag "
+                    f"median {result['lag_median']:7.2f} ms, p95 {result['lag_p95']:7.2f} ms, "
+                    f"max {result['lag_max']:7.2f} ms ({result['probes']} probes)"
+                )
+        finally:
+            sync_engine.dispose()
+            asyncio.run(async_engine.dispose())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Async DB session benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--tables", type=int, default=40)
+    args = parser.parse_args()
+    run_benchmark(args.requests, args.concurrency, args.tables)
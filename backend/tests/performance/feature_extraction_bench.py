@@ -0,0 +1,85 @@
+"""Hand-crafted feature extraction micro-benchmark.
+
+Times extract_combined_features per image for both the bottle recognition
+service and the training feature extractor (CNN/OCR disabled so only the
+hand-crafted kernels are measured), plus each individual feature.
+
+Usage: python tests/performance/feature_extraction_bench.py [--images 20]
+"""
+
+import argparse
+import io
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def make_images(count: int) -> list:
+    rng = np.random.default_rng(7)
+    images = []
+    for _ in range(count):
+        arr = np.full((640, 320, 3), 230, dtype=np.uint8)
+        arr[120:600, 90:230] = rng.integers(0, 255, 3, dtype=np.uint8)
+        arr[260:420, 100:220] = rng.integers(0, 255, (160, 120, 3), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(arr).save(buffer, format="JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def time_per_call(fn, inputs) -> list:
+    timings = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list):
+    logger.info(
+        f"{name:<45} median {statistics.median(timings):8.2f}ms  "
+        f"p95 {np.percentile(timings, 95):8.2f}ms"
+    )
+
+
+def run_benchmark(num_images: int = 20):
+    from app.services import ai_bottle_recognition_service as bottle
+    from app.services.ai import feature_extraction as fe
+
+    images = make_images(num_images)
+    fe_config = fe.FeatureConfig(use_cnn=False, use_ocr=False)
+
+    report("bottle.extract_combined_features", time_per_call(bottle.extract_combined_features, images))
+    report(
+        "feature_extraction.extract_combined_features",
+        time_per_call(lambda data: fe.extract_combined_features(data, fe_config), images),
+    )
+
+    pil_images = [bottle.preprocess_image(data) for data in images]
+    for name in (
+        "extract_hog_features",
+        "extract_lbp_features",
+        "extract_edge_features",
+        "extract_shape_features",
+        "extract_keypoint_features",
+        "extract_text_features",
+    ):
+        report(f"bottle.{name}", time_per_call(getattr(bottle, name), pil_images))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feature extraction micro-benchmark")
+    parser.add_argument("--images", type=int, default=20)
+    args = parser.parse_args()
+    run_benchmark(args.images)
@@ -0,0 +1,206 @@
+"""Per-request middleware overhead benchmark.
+
+Compares a bare FastAPI app against the same app wrapped in
+- "legacy": the former stack of seven BaseHTTPMiddleware layers (metrics,
+  HTTPS redirect, security headers, auth enforcement, CSRF, audit logging,
+  request logging), each re-reading headers and decoding the JWT separately
+- "pipeline": the single pure ASGI RequestPipelineMiddleware
+
+and reports median/p95 latency per request plus the overhead over the bare
+app, in-process via httpx.ASGITransport and over HTTP through uvicorn.
+
+Usage:
+    python tests/performance/middleware_overhead_bench.py [--requests 2000] [--skip-uvicorn]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault("DEBUG", "true")
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger("requests")
+# Request/response log lines are still formatted, just not printed
+request_logger.setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+PATH = "/api/v1/bench/ping"
+
+
+def build_apps() -> dict:
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, RedirectResponse
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    from app.core.config import settings
+    from app.core.metrics import metrics
+    from app.core.request_pipeline import RequestPipelineMiddleware, SECURITY_HEADERS
+    from app.core.security import decode_access_token
+
+    def make_app() -> FastAPI:
+        bench_app = FastAPI()
+
+        @bench_app.get(PATH)
+        def ping():
+            return {"ok": True}
+
+        return bench_app
+
+    def bearer_payload(request: Request):
+        auth_header = request.headers.get("Authorization", "")
+        if auth_header.startswith("Bearer "):
+            return decode_access_token(auth_header.split(" ", 1)[1])
+        return None
+
+    class Metrics(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            start = time.time()
+            response = await call_next(request)
+            metrics.record_request(request.method, request.url.path, response.status_code, time.time() - start)
+            return response
+
+    class HTTPSRedirect(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            if not settings.debug and request.headers.get("x-forwarded-proto") == "http":
+                return RedirectResponse(url=str(request.url.replace(scheme="https")), status_code=301)
+            return await call_next(request)
+
+    class SecurityHeaders(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            response = await call_next(request)
+            for name, value in SECURITY_HEADERS.items():
+                response.headers[name] = value
+            return response
+
+    class AuthEnforcement(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            public = ["/api/v1/guest-orders", "/api/v1/menu/", "/api/v1/menu-complete", "/api/v1/menu-items",
+                      "/api/v1/tables", "/api/v1/reservations/availability", "/api/v1/locations",
+                      "/api/v1/orders/table/"]
+            if not any(request.url.path.startswith(p) for p in public) and bearer_payload(request) is None:
+                return JSONResponse(status_code=401, content={"detail": "Authentication required"})
+            return await call_next(request)
+
+    class CSRF(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            return await call_next(request)  # GET: method check only
+
+    class AuditLogging(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            response = await call_next(request)
+            if request.method in ("POST", "PUT", "PATCH", "DELETE"):
+                bearer_payload(request)
+            return response
+
+    class RequestLogging(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            start = time.time()
+            request_logger.info(f"Request: {request.method} {request.url.path}")
+            response = await call_next(request)
+            request_logger.info(f"Response: {request.method} {request.url.path} {time.time() - start:.3f}s")
+            return response
+
+    legacy = make_app()
+    for middleware in (Metrics, HTTPSRedirect, SecurityHeaders, AuthEnforcement, CSRF, AuditLogging, RequestLogging):
+        legacy.add_middleware(middleware)
+
+    pipeline = make_app()
+    pipeline.add_middleware(RequestPipelineMiddleware)
+
+    return {"bare": make_app(), "legacy": legacy, "pipeline": pipeline}
+
+
+def make_token() -> str:
+    from app.core.security import create_access_token
+    return create_access_token(data={"sub": "1", "email": "bench@example.com", "role": "owner"})
+
+
+def summarize(name: str, mode: str, timings: list, baseline: float = None) -> float:
+    median = statistics.median(timings)
+    p95 = sorted(timings)[int(len(timings) * 0.95)]
+    overhead = f"  overhead {median - baseline:7.1f}us" if baseline is not None else ""
+    logger.info(f"{mode:<8} {name:<9} median {median:7.1f}us  p95 {p95:7.1f}us{overhead}")
+    return median
+
+
+async def run_asgi(app, headers: dict, count: int) -> list:
+    import httpx
+
+    timings = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):
+            await client.get(PATH, headers=headers)
+        for _ in range(count):
+            start = time.perf_counter()
+            response = await client.get(PATH, headers=headers)
+            timings.append((time.perf_counter() - start) * 1e6)
+            assert response.status_code == 200, response.status_code
+    return timings
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn(app, headers: dict, count: int) -> list:
+    import httpx
+    import uvicorn
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    timings = []
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            for _ in range(50):
+                client.get(PATH, headers=headers)
+            for _ in range(count):
+                start = time.perf_counter()
+                response = client.get(PATH, headers=headers)
+                timings.append((time.perf_counter() - start) * 1e6)
+                assert response.status_code == 200, response.status_code
+    finally:
+        server.should_exit = True
+        thread.join()
+    return timings
+
+
+def run_benchmark(count: int = 2000, skip_uvicorn: bool = False):
+    apps = build_apps()
+    headers = {"Authorization": f"Bearer {make_token()}"}
+
+    baseline = None
+    for name, app in apps.items():
+        median = summarize(name, "asgi", asyncio.run(run_asgi(app, headers, count)), baseline)
+        baseline = median if baseline is None else baseline
+
+    if not skip_uvicorn:
+        baseline = None
+        for name, app in apps.items():
+            median = summarize(name, "uvicorn", run_uvicorn(app, headers, count), baseline)
+            baseline = median if baseline is None else baseline
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Middleware overhead benchmark")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--skip-uvicorn", action="store_true")
+    args = parser.parse_args()
+    run_benchmark(args.requests, args.skip_uvicorn)
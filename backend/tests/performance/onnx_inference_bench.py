@@ -0,0 +1,128 @@
+"""ONNX detection inference benchmark.
+
+Reports cold (model load + first run) vs warm latency for a single image and
+images/sec for per-image vs batched inference through app.services.ai.inference.
+
+Usage:
+    python tests/performance/onnx_inference_bench.py --model models/shelf_detector.onnx
+    python tests/performance/onnx_inference_bench.py --synthetic   # tiny generated YOLO-shaped model
+"""
+
+import argparse
+import io
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def build_synthetic_model(path: Path, num_classes: int = 20) -> Path:
+    """Write a small YOLOv8-shaped ONNX model: (N, 3, H, W) -> (N, 4 + classes, boxes)."""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    channels = 4 + num_classes
+    rng = np.random.default_rng(0)
+    weights = rng.standard_normal((channels, 3, 8, 8)).astype(np.float32) * 0.05
+    bias = np.zeros(channels, dtype=np.float32)
+
+    graph = helper.make_graph(
+        nodes=[
+            helper.make_node("Conv", ["images", "w", "b"], ["conv"], kernel_shape=[8, 8], strides=[8, 8]),
+            helper.make_node("Sigmoid", ["conv"], ["act"]),
+            helper.make_node("Reshape", ["act", "shape"], ["output0"]),
+        ],
+        name="synthetic_detector",
+        inputs=[helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, "h", "w"])],
+        outputs=[helper.make_tensor_value_info("output0", TensorProto.FLOAT, ["batch", channels, "boxes"])],
+        initializer=[
+            numpy_helper.from_array(weights, "w"),
+            numpy_helper.from_array(bias, "b"),
+            numpy_helper.from_array(np.array([0, channels, -1], dtype=np.int64), "shape"),
+        ],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return path
+
+
+def make_images(count: int, size=(1280, 960)) -> list:
+    rng = np.random.default_rng(1)
+    images = []
+    for _ in range(count):
+        pixels = rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def run_benchmark(model_path: Path, num_images: int = 16, repeats: int = 5, multi_scale: bool = False):
+    from app.services.ai import inference
+
+    inference.MODEL_PATH = model_path
+    config = inference.InferenceConfig(
+        confidence_threshold=0.5,
+        multi_scale=multi_scale,
+        scales=[0.75, 1.0, 1.25] if multi_scale else None,
+    )
+    images = make_images(num_images)
+
+    # Cold: first call pays model load + graph optimization
+    inference.clear_session_cache()
+    start = time.perf_counter()
+    inference.run_inference(images[0], config)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    warm = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        inference.run_inference(images[0], config)
+        warm.append((time.perf_counter() - start) * 1000)
+
+    # Throughput: per-image loop vs one batched tensor per scale
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for image_data in images:
+            inference.run_inference(image_data, config)
+    loop_ips = num_images * repeats / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        inference.run_batch_inference(images, config)
+    batch_ips = num_images * repeats / (time.perf_counter() - start)
+
+    logger.info(f"Model: {model_path} (multi_scale={multi_scale})")
+    logger.info(f"Cold latency (load + first run): {cold_ms:.1f}ms")
+    logger.info(f"Warm latency: median {statistics.median(warm):.1f}ms, max {max(warm):.1f}ms")
+    logger.info(f"Per-image loop: {loop_ips:.1f} images/sec")
+    logger.info(f"Batched:        {batch_ips:.1f} images/sec")
+    logger.info(f"Sessions: {inference.get_session_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ONNX inference benchmark")
+    parser.add_argument("--model", type=Path, help="Path to a YOLO-style .onnx model")
+    parser.add_argument("--synthetic", action="store_true", help="Generate a small synthetic model")
+    parser.add_argument("--images", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--multi-scale", action="store_true")
+    args = parser.parse_args()
+
+    if args.synthetic or not args.model:
+        with tempfile.TemporaryDirectory() as tmp:
+            model = build_synthetic_model(Path(tmp) / "synthetic_detector.onnx")
+            run_benchmark(model, args.images, args.repeats, args.multi_scale)
+    else:
+        run_benchmark(args.model, args.images, args.repeats, args.multi_scale)
@@ -0,0 +1,175 @@
+"""Report export memory benchmark: buffered vs streaming.
+
+Seeds a temporary SQLite database with synthetic POS sales lines (1M by
+default), then exports all of them once per mode, each in a fresh child
+process so that its peak RSS is measured on its own:
+- "buffered": the former approach. All rows are loaded with ``.all()``,
+  rendered into one in-memory CSV, or into a regular openpyxl workbook for
+  XLSX.
+- "streaming": ``app.services.report_export``. The rows come from a
+  ``yield_per`` server-side cursor and the CSV/XLSX encoder is a chunk
+  generator. The chunks are drained the way ``StreamingResponse`` would
+  send them.
+
+Reports rows/second, output size and peak RSS per mode and format.
+
+Usage:
+    python tests/performance/report_export_bench.py [--rows 1000000] [--formats csv,xlsx]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+os.environ.setdefault("DEBUG", "false")
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HEADERS = ["Date", "Time", "POS Item ID", "Item", "Quantity", "Refund", "Location ID"]
+ITEMS = ["Burger", "Fries", "Cola", "IPA Draft", "Caesar Salad", "Espresso", "Cheesecake", "Margarita"]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def seed(url: str, rows: int, batch: int = 20000):
+    from sqlalchemy import create_engine, insert
+
+    from app.db.base import Base
+    from app.models.pos import PosSalesLine
+
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine, tables=[PosSalesLine.__table__])
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            conn.execute(insert(PosSalesLine), [
+                {
+                    "ts": start + timedelta(seconds=7 * n),
+                    "pos_item_id": f"SKU-{n % 400}",
+                    "name": ITEMS[n % len(ITEMS)],
+                    "qty": Decimal(n % 4 + 1),
+                    "is_refund": n % 97 == 0,
+                    "processed": True,
+                }
+                for n in range(offset, min(offset + batch, rows))
+            ])
+    engine.dispose()
+
+
+def _query():
+    from sqlalchemy import select
+
+    from app.models.pos import PosSalesLine
+
+    return select(
+        PosSalesLine.ts, PosSalesLine.pos_item_id, PosSalesLine.name,
+        PosSalesLine.qty, PosSalesLine.is_refund, PosSalesLine.location_id,
+    ).order_by(PosSalesLine.ts, PosSalesLine.id)
+
+
+def _row(r):
+    ts, pos_item_id, name, qty, is_refund, location_id = r
+    return [str(ts.date()), ts.strftime("%H:%M:%S"), pos_item_id or "", name,
+            float(qty or 0), "yes" if is_refund else "no", location_id or ""]
+
+
+def export_buffered(url: str, fmt: str) -> int:
+    import csv
+    import io
+
+    from sqlalchemy import create_engine
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        data = [_row(r) for r in conn.execute(_query()).all()]
+    engine.dispose()
+
+    if fmt == "csv":
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(HEADERS)
+        for row in data:
+            writer.writerow(row)
+        return len(output.getvalue().encode("utf-8"))
+
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(HEADERS)
+    for row in data:
+        ws.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return len(buffer.getvalue())
+
+
+def export_streaming(url: str, fmt: str) -> int:
+    from sqlalchemy import create_engine
+
+    from app.services.report_export import encode_rows, stream_rows
+
+    engine = create_engine(url)
+    rows = stream_rows(engine, _query(), _row)
+    size = 0
+    for chunk in encode_rows(fmt, HEADERS, rows, title="Sales"):
+        size += len(chunk)
+    engine.dispose()
+    return size
+
+
+def _child(mode: str, url: str, fmt: str, results):
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    size = (export_buffered if mode == "buffered" else export_streaming)(url, fmt)
+    results.put({
+        "elapsed": time.perf_counter() - start,
+        "bytes": size,
+        "baseline_mb": baseline,
+        "peak_mb": peak_rss_mb(),
+    })
+
+
+def run_benchmark(rows: int = 1_000_000, formats=("csv", "xlsx"), modes=("buffered", "streaming")):
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        start = time.perf_counter()
+        seed(url, rows)
+        logger.info(f"Seeded {rows:,} sales lines in {time.perf_counter() - start:.1f}s")
+
+        for fmt in formats:
+            for mode in modes:
+                results = ctx.Queue()
+                child = ctx.Process(target=_child, args=(mode, url, fmt, results))
+                child.start()
+                result = results.get()
+                child.join()
+                logger.info(
+                    f"{fmt:>4} {mode:>9}: {rows / result['elapsed']:10,.0f} rows/s | "
+                    f"{result['bytes'] / 1e6:8.1f} MB out | peak RSS {result['peak_mb']:7.1f} MB "
+                    f"(+{result['peak_mb'] - result['baseline_mb']:.1f} MB over process start)"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report export memory benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--formats", default="csv,xlsx")
+    parser.add_argument("--modes", default="buffered,streaming")
+    args = parser.parse_args()
+    run_benchmark(args.rows, tuple(args.formats.split(",")), tuple(args.modes.split(",")))
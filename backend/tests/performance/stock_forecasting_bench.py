@@ -0,0 +1,160 @@
+"""Stock forecasting (reorder suggestions / demand trends / dashboard) benchmark.
+
+Seeds an in-memory SQLite database with a synthetic history (2,000 SKUs,
+90 days of SALE movements at one location by default) and compares the former
+per-product loop (two queries per SKU) with the bulk matrix path, reporting
+time and statement counts and checking both return the same suggestions.
+
+Usage: python tests/performance/stock_forecasting_bench.py [--products 2000] [--days 90]
+"""
+
+import argparse
+import logging
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+os.environ.setdefault("DEBUG", "true")
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def seed_history(db, num_products: int = 2000, days: int = 90, seed: int = 7) -> int:
+    """Create products, stock on hand and SALE movements; returns the location id."""
+    from app.models.location import Location
+    from app.models.product import Product
+    from app.models.stock import StockMovement, StockOnHand
+
+    rng = random.Random(seed)
+    location = Location(name="Bench Bar", active=True)
+    db.add(location)
+    db.flush()
+
+    products = [
+        Product(
+            name=f"SKU {i:05d}",
+            unit="pcs",
+            lead_time_days=rng.choice([1, 2, 3, 5]),
+            target_stock=Decimal(rng.choice([0, 24, 48])),
+        )
+        for i in range(num_products)
+    ]
+    db.add_all(products)
+    db.flush()
+
+    db.bulk_insert_mappings(StockOnHand, [
+        {"product_id": p.id, "location_id": location.id, "qty": Decimal(rng.randint(0, 80)), "reserved_qty": 0}
+        for p in products
+    ])
+
+    now = datetime.now(timezone.utc)
+    movements = []
+    for product in products:
+        density = rng.choice([0.9, 0.6, 0.2])
+        for d in range(days):
+            if rng.random() < density:
+                movements.append({
+                    "product_id": product.id,
+                    "location_id": location.id,
+                    "qty_delta": -Decimal(rng.randint(1, 600)) / 100,
+                    "reason": "sale",
+                    "ts": now - timedelta(days=d, minutes=rng.randint(0, 600)),
+                })
+    db.bulk_insert_mappings(StockMovement, movements)
+    db.commit()
+    logger.info(f"Seeded {num_products} products, {len(movements)} sale movements over {days} days")
+    return location.id
+
+
+def legacy_reorder_suggestions(svc, location_id: int) -> list:
+    """The per-product loop generate_reorder_suggestions used to run."""
+    from app.models.product import Product
+    from app.services.stock_forecasting_service import _Z_SCORES
+
+    products = svc.db.query(Product).filter(Product.active == True).all()  # noqa: E712
+    suggestions = []
+    for product in products:
+        current = float(svc._get_current_stock(product.id, location_id))
+        daily_usage = svc._get_daily_usage(product.id, location_id, lookback_days=60)
+        avg_daily = svc._moving_average(daily_usage, window=14)
+        if avg_daily <= 0:
+            continue
+        std_daily = svc._std_deviation(daily_usage)
+        lead_time = product.lead_time_days or 1
+        safety_stock = _Z_SCORES.get(0.95, 1.645) * std_daily * math.sqrt(lead_time)
+        reorder_point = (avg_daily * lead_time) + safety_stock
+        if current <= reorder_point:
+            target = float(product.target_stock) if product.target_stock else reorder_point * 2
+            days_until_stockout = current / avg_daily
+            suggestions.append({
+                "product_id": product.id,
+                "reorder_point": round(reorder_point, 1),
+                "safety_stock": round(safety_stock, 1),
+                "suggested_order_qty": round(max(0, target - current), 1),
+                "days_until_stockout": round(days_until_stockout, 1),
+            })
+    return suggestions
+
+
+def timed(engine, fn):
+    from sqlalchemy import event
+
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - start
+        event.remove(engine, "before_cursor_execute", count)
+    return result, elapsed, len(statements)
+
+
+def run_benchmark(num_products: int = 2000, days: int = 90):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from app.db.base import Base
+    import app.models  # noqa: F401 - register all tables
+    from app.services.stock_forecasting_service import StockForecastingService
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    location_id = seed_history(db, num_products, days)
+    svc = StockForecastingService(db)
+
+    legacy, legacy_s, legacy_q = timed(engine, lambda: legacy_reorder_suggestions(svc, location_id))
+    bulk, bulk_s, bulk_q = timed(engine, lambda: svc.generate_reorder_suggestions(location_id))
+    _, dash_s, dash_q = timed(engine, lambda: svc.get_dashboard(location_id))
+
+    logger.info(f"reorder suggestions (per-product loop): {legacy_s * 1000:9.1f}ms  {legacy_q:5d} queries")
+    logger.info(f"reorder suggestions (bulk):             {bulk_s * 1000:9.1f}ms  {bulk_q:5d} queries")
+    logger.info(f"dashboard (bulk):                       {dash_s * 1000:9.1f}ms  {dash_q:5d} queries")
+
+    keys = ("reorder_point", "safety_stock", "suggested_order_qty", "days_until_stockout")
+    legacy_by_id = {s["product_id"]: tuple(s[k] for k in keys) for s in legacy}
+    bulk_by_id = {s["product_id"]: tuple(s[k] for k in keys) for s in bulk}
+    if legacy_by_id != bulk_by_id:
+        raise SystemExit("Bulk suggestions differ from the per-product loop")
+    logger.info(f"{len(bulk)} suggestions identical between both paths")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stock forecasting benchmark")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+    run_benchmark(args.products, args.days)
@@ -1,11 +1,30 @@
 """WebSocket stress test (H5.2).
 
-Usage: python tests/performance/websocket_stress.py
+Two modes:
+- "live": N real clients hold /ws/orders open against a running server and
+  exchange pings for `duration` seconds
+- "fanout" (default): in-process broadcast to 1,000 simulated clients, a
+  fraction of which are slow readers (each send blocks for --slow-delay).
+  Compares the former sequential send loop with the fan-out engine and
+  reports p50/p99 delivery latency for fast clients plus drop counts.
+
+Usage:
+    python tests/performance/websocket_stress.py [--clients 1000] [--slow 0.05] [--messages 50]
+    python tests/performance/websocket_stress.py --live [--clients 50] [--duration 30]
 """
 
+import argparse
 import asyncio
+import json
+import os
+import random
+import sys
 import time
 import logging
+from pathlib import Path
+
+os.environ.setdefault("DEBUG", "true")
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -76,5 +95,139 @@ async def stress_test(
     logger.info(f"Elapsed: {elapsed:.1f}s, Failures: {failures}")
 
 
+# ===== In-process fan-out latency =====
+
+class SimulatedClient:
+    """Stands in for a WebSocket; records when each broadcast arrived."""
+
+    def __init__(self, send_delay: float, slow: bool):
+        self.send_delay = send_delay
+        self.slow = slow
+        self.latencies = []
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, data: str):
+        # Network time for this client, with jitter
+        await asyncio.sleep(self.send_delay * random.uniform(0.5, 1.5))
+        sent_at = json.loads(data).get("sent_at")
+        if sent_at is not None:
+            self.latencies.append(time.perf_counter() - sent_at)
+
+    async def send_json(self, data: dict):
+        await self.send_text(json.dumps(data))
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def _run_fanout(mode: str, clients: list, messages: int, interval: float) -> float:
+    """Broadcast `messages` frames to every client; returns seconds spent inside broadcast()."""
+    from app.main import ConnectionManager
+    from app.services.ws_event_bus import EventBus
+    from app.services.ws_fanout import ws_fanout
+
+    manager = ConnectionManager(bus=EventBus())
+    manager.MAX_CONNECTIONS_PER_CHANNEL = len(clients)
+    for client in clients:
+        await manager.connect(client, "bench")
+
+    async def sequential_broadcast(message: dict):
+        # The former ConnectionManager.broadcast: one awaited send per socket
+        for connection in list(manager.active_connections["bench"]):
+            await connection.send_json(message)
+
+    blocked = 0.0
+    for seq in range(messages):
+        message = {"type": "bench", "seq": seq, "sent_at": time.perf_counter()}
+        start = time.perf_counter()
+        if mode == "sequential":
+            await sequential_broadcast(message)
+        else:
+            await manager.broadcast(message, "bench")
+        blocked += time.perf_counter() - start
+        await asyncio.sleep(interval)
+
+    # Let writer tasks drain what is still queued for fast clients
+    deadline = time.perf_counter() + 5
+    while time.perf_counter() < deadline and ws_fanout.get_stats()["queue_depth"]:
+        await asyncio.sleep(0.05)
+    for client in clients:
+        manager.disconnect_all(client)
+    return blocked
+
+
+def run_fanout_benchmark(
+    num_clients: int = 1000,
+    slow_fraction: float = 0.05,
+    slow_delay: float = 0.5,
+    messages: int = 50,
+    interval: float = 0.02,
+    baseline_messages: int = 3,
+    modes: tuple = ("sequential", "fanout"),
+):
+    from app.services.ws_fanout import ws_fanout
+
+    for mode in modes:
+        # Sequential sends wait on every slow reader, so it gets fewer messages
+        count = baseline_messages if mode == "sequential" else messages
+        random.seed(42)
+        num_slow = int(num_clients * slow_fraction)
+        clients = [
+            SimulatedClient(slow_delay if i < num_slow else 0.001, slow=i < num_slow)
+            for i in range(num_clients)
+        ]
+        before = dict(ws_fanout.stats)
+        start = time.perf_counter()
+        blocked = asyncio.run(_run_fanout(mode, clients, count, interval))
+        elapsed = time.perf_counter() - start
+
+        fast = [lat for c in clients if not c.slow for lat in c.latencies]
+        slow = [lat for c in clients if c.slow for lat in c.latencies]
+        expected_fast = (num_clients - num_slow) * count
+        dropped = ws_fanout.stats["dropped"] - before["dropped"]
+        logger.info(
+            f"{mode:<10} clients={num_clients} slow={num_slow} messages={count} "
+            f"elapsed={elapsed:.1f}s blocked_in_broadcast={blocked:.2f}s"
+        )
+        logger.info(
+            f"{'':<10} fast p50 {_percentile(fast, 0.5) * 1000:8.1f}ms  "
+            f"p99 {_percentile(fast, 0.99) * 1000:8.1f}ms  delivered {len(fast)}/{expected_fast}"
+        )
+        logger.info(
+            f"{'':<10} slow p50 {_percentile(slow, 0.5) * 1000:8.1f}ms  "
+            f"p99 {_percentile(slow, 0.99) * 1000:8.1f}ms  delivered {len(slow)}  dropped {dropped}"
+        )
+
+
 if __name__ == "__main__":
-    asyncio.run(stress_test())
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="Hold real connections against a running server")
+    parser.add_argument("--clients", type=int, default=None)
+    parser.add_argument("--duration", type=int, default=30)
+    parser.add_argument("--slow", type=float, default=0.05, help="Fraction of slow readers")
+    parser.add_argument("--slow-delay", type=float, default=0.5, help="Seconds each send to a slow reader blocks")
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between broadcasts")
+    parser.add_argument("--baseline-messages", type=int, default=3, help="Messages for the sequential baseline")
+    args = parser.parse_args()
+
+    if args.live:
+        asyncio.run(stress_test(num_connections=args.clients or 50, duration=args.duration))
+    else:
+        run_fanout_benchmark(
+            num_clients=args.clients or 1000,
+            slow_fraction=args.slow,
+            slow_delay=args.slow_delay,
+            messages=args.messages,
+            interval=args.interval,
+            baseline_messages=args.baseline_messages,
+        )
@@ -0,0 +1,82 @@
+"""Tests for the async database engine and AsyncDbSession handlers.
+
+Rows written through the sync session must be visible to handlers and
+background workers reading through the async (aiosqlite) session.
+"""
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.db.session import async_database_url
+from app.models.restaurant import GuestOrder
+from app.schemas.pagination import paginate_select
+from app.services.background_workers import BackgroundWorkerManager, TaskStatus
+
+
+def _guest_orders(db: Session, count: int, token: str = "async-token-1"):
+    orders = [
+        GuestOrder(table_token=token, status="received", total=Decimal("10.00") + n, items=[])
+        for n in range(count)
+    ]
+    db.add_all(orders)
+    db.commit()
+    return orders
+
+
+class TestAsyncDatabaseUrl:
+    @pytest.mark.parametrize("url, expected", [
+        ("sqlite:///./data/bjsbar.db", "sqlite+aiosqlite:///./data/bjsbar.db"),
+        ("postgresql://bjs:secret@db:5432/bjs", "postgresql+asyncpg://bjs:secret@db:5432/bjs"),
+        ("postgresql+psycopg2://bjs:secret@db/bjs", "postgresql+asyncpg://bjs:secret@db/bjs"),
+    ])
+    def test_driver_swap_keeps_credentials(self, url, expected):
+        assert async_database_url(url) == expected
+
+
+class TestAsyncSession:
+    async def test_paginate_select(self, db_session: Session, async_db_engine):
+        _guest_orders(db_session, 7)
+
+        async with async_sessionmaker(async_db_engine)() as db:
+            stmt = select(GuestOrder).order_by(GuestOrder.id)
+            items, total = await paginate_select(db, stmt, skip=5, limit=5)
+
+        assert total == 7
+        assert [o.total for o in items] == [Decimal("15.00"), Decimal("16.00")]
+
+    def test_guest_order_handlers_read_committed_rows(self, client, auth_headers, db_session: Session):
+        orders = _guest_orders(db_session, 3)
+
+        res = client.get(f"/api/v1/orders/guest/{orders[1].id}", headers=auth_headers)
+        assert res.status_code == 200
+        assert res.json()["total"] == 11.0
+
+        res = client.get("/api/v1/orders/table/async-token-1", params={"limit": 2})
+        assert res.status_code == 200
+        assert res.json()["total"] == 2
+
+    async def test_worker_handlers_get_async_sessions(self, db_session: Session, async_db_engine):
+        _guest_orders(db_session, 4)
+        manager = BackgroundWorkerManager(max_workers=1)
+        manager.recurring_jobs.clear()
+
+        async def count_orders(db, task):
+            return {"orders": await db.scalar(select(func.count()).select_from(GuestOrder))}
+
+        manager.task_handlers["count_orders"] = count_orders
+        task_id = await manager.schedule("count_orders", "count")
+        await manager.start(async_sessionmaker(async_db_engine, expire_on_commit=False))
+        try:
+            for _ in range(200):
+                if manager.get_task_status(task_id).status == TaskStatus.COMPLETED:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await manager.stop()
+
+        assert manager.get_task_status(task_id).result == {"orders": 4}
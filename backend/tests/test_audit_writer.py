@@ -0,0 +1,104 @@
+"""Tests for the batched audit log writer.
+
+Covers queueing through log_action, size/interval flushes, flush on stop,
+backpressure drops, the synchronous fallback and spilling failed batches.
+"""
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.metrics import metrics
+from app.models.operations import AuditLogEntry
+from app.services import audit_service
+from app.services.audit_service import AuditLogWriter
+
+
+@pytest.fixture
+def session_factory(db_engine, monkeypatch):
+    """Point the writer's SessionLocal at the test database."""
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    monkeypatch.setattr(audit_service, "SessionLocal", factory)
+    return factory
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    writer = AuditLogWriter(max_queue_size=5, batch_size=3, flush_interval=0.05)
+    monkeypatch.setattr(audit_service, "audit_writer", writer)
+    return writer
+
+
+def _count(db: Session) -> int:
+    db.expire_all()
+    return db.query(AuditLogEntry).count()
+
+
+class TestAuditLogWriter:
+    """Test AuditLogWriter queueing and flushing."""
+
+    async def test_log_action_is_queued_and_flushed_on_stop(self, session_factory, writer, db_session):
+        await writer.start()
+        audit_service.log_action(action="create", entity_type="orders", entity_id=7, user_id=1)
+        assert writer.get_stats()["queue_depth"] == 1
+        assert _count(db_session) == 0
+
+        await writer.stop()
+        entry = db_session.query(AuditLogEntry).one()
+        assert (entry.action, entry.entity_type, entry.entity_id) == ("create", "orders", "7")
+        assert writer.get_stats()["written"] == 1
+
+    async def test_flushes_on_interval_and_batch_size(self, session_factory, writer, db_session):
+        await writer.start()
+        for i in range(4):
+            audit_service.log_action(action="update", entity_id=i)
+        await asyncio.sleep(0.3)
+        assert _count(db_session) == 4
+        assert writer.get_stats()["batches"] == 2  # 3-row batch + 1-row batch
+        await writer.stop()
+
+    async def test_full_queue_drops_rows(self, session_factory, db_session):
+        writer = AuditLogWriter(max_queue_size=5, batch_size=10, flush_interval=60)
+        await writer.start()
+        for i in range(7):
+            assert writer.submit({"action": "create", "entity_id": str(i)})
+        stats = writer.get_stats()
+        assert (stats["enqueued"], stats["dropped"], stats["queue_depth"]) == (5, 2, 5)
+
+        await writer.stop()
+        assert _count(db_session) == 5
+
+    def test_falls_back_to_sync_write_when_not_running(self, session_factory, writer, db_session):
+        audit_service.log_action(action="delete", entity_type="menu_items", entity_id=3)
+        assert _count(db_session) == 1
+        assert writer.get_stats()["enqueued"] == 0
+
+    async def test_failed_batch_spills_to_file(self, monkeypatch, writer, tmp_path):
+        class BrokenSession:
+            def execute(self, *args, **kwargs):
+                raise RuntimeError("database unavailable")
+
+            def rollback(self):
+                pass
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(audit_service, "SessionLocal", BrokenSession)
+        writer.spill_path = str(tmp_path / "audit_spill.jsonl")
+        await writer.start()
+        audit_service.log_action(action="create", entity_type="orders", entity_id=1)
+        audit_service.log_action(action="update", entity_type="orders", entity_id=1)
+        await writer.stop()
+
+        lines = (tmp_path / "audit_spill.jsonl").read_text().splitlines()
+        assert [json.loads(line)["action"] for line in lines] == ["create", "update"]
+        stats = writer.get_stats()
+        assert (stats["write_errors"], stats["spilled"], stats["dropped"]) == (1, 2, 0)
+
+    def test_counters_exposed_in_metrics(self):
+        output = metrics.get_prometheus_metrics()
+        assert "audit_log_dropped_total" in output
+        assert "audit_log_queue_depth" in output
@@ -0,0 +1,218 @@
+"""Tests for the BackgroundWorkerManager delayed queue and cron schedule table."""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.gap_features_models import ReviewRequest
+from app.services.background_workers import (
+    BackgroundWorkerManager,
+    CronSchedule,
+    TaskPriority,
+    TaskStatus,
+)
+
+
+class _NullSession:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def _manager(**kwargs) -> BackgroundWorkerManager:
+    manager = BackgroundWorkerManager(**kwargs)
+    manager.recurring_jobs.clear()
+    return manager
+
+
+async def _wait_for(predicate, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+class TestCronSchedule:
+    """Test cron parsing and next-slot computation."""
+
+    def test_step_and_fixed_fields(self):
+        every_five = CronSchedule("*/5 * * * *")
+        assert every_five.next_after(datetime(2026, 1, 1, 10, 3, 59, tzinfo=timezone.utc)) == \
+            datetime(2026, 1, 1, 10, 5, tzinfo=timezone.utc)
+        # Strictly after: a slot is never returned twice
+        assert every_five.next_after(datetime(2026, 1, 1, 10, 5, 0, tzinfo=timezone.utc)) == \
+            datetime(2026, 1, 1, 10, 10, tzinfo=timezone.utc)
+
+        midnight = CronSchedule("0 0 * * *")
+        assert midnight.next_after(datetime(2026, 12, 31, 23, 59, tzinfo=timezone.utc)) == \
+            datetime(2027, 1, 1, 0, 0, tzinfo=timezone.utc)
+
+    def test_weekday_ranges_and_lists(self):
+        # Weekdays at 09:30 and 17:30; 2026-10-17 is a Saturday
+        schedule = CronSchedule("30 9,17 * * 1-5")
+        assert schedule.next_after(datetime(2026, 10, 16, 18, 0, tzinfo=timezone.utc)) == \
+            datetime(2026, 10, 19, 9, 30, tzinfo=timezone.utc)
+
+    @pytest.mark.parametrize("expression", ["* * * *", "61 * * * *", "*/0 * * * *", "5-1 * * * *"])
+    def test_invalid_expressions(self, expression):
+        with pytest.raises(ValueError):
+            CronSchedule(expression)
+
+
+class TestBackgroundWorkerManager:
+    """Test priority ordering, exact wakeups, concurrency limits and de-duplication."""
+
+    async def test_due_tasks_run_by_priority(self):
+        manager = _manager(max_workers=1)
+        order = []
+
+        async def handler(db, task):
+            order.append(task.name)
+
+        manager.task_handlers["record"] = handler
+        for name, priority in [("low", TaskPriority.LOW), ("normal", TaskPriority.NORMAL),
+                               ("critical", TaskPriority.CRITICAL), ("high", TaskPriority.HIGH)]:
+            await manager.schedule("record", name, priority=priority)
+
+        await manager.start(_NullSession)
+        try:
+            await _wait_for(lambda: len(order) == 4)
+        finally:
+            await manager.stop()
+        assert order == ["critical", "high", "normal", "low"]
+
+    async def test_deferred_task_waits_without_requeueing(self):
+        manager = _manager(max_workers=2)
+        started = []
+
+        async def handler(db, task):
+            started.append(asyncio.get_running_loop().time())
+
+        manager.task_handlers["record"] = handler
+        await manager.start(_NullSession)
+        try:
+            begin = asyncio.get_running_loop().time()
+            await manager.schedule("record", "later", delay_seconds=0.3)
+            await asyncio.sleep(0.15)
+            assert started == []
+            assert manager.get_stats()["delayed_tasks"] == 1
+            await _wait_for(lambda: started)
+        finally:
+            await manager.stop()
+        assert 0.28 <= started[0] - begin < 0.6
+        assert sum(manager.start_lag.counts) == 1
+
+    async def test_concurrency_limit_per_task_type(self):
+        manager = _manager(max_workers=4, concurrency_limits={"sync": 1})
+        running = 0
+        peak = 0
+
+        async def handler(db, task):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+
+        manager.task_handlers["sync"] = handler
+        for n in range(4):
+            await manager.schedule("sync", f"sync {n}")
+
+        await manager.start(_NullSession)
+        try:
+            await _wait_for(lambda: manager.stats["tasks_completed"] == 4)
+        finally:
+            await manager.stop()
+        assert peak == 1
+
+    async def test_recurring_job_skipped_while_previous_run_pending(self):
+        manager = _manager()
+        job = manager.add_recurring("Nightly", "record", "0 0 * * *")
+
+        await manager._fire_recurring(job)
+        first = job.last_task_id
+        await manager._fire_recurring(job)
+
+        assert job.last_task_id == first
+        assert manager.stats["recurring_skipped"] == 1
+
+        manager.task_history[first].status = TaskStatus.COMPLETED
+        await manager._fire_recurring(job)
+        assert job.last_task_id != first
+
+    async def test_recurring_slot_fires_once(self):
+        manager = _manager()
+        job = manager.add_recurring("Five", "record", "*/5 * * * *")
+        now = datetime(2026, 1, 1, 10, 4, 30, tzinfo=timezone.utc)
+
+        await manager._run_due_recurring(now)
+        assert job.next_run == datetime(2026, 1, 1, 10, 5, tzinfo=timezone.utc)
+
+        slot = datetime(2026, 1, 1, 10, 5, 1, tzinfo=timezone.utc)
+        await manager._run_due_recurring(slot)
+        await manager._run_due_recurring(slot)
+        assert manager.stats["tasks_enqueued"] == 1
+        assert job.next_run == datetime(2026, 1, 1, 10, 10, tzinfo=timezone.utc)
+
+    async def test_slot_fires_on_one_worker(self, async_db_engine):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        session_factory = async_sessionmaker(async_db_engine, expire_on_commit=False)
+        workers = []
+        for n in range(2):
+            manager = _manager()
+            manager.db_session_factory = session_factory
+            manager.instance_id = f"worker-{n}"
+            manager.add_recurring("Five", "record", "*/5 * * * *")
+            await manager._run_due_recurring(datetime(2026, 1, 1, 10, 4, 30, tzinfo=timezone.utc))
+            workers.append(manager)
+
+        for minute in (5, 10):
+            slot = datetime(2026, 1, 1, 10, minute, 1, tzinfo=timezone.utc)
+            for manager in workers:
+                await manager._run_due_recurring(slot)
+            assert sum(m.stats["tasks_enqueued"] for m in workers) == minute // 5
+            assert sum(m.stats["recurring_claimed_elsewhere"] for m in workers) == minute // 5
+            # Nothing runs the queue here; finish the run so the next slot is not skipped
+            for manager in workers:
+                for task in manager.task_history.values():
+                    task.status = TaskStatus.COMPLETED
+
+        # A worker whose clock is behind cannot take back a slot
+        late = workers[1]
+        lost = late.stats["recurring_claimed_elsewhere"]
+        late.recurring_jobs["Five"].next_run = datetime(2026, 1, 1, 10, 5, tzinfo=timezone.utc)
+        await late._run_due_recurring(datetime(2026, 1, 1, 10, 5, 2, tzinfo=timezone.utc))
+        assert late.stats["recurring_claimed_elsewhere"] == lost + 1
+        assert sum(m.stats["tasks_enqueued"] for m in workers) == 2
+
+class TestHandlers:
+    """Handlers that delegate to services written against a sync Session."""
+
+    async def test_review_requests_run_on_a_sync_session(self, db_session, async_db_engine):
+        from datetime import timedelta
+
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from sqlalchemy.orm import sessionmaker
+
+        from app.services.background_workers import BackgroundTask
+
+        db_session.add(ReviewRequest(
+            id="req-1", venue_id="venue-1", order_id="order-1", customer_id="404", method="email",
+            status="scheduled", scheduled_at=datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=5),
+        ))
+        db_session.commit()
+
+        manager = _manager()
+        manager.sync_session_factory = sessionmaker(bind=db_session.get_bind())
+        task = BackgroundTask(id="t-1", name="reviews", task_type="process_review_requests")
+        async with async_sessionmaker(async_db_engine)() as db:
+            result = await manager._process_review_requests(db, task)
+
+        assert result["venues_processed"] == 1
+        assert result["total_failed"] == 1  # No such customer
+        db_session.expire_all()
+        assert db_session.get(ReviewRequest, "req-1").status == "failed"
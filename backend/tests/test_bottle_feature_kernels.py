@@ -0,0 +1,102 @@
+"""Golden-output tests for the vectorized hand-crafted bottle features.
+
+tests/fixtures/bottle_features_golden.npz holds the outputs of the original
+per-pixel loop implementations (HOG, LBP, Sobel edges, shape, FAST/BRIEF
+keypoints, Laplacian text features, blur score and the combined vectors) for
+three deterministic synthetic images. The vectorized kernels must reproduce them.
+"""
+
+import io
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services import ai_bottle_recognition_service as bottle
+from app.services.ai import feature_extraction as fe
+
+GOLDEN_PATH = Path(__file__).parent / "fixtures" / "bottle_features_golden.npz"
+
+PER_IMAGE_FUNCTIONS = [
+    "extract_hog_features",
+    "extract_lbp_features",
+    "extract_edge_features",
+    "extract_shape_features",
+    "extract_keypoint_features",
+    "extract_text_features",
+]
+
+
+def _golden_images():
+    """The three PNG images the golden file was generated from."""
+    rng = np.random.default_rng(2024)
+    arrays = [rng.integers(0, 256, (240, 180, 3), dtype=np.uint8)]
+
+    yy, xx = np.mgrid[0:200, 0:300]
+    grad = np.stack([(xx % 256), (yy % 256), ((xx + yy) // 2 % 256)], axis=2).astype(np.uint8)
+    grad[50:150, 100:140] = [20, 120, 40]
+    arrays.append(grad)
+
+    bottle_img = np.full((320, 160, 3), 235, dtype=np.uint8)
+    bottle_img[60:300, 45:115] = [90, 30, 20]
+    bottle_img[20:60, 68:92] = [60, 60, 60]
+    bottle_img[140:220, 50:110] = rng.integers(150, 255, (80, 60, 3), dtype=np.uint8)
+    arrays.append(bottle_img)
+
+    images = []
+    for arr in arrays:
+        buffer = io.BytesIO()
+        Image.fromarray(arr).save(buffer, format="PNG")
+        images.append(buffer.getvalue())
+    return images
+
+
+@pytest.fixture(scope="module")
+def golden():
+    return np.load(GOLDEN_PATH)
+
+
+@pytest.fixture(scope="module")
+def images():
+    return _golden_images()
+
+
+@pytest.mark.parametrize("module_name,module", [("bottle", bottle), ("fe", fe)])
+@pytest.mark.parametrize("function", PER_IMAGE_FUNCTIONS)
+def test_per_feature_matches_golden(golden, images, module_name, module, function):
+    """Test each vectorized feature reproduces the loop implementation."""
+    for i, data in enumerate(images):
+        pil = Image.open(io.BytesIO(data)).convert("RGB")
+        actual = getattr(module, function)(pil)
+        expected = golden[f"{module_name}_{function}_{i}"]
+        assert actual.shape == expected.shape
+        np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_combined_features_match_golden(golden, images):
+    """Test full combined vectors (bytes in, pickled vector out) are unchanged."""
+    for i, data in enumerate(images):
+        np.testing.assert_allclose(
+            pickle.loads(bottle.extract_combined_features(data)),
+            golden[f"bottle_combined_{i}"],
+            rtol=1e-5, atol=1e-6,
+        )
+        np.testing.assert_allclose(
+            pickle.loads(fe.extract_combined_features(
+                data, fe.FeatureConfig(use_cnn=False, use_ocr=False)
+            )),
+            golden[f"fe_combined_{i}"],
+            rtol=1e-5, atol=1e-6,
+        )
+
+
+def test_blur_score_matches_golden(golden, images):
+    """Test the vectorized Laplacian blur score in assess_image_quality."""
+    for i, data in enumerate(images):
+        np.testing.assert_allclose(
+            fe.assess_image_quality(data).blur_score,
+            golden[f"fe_quality_{i}"][0],
+            rtol=1e-9,
+        )
@@ -0,0 +1,136 @@
+"""Tests for sync-DB handler offloading and the event-loop lag monitor."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.db_offload import (
+    DbExecutor,
+    LoopLagMonitor,
+    can_offload,
+    offload_db,
+    offload_sync_db_routes,
+)
+from app.db.session import get_db
+
+
+async def _reads_only(db=None):
+    return threading.current_thread().name
+
+
+async def _awaits():
+    await asyncio.sleep(0)
+
+
+async def _spawns_task():
+    asyncio.create_task(_awaits())
+
+
+def _sync_handler():
+    return threading.current_thread().name
+
+
+def _block(seconds: float):
+    time.sleep(seconds)
+
+
+class TestCanOffload:
+    def test_await_free_and_sync_handlers_qualify(self):
+        assert can_offload(_reads_only)
+        assert can_offload(_sync_handler)
+
+    def test_suspending_or_loop_bound_handlers_do_not(self):
+        assert not can_offload(_awaits)
+        assert not can_offload(_spawns_task)
+        with pytest.raises(TypeError):
+            offload_db(_awaits)
+
+    def test_unknown_async_wrappers_do_not(self):
+        async def wrapper(*args, **kwargs):
+            return await _reads_only(*args, **kwargs)
+        wrapper.__wrapped__ = _reads_only
+
+        assert not can_offload(wrapper)
+
+
+class TestOffloadDb:
+    async def test_runs_on_db_pool_thread(self):
+        assert (await offload_db(_reads_only)()).startswith("db-offload")
+        assert (await offload_db(_sync_handler)()).startswith("db-offload")
+
+    async def test_exceptions_propagate(self):
+        async def missing():
+            raise HTTPException(status_code=404, detail="Order not found")
+
+        with pytest.raises(HTTPException):
+            await offload_db(missing)()
+
+    async def test_executor_is_bounded(self):
+        executor = DbExecutor(max_workers=2)
+        running, peak = 0, 0
+        lock = threading.Lock()
+
+        def work():
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+        try:
+            await asyncio.gather(*(executor.run(work) for _ in range(6)))
+        finally:
+            executor.shutdown()
+        assert peak == 2
+        assert executor.get_stats()["calls"] == 6
+        assert sum(executor.wait.counts) == 6
+
+    def test_routes_using_get_db_are_rewired(self):
+        app = FastAPI()
+
+        @app.get("/db")
+        async def uses_db(db=Depends(get_db)):
+            return {"thread": threading.current_thread().name}
+
+        @app.get("/no-db")
+        async def no_db():
+            return {"thread": threading.current_thread().name}
+
+        @app.get("/awaits")
+        async def awaits(db=Depends(get_db)):
+            await asyncio.sleep(0)
+            return {"thread": threading.current_thread().name}
+
+        app.dependency_overrides[get_db] = lambda: None
+        assert offload_sync_db_routes(app) == 1
+        assert offload_sync_db_routes(app) == 0
+
+        with TestClient(app) as client:
+            assert client.get("/db").json()["thread"].startswith("db-offload")
+            assert not client.get("/no-db").json()["thread"].startswith("db-offload")
+            assert not client.get("/awaits").json()["thread"].startswith("db-offload")
+
+
+class TestLoopLagMonitor:
+    async def test_stall_is_recorded_with_blocking_function(self):
+        monitor = LoopLagMonitor()
+        monitor.start(interval=0.01, threshold=0.05)
+        try:
+            await asyncio.sleep(0.05)
+            _block(0.2)
+            await asyncio.sleep(0.05)
+        finally:
+            monitor.stop()
+
+        stats = monitor.get_stats()
+        assert stats["max_lag_seconds"] >= 0.15
+        assert [name.rsplit(".", 1)[-1] for name in stats["blocked_by"]] == ["_block"]
+        lines = monitor.prometheus_lines()
+        assert any(line.startswith("event_loop_blocked_total{handler=") for line in lines)
+        assert any(line.startswith("event_loop_lag_seconds_count") for line in lines)
@@ -0,0 +1,173 @@
+"""Tests for vectorized YOLO post-processing (app.services.ai.postprocess).
+
+Compares the array-based NMS against the pairwise dict loop it replaced.
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.ai.inference import InferenceConfig, _apply_nms, _postprocess_yolo_output, _run_session
+from app.services.ai.postprocess import box_iou, decode_yolo, nms, yolo_predictions
+
+
+def _reference_iou(box1, box2):
+    x1_1, y1_1, x2_1, y2_1 = box1
+    x1_2, y1_2, x2_2, y2_2 = box2
+    inter = max(0, min(x2_1, x2_2) - max(x1_1, x1_2)) * max(0, min(y2_1, y2_2) - max(y1_1, y1_2))
+    union = (x2_1 - x1_1) * (y2_1 - y1_1) + (x2_2 - x1_2) * (y2_2 - y1_2) - inter
+    return 0 if union == 0 else inter / union
+
+
+def _reference_nms(detections, threshold):
+    """The original O(n^2) pure-Python NMS."""
+    detections = sorted(detections, key=lambda x: x["confidence"], reverse=True)
+    keep, suppressed = [], set()
+    for i, det in enumerate(detections):
+        if i in suppressed:
+            continue
+        keep.append(det)
+        for j in range(i + 1, len(detections)):
+            if j in suppressed or det.get("class_id") != detections[j].get("class_id"):
+                continue
+            if _reference_iou(det["bbox"], detections[j]["bbox"]) > threshold:
+                suppressed.add(j)
+    return keep
+
+
+def _random_detections(rng, n, num_classes=3):
+    xy = rng.uniform(0, 0.8, (n, 2))
+    wh = rng.uniform(0.02, 0.2, (n, 2))
+    boxes = np.concatenate([xy, xy + wh], axis=1)
+    return [
+        {
+            "label": f"class_{c}",
+            "confidence": float(conf),
+            "bbox": [float(v) for v in box],
+            "class_id": int(c),
+        }
+        for box, conf, c in zip(boxes, rng.uniform(0.3, 1.0, n), rng.integers(0, num_classes, n))
+    ]
+
+
+class TestNMS:
+    """Tests for array NMS vs the reference loop."""
+
+    def test_matches_reference_nms(self):
+        """Test kept boxes and order equal the pairwise implementation."""
+        rng = np.random.default_rng(42)
+        for n in (1, 10, 300):
+            dets = _random_detections(rng, n)
+            expected = _reference_nms(dets, 0.45)
+            actual = _apply_nms(dets, 0.45)
+            assert [id(d) for d in actual] == [id(d) for d in expected]
+
+    def test_class_aware(self):
+        """Test overlapping boxes of different classes are both kept."""
+        boxes = np.array([[0, 0, 10, 10], [0, 0, 10, 10], [1, 1, 10, 10]], dtype=np.float32)
+        scores = np.array([0.9, 0.8, 0.7])
+        assert nms(boxes, scores, 0.5, class_ids=np.array([0, 1, 0])).tolist() == [0, 1]
+        assert nms(boxes, scores, 0.5).tolist() == [0]
+
+    def test_max_detections(self):
+        """Test max_detections stops after the best boxes."""
+        boxes = np.array([[i * 20, 0, i * 20 + 10, 10] for i in range(5)], dtype=np.float32)
+        scores = np.array([0.1, 0.5, 0.9, 0.3, 0.7])
+        assert nms(boxes, scores, 0.5, max_detections=2).tolist() == [2, 4]
+
+    def test_box_iou_empty_union(self):
+        """Test degenerate boxes give IoU 0 instead of dividing by zero."""
+        iou = box_iou(np.zeros(4), np.zeros((2, 4)))
+        assert iou.tolist() == [0.0, 0.0]
+
+
+class _FakeSession:
+    """Stands in for an onnxruntime session; returns one row per image."""
+
+    def __init__(self, batch_dim):
+        self.batch_dim = batch_dim
+        self.run_sizes = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="images", shape=[self.batch_dim, 3, 2, 2])]
+
+    def run(self, output_names, feed):
+        batch = feed["images"]
+        if isinstance(self.batch_dim, int):
+            assert len(batch) == self.batch_dim
+        self.run_sizes.append(len(batch))
+        return [batch.sum(axis=(1, 2, 3))[:, np.newaxis]]
+
+
+class TestRunSession:
+    """Test batching against fixed and dynamic model batch axes."""
+
+    def _batch(self, n):
+        return np.arange(n, dtype=np.float32)[:, None, None, None] * np.ones((n, 3, 2, 2), dtype=np.float32)
+
+    def test_fixed_batch_pads_last_chunk(self):
+        session = _FakeSession(4)
+        (output,) = _run_session(session, self._batch(6))
+        assert session.run_sizes == [4, 4]
+        assert output[:, 0].tolist() == [12.0 * n for n in range(6)]
+
+    def test_dynamic_batch_runs_once(self):
+        session = _FakeSession("batch")
+        (output,) = _run_session(session, self._batch(6))
+        assert session.run_sizes == [6]
+        assert output.shape == (6, 1)
+
+    """Tests for YOLO output decoding."""
+
+    def test_yolov8_layout_transposed(self):
+        """Test (1, 4 + classes, boxes) output becomes (boxes, features)."""
+        assert yolo_predictions(np.zeros((1, 6, 100))).shape == (100, 6)
+        assert yolo_predictions(np.zeros((100, 6))).shape == (100, 6)
+        assert yolo_predictions(np.zeros(5)) is None
+
+    def test_decode_yolov5_objectness(self):
+        """Test objectness gates rows and multiplies the class score."""
+        preds = np.array([
+            [50, 50, 20, 20, 0.9, 0.1, 0.8],
+            [50, 50, 20, 20, 0.2, 0.1, 0.9],
+        ], dtype=np.float32)
+        boxes, scores, class_ids = decode_yolo(preds, 0.5, objectness=True)
+        assert boxes.tolist() == [[40, 40, 60, 60]]
+        assert np.allclose(scores, [0.72])
+        assert class_ids.tolist() == [1]
+
+    def test_postprocess_matches_reference(self):
+        """Test inference post-processing keeps the same boxes as the loop version."""
+        rng = np.random.default_rng(0)
+        num_boxes, num_classes = 2000, 4
+        xywh = np.concatenate([
+            rng.uniform(0, 640, (num_boxes, 2)),
+            rng.uniform(10, 120, (num_boxes, 2)),
+        ], axis=1)
+        scores = rng.uniform(0, 1, (num_boxes, num_classes))
+        output = np.concatenate([xywh, scores], axis=1).T[np.newaxis].astype(np.float32)
+
+        config = InferenceConfig(confidence_threshold=0.6, nms_threshold=0.45, max_detections=1000)
+        result = _postprocess_yolo_output([output], config, (640, 640), 640, 640)
+
+        # Reference: per-row loop + pairwise NMS
+        reference = []
+        for det in output[0].T:
+            class_id = int(np.argmax(det[4:]))
+            conf = det[4:][class_id]
+            if conf < config.confidence_threshold:
+                continue
+            x, y, w, h = det[:4]
+            box = [float(max(0, min(1, v))) for v in (
+                (x - w / 2) / 640, (y - h / 2) / 640, (x + w / 2) / 640, (y + h / 2) / 640,
+            )]
+            reference.append({"confidence": float(conf), "bbox": box, "class_id": class_id})
+        reference = _reference_nms(reference, config.nms_threshold)
+
+        counts = {}
+        for d in reference:
+            counts[d["class_id"]] = counts.get(d["class_id"], 0) + 1
+        assert {d["class_id"]: d["count"] for d in result} == counts
+        for d in result:
+            best = max(r["confidence"] for r in reference if r["class_id"] == d["class_id"])
+            assert abs(d["confidence"] - best) < 1e-6
@@ -0,0 +1,116 @@
+"""Tests for the resident CLIP embedding index used by /ai/recognize.
+
+Checks the vectorized scores match the per-product loop the route used to run,
+and that the index rebuilds when training features change.
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.ai import TrainingImage
+from app.services.ai.embedding_index import EmbeddingIndex
+
+
+def _add_images(db: Session, rng: np.random.Generator, product_id: int, count: int):
+    vectors = []
+    for _ in range(count):
+        vec = rng.standard_normal(512).astype(np.float32)
+        vec /= np.linalg.norm(vec)
+        vectors.append(vec)
+        db.add(TrainingImage(
+            stock_item_id=product_id,
+            storage_path="features_only",
+            feature_vector=vec.tobytes(),
+        ))
+    db.commit()
+    return vectors
+
+
+def _reference_scores(query: np.ndarray, product_features: dict) -> dict:
+    """Per-product scoring exactly as the recognize endpoint computed it."""
+    scores = {}
+    for product_id, features_list in product_features.items():
+        best_sim = 0.0
+        for train_feat in features_list:
+            sim = float(np.dot(query, train_feat))
+            if sim > best_sim:
+                best_sim = sim
+        if len(features_list) > 1:
+            mean_feat = np.mean(features_list, axis=0)
+            mean_feat = mean_feat / (np.linalg.norm(mean_feat) + 1e-7)
+            best_sim = max(best_sim, float(np.dot(query, mean_feat)))
+        scores[product_id] = best_sim
+    return scores
+
+
+class TestEmbeddingIndex:
+    """Tests for EmbeddingIndex / EmbeddingSnapshot."""
+
+    def test_empty_index(self, db_session: Session):
+        """Test an empty training set yields an empty snapshot."""
+        index = EmbeddingIndex().get(db_session)
+        assert index.size == 0
+        assert index.top_k(np.ones(512, dtype=np.float32), k=5) == []
+
+    def test_scores_match_reference_loop(self, db_session: Session):
+        """Test vectorized scores equal the per-product Python loop."""
+        rng = np.random.default_rng(7)
+        product_features = {
+            pid: _add_images(db_session, rng, pid, count)
+            for pid, count in [(3, 1), (1, 4), (7, 2), (5, 6)]
+        }
+        # Legacy feature formats must be ignored
+        db_session.add(TrainingImage(
+            stock_item_id=9, storage_path="legacy", feature_vector=b"\x00" * 100,
+        ))
+        db_session.commit()
+
+        query = product_features[1][2] + 0.1 * rng.standard_normal(512).astype(np.float32)
+        query = query / (np.linalg.norm(query) + 1e-7)
+
+        index = EmbeddingIndex().get(db_session)
+        assert index.size == 13
+        assert sorted(index.product_ids.tolist()) == [1, 3, 5, 7]
+
+        expected = _reference_scores(query, product_features)
+        matches = index.top_k(query, k=10)
+        assert [m.product_id for m in matches] == sorted(expected, key=expected.get, reverse=True)
+        for match in matches:
+            assert match.score == pytest.approx(expected[match.product_id], abs=1e-5)
+        assert matches[0].product_id == 1
+
+    def test_top_k_margin_keeps_near_candidates(self, db_session: Session):
+        """Test margin widens top-k to every product close to the k-th score."""
+        rng = np.random.default_rng(11)
+        for pid in range(1, 9):
+            _add_images(db_session, rng, pid, 2)
+        index = EmbeddingIndex().get(db_session)
+        query = index.mean_matrix[0]
+
+        scores, _, _ = index.similarities(query)
+        top2 = index.top_k(query, k=2)
+        assert len(top2) == 2
+        wide = index.top_k(query, k=2, margin=1.0)
+        kth = sorted(scores, reverse=True)[1]
+        assert len(wide) == int(np.sum(scores >= kth - 1.0))
+
+    def test_rebuilds_after_invalidate_and_new_rows(self, db_session: Session):
+        """Test the snapshot is reused until invalidated or the table changes."""
+        rng = np.random.default_rng(3)
+        _add_images(db_session, rng, 1, 2)
+        embedding_index = EmbeddingIndex()
+
+        first = embedding_index.get(db_session)
+        assert embedding_index.get(db_session) is first
+
+        embedding_index.invalidate()
+        second = embedding_index.get(db_session)
+        assert second is not first
+        assert second.size == 2
+
+        # Rows written elsewhere (another worker) change the DB signature
+        _add_images(db_session, rng, 2, 1)
+        third = embedding_index.get(db_session)
+        assert third.size == 3
+        assert third.product_count == 2
@@ -0,0 +1,239 @@
+"""Tests for the in-memory waiter floor state."""
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import session as db_session_module
+from app.models import Order, StaffUser, Table, TableSession
+from app.models.platform_compat import OrderStatus
+from app.services.floor_state import FloorStateRegistry, floor_query, floor_state, table_rows
+from app.services.ws_event_bus import EventBus, InProcessBackend, InProcessHub
+
+VENUE_ID = 1
+
+
+class _StatementCounter:
+    def __init__(self, session):
+        self.bind = session.get_bind()
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def _floor(db, tables: int = 6, prefix: str = "F"):
+    """Tables 1..n; even ones are seated with an open order, the last one is reserved.
+
+    Order numbers are ``<prefix>-<n>``; pass another prefix to lay a second floor.
+    """
+    waiter = StaffUser(full_name="Maria Server", role="waiter")
+    db.add(waiter)
+    db.flush()
+    rows = []
+    for n in range(tables):
+        table = Table(number=str(n + 1), capacity=4, area="Patio" if n < 2 else "Main Floor")
+        if n == tables - 1:
+            table.status = "reserved"
+        db.add(table)
+        db.flush()
+        if n % 2 == 0:
+            session = TableSession(table_id=table.id, venue_id=VENUE_ID, guest_count=3, waiter_id=waiter.id)
+            db.add(session)
+            db.flush()
+            db.add(Order(order_number=f"{prefix}-{n}", table_id=table.id, session_id=session.id,
+                         venue_id=VENUE_ID, total=42.5))
+        rows.append(table)
+    db.commit()
+    return waiter, rows
+
+
+class TestFloorQuery:
+    def test_one_statement_for_the_whole_floor(self, db_session):
+        _floor(db_session, tables=3)
+        with _StatementCounter(db_session) as small:
+            table_rows(db_session.execute(floor_query(VENUE_ID)).all())
+
+        _floor(db_session, tables=12, prefix="G")
+        with _StatementCounter(db_session) as large:
+            tables = table_rows(db_session.execute(floor_query(VENUE_ID)).all())
+
+        assert small.count == large.count == 1
+        assert len(tables) == 15
+
+    def test_rows_carry_session_order_and_server(self, db_session):
+        waiter, tables = _floor(db_session)
+        rows = table_rows(db_session.execute(floor_query(VENUE_ID)).all())
+
+        seated = rows[tables[0].id]
+        assert seated["status"] == "occupied"
+        assert seated["guest_count"] == 3
+        assert seated["server_id"] == waiter.id
+        assert seated["server_name"] == "Maria Server"
+        assert seated["current_total"] == 42.5
+        assert seated["area"] == "Patio"
+
+        assert rows[tables[1].id]["status"] == "available"
+        assert rows[tables[1].id]["current_check_id"] is None
+        assert rows[tables[-1].id]["status"] == "reserved"
+
+
+class TestFloorStateRegistry:
+    def test_reads_are_served_from_memory(self, db_session):
+        _floor(db_session)
+        registry = FloorStateRegistry()
+        registry.venue(db_session, VENUE_ID)
+
+        with _StatementCounter(db_session) as counter:
+            state = registry.venue(db_session, VENUE_ID)
+        assert counter.count == 0
+        assert len(state.tables) == 6
+
+    def test_refresh_records_versioned_deltas(self, db_session):
+        _, tables = _floor(db_session)
+        registry = FloorStateRegistry()
+        state = registry.venue(db_session, VENUE_ID)
+        epoch, version = state.epoch, state.version
+
+        session = db_session.query(TableSession).filter(TableSession.table_id == tables[0].id).one()
+        session.status = "closed"
+        db_session.query(Order).filter(Order.session_id == session.id).update({"status": OrderStatus.SERVED})
+        db_session.commit()
+        # Unchanged tables produce no delta
+        registry.refresh(db_session, VENUE_ID, [tables[0].id, tables[1].id])
+
+        assert state.version == version + 1
+        assert state.tables[tables[0].id]["status"] == "available"
+        changes = state.changes_since(epoch, version)
+        assert [c["data"]["table_id"] for c in changes["changes"]] == [tables[0].id]
+        assert changes["changes"][0]["action"] == "table_updated"
+        assert state.changes_since(epoch, state.version)["changes"] == []
+
+    def test_refresh_ignores_venues_not_loaded(self, db_session):
+        _, tables = _floor(db_session)
+        table_id = tables[0].id  # Reload the expired row outside the counter
+        registry = FloorStateRegistry()
+        with _StatementCounter(db_session) as counter:
+            registry.refresh(db_session, VENUE_ID, [table_id])
+        assert counter.count == 0
+        assert registry.get_stats()["venues"] == {}
+
+    def test_unknown_epoch_or_trimmed_log_needs_snapshot(self, db_session):
+        _, tables = _floor(db_session)
+        registry = FloorStateRegistry(log_size=2)
+        state = registry.venue(db_session, VENUE_ID)
+        epoch = state.epoch
+
+        for table in tables[:3]:
+            db_session.query(Table).filter(Table.id == table.id).update({"area": "Bar"})
+            db_session.commit()
+            registry.refresh(db_session, VENUE_ID, [table.id])
+
+        assert state.version == 3
+        assert state.changes_since("stale-epoch", 0) is None
+        assert state.changes_since(epoch, 0) is None
+        assert len(state.changes_since(epoch, 1)["changes"]) == 2
+        assert state.snapshot()["full"] is True
+
+    def test_resync_keeps_epoch_and_emits_changes(self, db_session):
+        _, tables = _floor(db_session)
+        registry = FloorStateRegistry(resync_seconds=0)
+        state = registry.venue(db_session, VENUE_ID)
+        epoch = state.epoch
+
+        # Changed outside the waiter terminal routes, so no refresh() call
+        removed_id = tables[1].id
+        db_session.delete(db_session.get(Table, removed_id))
+        db_session.commit()
+        reloaded = registry.venue(db_session, VENUE_ID)
+
+        assert reloaded is state
+        assert reloaded.epoch == epoch
+        assert removed_id not in reloaded.tables
+        assert reloaded.changes_since(epoch, 0)["changes"][0]["action"] == "table_removed"
+
+    def test_commits_elsewhere_mark_tables_dirty(self, db_session):
+        _, tables = _floor(db_session)
+        state = floor_state.venue(db_session, VENUE_ID)
+        epoch, version = state.epoch, state.version
+
+        # E.g. a reservation route updating the table, without refresh()
+        db_session.get(Table, tables[1].id).status = "reserved"
+        db_session.commit()
+        assert state.dirty == {tables[1].id}
+
+        with _StatementCounter(db_session) as counter:
+            floor_state.venue(db_session, VENUE_ID)
+        assert counter.count == 1
+        assert state.tables[tables[1].id]["status"] == "reserved"
+        assert [c["data"]["table_id"] for c in state.changes_since(epoch, version)["changes"]] == [tables[1].id]
+
+    def test_rolled_back_writes_are_not_marked(self, db_session):
+        _, tables = _floor(db_session)
+        state = floor_state.venue(db_session, VENUE_ID)
+
+        db_session.get(Table, tables[1].id).area = "Bar"
+        db_session.flush()
+        db_session.rollback()
+        db_session.commit()
+
+        assert state.dirty == set()
+
+    async def test_other_workers_push_the_changed_tables(self, db_session, db_engine, monkeypatch):
+        monkeypatch.setattr(db_session_module, "SessionLocal", sessionmaker(bind=db_engine))
+        _, tables = _floor(db_session)
+        sent = []
+
+        async def broadcast(message):
+            sent.append(message)
+
+        hub = InProcessHub()
+        workers = []
+        for registry in (floor_state, FloorStateRegistry()):
+            bus = EventBus()
+            await bus.start(InProcessBackend(hub))
+            registry.start(broadcast, bus=bus)
+            registry.venue(db_session, VENUE_ID)
+            workers.append((bus, registry))
+        remote = workers[1][1]
+        try:
+            db_session.get(Table, tables[1].id).area = "Bar"
+            db_session.commit()
+            await floor_state.flush()
+            await remote.flush()
+        finally:
+            for bus, registry in workers:
+                registry.stop()
+                await bus.stop()
+
+        assert remote.venue(db_session, VENUE_ID).tables[tables[1].id]["area"] == "Bar"
+        # Each worker pushes the delta to its own sockets
+        assert [(m["action"], m["data"]["table_id"]) for m in sent] == [("table_updated", tables[1].id)] * 2
+
+
+class TestMyTables:
+    async def test_every_active_session_of_the_venue(self, db_session, async_db_engine):
+        from sqlalchemy.ext.asyncio import AsyncSession
+
+        from app.api.routes.waiter_terminal.floor_plan_menu import get_my_tables
+        from app.core.rbac import TokenData, UserRole
+
+        waiter, tables = _floor(db_session)
+        # A second party seated at the same table, and a session of another venue
+        db_session.add(TableSession(table_id=tables[0].id, venue_id=VENUE_ID, guest_count=2, waiter_id=waiter.id))
+        db_session.add(TableSession(table_id=tables[1].id, venue_id=VENUE_ID + 1, guest_count=2, waiter_id=waiter.id))
+        db_session.commit()
+        user = TokenData(waiter.id, "maria@example.com", UserRole.STAFF, venue_id=VENUE_ID, full_name=waiter.full_name)
+
+        async with AsyncSession(async_db_engine) as db:
+            page = await get_my_tables.__wrapped__(None, db, skip=0, limit=50, current_user=user)
+
+        assert page.total == 4
+        assert sorted(t.table_id for t in page.items) == sorted([tables[0].id, tables[0].id, tables[2].id, tables[4].id])
+        assert sorted(t.guest_count for t in page.items if t.table_id == tables[0].id) == [2, 3]
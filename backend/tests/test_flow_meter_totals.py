@@ -0,0 +1,212 @@
+"""Tests for flow meter running totals on kegs and bulk tanks.
+
+Covers incremental totals, batched gateway ingest and drift reconciliation.
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core import rbac
+from app.models.advanced_features_v9 import BulkTankLevel, FlowMeterReading, IoTDevice, KegTracking
+from app.services.iot_service import IoTService
+
+
+API = "/api/v1"
+
+
+@pytest.fixture
+def client(client, db_engine, monkeypatch):
+    """get_current_user looks the token's user up in the test database."""
+    monkeypatch.setattr(rbac, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=db_engine))
+    return client
+
+
+@pytest.fixture
+def flow_meter(db_session: Session) -> IoTDevice:
+    device = IoTDevice(
+        venue_id=1,
+        device_id="FLOW-TAP-1",
+        device_type="flow_meter",
+        device_name="Tap wall meter",
+    )
+    db_session.add(device)
+    db_session.commit()
+    return device
+
+
+@pytest.fixture
+def keg(db_session: Session) -> KegTracking:
+    IoTService.register_keg(db_session, venue_id=1, keg_id="KEG-1", product_name="Lager", keg_size_liters=20)
+    return db_session.query(KegTracking).filter(KegTracking.keg_id == "KEG-1").one()
+
+
+@pytest.fixture
+def tank(db_session: Session) -> BulkTankLevel:
+    IoTService.register_bulk_tank(
+        db_session, venue_id=1, tank_id="TANK-1", tank_name="Cola syrup",
+        capacity_liters=10, product_type="syrup", min_level_liters=2,
+    )
+    return db_session.query(BulkTankLevel).filter(BulkTankLevel.tank_id == "TANK-1").one()
+
+
+def _pour(db_session, device, container_id, ml, **kwargs):
+    return IoTService.record_flow_meter_reading(
+        db_session, venue_id=1, device_id=device.id, meter_type="beer",
+        flow_volume_ml=ml, container_id=container_id, **kwargs,
+    )
+
+
+class TestFlowRunningTotals:
+    """Readings advance the container totals without re-summing history."""
+
+    def test_keg_totals_accumulate(self, db_session: Session, flow_meter, keg):
+        _pour(db_session, flow_meter, "KEG-1", 500)
+        result = _pour(db_session, flow_meter, "KEG-1", 400)
+
+        assert result["total_dispensed_ml"] == 900
+        assert result["remaining_ml"] == 19100
+        db_session.refresh(keg)
+        assert keg.dispensed_volume_ml == 900
+        assert keg.current_volume_ml == 19100
+        assert keg.pours_count == 2
+        assert keg.last_reading_ml == 400
+        assert keg.last_reading_at is not None
+
+    def test_keg_low_and_empty(self, db_session: Session, flow_meter, keg):
+        result = _pour(db_session, flow_meter, "KEG-1", 18500)
+        assert result["alert"]["type"] == "low_level"
+        db_session.refresh(keg)
+        assert keg.status == "low"
+
+        result = _pour(db_session, flow_meter, "KEG-1", 2000)
+        assert result["alert"]["type"] == "empty"
+        db_session.refresh(keg)
+        assert keg.status == "empty"
+        assert keg.current_volume_ml == 0
+        assert keg.empty_date is not None
+
+    def test_bulk_tank_totals_and_level(self, db_session: Session, flow_meter, tank):
+        result = _pour(db_session, flow_meter, "TANK-1", 8500)
+
+        assert result["remaining_ml"] == 1500
+        assert result["fill_percentage"] == 15.0
+        db_session.refresh(tank)
+        assert tank.current_level_liters == 1.5
+        assert tank.dispensed_volume_ml == 8500
+        assert tank.pours_count == 1
+        assert tank.status == "low"
+
+    def test_tank_refill_resets_totals(self, db_session: Session, flow_meter, tank):
+        _pour(db_session, flow_meter, "TANK-1", 3000)
+        IoTService.update_bulk_tank_level(db_session, venue_id=1, tank_id="TANK-1", current_level_liters=10)
+
+        db_session.refresh(tank)
+        assert tank.dispensed_volume_ml == 0
+        assert tank.pours_count == 0
+
+    def test_untracked_container_continues_from_last_reading(self, db_session: Session, flow_meter):
+        _pour(db_session, flow_meter, "BIB-7", 250)
+        result = _pour(db_session, flow_meter, "BIB-7", 250)
+
+        assert result["total_dispensed_ml"] == 500
+        assert "remaining_ml" not in result
+
+    def test_unknown_device_rejected(self, db_session: Session, flow_meter, keg):
+        with pytest.raises(ValueError):
+            IoTService.record_flow_meter_reading(db_session, 1, 999, "beer", 100, container_id="KEG-1")
+
+
+class TestFlowBatchIngest:
+    """A gateway batch is applied in one transaction."""
+
+    def test_batch_running_totals_per_reading(self, db_session: Session, flow_meter, keg, tank):
+        start = datetime(2026, 1, 1, 18, 0, tzinfo=timezone.utc)
+        result = IoTService.record_flow_meter_readings(db_session, 1, [
+            {"device_id": flow_meter.id, "meter_type": "beer", "flow_volume_ml": 500,
+             "container_id": "KEG-1", "recorded_at": start},
+            {"device_id": flow_meter.id, "meter_type": "syrup", "flow_volume_ml": 1000,
+             "container_id": "TANK-1", "recorded_at": start},
+            {"device_id": flow_meter.id, "meter_type": "beer", "flow_volume_ml": 300,
+             "container_id": "KEG-1", "recorded_at": start + timedelta(seconds=30)},
+        ])
+
+        assert result["accepted"] == 3
+        assert [r["total_dispensed_ml"] for r in result["readings"]] == [500, 1000, 800]
+        assert [r["remaining_ml"] for r in result["readings"]] == [19500, 9000, 19200]
+        db_session.refresh(keg)
+        assert keg.dispensed_volume_ml == 800
+        assert keg.pours_count == 2
+        assert keg.last_reading_ml == 300
+
+    def test_batch_is_all_or_nothing(self, db_session: Session, flow_meter, keg):
+        with pytest.raises(ValueError):
+            IoTService.record_flow_meter_readings(db_session, 1, [
+                {"device_id": flow_meter.id, "meter_type": "beer", "flow_volume_ml": 500, "container_id": "KEG-1"},
+                {"device_id": 999, "meter_type": "beer", "flow_volume_ml": 500, "container_id": "KEG-1"},
+            ])
+
+        assert db_session.query(FlowMeterReading).count() == 0
+        db_session.refresh(keg)
+        assert keg.dispensed_volume_ml == 0
+
+    def test_batch_endpoint(self, client: TestClient, auth_headers: dict, flow_meter, keg):
+        response = client.post(f"{API}/v9/iot/flow/readings/batch", headers=auth_headers, json={
+            "readings": [
+                {"device_id": flow_meter.id, "meter_type": "beer", "flow_volume_ml": 500, "container_id": "KEG-1"},
+                {"device_id": flow_meter.id, "meter_type": "beer", "flow_volume_ml": 250, "container_id": "KEG-1"},
+            ]
+        })
+
+        assert response.status_code == 200
+        assert response.json()["accepted"] == 2
+        assert response.json()["readings"][-1]["total_dispensed_ml"] == 750
+
+
+class TestFlowReconciliation:
+    """Reconciliation recomputes totals from the readings and flags drift."""
+
+    def test_consistent_totals_have_no_drift(self, db_session: Session, flow_meter, keg):
+        _pour(db_session, flow_meter, "KEG-1", 500)
+
+        result = IoTService.reconcile_flow_totals(db_session, venue_id=1)
+
+        assert result["drifted"] == []
+        db_session.refresh(keg)
+        assert keg.totals_drift_ml == 0
+        assert keg.reconciled_at is not None
+
+    def test_drift_is_flagged_and_corrected(self, db_session: Session, flow_meter, keg, tank):
+        _pour(db_session, flow_meter, "KEG-1", 500)
+        _pour(db_session, flow_meter, "TANK-1", 1000)
+        keg.dispensed_volume_ml = 1500
+        tank.pours_count = 5
+        db_session.commit()
+
+        result = IoTService.reconcile_flow_totals(db_session, venue_id=1)
+
+        assert {d["container_id"] for d in result["drifted"]} == {"KEG-1", "TANK-1"}
+        db_session.refresh(keg)
+        db_session.refresh(tank)
+        assert keg.totals_drift_ml == 1000
+        assert keg.dispensed_volume_ml == 500
+        assert keg.current_volume_ml == 19500
+        assert tank.pours_count == 1
+
+    def test_readings_of_a_previous_keg_cycle_are_ignored(self, db_session: Session, flow_meter, keg):
+        _pour(db_session, flow_meter, "KEG-1", 500)
+        db_session.query(FlowMeterReading).update({"recorded_at": datetime.now(timezone.utc) - timedelta(days=2)})
+        keg.tapped_date = datetime.now(timezone.utc) - timedelta(days=1)
+        keg.dispensed_volume_ml = 0
+        keg.pours_count = 0
+        db_session.commit()
+        _pour(db_session, flow_meter, "KEG-1", 300)
+
+        result = IoTService.reconcile_flow_totals(db_session)
+
+        assert result["drifted"] == []
+        assert result["kegs_checked"] == 1
+        db_session.refresh(keg)
+        assert keg.dispensed_volume_ml == 300
+        assert keg.pours_count == 1
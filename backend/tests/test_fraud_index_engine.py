@@ -0,0 +1,138 @@
+"""Tests for the venue fraud index batch engine.
+
+Batch scores must match the per-employee calculate_fraud_index path, use a
+constant number of queries and only rescore staff with new activity.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import AuditLog, CashDrawer, CashDrawerTransaction, FraudScore, Order, OrderStatus, StaffUser
+from app.services import fraud_index_engine as engine_module
+from app.services.employee_fraud_detection_service import EmployeeFraudDetectionService
+from app.services.fraud_index_engine import FraudIndexEngine
+
+VENUE_ID = 1
+
+
+def _seed_staff(db: Session, count: int):
+    now = datetime.now(timezone.utc)
+    staff = []
+    for n in range(count):
+        member = StaffUser(full_name=f"Waiter {n}", role="waiter", location_id=VENUE_ID)
+        db.add(member)
+        db.flush()
+        staff.append(member)
+        for k in range(6 + n):
+            cancelled = k < n
+            db.add(Order(
+                order_number=f"F-{member.id}-{k}",
+                waiter_id=member.id,
+                venue_id=VENUE_ID,
+                total=20.0 + 15 * k,
+                status=OrderStatus.CANCELLED if cancelled else OrderStatus.SERVED,
+                payment_method="cash",
+                created_at=now - timedelta(days=1, minutes=10 * k),
+                updated_at=now - timedelta(days=1, minutes=10 * k - 2) if cancelled else None,
+            ))
+        drawer = CashDrawer(
+            venue_id=VENUE_ID, staff_user_id=member.id, opening_balance=100.0,
+            variance=-10.0 * (n + 1), opened_at=now - timedelta(days=2),
+        )
+        db.add(drawer)
+        db.flush()
+        for _ in range(11 + n):
+            db.add(CashDrawerTransaction(
+                drawer_id=drawer.id, staff_user_id=member.id, transaction_type="no_sale", amount=0.0
+            ))
+        db.add(AuditLog(
+            staff_user_id=member.id, action="void_approval", entity_type="order", created_at=now - timedelta(hours=5)
+        ))
+    db.add(StaffUser(full_name="Former", role="waiter", location_id=VENUE_ID, is_active=False))
+    db.commit()
+    return staff
+
+
+def _count_statements(db: Session, fn):
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    return result, statements
+
+
+class TestFraudIndexBatch:
+    """Venue batches score every active staff member from shared queries."""
+
+    def test_batch_matches_per_employee_scores(self, db_session: Session):
+        staff = _seed_staff(db_session, 3)
+        batch = FraudIndexEngine().get(EmployeeFraudDetectionService(db_session), VENUE_ID)
+
+        assert sorted(batch.results) == [s.id for s in staff]
+        for member in staff:
+            expected = EmployeeFraudDetectionService(db_session).calculate_fraud_index(member.id)
+            result = batch.results[member.id]
+            assert result["category_scores"] == expected["category_scores"]
+            assert (result["fraud_index"], result["risk_level"]) == (expected["fraud_index"], expected["risk_level"])
+            assert result["transactions_analyzed"] == 6 + staff.index(member)
+
+    def test_query_count_does_not_grow_with_staff(self, db_session: Session):
+        _seed_staff(db_session, 2)
+        service = EmployeeFraudDetectionService(db_session)
+        _, few = _count_statements(db_session, lambda: FraudIndexEngine().get(service, VENUE_ID))
+
+        _seed_staff(db_session, 6)
+        batch, many = _count_statements(db_session, lambda: FraudIndexEngine().get(service, VENUE_ID))
+
+        assert len(batch.results) == 8
+        assert len(many) == len(few)
+
+    def test_cached_then_incremental(self, db_session: Session):
+        staff = _seed_staff(db_session, 3)
+        service = EmployeeFraudDetectionService(db_session)
+        engine = FraudIndexEngine(cache_seconds=60)
+        first = engine.get(service, VENUE_ID)
+        assert first.rescored == [s.id for s in staff]
+
+        cached, statements = _count_statements(db_session, lambda: engine.get(service, VENUE_ID))
+        assert cached.rescored == [] and statements == []
+        assert cached.results == first.results
+
+        db_session.add(Order(order_number="F-new", waiter_id=staff[1].id, venue_id=VENUE_ID, total=40.0))
+        db_session.commit()
+        refreshed = engine.get(service, VENUE_ID, max_age_seconds=0)
+
+        assert refreshed.rescored == [staff[1].id]
+        assert refreshed.results[staff[1].id]["transactions_analyzed"] == 8
+        assert refreshed.results[staff[0].id] is first.results[staff[0].id]
+        assert engine.get(service, VENUE_ID, incremental=False).rescored == [s.id for s in staff]
+
+
+class TestFraudDashboard:
+    def test_dashboard_persists_only_rescored_staff(self, db_session: Session, monkeypatch):
+        staff = _seed_staff(db_session, 2)
+        monkeypatch.setattr(engine_module, "fraud_index_engine", FraudIndexEngine(cache_seconds=60))
+
+        dashboard = EmployeeFraudDetectionService(db_session).get_fraud_dashboard(VENUE_ID)
+        assert dashboard["summary"]["staff_count"] == 2
+        assert {e["staff_id"] for e in dashboard["top_risk_employees"]} == {s.id for s in staff}
+        assert db_session.query(FraudScore).count() == 2
+        assert db_session.query(FraudScore).first().venue_id == VENUE_ID
+
+        EmployeeFraudDetectionService(db_session).get_fraud_dashboard(VENUE_ID)
+        assert db_session.query(FraudScore).count() == 2
+
+    @pytest.mark.parametrize("thresholds", [None, {"void_rate_threshold": 1.0}])
+    def test_thresholds_are_part_of_cache_key(self, db_session: Session, thresholds):
+        _seed_staff(db_session, 1)
+        engine = FraudIndexEngine(cache_seconds=60)
+        engine.get(EmployeeFraudDetectionService(db_session), VENUE_ID)
+
+        batch = engine.get(EmployeeFraudDetectionService(db_session, thresholds), VENUE_ID)
+        assert bool(batch.rescored) == bool(thresholds)
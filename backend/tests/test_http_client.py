@@ -0,0 +1,145 @@
+"""Tests for the shared outbound HTTP client registry.
+
+A stand-in HTTP/1.1 keep-alive server on localhost counts the TCP
+connections it accepts.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import http_client as http_client_module
+from app.core.http_client import HttpClientRegistry, IntegrationLimits
+
+
+class StandInServer:
+    """Minimal keep-alive HTTP server answering every request with 200 "ok"."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.connections = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                self.requests += 1
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                await asyncio.sleep(self.delay)
+                self.in_flight -= 1
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+
+@pytest.fixture
+async def server():
+    stand_in = StandInServer()
+    await stand_in.start()
+    yield stand_in
+    await stand_in.stop()
+
+
+class TestHttpClientRegistry:
+    """Test connection reuse, concurrency caps and per-host metrics."""
+
+    async def test_clients_reuse_pooled_connection(self, server):
+        registry = HttpClientRegistry()
+        try:
+            for _ in range(5):
+                # Each call site opens and closes its own client, as services do
+                async with registry.client("stripe") as client:
+                    response = await client.get(f"{server.url}/ping")
+                    assert response.text == "ok"
+        finally:
+            await registry.aclose()
+
+        assert server.requests == 5
+        assert server.connections == 1
+        assert registry.stats["pools_opened"] == 1
+
+    async def test_integrations_have_separate_pools(self, server):
+        registry = HttpClientRegistry()
+        try:
+            async with registry.client("stripe") as client:
+                await client.get(server.url)
+            async with registry.client("xero") as client:
+                await client.get(server.url)
+            assert registry.get_stats()["pools"] == ["stripe", "xero"]
+        finally:
+            await registry.aclose()
+
+        assert server.connections == 2
+
+    async def test_concurrency_cap(self, monkeypatch):
+        monkeypatch.setitem(http_client_module.INTEGRATION_LIMITS, "capped",
+                            IntegrationLimits(timeout=5.0, max_concurrency=2))
+        slow = StandInServer(delay=0.05)
+        await slow.start()
+        registry = HttpClientRegistry()
+        try:
+            async with registry.client("capped") as client:
+                await asyncio.gather(*(client.get(slow.url) for _ in range(6)))
+        finally:
+            await registry.aclose()
+            await slow.stop()
+
+        assert slow.requests == 6
+        assert slow.peak_in_flight == 2
+
+    async def test_latency_and_errors_recorded_per_host(self, server):
+        closed = StandInServer()
+        await closed.start()
+        await closed.stop()
+        registry = HttpClientRegistry()
+        try:
+            async with registry.client("webhooks") as client:
+                await client.get(server.url)
+                with pytest.raises(Exception):
+                    await client.get(closed.url)
+        finally:
+            await registry.aclose()
+
+        assert sum(registry.latency[("webhooks", "127.0.0.1")].counts) == 2
+        assert registry.errors == {("webhooks", "127.0.0.1", "ConnectError"): 1}
+        lines = registry.prometheus_lines()
+        assert 'http_client_request_duration_seconds_count{integration="webhooks",host="127.0.0.1"} 2' in lines
+        assert 'http_client_errors_total{integration="webhooks",host="127.0.0.1",kind="ConnectError"} 1' in lines
+
+    async def test_sync_client_reuses_connection(self, server):
+        registry = HttpClientRegistry()
+
+        def fetch():
+            for _ in range(3):
+                with registry.sync_client("weather") as client:
+                    assert client.get(server.url).text == "ok"
+
+        try:
+            await asyncio.to_thread(fetch)
+        finally:
+            await registry.aclose()
+        assert server.connections == 1
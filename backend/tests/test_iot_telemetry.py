@@ -0,0 +1,199 @@
+"""Tests for the temperature telemetry pipeline.
+
+Covers alert hysteresis and its dedupe across workers, batched writes,
+backpressure, minute/hour rollups, the reports that read them and raw-reading
+retention.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.advanced_features_v9 import IoTDevice, TemperatureLog, TemperatureRollup
+from app.services import iot_telemetry
+from app.services.iot_service import IoTService
+from app.services.iot_telemetry import TelemetryBackpressure, TemperatureTelemetry, purge_expired_telemetry
+
+
+@pytest.fixture
+def telemetry(db_engine, monkeypatch):
+    """Fresh pipeline (empty sensor cache and alert state) on the test database."""
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+    monkeypatch.setattr(iot_telemetry, "SessionLocal", factory)
+    telemetry = TemperatureTelemetry(max_queue_size=100, batch_size=50, flush_interval=60, hysteresis_c=0.5)
+    monkeypatch.setattr(iot_telemetry, "temperature_telemetry", telemetry)
+    return telemetry
+
+
+@pytest.fixture
+def fridge(db_session: Session) -> IoTDevice:
+    device = IoTDevice(
+        venue_id=1,
+        device_id="TEMP-FRIDGE-1",
+        device_type="temperature_sensor",
+        device_name="Bar fridge",
+        location="Bar fridge",
+        configuration={"min_temp": 0, "max_temp": 5},
+    )
+    db_session.add(device)
+    db_session.commit()
+    return device
+
+
+def _rollups(db: Session, resolution: str):
+    db.expire_all()
+    return db.query(TemperatureRollup).filter(TemperatureRollup.resolution == resolution).all()
+
+
+class TestTemperatureAlerts:
+    """Thresholds are evaluated in memory with hysteresis."""
+
+    def test_reading_is_written_with_rollups_when_not_running(self, db_session: Session, telemetry, fridge):
+        result = IoTService.record_temperature(db_session, fridge.id, 3.5)
+
+        assert result["within_range"] is True
+        assert result["id"] is not None
+        log = db_session.query(TemperatureLog).one()
+        assert (log.temperature_celsius, log.location, log.is_in_range) == (3.5, "Bar fridge", True)
+        [minute] = _rollups(db_session, "minute")
+        assert (minute.reading_count, minute.min_celsius, minute.max_celsius) == (1, 3.5, 3.5)
+        assert len(_rollups(db_session, "hour")) == 1
+        db_session.refresh(fridge)
+        assert fridge.last_seen is not None
+
+    def test_alert_opens_once_and_clears_with_hysteresis(self, db_session: Session, telemetry, fridge):
+        results = [
+            IoTService.record_temperature(db_session, fridge.id, t)
+            for t in (4.0, 6.0, 7.0, 4.8, 4.0, 6.0)
+        ]
+
+        assert ["alert" in r for r in results] == [False, True, False, False, False, True]
+        assert results[3]["within_range"] is True
+        assert results[4].get("alert_cleared") is True
+        assert db_session.query(TemperatureLog).filter(TemperatureLog.alert_triggered.is_(True)).count() == 2
+
+    def test_other_worker_does_not_reopen_the_alert(self, db_session: Session, telemetry, fridge):
+        other_worker = TemperatureTelemetry(hysteresis_c=0.5)
+
+        other_worker.ingest(db_session, fridge.id, 4.0)
+        opened = telemetry.ingest(db_session, fridge.id, 6.0)
+        duplicate = other_worker.ingest(db_session, fridge.id, 7.0)
+        restarted = TemperatureTelemetry(hysteresis_c=0.5).ingest(db_session, fridge.id, 7.5)
+
+        assert "alert" in opened
+        assert "alert" not in duplicate and "alert" not in restarted
+        assert db_session.query(TemperatureLog).filter(TemperatureLog.alert_triggered.is_(True)).count() == 1
+        db_session.refresh(fridge)
+        assert fridge.alert_type == "above_maximum"
+
+        telemetry.ingest(db_session, fridge.id, 3.0)
+        db_session.refresh(fridge)
+        assert fridge.alert_type is None
+
+    def test_unknown_or_foreign_device_rejected(self, db_session: Session, telemetry, fridge):
+        with pytest.raises(ValueError):
+            IoTService.record_temperature(db_session, 999, 3.0)
+        with pytest.raises(ValueError):
+            IoTService.record_temperature_readings(db_session, 2, [{"device_id": fridge.id, "temperature": 3.0}])
+
+
+class TestTemperatureBatching:
+    """Queued readings are bulk-written with their rollups."""
+
+    async def test_queued_readings_flush_on_stop(self, db_session: Session, telemetry, fridge):
+        await telemetry.start()
+        start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        result = IoTService.record_temperature_readings(db_session, 1, [
+            {"device_id": fridge.id, "temperature": t, "recorded_at": start + timedelta(seconds=10 * i)}
+            for i, t in enumerate((2.0, 3.0, 4.0))
+        ])
+
+        assert result == {"accepted": 3, "alerts": []}
+        assert telemetry.get_stats()["queue_depth"] == 3
+        assert db_session.query(TemperatureLog).count() == 0
+
+        await telemetry.stop()
+        assert db_session.query(TemperatureLog).count() == 3
+        [minute] = _rollups(db_session, "minute")
+        assert (minute.reading_count, minute.min_celsius, minute.max_celsius, minute.sum_celsius) == (3, 2.0, 4.0, 9.0)
+
+    async def test_alert_reading_bypasses_queue(self, db_session: Session, telemetry, fridge):
+        await telemetry.start()
+        result = IoTService.record_temperature(db_session, fridge.id, 9.0)
+
+        assert result["alert"]["type"] == "above_maximum"
+        assert db_session.query(TemperatureLog).filter(TemperatureLog.id == result["id"]).count() == 1
+        assert telemetry.get_stats()["queue_depth"] == 0
+        await telemetry.stop()
+
+    async def test_full_queue_rejects_readings(self, db_session: Session, telemetry, fridge):
+        telemetry.max_queue_size = 2
+        await telemetry.start()
+        readings = [{"device_id": fridge.id, "temperature": 3.0}] * 3
+
+        with pytest.raises(TelemetryBackpressure) as exc:
+            IoTService.record_temperature_readings(db_session, 1, readings)
+        assert exc.value.retry_after == 60
+        assert telemetry.get_stats()["queue_depth"] == 0
+
+        IoTService.record_temperature_readings(db_session, 1, readings[:2])
+        with pytest.raises(TelemetryBackpressure):
+            IoTService.record_temperature(db_session, fridge.id, 3.0)
+        await telemetry.stop()
+        assert db_session.query(TemperatureLog).count() == 2
+
+    async def test_failed_batch_is_written_row_by_row(self, db_session: Session, telemetry, fridge):
+        await telemetry.start()
+        IoTService.record_temperature_readings(db_session, 1, [
+            {"device_id": fridge.id, "temperature": t} for t in (2.0, 3.0, 4.0)
+        ])
+        telemetry._queue[1]["temperature_celsius"] = None
+
+        await telemetry.stop()
+
+        stats = telemetry.get_stats()
+        assert (stats["written"], stats["dropped"], stats["write_errors"]) == (2, 1, 1)
+        assert sorted(log.temperature for log in db_session.query(TemperatureLog)) == [2.0, 4.0]
+
+    def test_later_readings_increment_existing_bucket(self, db_session: Session, telemetry, fridge):
+        at = datetime.now(timezone.utc).replace(second=5, microsecond=0)
+        IoTService.record_temperature_readings(db_session, 1, [{"device_id": fridge.id, "temperature": 1.0, "recorded_at": at}])
+        IoTService.record_temperature_readings(db_session, 1, [
+            {"device_id": fridge.id, "temperature": -1.0, "recorded_at": at + timedelta(seconds=20)}
+        ])
+
+        [minute] = _rollups(db_session, "minute")
+        assert (minute.reading_count, minute.min_celsius, minute.max_celsius, minute.out_of_range_count) == (2, -1.0, 1.0, 1)
+
+
+class TestTemperatureReports:
+    """History and HACCP reports read the rollups; retention keeps alerts."""
+
+    def test_history_and_haccp_report_from_rollups(self, db_session: Session, telemetry, fridge):
+        now = datetime.now(timezone.utc)
+        for i, t in enumerate((2.0, 4.0, 8.0)):
+            telemetry.ingest(db_session, fridge.id, t, recorded_at=now - timedelta(minutes=3 - i))
+
+        history = IoTService.get_temperature_history(db_session, 1, device_id=fridge.id)
+        assert history["resolution"] == "minute"
+        assert history["total_readings"] == 3
+        assert history["alerts_count"] == 1
+
+        report = IoTService.get_haccp_compliance_report(db_session, 1, now.date() - timedelta(days=1), now.date())
+        location = report["by_location"]["Bar fridge"]
+        assert (location["readings"], location["min_temp"], location["max_temp"]) == (3, 2.0, 8.0)
+        assert location["avg_temp"] == round(14 / 3, 2)
+        assert report["summary"]["out_of_range_readings"] == 1
+        assert report["summary"]["total_alerts"] == 1
+
+    def test_retention_keeps_alert_rows_and_hour_rollups(self, db_session: Session, telemetry, fridge):
+        old = datetime.now(timezone.utc) - timedelta(days=30)
+        for t in (3.0, 9.0):
+            telemetry.ingest(db_session, fridge.id, t, recorded_at=old)
+
+        result = purge_expired_telemetry(db_session, raw_retention_days=14, minute_retention_days=14)
+
+        assert result == {"raw_readings": 1, "minute_rollups": 1}
+        assert db_session.query(TemperatureLog).one().alert_triggered is True
+        assert len(_rollups(db_session, "hour")) == 1
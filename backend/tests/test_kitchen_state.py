@@ -0,0 +1,188 @@
+"""Tests for the in-memory KDS state behind KitchenDisplayService."""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from app.services.kitchen_display_service import KitchenDisplayService
+from app.services.kitchen_state import KitchenStateRegistry, TimerWheel, kitchen_state
+from app.services.ws_event_bus import EventBus, InProcessBackend, InProcessHub
+
+VENUE_ID = 1
+
+
+def _items(category: str, quantity: int = 1):
+    return [{"name": f"{category} item", "category": category, "quantity": quantity}]
+
+
+class _StatementCounter:
+    def __init__(self, session):
+        self.bind = session.get_bind()
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+class TestTimerWheel:
+    """Test the hashed timer wheel."""
+
+    def test_expires_in_deadline_order(self):
+        wheel = TimerWheel(slots=8)
+        wheel.advance(1000)
+        wheel.schedule(1003.5, "b")
+        wheel.schedule(1002, "a")
+        wheel.schedule(1030, "far")  # several revolutions out
+
+        assert wheel.advance(1001) == []
+        assert wheel.advance(1004) == ["a", "b"]
+        assert wheel.advance(1029) == []
+        assert wheel.advance(1030) == ["far"]
+
+    def test_large_gap_expires_everything_due(self):
+        wheel = TimerWheel(slots=8)
+        wheel.advance(0)
+        for deadline in (3, 9, 17, 500):
+            wheel.schedule(deadline, deadline)
+        assert wheel.advance(100) == [3, 9, 17]
+        assert wheel.advance(10_000) == [500]
+
+
+class TestKitchenState:
+    """Test station queues, expo and cook-time stages served from memory."""
+
+    def test_station_display_is_served_without_queries(self, db_session):
+        svc = KitchenDisplayService(db_session)
+        svc.create_ticket(VENUE_ID, order_id=1, items=_items("mains"))
+        svc.create_ticket(VENUE_ID, order_id=2, items=_items("mains", 2), is_rush=True)
+        svc.create_ticket(VENUE_ID, order_id=3, items=_items("sides"))
+
+        with _StatementCounter(db_session) as counter:
+            display = svc.get_station_display(VENUE_ID, "KITCHEN-1")
+            overview = svc.get_kitchen_overview(VENUE_ID)
+            svc.get_cook_time_alerts(VENUE_ID)
+            svc.get_expo_display(VENUE_ID)
+        assert counter.count == 0
+
+        # Rush first, then by creation time
+        assert [t["order_id"] for t in display["tickets"]] == [2, 1, 3]
+        assert display["station"]["current_load"] == 3
+        kitchen = next(s for s in overview["stations"] if s["station_code"] == "KITCHEN-1")
+        assert kitchen["current_load"] == 3
+
+    def test_mutations_update_queues_and_expo(self, db_session):
+        svc = KitchenDisplayService(db_session)
+        first = svc.create_ticket(VENUE_ID, order_id=10, items=_items("mains"))["tickets"][0]["ticket_code"]
+        second = svc.create_ticket(VENUE_ID, order_id=11, items=_items("mains"))["tickets"][0]["ticket_code"]
+        drink = svc.create_ticket(VENUE_ID, order_id=11, items=_items("beer"))["tickets"][0]["ticket_code"]
+
+        assert svc.start_ticket(second)["success"]
+        assert svc.bump_ticket(first)["success"]
+        assert svc.void_ticket(drink, reason="customer left")["success"]
+
+        display = svc.get_station_display(VENUE_ID, "KITCHEN-1")
+        assert [(t["ticket_code"], t["status"]) for t in display["tickets"]] == [(second, "in_progress")]
+        assert svc.get_station_display(VENUE_ID, "BAR-1")["tickets"] == []
+        expo = svc.get_expo_display(VENUE_ID)
+        assert [o["order_id"] for o in expo["orders"]] == [10]
+
+        # A recalled ticket leaves expo and jumps to the top of its station
+        assert svc.recall_ticket(first, reason="cold")["success"]
+        display = svc.get_station_display(VENUE_ID, "KITCHEN-1")
+        assert [t["ticket_code"] for t in display["tickets"]] == [first, second]
+        assert display["tickets"][0]["priority"] == 3
+        assert svc.get_expo_display(VENUE_ID)["orders"] == []
+
+        # Reloading from the database gives the same screen
+        kitchen_state.invalidate(VENUE_ID)
+        reloaded = svc.get_station_display(VENUE_ID, "KITCHEN-1")
+        timing = ("wait_time_seconds", "wait_time_minutes")
+        assert [{k: v for k, v in t.items() if k not in timing} for t in reloaded["tickets"]] == [
+            {k: v for k, v in t.items() if k not in timing} for t in display["tickets"]
+        ]
+        assert reloaded["station"] == display["station"]
+
+    def test_timer_wheel_drives_alert_stages(self, db_session):
+        svc = KitchenDisplayService(db_session)
+        svc.create_ticket(VENUE_ID, order_id=20, items=_items("mains"))
+        state = kitchen_state.venue(db_session, VENUE_ID)
+        ticket = next(iter(state.tickets.values()))
+        target = 12 * 60  # KITCHEN-1 default avg cook time
+
+        def stage_at(fraction):
+            now = ticket.created + timedelta(seconds=target * fraction)
+            venue = kitchen_state.venue(db_session, VENUE_ID, now)
+            with kitchen_state.lock:
+                return (
+                    venue.alerts(None, now),
+                    venue.station_display("KITCHEN-1", now)["overdue_count"],
+                )
+
+        assert stage_at(0.5) == ([], 0)
+        alerts, overdue = stage_at(0.9)
+        assert [(a["alert_type"], a["severity"]) for a in alerts] == [("warning", "info")]
+        alerts, overdue = stage_at(1.6)
+        assert [(a["alert_type"], a["severity"]) for a in alerts] == [("overdue", "warning")]
+        assert overdue == 1
+        alerts, _ = stage_at(2.1)
+        assert [(a["alert_type"], a["severity"]) for a in alerts] == [("overdue", "critical")]
+
+    async def test_deltas_are_pushed_to_broadcast(self, db_session):
+        sent = []
+
+        async def broadcast(message):
+            sent.append(message)
+
+        svc = KitchenDisplayService(db_session)
+        svc.get_kitchen_overview(VENUE_ID)
+        await kitchen_state.start(broadcast)
+        try:
+            code = svc.create_ticket(VENUE_ID, order_id=30, items=_items("mains"))["tickets"][0]["ticket_code"]
+            svc.bump_ticket(code)
+            # Jump past the warning and overdue thresholds
+            later = datetime.now(timezone.utc) + timedelta(hours=1)
+            svc.create_ticket(VENUE_ID, order_id=31, items=_items("mains"))
+            kitchen_state.venue(db_session, VENUE_ID, later)
+            await kitchen_state.flush()
+        finally:
+            await kitchen_state.stop()
+
+        actions = [(m["action"], m["data"].get("stage")) for m in sent]
+        assert actions[:3] == [("ticket_added", "ok"), ("ticket_removed", None), ("ticket_added", "ok")]
+        assert actions[3:] == [("ticket_stage", "critical")]
+        assert all(m["type"] == "kds" and m["station_code"] == "KITCHEN-1" for m in sent)
+
+    async def test_changes_invalidate_the_venue_on_other_workers(self, db_session):
+        async def broadcast(message):
+            pass
+
+        hub = InProcessHub()
+        workers = []
+        for _ in range(2):
+            bus = EventBus()
+            await bus.start(InProcessBackend(hub))
+            registry = KitchenStateRegistry()
+            await registry.start(broadcast, bus=bus)
+            workers.append((bus, registry))
+        (_, local), (_, remote) = workers
+
+        KitchenDisplayService(db_session).get_kitchen_overview(VENUE_ID)
+        local.venue(db_session, VENUE_ID)
+        remote.venue(db_session, VENUE_ID)
+        try:
+            local.apply(db_session, VENUE_ID, [])
+            await local.flush()
+
+            assert VENUE_ID in local._venues
+            assert VENUE_ID not in remote._venues
+        finally:
+            for bus, registry in workers:
+                await registry.stop()
+                await bus.stop()
@@ -0,0 +1,112 @@
+"""Tests for the Prometheus metrics collector."""
+
+import json
+import os
+
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import DURATION_BUCKETS, MetricsCollector
+
+
+def _sample(output: str, name: str) -> float:
+    """Value of one sample (metric name plus labels) in exposition output."""
+    samples = dict(
+        line.rsplit(" ", 1) for line in output.splitlines() if line and not line.startswith("#")
+    )
+    return float(samples[name])
+
+
+class TestMetricsCollector:
+    """Test histograms, live gauges and multi-worker aggregation."""
+
+    def test_duration_histogram_is_cumulative(self):
+        collector = MetricsCollector()
+        for duration in (0.003, 0.005, 0.07, 0.07, 30.0):
+            collector.record_request("GET", "/api/v1/orders/12", 200, duration)
+
+        output = collector.get_prometheus_metrics()
+        labels = 'method="GET",path="/api/v1/orders/:id"'
+        assert _sample(output, f'http_request_duration_seconds_bucket{{{labels},le="0.005"}}') == 2
+        assert _sample(output, f'http_request_duration_seconds_bucket{{{labels},le="0.05"}}') == 2
+        assert _sample(output, f'http_request_duration_seconds_bucket{{{labels},le="0.1"}}') == 4
+        assert _sample(output, f'http_request_duration_seconds_bucket{{{labels},le="10.0"}}') == 4
+        assert _sample(output, f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}') == 5
+        assert _sample(output, f"http_request_duration_seconds_count{{{labels}}}") == 5
+        assert abs(_sample(output, f"http_request_duration_seconds_sum{{{labels}}}") - 30.148) < 1e-6
+
+    def test_histogram_memory_is_constant(self):
+        collector = MetricsCollector()
+        for i in range(5000):
+            collector.record_request("GET", "/health", 200, i / 1000)
+        histogram = collector.request_duration["GET /health"]
+        assert len(histogram.counts) == len(DURATION_BUCKETS) + 1
+        assert sum(histogram.counts) == 5000
+
+    def test_pool_gauges_follow_checkouts(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+        collector = MetricsCollector()
+        collector.instrument_pool(engine)
+
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert collector.db_pool_checked_out == 1
+            assert _sample(collector.get_prometheus_metrics(), "db_pool_checked_out") == 1
+        assert collector.db_pool_checked_out == 0
+        assert _sample(collector.get_prometheus_metrics(), "db_pool_size") == engine.pool.size()
+
+    def test_gauge_callbacks_are_summed(self):
+        collector = MetricsCollector()
+        collector.register_gauge("ws_active_connections", lambda: 3)
+        collector.register_gauge("ws_active_connections", lambda: 4)
+        collector.register_gauge("redis_connected", lambda: 1)
+
+        output = collector.get_prometheus_metrics()
+        assert _sample(output, "ws_active_connections") == 7
+        assert _sample(output, "redis_connected") == 1
+
+    def test_workers_are_merged_from_snapshot_files(self, tmp_path):
+        collector = MetricsCollector(multiproc_dir=str(tmp_path))
+        collector.register_gauge("ws_active_connections", lambda: 2)
+        collector.record_request("GET", "/api/v1/menu/items", 200, 0.02)
+        collector.record_request("POST", "/api/v1/orders", 500, 0.3)
+
+        # Another live worker (our parent process stands in for it)...
+        other = MetricsCollector()
+        other.register_gauge("ws_active_connections", lambda: 5)
+        other.record_request("GET", "/api/v1/menu/items", 200, 0.02)
+        other.record_request("GET", "/api/v1/menu/items", 404, 2.0)
+        snapshot = other.snapshot()
+        snapshot["pid"] = os.getppid()
+        (tmp_path / f"metrics_{os.getppid()}.json").write_text(json.dumps(snapshot))
+
+        # ...and an exited one whose gauges no longer count
+        dead = dict(snapshot, pid=2 ** 22 + 12345)
+        (tmp_path / f"metrics_{dead['pid']}.json").write_text(json.dumps(dead))
+
+        output = collector.get_prometheus_metrics()
+        assert (tmp_path / f"metrics_{os.getpid()}.json").exists()
+        assert _sample(output, 'http_requests_total{method="GET",path="/api/v1/menu/items"}') == 5
+        assert _sample(output, 'http_errors_total{status="404"}') == 2
+        assert _sample(output, 'http_errors_total{status="500"}') == 1
+        labels = 'method="GET",path="/api/v1/menu/items"'
+        assert _sample(output, f'http_request_duration_seconds_bucket{{{labels},le="0.025"}}') == 3
+        assert _sample(output, f"http_request_duration_seconds_count{{{labels}}}") == 5
+        assert _sample(output, "ws_active_connections") == 7
+        # The exited worker's counters moved to the archive and its file is gone
+        assert not (tmp_path / f"metrics_{dead['pid']}.json").exists()
+        assert json.loads((tmp_path / "archive.json").read_text())["requests"] == dead["requests"]
+        again = collector.get_prometheus_metrics()
+        assert _sample(again, 'http_requests_total{method="GET",path="/api/v1/menu/items"}') == 5
+
+    def test_snapshot_left_under_a_reused_pid_is_archived(self, tmp_path):
+        previous = MetricsCollector()
+        previous.record_request("GET", "/api/v1/orders", 200, 0.01)
+        (tmp_path / f"metrics_{os.getpid()}.json").write_text(json.dumps(previous.snapshot()))
+
+        collector = MetricsCollector(multiproc_dir=str(tmp_path))
+        collector.reap_dead_workers()
+        collector.record_request("GET", "/api/v1/orders", 200, 0.01)
+
+        output = collector.get_prometheus_metrics()
+        assert _sample(output, 'http_requests_total{method="GET",path="/api/v1/orders"}') == 2
+        assert sorted(p.name for p in tmp_path.glob("metrics_*.json")) == [f"metrics_{os.getpid()}.json"]
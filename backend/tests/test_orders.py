@@ -3,8 +3,10 @@
 import pytest
 from decimal import Decimal
 
+from app.core.cache import invalidate_menu_cache
 from app.models.restaurant import GuestOrder as GuestOrderModel, MenuItem, Table
 from app.models.location import Location
+from app.services.auto_86_service import Auto86Service
 
 
 @pytest.fixture
@@ -294,3 +296,63 @@ class TestMenuManagement:
     def test_list_menu_items(self, client, order_setup):
         res = client.get("/api/v1/menu/items")
         assert res.status_code == 200
+
+
+class TestGuestMenuSnapshot:
+    """Public menu endpoints serve cached snapshots with ETags."""
+
+    def test_table_menu_payload(self, client, order_setup):
+        res = client.get("/api/v1/menu/table/test-token-123")
+        assert res.status_code == 200
+        data = res.json()
+        assert data["table"]["number"] == "T1"
+        assert data["table"]["venue_name"] == ""
+        assert {c["name"] for c in data["categories"]} == {"Drinks", "Food"}
+        assert data["menu"]["total_items"] == 2
+        assert data["menu"]["categories"] == data["categories"]
+        assert res.headers["etag"]
+
+    def test_unknown_table_token_still_404(self, client, order_setup):
+        res = client.get("/api/v1/menu/table/not-a-real-token")
+        assert res.status_code == 404
+
+    def test_if_none_match_returns_304(self, client, order_setup):
+        for path in ("/api/v1/menu/display", "/api/v1/menu/items",
+                     "/api/v1/menu/categories", "/api/v1/menu/table/test-token-123"):
+            first = client.get(path)
+            etag = first.headers["etag"]
+            res = client.get(path, headers={"If-None-Match": etag})
+            assert res.status_code == 304, path
+            assert res.content == b""
+            assert res.headers["etag"] == etag
+
+    def test_items_filters_cached_separately(self, client, order_setup):
+        assert client.get("/api/v1/menu/items").json()["total"] == 2
+        assert client.get("/api/v1/menu/items", params={"available_only": False}).json()["total"] == 3
+        assert client.get("/api/v1/menu/items", params={"category": "Food"}).json()["total"] == 1
+
+    def test_snapshot_served_until_invalidated(self, client, order_setup):
+        db = order_setup["db"]
+        first = client.get("/api/v1/menu/display")
+        assert first.json()["total_items"] == 2
+
+        db.add(MenuItem(name="Lemonade", price=Decimal("3.00"), category="Drinks", available=True))
+        db.commit()
+        assert client.get("/api/v1/menu/display").json()["total_items"] == 2
+
+        invalidate_menu_cache()
+        res = client.get("/api/v1/menu/display", headers={"If-None-Match": first.headers["etag"]})
+        assert res.status_code == 200
+        assert res.json()["total_items"] == 3
+
+    def test_86_invalidates_snapshot(self, client, order_setup):
+        before = client.get("/api/v1/menu/display").json()
+        assert before["total_items"] == 2
+
+        Auto86Service(order_setup["db"]).manual_86(
+            order_setup["beer"].id, order_setup["location"].id, reason="keg empty",
+        )
+
+        data = client.get("/api/v1/menu/display").json()
+        assert data["total_items"] == 1
+        assert [c["name"] for c in data["categories"]] == ["Food"]
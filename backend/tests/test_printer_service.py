@@ -0,0 +1,151 @@
+"""Tests for the asyncio ESC/POS printer transport and per-printer job queue.
+
+A fake network printer is served with asyncio.start_server on localhost.
+"""
+
+import asyncio
+
+from app.services.printer_service import (
+    ConnectionType,
+    JobStatus,
+    PrinterConfig,
+    PrinterManager,
+    PrinterService,
+    ReceiptItem,
+)
+
+
+class FakePrinter:
+    """TCP server that records every byte it receives, per connection."""
+
+    def __init__(self):
+        self.connections = []
+        self.writers = []
+        self.server = None
+        self.port = None
+
+    async def start(self, port: int = 0):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader, writer):
+        received = bytearray()
+        self.connections.append(received)
+        self.writers.append(writer)
+        while data := await reader.read(4096):
+            received.extend(data)
+        writer.close()
+
+    def drop_connections(self):
+        for writer in self.writers:
+            writer.close()
+
+    async def stop(self):
+        self.drop_connections()
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def received(self) -> bytes:
+        return b"".join(bytes(c) for c in self.connections)
+
+
+def _printer(port: int) -> PrinterService:
+    printer = PrinterService(PrinterConfig(
+        name="Kitchen",
+        connection_type=ConnectionType.NETWORK,
+        ip_address="127.0.0.1",
+        port=port,
+    ))
+    printer.CONNECT_TIMEOUT = 0.5
+    printer.RETRY_BACKOFF = (0.01, 0.01, 0.05)
+    printer.SPOOL_RETRY_MAX = 0.05
+    return printer
+
+
+async def _wait_for(predicate, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+ITEMS = [ReceiptItem(name="Burger", quantity=2, price=12.5, modifiers=["No onion"])]
+
+
+class TestPrinterService:
+    """Test persistent connections, reconnects and spooling."""
+
+    async def test_jobs_share_one_connection(self):
+        server = FakePrinter()
+        await server.start()
+        printer = _printer(server.port)
+        try:
+            assert await printer.print_kitchen_ticket("101", "T4", ITEMS)
+            assert await printer.print_kitchen_ticket("102", "T5", ITEMS)
+            expected = (printer.build_kitchen_ticket(order_number="101", table_number="T4", items=ITEMS)
+                        + printer.build_kitchen_ticket(order_number="102", table_number="T5", items=ITEMS))
+            # Tickets carry a timestamp, so compare sizes rather than bytes
+            await _wait_for(lambda: len(server.received) == len(expected))
+            assert len(server.connections) == 1
+            assert printer.status == "online"
+            assert printer.last_success_at is not None
+        finally:
+            await printer.close()
+            await server.stop()
+
+    async def test_reconnects_after_printer_drops_connection(self):
+        server = FakePrinter()
+        await server.start()
+        printer = _printer(server.port)
+        try:
+            assert await printer.print_raw(b"first")
+            await _wait_for(lambda: server.received == b"first")
+            server.drop_connections()
+            await _wait_for(lambda: printer._reader.at_eof())
+
+            assert await printer.print_raw(b"second")
+            await _wait_for(lambda: server.received == b"firstsecond")
+            assert len(server.connections) == 2
+        finally:
+            await printer.close()
+            await server.stop()
+
+    async def test_kitchen_ticket_spools_until_printer_returns(self):
+        server = FakePrinter()
+        await server.start()
+        port = server.port
+        await server.stop()
+        printer = _printer(port)
+        try:
+            job = printer.submit(b"ticket", kind="kitchen_ticket", spool=True)
+            assert await job.wait() == JobStatus.SPOOLED
+            assert printer.status == "offline"
+            assert printer.queue_depth == 1
+
+            # Receipts fail fast instead of queueing behind the spooled ticket
+            assert not await printer.print_raw(b"receipt", kind="receipt")
+
+            await server.start(port)
+            await _wait_for(lambda: job.status == JobStatus.PRINTED)
+            await _wait_for(lambda: server.received == b"ticket")
+            assert printer.queue_depth == 0
+            assert printer.status == "online"
+        finally:
+            await printer.close()
+            await server.stop()
+
+    async def test_manager_reports_queue_depth_and_last_success(self):
+        manager = PrinterManager()
+        server = FakePrinter()
+        await server.start()
+        printer = manager.add_printer("bar", _printer(server.port).config)
+        try:
+            assert await printer.print_raw(b"x")
+            [info] = manager.list_printers()
+            assert info["status"] == "online"
+            assert info["queue_depth"] == 0
+            assert info["last_success_at"] is not None
+        finally:
+            await manager.close_all()
+            await server.stop()
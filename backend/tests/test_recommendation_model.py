@@ -0,0 +1,150 @@
+"""Tests for the resident recommendation model.
+
+Covers the CSR co-occurrence build, cart and user-based lookups, content
+similarity and folding new order lines into a resident snapshot.
+"""
+
+import numpy as np
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models import ItemTag, ItemTagLink, MenuItem, MenuItemRatingAggregate, Order, OrderItem
+from app.services.ai_recommendations_service import AIRecommendationsService
+from app.services.recommendation_model import RecommendationModels, _pairs_within_groups
+
+
+@pytest.fixture
+def menu(db_session: Session):
+    items = {
+        "lager": MenuItem(name="Lager", price=5.0, category="Beer", available=True),
+        "ipa": MenuItem(name="IPA", price=6.0, category="Beer", available=True),
+        "stout": MenuItem(name="Stout", price=6.5, category="Beer", available=False),
+        "fries": MenuItem(name="Fries", price=4.0, category="Food", available=True),
+        "burger": MenuItem(name="Burger", price=12.0, category="Food", available=True),
+    }
+    db_session.add_all(items.values())
+    db_session.flush()
+    hoppy = ItemTag(name="hoppy")
+    db_session.add(hoppy)
+    db_session.flush()
+    db_session.add_all([
+        ItemTagLink(item_id=items["lager"].id, tag_id=hoppy.id),
+        ItemTagLink(item_id=items["ipa"].id, tag_id=hoppy.id),
+    ])
+    db_session.commit()
+    return items
+
+
+def _order(db: Session, number: str, items, customer_id=None, venue_id=1) -> Order:
+    order = Order(order_number=number, venue_id=venue_id, customer_id=customer_id, total=0.0)
+    db.add(order)
+    db.flush()
+    for item in items:
+        db.add(OrderItem(order_id=order.id, menu_item_id=item.id, quantity=1, unit_price=item.price, total_price=item.price))
+    db.commit()
+    return order
+
+
+def _ids(entries):
+    return [e["item_id"] for e in entries]
+
+
+class TestPairs:
+    def test_pairs_within_groups(self):
+        left, right = _pairs_within_groups(np.array([1, 1, 1, 2, 2, 3]), np.array([0, 1, 2, 0, 3, 4]))
+
+        assert sorted(zip(left.tolist(), right.tolist())) == sorted([
+            (0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1), (0, 3), (3, 0),
+        ])
+
+
+class TestRecommendationModel:
+    """Snapshot queries answer the service's collaborative and content paths."""
+
+    def test_item_and_cart_based(self, db_session: Session, menu):
+        _order(db_session, "R-1", [menu["lager"], menu["fries"], menu["fries"]])
+        _order(db_session, "R-2", [menu["lager"], menu["fries"], menu["stout"]])
+        _order(db_session, "R-3", [menu["lager"], menu["burger"]])
+        _order(db_session, "R-4", [menu["ipa"], menu["burger"]], venue_id=2)
+
+        model = RecommendationModels(refresh_seconds=60).get(db_session, 1)
+
+        together = model.item_based(menu["lager"].id)
+        assert _ids(together) == [menu["fries"].id, menu["burger"].id]
+        assert [e["co_occurrence"] for e in together] == [2, 1]
+        cart = model.cart_based([menu["lager"].id, menu["fries"].id])
+        assert _ids(cart) == [menu["burger"].id]
+        assert cart[0]["frequency"] == 1
+
+    def test_user_based_skips_own_items(self, db_session: Session, menu):
+        _order(db_session, "U-1", [menu["lager"], menu["fries"]], customer_id=1)
+        _order(db_session, "U-2", [menu["lager"], menu["fries"], menu["burger"]], customer_id=2)
+        _order(db_session, "U-3", [menu["ipa"]], customer_id=3)
+
+        model = RecommendationModels(refresh_seconds=60).get(db_session, 1)
+
+        assert _ids(model.user_based(1)) == [menu["burger"].id]
+        assert model.user_based(3) is None
+        assert model.user_based(99) is None
+
+    def test_similar_items_by_category_price_and_tags(self, db_session: Session, menu):
+        model = RecommendationModels(refresh_seconds=60).get(db_session, 1)
+
+        similar = model.similar_items(menu["lager"].id)
+        assert similar[0]["item_id"] == menu["ipa"].id
+        assert similar[0]["similarity_score"] == 40 + 20 + 10
+        assert menu["stout"].id not in _ids(similar)
+        assert menu["burger"].id not in _ids(similar)
+
+    def test_new_lines_are_folded_into_resident_snapshot(self, db_session: Session, menu):
+        models = RecommendationModels(refresh_seconds=0)
+        order = _order(db_session, "N-1", [menu["lager"], menu["fries"]], customer_id=1)
+        first = models.get(db_session, 1)
+
+        db_session.add(OrderItem(order_id=order.id, menu_item_id=menu["burger"].id, quantity=1, unit_price=12.0, total_price=12.0))
+        db_session.commit()
+        _order(db_session, "N-2", [menu["lager"], menu["burger"]], customer_id=2)
+        refreshed = models.get(db_session, 1)
+
+        assert refreshed is not first
+        assert refreshed.built_at == first.built_at
+        assert _ids(first.item_based(menu["lager"].id)) == [menu["fries"].id]
+        assert [(e["item_id"], e["co_occurrence"]) for e in refreshed.item_based(menu["lager"].id)] == [
+            (menu["burger"].id, 2), (menu["fries"].id, 1),
+        ]
+        assert _ids(refreshed.user_based(2)) == [menu["fries"].id]
+
+        rebuilt = RecommendationModels(refresh_seconds=60).get(db_session, 1)
+        assert np.array_equal(rebuilt.co_data, refreshed.co_data)
+        assert np.array_equal(rebuilt.order_counts, refreshed.order_counts)
+
+    def test_menu_change_and_invalidate_rebuild(self, db_session: Session, menu):
+        models = RecommendationModels(refresh_seconds=0)
+        first = models.get(db_session, 1)
+
+        db_session.add(MenuItem(name="Cider", price=5.5, category="Beer", available=True))
+        db_session.commit()
+        rebuilt = models.get(db_session, 1)
+        assert rebuilt.built_at > first.built_at
+        assert rebuilt.item_count == first.item_count + 1
+
+        models.invalidate()
+        assert models.get(db_session, 1).generation == 1
+        assert models.get_stats()["venues"][1]["items"] == rebuilt.item_count
+
+
+class TestServiceFallback:
+    def test_customer_without_history_gets_popular_items(self, db_session: Session, menu):
+        _order(db_session, "P-1", [menu["burger"], menu["fries"]], customer_id=None)
+        _order(db_session, "P-2", [menu["burger"]], customer_id=None)
+        _order(db_session, "P-3", [menu["ipa"]], customer_id=None, venue_id=2)
+        db_session.add(MenuItemRatingAggregate(menu_item_id=menu["fries"].id, total_reviews=4, average_rating=4.5))
+        db_session.add(MenuItemRatingAggregate(menu_item_id=menu["burger"].id, total_reviews=0, average_rating=0))
+        db_session.commit()
+
+        popular = AIRecommendationsService(db_session).get_user_based_recommendations(999, 1)
+
+        assert _ids(popular) == [menu["fries"].id, menu["burger"].id]
+        assert popular[0]["avg_rating"] == 4.5
+        assert popular[1]["avg_rating"] is None
+        assert popular[1]["order_count"] == 2
@@ -0,0 +1,158 @@
+"""Tests for streaming report exports."""
+
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core import rbac
+from app.models.pos import PosSalesLine
+from app.models.staff import StaffUser, TimeClockEntry
+from app.models.stock import StockOnHand
+from app.services.report_export import iter_csv, iter_json, iter_pdf
+from app.services.scheduled_reports_service import ReportType, ScheduledReportsService
+
+
+@pytest.fixture
+def client(client, db_engine, monkeypatch):
+    """get_current_user looks the token's user up in the test database."""
+    monkeypatch.setattr(rbac, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=db_engine))
+    return client
+
+
+def _sales_lines(db, count, location_id=None):
+    now = datetime.now(timezone.utc)
+    db.execute(insert(PosSalesLine), [
+        {"ts": now - timedelta(minutes=n), "pos_item_id": f"P{n % 7}", "name": f"Item {n % 7}",
+         "qty": Decimal(n % 3 + 1), "is_refund": n % 50 == 0, "location_id": location_id, "processed": True}
+        for n in range(count)
+    ])
+    db.commit()
+
+
+def _export(client, auth_headers, report_type, format, period="week"):
+    return client.post(f"/api/v1/reports/export/{report_type}", headers=auth_headers,
+                       json={"format": format, "period": period})
+
+
+class TestEncoders:
+    def test_csv_chunks_join_to_the_whole_file(self):
+        rows = [[n, f"name {n}", Decimal("1.50") * n] for n in range(2000)]
+        chunks = list(iter_csv(["id", "name", "amount"], iter(rows), chunk_size=1024))
+
+        assert len(chunks) > 10
+        assert all(len(chunk) < 2048 for chunk in chunks)
+        parsed = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+        assert parsed[0] == ["id", "name", "amount"]
+        assert parsed[-1] == ["1999", "name 1999", "2998.5"]
+        assert len(parsed) == 2001
+
+    def test_json_streams_a_valid_document(self):
+        chunks = list(iter_json({"report_type": "sales"}, ["a", "b"], ([n, str(n)] for n in range(500)), chunk_size=256))
+
+        body = json.loads(b"".join(chunks))
+        assert len(chunks) > 1
+        assert body["report_type"] == "sales"
+        assert body["headers"] == ["a", "b"]
+        assert body["data"][499] == [499, "499"]
+
+    def test_pdf_is_truncated_at_max_rows(self):
+        consumed = []
+
+        def rows():
+            for n in range(100):
+                consumed.append(n)
+                yield [n, "x" * 200]
+
+        pdf = b"".join(iter_pdf(["n", "text"], rows(), title="Test", max_rows=60))
+        assert pdf.startswith(b"%PDF")
+        assert len(consumed) == 61
+
+
+class TestExportEndpoint:
+    def test_csv_exports_every_line_past_the_former_cap(self, client, db_session, auth_headers, test_location):
+        _sales_lines(db_session, 2500, test_location.id)
+
+        res = _export(client, auth_headers, "sales", "csv")
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/csv")
+        assert "sales_report_" in res.headers["content-disposition"]
+        rows = list(csv.reader(io.StringIO(res.text)))
+        assert rows[0] == ["Date", "Time", "POS Item ID", "Item", "Quantity", "Refund", "Location ID"]
+        assert len(rows) == 2501
+        assert sum(1 for r in rows[1:] if r[5] == "yes") == 50
+
+    def test_excel_export_is_a_workbook(self, client, db_session, auth_headers):
+        _sales_lines(db_session, 1200)
+
+        res = _export(client, auth_headers, "sales", "excel")
+        assert res.status_code == 200
+        assert res.headers["content-disposition"].endswith(".xlsx")
+        ws = load_workbook(io.BytesIO(res.content), read_only=True).active
+        rows = list(ws.iter_rows(values_only=True))
+        assert rows[0][0] == "Date"
+        assert len(rows) == 1201
+
+    def test_inventory_and_staff_exports(self, client, db_session, auth_headers, test_product, test_location):
+        test_product.cost_price = Decimal("2.50")
+        db_session.add(StockOnHand(product_id=test_product.id, location_id=test_location.id, qty=Decimal("8")))
+        staff = StaffUser(full_name="Ana Bar", role="bartender")
+        idle = StaffUser(full_name="Zed Idle", role="waiter")
+        db_session.add_all([staff, idle])
+        db_session.flush()
+        clock_in = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
+        db_session.add_all([
+            TimeClockEntry(staff_id=staff.id, clock_in=clock_in, total_hours=6.5),
+            TimeClockEntry(staff_id=staff.id, clock_in=clock_in + timedelta(hours=12), total_hours=2.0),
+        ])
+        db_session.commit()
+
+        inventory = _export(client, auth_headers, "inventory", "json").json()
+        assert inventory["headers"][0] == "Product"
+        assert inventory["data"] == [[test_product.name, test_product.sku or "", test_location.id, 8.0,
+                                      test_product.unit, 20.0]]
+
+        staff_rows = _export(client, auth_headers, "staff", "json").json()["data"]
+        assert staff_rows == [["Ana Bar", "bartender", 8.5, 0], ["Zed Idle", "waiter", 0.0, 0]]
+
+    def test_pdf_export(self, client, db_session, auth_headers):
+        _sales_lines(db_session, 30)
+
+        res = _export(client, auth_headers, "sales", "pdf")
+        assert res.status_code == 200
+        assert res.headers["content-type"] == "application/pdf"
+        assert res.content.startswith(b"%PDF")
+
+
+class TestScheduledReportFiles:
+    def test_sections_can_be_generators(self):
+        service = ScheduledReportsService()
+
+        def lines():
+            for n in range(3):
+                yield {"item": f"Item {n}", "qty": n}
+
+        data = {"summary": {"total": 3}, "lines": lines()}
+        content = asyncio.run(service._generate_csv(data, ReportType.SALES))
+
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        assert ["item", "qty"] in rows
+        assert ["Item 2", "2"] in rows
+        assert ["total", "3"] in rows
+
+    def test_excel_is_written_row_by_row(self):
+        service = ScheduledReportsService()
+        data = {"lines": ({"item": f"Item {n}", "qty": n} for n in range(100))}
+
+        content = asyncio.run(service._generate_excel(data, ReportType.SALES))
+
+        rows = list(load_workbook(io.BytesIO(content), read_only=True).active.iter_rows(values_only=True))
+        assert ("item", "qty") in rows
+        assert ("Item 99", 99) in rows
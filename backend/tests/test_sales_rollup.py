@@ -0,0 +1,312 @@
+"""Tests for the hourly sales cube behind dashboards, KPIs and sales reports.
+
+The endpoints must report what the former per-order loops computed from the
+raw orders; the loops are kept here as reference implementations.
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.api.routes.kitchen._shared import _sync_guest_order_status
+from app.core import rbac
+from app.models.analytics import SalesRollup
+from app.models.restaurant import Check, CheckItem, GuestOrder, KitchenOrder, MenuItem, Table
+from app.services.sales_rollup import (
+    SOURCE_CHECK,
+    SOURCE_GUEST_ORDER,
+    rebuild_sales_rollups,
+    sales_totals,
+    sync_guest_order,
+)
+
+
+@pytest.fixture
+def client(client, auth_headers, db_engine, monkeypatch):
+    """Authenticated client; get_current_user looks the user up in the test database."""
+    monkeypatch.setattr(rbac, "SessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=db_engine))
+    client.headers.update(auth_headers)
+    return client
+
+
+class _StatementCounter:
+    def __init__(self, session):
+        self.bind = session.get_bind()
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(self.bind, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def _menu(db):
+    burger = MenuItem(name="Burger", price=Decimal("12.00"), base_price=Decimal("4.00"), category="Mains")
+    soda = MenuItem(name="Soda", price=Decimal("3.00"), category="Drinks")
+    cake = MenuItem(name="Chocolate Cake", price=Decimal("6.50"), base_price=Decimal("2.10"), category="Desserts")
+    db.add_all([burger, soda, cake])
+    db.commit()
+    return burger, soda, cake
+
+
+def _guest_order(db, menu, quantities, status="served", order_type="dine-in", **fields):
+    items = [
+        {"id": mi.id, "menu_item_id": mi.id, "name": mi.name, "price": float(mi.price), "quantity": qty}
+        for mi, qty in zip(menu, quantities) if qty
+    ]
+    subtotal = sum(Decimal(str(i["price"])) * i["quantity"] for i in items)
+    order = GuestOrder(
+        table_token="rollup-table", status=status, order_type=order_type, items=items,
+        subtotal=subtotal, tax=subtotal * Decimal("0.1"), total=subtotal * Decimal("1.1"), **fields
+    )
+    db.add(order)
+    db.commit()
+    return order
+
+
+def _closed_check(db, menu, quantities):
+    check = Check(status="open")
+    db.add(check)
+    db.flush()
+    subtotal = Decimal("0")
+    for mi, qty in zip(menu, quantities):
+        db.add(CheckItem(check_id=check.id, menu_item_id=mi.id, name=mi.name, quantity=qty,
+                         price=mi.price, total=mi.price * qty))
+        subtotal += mi.price * qty
+    db.add(CheckItem(check_id=check.id, name="Open food", quantity=1, price=Decimal("8.00"), total=Decimal("8.00")))
+    check.subtotal = subtotal + Decimal("8.00")
+    check.total = check.subtotal
+    check.status = "closed"
+    check.closed_at = datetime.now(timezone.utc)
+    db.commit()
+    return check
+
+
+def _reference_sales(db, start):
+    """The former /analytics/sales loop over every order of the period."""
+    orders = db.query(GuestOrder).filter(GuestOrder.created_at >= start).all()
+    total_sales = sum(float(o.total) if o.total else 0 for o in orders)
+    item_sales = {}
+    food_revenue = food_cost = 0
+    for order in orders:
+        for item in order.items or []:
+            qty = item.get("quantity", 1)
+            line = float(item.get("price", 0)) * qty
+            entry = item_sales.setdefault(item.get("name", "Unknown"), {"quantity": 0, "revenue": 0})
+            entry["quantity"] += qty
+            entry["revenue"] += line
+            food_revenue += line
+            mi = db.get(MenuItem, item.get("menu_item_id"))
+            if mi and mi.base_price:
+                food_cost += float(mi.base_price) * qty
+    return {
+        "total_sales": round(total_sales, 2),
+        "order_count": len(orders),
+        "top_items": {name: (data["quantity"], round(data["revenue"], 2)) for name, data in item_sales.items()},
+        "food_cost_pct": round(food_cost / food_revenue * 100, 1) if food_revenue else 0,
+    }
+
+
+class TestGuestOrderRollups:
+    def test_dashboard_and_sales_match_order_loops(self, client, db_session):
+        menu = _menu(db_session)
+        _guest_order(db_session, menu, [2, 1, 0])
+        _guest_order(db_session, menu, [1, 3, 1], order_type="takeout")
+        _guest_order(db_session, menu, [0, 2, 2], status="received", payment_status="paid")
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        expected = _reference_sales(db_session, today)
+
+        sales = client.get("/api/v1/analytics/sales", params={"period": "today"}).json()
+        assert sales["total_sales"] == expected["total_sales"]
+        assert sales["order_count"] == expected["order_count"] == 3
+        assert {i["name"]: (i["quantity"], i["revenue"]) for i in sales["top_items"]} == expected["top_items"]
+        category_total = sum(c["amount"] for c in sales["sales_by_category"])
+        assert round(category_total, 2) == round(sum(r for _, r in expected["top_items"].values()), 2)
+
+        kpis = {k["name"]: k for k in client.get("/api/v1/analytics/dashboard/kpis").json()["kpis"]}
+        assert kpis["Revenue Today"]["value"] == expected["total_sales"]
+        assert kpis["Orders Today"]["value"] == 3
+        assert kpis["Food Cost %"]["value"] == expected["food_cost_pct"]
+
+    def test_open_orders_are_not_booked_until_closed(self, db_session):
+        menu = _menu(db_session)
+        order = _guest_order(db_session, menu, [1, 0, 0], status="preparing")
+        assert sales_totals(db_session, source=SOURCE_GUEST_ORDER)["orders"] == 0
+
+        order.status = "served"
+        sync_guest_order(db_session, order)
+        order.payment_status = "paid"
+        sync_guest_order(db_session, order)  # already booked: no change
+        db_session.commit()
+
+        totals = sales_totals(db_session, source=SOURCE_GUEST_ORDER)
+        assert totals["orders"] == 1
+        assert totals["items_sold"] == 1
+        assert totals["cost"] == Decimal("4")
+
+    def test_void_and_refund_reverse_the_sale(self, client, db_session):
+        menu = _menu(db_session)
+        voided = _guest_order(db_session, menu, [1, 1, 0])
+        refunded = _guest_order(db_session, menu, [0, 0, 2])
+        kept = _guest_order(db_session, menu, [3, 0, 0])
+
+        assert client.post(f"/api/v1/orders/{voided.id}/void", json={"reason": "wrong table"}).status_code == 200
+        assert client.post(f"/api/v1/orders/{refunded.id}/refund", json={"amount": 14.3}).status_code == 200
+
+        db_session.expire_all()
+        totals = sales_totals(db_session, source=SOURCE_GUEST_ORDER)
+        assert totals["orders"] == 1
+        assert totals["revenue"] == db_session.get(GuestOrder, kept.id).total
+        assert totals["items_sold"] == 3
+        assert totals["refund_count"] == 1
+        assert totals["refunds"] == db_session.get(GuestOrder, refunded.id).total
+
+    def test_kitchen_completion_books_the_order(self, db_session):
+        menu = _menu(db_session)
+        order = _guest_order(db_session, menu, [2, 1, 0], status="preparing", table_number="12")
+        assert sales_totals(db_session, source=SOURCE_GUEST_ORDER)["orders"] == 0
+
+        # What a ticket bump does to the guest order before committing
+        _sync_guest_order_status(db_session, KitchenOrder(table_number="12"), "completed")
+        db_session.commit()
+
+        assert order.status == "served"
+        totals = sales_totals(db_session, source=SOURCE_GUEST_ORDER)
+        assert totals["orders"] == 1
+        assert totals["items_sold"] == 3
+        assert totals["revenue"] == db_session.get(GuestOrder, order.id).total
+
+    def test_rolled_back_changes_are_not_booked(self, db_session):
+        menu = _menu(db_session)
+        order = _guest_order(db_session, menu, [1, 0, 0], status="preparing")
+        order.status = "served"
+        db_session.flush()
+        db_session.rollback()
+        db_session.commit()
+
+        assert sales_totals(db_session, source=SOURCE_GUEST_ORDER)["orders"] == 0
+
+    def test_kpis_read_a_constant_number_of_rows(self, client, db_session):
+        menu = _menu(db_session)
+        for n in range(3):
+            _guest_order(db_session, menu, [1, n, 1])
+        with _StatementCounter(db_session) as few:
+            client.get("/api/v1/analytics/dashboard/kpis")
+
+        for n in range(30):
+            _guest_order(db_session, menu, [n % 3, 1, 2])
+        with _StatementCounter(db_session) as many:
+            client.get("/api/v1/analytics/dashboard/kpis")
+
+        assert few.count == many.count
+        assert db_session.query(SalesRollup).count() <= 2 * (1 + len(menu))
+
+
+class TestCheckRollups:
+    def test_turnover_matches_check_item_loop(self, client, db_session):
+        burger, soda, cake = _menu(db_session)
+        _closed_check(db_session, [burger, soda], [2, 2])
+        _closed_check(db_session, [soda, cake], [1, 3])
+
+        res = client.get("/api/v1/reports/turnover-base-prices").json()
+        # Base price where set, 35% of menu price (soda) or of the line (open food) otherwise
+        expected_base = (Decimal("4.00") * 2 + Decimal("3.00") * Decimal("0.35") * 3
+                         + Decimal("2.10") * 3 + Decimal("8.00") * Decimal("0.35") * 2)
+        expected_actual = Decimal("24.00") + Decimal("6.00") + Decimal("3.00") + Decimal("19.50") + Decimal("16.00")
+        assert res["summary"]["actual_revenue"] == float(expected_actual)
+        assert round(res["summary"]["base_revenue"], 4) == float(expected_base)
+        assert res["summary"]["total_checks"] == 2
+        assert res["summary"]["total_items_sold"] == 2 + 2 + 1 + 3 + 2
+        assert {c["category"] for c in res["by_category"]} == {"Mains", "Drinks", "Desserts", "Other"}
+
+        drinks = client.get("/api/v1/reports/turnover-base-prices", params={"category": "Drinks"}).json()
+        assert drinks["summary"]["actual_revenue"] == 9.0
+        assert [i["name"] for i in drinks["by_item"]] == ["Soda"]
+
+    def test_item_void_after_close_updates_the_cube(self, client, db_session):
+        burger, soda, _ = _menu(db_session)
+        check = _closed_check(db_session, [burger, soda], [1, 1])
+        soda_line = db_session.query(CheckItem).filter(CheckItem.check_id == check.id, CheckItem.name == "Soda").one()
+
+        res = client.post(f"/api/v1/waiter/items/{soda_line.id}/void", json={"reason": "spilled"})
+        assert res.status_code == 200
+
+        db_session.expire_all()
+        totals = sales_totals(db_session, source=SOURCE_CHECK)
+        assert totals["items_sold"] == 2
+        assert totals["item_revenue"] == Decimal("20")
+        assert totals["revenue"] == db_session.get(Check, check.id).total
+
+
+    def test_clearing_a_table_closes_and_books_its_checks(self, client, db_session):
+        burger, soda, _ = _menu(db_session)
+        table = Table(number="7", capacity=4, status="occupied")
+        db_session.add(table)
+        db_session.flush()
+        check = Check(table_id=table.id, status="open", subtotal=Decimal("15.00"), total=Decimal("15.00"))
+        db_session.add(check)
+        db_session.flush()
+        db_session.add_all([
+            CheckItem(check_id=check.id, menu_item_id=burger.id, name="Burger", quantity=1,
+                      price=Decimal("12.00"), total=Decimal("12.00")),
+            CheckItem(check_id=check.id, menu_item_id=soda.id, name="Soda", quantity=1,
+                      price=Decimal("3.00"), total=Decimal("3.00")),
+        ])
+        db_session.commit()
+        assert sales_totals(db_session, source=SOURCE_CHECK)["orders"] == 0
+
+        assert client.post(f"/api/v1/waiter/tables/{table.id}/clear").status_code == 200
+
+        totals = sales_totals(db_session, source=SOURCE_CHECK)
+        assert totals["orders"] == 1
+        assert totals["items_sold"] == 2
+        assert totals["revenue"] == Decimal("15")
+
+
+class TestRebuild:
+    def test_rebuild_reproduces_incremental_rows(self, db_session):
+        menu = _menu(db_session)
+        _guest_order(db_session, menu, [1, 2, 0])
+        _guest_order(db_session, menu, [0, 1, 1], order_type="delivery")
+        _guest_order(db_session, menu, [2, 0, 0], status="cancelled")
+        _closed_check(db_session, menu[:2], [1, 4])
+
+        def snapshot():
+            return sorted(
+                (r.bucket_key, r.order_count, r.quantity, float(r.revenue), float(r.cost), float(r.cost_estimate))
+                for r in db_session.query(SalesRollup).all()
+                if r.order_count or r.quantity
+            )
+
+        incremental = snapshot()
+        result = rebuild_sales_rollups(db_session)
+        db_session.expire_all()
+
+        assert snapshot() == incremental
+        assert result["guest_orders"] == 3  # two closed, one voided
+        assert result["checks"] == 1
+
+    def test_rebuild_backfills_orders_stored_before_the_cube(self, db_session):
+        menu = _menu(db_session)
+        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+        # A Core insert skips the session hooks, like rows written before the cube existed
+        db_session.execute(insert(GuestOrder.__table__).values(
+            table_token="legacy", status="served", total=Decimal("13.20"), created_at=yesterday,
+            items=[{"menu_item_id": menu[0].id, "name": "Burger", "price": 12.0, "quantity": 1}],
+        ))
+        db_session.commit()
+        assert sales_totals(db_session)["orders"] == 0
+
+        rebuild_sales_rollups(db_session, start=yesterday - timedelta(hours=1), end=yesterday)
+
+        totals = sales_totals(db_session, yesterday - timedelta(hours=1), source=SOURCE_GUEST_ORDER)
+        assert totals["orders"] == 1
+        assert totals["revenue"] == Decimal("13.20")
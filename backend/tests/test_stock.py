@@ -3,12 +3,15 @@
 import pytest
 from decimal import Decimal
 
+from sqlalchemy import event
+
 from app.models.location import Location
 from app.models.product import Product
 from app.models.recipe import Recipe, RecipeLine
 from app.models.restaurant import MenuItem
 from app.models.stock import MovementReason, StockMovement, StockOnHand
 from app.models.supplier import Supplier
+from app.services.recipe_bom_cache import CompiledMenuItem, RecipeBomCache, recipe_bom_cache
 from app.services.stock_deduction_service import StockDeductionService
 
 
@@ -182,6 +185,160 @@ class TestStockDeductionService:
         assert result["success"] is True
 
 
+class TestCompiledRecipeDeduction:
+    """deduct_for_order via the compiled recipe (BOM) cache."""
+
+    @staticmethod
+    def _count_statements(db):
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute",
+                     lambda *args: statements.append(args[2]))
+        return statements
+
+    def _stock(self, db, product, location):
+        return db.query(StockOnHand).filter(
+            StockOnHand.product_id == product.id,
+            StockOnHand.location_id == location.id,
+        ).first().qty
+
+    def test_deducts_all_ingredients_with_bulk_movements(self, stock_setup):
+        db = stock_setup["db"]
+        location = stock_setup["location"]
+        menu_item = stock_setup["menu_item"]
+
+        result = StockDeductionService(db).deduct_for_order(
+            order_items=[
+                {"menu_item_id": menu_item.id, "quantity": 2},
+                {"menu_item_id": str(menu_item.id), "quantity": 1},
+            ],
+            location_id=location.id,
+            reference_type="compiled_test",
+            reference_id=700,
+        )
+
+        assert result["success"] is True
+        assert result["total_items_processed"] == 2
+        assert result["total_ingredients_deducted"] == 6
+        # Second line sees the first line's deduction
+        vodka_rows = [d for d in result["deductions"] if d["product_id"] == stock_setup["vodka"].id]
+        assert [(d["old_qty"], d["new_qty"]) for d in vodka_rows] == [(5000, 4900), (4900, 4850)]
+        assert self._stock(db, stock_setup["vodka"], location) == Decimal("4850")
+        assert self._stock(db, stock_setup["garnish"], location) == Decimal("97")
+
+        movements = db.query(StockMovement).filter(StockMovement.ref_type == "compiled_test").all()
+        assert len(movements) == 6
+        assert all(m.qty_delta < 0 and m.ref_id == 700 for m in movements)
+
+    def test_cached_recipe_skips_lookup_queries(self, stock_setup):
+        db = stock_setup["db"]
+        location = stock_setup["location"]
+        order = [{"menu_item_id": stock_setup["menu_item"].id, "quantity": 1}]
+        svc = StockDeductionService(db)
+
+        svc.deduct_for_order(order_items=order, location_id=location.id)
+        statements = self._count_statements(db)
+        result = svc.deduct_for_order(order_items=order, location_id=location.id)
+
+        assert result["success"] is True
+        assert not any("FROM recipes" in s or "FROM recipe_lines" in s or "FROM menu_items" in s for s in statements)
+        assert sum(1 for s in statements if "FROM app_settings" in s) == 1
+        assert sum(1 for s in statements if s.lstrip().startswith("INSERT INTO stock_movements")) == 1
+
+    def test_converts_recipe_units_to_stock_unit(self, stock_setup):
+        db = stock_setup["db"]
+        location = stock_setup["location"]
+        recipe = stock_setup["recipe"]
+        vodka = stock_setup["vodka"]
+        vodka.unit = "L"
+        db.query(StockOnHand).filter(StockOnHand.product_id == vodka.id).update({"qty": Decimal("5")})
+        db.commit()
+
+        result = StockDeductionService(db).deduct_for_order(
+            order_items=[{"menu_item_id": stock_setup["menu_item"].id, "quantity": 3}],
+            location_id=location.id,
+        )
+
+        assert result["success"] is True
+        deduction = next(d for d in result["deductions"] if d["product_id"] == vodka.id)
+        assert deduction["qty_deducted"] == 0.15
+        assert deduction["unit"] == "L"
+        assert recipe.lines[0].unit == "ml"
+
+    def test_insufficient_stock_rolls_back_order(self, stock_setup):
+        db = stock_setup["db"]
+        location = stock_setup["location"]
+
+        result = StockDeductionService(db).deduct_for_order(
+            order_items=[{"menu_item_id": stock_setup["menu_item"].id, "quantity": 101}],
+            location_id=location.id,
+            reference_type="too_many",
+        )
+
+        assert result["success"] is False
+        shortages = {s["product_id"]: s["shortage"] for s in result["errors"][0]["shortages"]}
+        assert shortages == {stock_setup["vodka"].id: 50, stock_setup["garnish"].id: 1}
+        assert self._stock(db, stock_setup["vodka"], location) == Decimal("5000")
+        assert db.query(StockMovement).filter(StockMovement.ref_type == "too_many").count() == 0
+
+    def test_recipe_edit_recompiles(self, stock_setup):
+        db = stock_setup["db"]
+        location = stock_setup["location"]
+        recipe = stock_setup["recipe"]
+        order = [{"menu_item_id": stock_setup["menu_item"].id, "quantity": 1}]
+        svc = StockDeductionService(db)
+        svc.deduct_for_order(order_items=order, location_id=location.id)
+
+        line = next(line for line in recipe.lines if line.product_id == stock_setup["vodka"].id)
+        line.qty = Decimal("60")
+        db.commit()
+        result = svc.deduct_for_order(order_items=order, location_id=location.id)
+
+        deduction = next(d for d in result["deductions"] if d["product_id"] == stock_setup["vodka"].id)
+        assert deduction["qty_deducted"] == 60
+
+    def test_edits_committed_by_another_worker_are_seen(self, stock_setup):
+        db = stock_setup["db"]
+        menu_item = stock_setup["menu_item"]
+        other_worker = RecipeBomCache()
+        generation = other_worker.sync(db)
+        other_worker.store({menu_item.id: CompiledMenuItem(menu_item.id, menu_item.name)}, generation)
+
+        stock_setup["recipe"].lines[0].qty = Decimal("60")
+        db.commit()
+        other_worker.sync(db)
+
+        assert other_worker.lookup([menu_item.id]) == ({}, [menu_item.id])
+
+    def test_price_changes_keep_compiled_recipes(self, stock_setup):
+        db = stock_setup["db"]
+        order = [{"menu_item_id": stock_setup["menu_item"].id, "quantity": 1}]
+        StockDeductionService(db).deduct_for_order(order_items=order, location_id=stock_setup["location"].id)
+        rebuilds = recipe_bom_cache.get_stats()["rebuilds"]
+
+        stock_setup["vodka"].cost_price = Decimal("0.07")
+        db.commit()
+        StockDeductionService(db).deduct_for_order(order_items=order, location_id=stock_setup["location"].id)
+
+        assert recipe_bom_cache.get_stats()["rebuilds"] == rebuilds
+
+    def test_missing_menu_item_and_recipe_are_warnings(self, stock_setup):
+        db = stock_setup["db"]
+        no_recipe = MenuItem(name="Water", price=Decimal("2.00"), category="Drinks", available=True)
+        db.add(no_recipe)
+        db.commit()
+
+        result = StockDeductionService(db).deduct_for_order(
+            order_items=[{"menu_item_id": 9999, "quantity": 1}, {"menu_item_id": no_recipe.id, "quantity": 1}],
+            location_id=stock_setup["location"].id,
+        )
+
+        assert result["success"] is True
+        assert [w["warning"] for w in result["warnings"]] == [
+            "Menu item 9999 not found",
+            f"No recipe found for 'Water' (ID: {no_recipe.id})",
+        ]
+
+
 # ============== Stock refund tests (using recipe-level deduction/refund) ==============
 
 class TestStockRefund:
@@ -0,0 +1,177 @@
+"""Tests for the bulk (matrix) paths of StockForecastingService.
+
+The location-wide views must return exactly what the former per-product loop
+(one _get_current_stock and one _get_daily_usage query per product) returned.
+"""
+
+import math
+import random
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app.models.location import Location
+from app.models.product import Product
+from app.models.stock import StockMovement, StockOnHand
+from app.services.stock_forecasting_service import StockForecastingService, _Z_SCORES
+
+
+def _seed(db, n_products: int = 40, days: int = 90, seed: int = 11):
+    rng = random.Random(seed)
+    location = Location(name="Forecast Bar", active=True)
+    other = Location(name="Other Bar", active=True)
+    db.add_all([location, other])
+    db.flush()
+
+    now = datetime.now(timezone.utc)
+    for i in range(n_products):
+        product = Product(
+            name=f"SKU {i}",
+            unit="pcs",
+            lead_time_days=rng.choice([1, 2, 3, 5, 7]),
+            target_stock=Decimal(rng.choice([0, 0, 40, 120])),
+            active=(i % 13 != 0),
+        )
+        db.add(product)
+        db.flush()
+        if i % 7 != 3:
+            db.add(StockOnHand(
+                product_id=product.id, location_id=location.id,
+                qty=Decimal(rng.randint(0, 60)), reserved_qty=Decimal(rng.randint(0, 3)),
+            ))
+        if i % 11 == 5:
+            continue  # no sales history
+        # Sparse products only sell on some days; a few only in the last week or long ago
+        density = rng.choice([0.9, 0.5, 0.15])
+        first_day = rng.choice([days - 1, days - 1, 40, 6])
+        for d in range(first_day, -1, -1):
+            if rng.random() > density:
+                continue
+            ts = now - timedelta(days=d, hours=rng.randint(0, 5))
+            for _ in range(rng.randint(1, 3)):
+                db.add(StockMovement(
+                    product_id=product.id, location_id=location.id,
+                    qty_delta=-Decimal(rng.randint(1, 400)) / 100, reason="sale", ts=ts,
+                ))
+        # Noise that must be ignored: other reasons and other locations
+        db.add(StockMovement(product_id=product.id, location_id=location.id,
+                             qty_delta=Decimal("50"), reason="purchase", ts=now))
+        db.add(StockMovement(product_id=product.id, location_id=other.id,
+                             qty_delta=Decimal("-9"), reason="sale", ts=now))
+    db.commit()
+    return location
+
+
+def _legacy_reorder_suggestions(svc: StockForecastingService, location_id: int):
+    """The per-product loop generate_reorder_suggestions used to run."""
+    products = svc.db.query(Product).filter(Product.active == True).all()  # noqa: E712
+    suggestions = []
+    for product in products:
+        current = float(svc._get_current_stock(product.id, location_id))
+        daily_usage = svc._get_daily_usage(product.id, location_id, lookback_days=60)
+        avg_daily = svc._moving_average(daily_usage, window=14)
+        if avg_daily <= 0:
+            continue
+        std_daily = svc._std_deviation(daily_usage)
+        lead_time = product.lead_time_days or 1
+        z_score = _Z_SCORES.get(0.95, 1.645)
+        safety_stock = z_score * std_daily * math.sqrt(lead_time)
+        reorder_point = (avg_daily * lead_time) + safety_stock
+        if current <= reorder_point:
+            target = float(product.target_stock) if product.target_stock else reorder_point * 2
+            order_qty = max(0, target - current)
+            days_until_stockout = current / avg_daily if avg_daily > 0 else 999
+            urgency = "critical" if days_until_stockout <= 1 else (
+                "high" if days_until_stockout <= lead_time else "normal"
+            )
+            suggestions.append({
+                "product_id": product.id,
+                "product_name": product.name,
+                "supplier_id": product.supplier_id,
+                "current_stock": current,
+                "reorder_point": round(reorder_point, 1),
+                "safety_stock": round(safety_stock, 1),
+                "suggested_order_qty": round(order_qty, 1),
+                "avg_daily_demand": round(avg_daily, 2),
+                "lead_time_days": lead_time,
+                "days_until_stockout": round(days_until_stockout, 1),
+                "urgency": urgency,
+                "unit": product.unit,
+            })
+    urgency_order = {"critical": 0, "high": 1, "normal": 2}
+    suggestions.sort(key=lambda s: (urgency_order.get(s["urgency"], 3), s["days_until_stockout"]))
+    return suggestions
+
+
+def _legacy_trends(svc: StockForecastingService, location_id: int):
+    """(product_id, recent, prior, change_pct, direction) as the per-product loop computed them."""
+    products = svc.db.query(Product).filter(Product.active == True).all()  # noqa: E712
+    trends = []
+    for product in products:
+        daily_usage = svc._get_daily_usage(product.id, location_id, lookback_days=60)
+        if not daily_usage:
+            continue
+        recent = svc._moving_average(daily_usage, window=7)
+        prior = svc._moving_average(daily_usage, window=30)
+        if prior <= 0:
+            continue
+        change_pct = ((recent - prior) / prior) * 100
+        direction = "up" if change_pct > 5 else ("down" if change_pct < -5 else "stable")
+        trends.append((product.id, round(recent, 2), round(prior, 2), round(change_pct, 1), direction))
+    return trends
+
+
+class TestBulkForecasting:
+    """Test the bulk location-wide forecasting paths."""
+
+    def test_reorder_suggestions_match_per_product_loop(self, db_session):
+        location = _seed(db_session)
+        svc = StockForecastingService(db_session)
+
+        expected = _legacy_reorder_suggestions(svc, location.id)
+        actual = svc.generate_reorder_suggestions(location.id)
+
+        assert len(expected) > 5
+        assert actual == expected
+
+    def test_demand_trends_match_per_product_loop(self, db_session):
+        location = _seed(db_session)
+        svc = StockForecastingService(db_session)
+
+        expected = _legacy_trends(svc, location.id)
+        result = svc.get_demand_trends(location.id, top_n=1000)
+        actual = sorted(
+            (t["product_id"], t["recent_avg_7d"], t["prior_avg_30d"], t["change_pct"], t["direction"])
+            for t in result["trending_up"] + result["trending_down"]
+        )
+
+        assert result["total_analyzed"] == len(expected)
+        assert actual == sorted(t for t in expected if t[4] != "stable")
+        assert result["stable_count"] == sum(1 for t in expected if t[4] == "stable")
+
+    def test_dashboard_query_count_is_constant(self, db_session):
+        location_id = _seed(db_session, n_products=30).id
+        svc = StockForecastingService(db_session)
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+        try:
+            dashboard = svc.get_dashboard(location_id)
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+
+        # active products, grouped daily usage, stock on hand
+        assert len(statements) == 3
+        assert dashboard["reorder_suggestions"]["total"] == len(svc.generate_reorder_suggestions(location_id))
+
+    def test_products_without_history_are_skipped(self, db_session):
+        location = Location(name="Empty Bar", active=True)
+        db_session.add_all([location, Product(name="Unsold", unit="pcs")])
+        db_session.commit()
+        svc = StockForecastingService(db_session)
+
+        assert svc.generate_reorder_suggestions(location.id) == []
+        trends = svc.get_demand_trends(location.id)
+        assert trends["total_analyzed"] == 0
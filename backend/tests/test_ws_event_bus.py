@@ -0,0 +1,111 @@
+"""Tests for the cross-worker WebSocket event bus.
+
+Two "workers" are simulated in one process: each has its own EventBus and
+ConnectionManager, attached to a shared InProcessHub.
+"""
+
+import asyncio
+
+from app.services.websocket_service import ConnectionManager, WebSocketMessage
+from app.services.ws_event_bus import EventBus, InProcessBackend, InProcessHub
+from app.services.ws_fanout import ws_fanout
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def _settle(buses, sockets=()):
+    """Wait until presence updates are published and the sockets' frames are sent."""
+    for bus in buses:
+        await asyncio.wait_for(bus.flush(), timeout=1)
+    await asyncio.wait_for(ws_fanout.drain(sockets), timeout=1)
+
+
+async def _worker(hub: InProcessHub):
+    bus = EventBus()
+    await bus.start(InProcessBackend(hub))
+    return bus, ConnectionManager(bus=bus)
+
+
+def _events(ws: FakeWebSocket) -> list:
+    return [frame for frame in ws.sent if '"connected"' not in frame]
+
+
+class TestEventBus:
+    """Test delivery, presence and the shared replay buffer across workers."""
+
+    async def test_channel_event_reaches_socket_on_other_worker(self):
+        hub = InProcessHub()
+        bus_a, worker_a = await _worker(hub)
+        bus_b, worker_b = await _worker(hub)
+        local, remote = FakeWebSocket(), FakeWebSocket()
+        await worker_a.connect(local, venue_id=1, channels=["kitchen"])
+        await worker_b.connect(remote, venue_id=1, channels=["kitchen"])
+        await _settle([bus_a, bus_b], [local, remote])
+
+        await worker_a.broadcast_channel(1, "kitchen", WebSocketMessage(event="new_order", data={"id": 7}))
+        await _settle([bus_a, bus_b], [local, remote])
+
+        # Each socket gets the event exactly once; A does not re-deliver its own envelope
+        assert len(_events(local)) == 1
+        assert len(_events(remote)) == 1
+        assert '"new_order"' in _events(remote)[0]
+        assert bus_a.stats["received"] == 0
+        assert bus_b.stats["received"] == 1
+
+        worker_a.disconnect(local)
+        worker_b.disconnect(remote)
+        await bus_a.stop()
+        await bus_b.stop()
+
+    async def test_presence_on_other_worker_skips_replay_buffer(self):
+        hub = InProcessHub()
+        bus_a, worker_a = await _worker(hub)
+        bus_b, worker_b = await _worker(hub)
+        remote = FakeWebSocket()
+        await worker_b.connect(remote, venue_id=2)
+        await _settle([bus_b], [remote])
+
+        await worker_a.broadcast_venue(2, WebSocketMessage(event="alert", data={}))
+        await _settle([bus_a, bus_b], [remote])
+
+        assert len(_events(remote)) == 1
+        assert hub.buffers == {}
+
+        worker_b.disconnect(remote)
+        await _settle([bus_b])
+        assert not await bus_a.has_presence("2")
+        await bus_a.stop()
+        await bus_b.stop()
+
+    async def test_replay_buffer_is_shared_between_workers(self):
+        hub = InProcessHub()
+        bus_a, worker_a = await _worker(hub)
+        bus_b, worker_b = await _worker(hub)
+
+        for n in range(3):
+            await worker_a.broadcast_venue(3, WebSocketMessage(event="alert", data={"n": n}))
+
+        # The next client connects to the other worker and still gets the backlog
+        late = FakeWebSocket()
+        await worker_b.connect(late, venue_id=3)
+        await _settle([bus_b], [late])
+
+        assert [frame.count('"alert"') for frame in _events(late)] == [1, 1, 1]
+        assert '"n": 2' in _events(late)[-1]
+        assert hub.buffers == {}
+
+        worker_b.disconnect(late)
+        await bus_a.stop()
+        await bus_b.stop()
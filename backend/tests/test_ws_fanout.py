@@ -0,0 +1,179 @@
+"""Tests for the WebSocket fan-out engine.
+
+Covers serialize-once publishing, isolation from slow readers, the
+drop_oldest / coalesce / disconnect policies, send timeouts and the
+managers' cleanup when the engine closes a connection.
+"""
+
+import asyncio
+
+from app.services.websocket_service import ConnectionManager, WebSocketMessage
+from app.services.ws_event_bus import EventBus
+from app.services.ws_fanout import FanoutEngine, SlowClientPolicy, ws_fanout
+
+
+class FakeWebSocket:
+    """Records sent frames; ``gate`` blocks sends until set."""
+
+    def __init__(self, blocked: bool = False, fail: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.fail = fail
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+        self.sending = asyncio.Event()  # A frame reached the socket
+        self.closed = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        self.sending.set()
+        await self.gate.wait()
+        if self.fail:
+            raise RuntimeError("socket gone")
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+        self.closed.set()
+
+
+async def _wait(awaitable):
+    """Await a condition, failing the test instead of hanging."""
+    await asyncio.wait_for(awaitable, timeout=1)
+
+
+class TestFanoutEngine:
+    """Test per-connection queues and slow-client policies."""
+
+    async def test_publish_does_not_wait_for_slow_reader(self):
+        engine = FanoutEngine(queue_size=10)
+        fast, slow = FakeWebSocket(), FakeWebSocket(blocked=True)
+        engine.register(fast)
+        engine.register(slow)
+
+        assert engine.publish([fast, slow], '{"n":1}') == 2
+        await _wait(engine.drain([fast]))
+        await _wait(slow.sending.wait())
+
+        assert fast.sent == ['{"n":1}']
+        assert slow.sent == []
+        assert engine.get_stats()["queue_depth"] == 0  # slow frame is in flight
+
+        slow.gate.set()
+        await _wait(engine.drain())
+        assert slow.sent == ['{"n":1}']
+        assert engine.stats["delivered"] == 2
+        assert sum(engine.delivery_lag.counts) == 2
+
+    async def test_drop_oldest_when_queue_full(self):
+        engine = FanoutEngine(queue_size=2)
+        ws = FakeWebSocket(blocked=True)
+        engine.register(ws)
+        engine.send(ws, "0")
+        await _wait(ws.sending.wait())
+        for n in range(1, 5):
+            engine.send(ws, str(n))
+
+        ws.gate.set()
+        await _wait(engine.drain())
+        # "0" was already in flight; "1" and "2" were dropped for "3" and "4"
+        assert ws.sent == ["0", "3", "4"]
+        assert engine.stats["dropped"] == 2
+
+    async def test_coalesce_replaces_queued_frame_with_same_key(self):
+        engine = FanoutEngine(queue_size=2, policy=SlowClientPolicy.COALESCE)
+        ws = FakeWebSocket(blocked=True)
+        engine.register(ws)
+        engine.send(ws, "in-flight")
+        await _wait(ws.sending.wait())
+        engine.send(ws, "keg1=50", key="keg:1")
+        engine.send(ws, "tank1=80", key="tank:1")
+        engine.send(ws, "keg1=40", key="keg:1")
+
+        ws.gate.set()
+        await _wait(engine.drain())
+        assert ws.sent == ["in-flight", "keg1=40", "tank1=80"]
+        assert engine.stats["coalesced"] == 1
+        assert engine.stats["dropped"] == 0
+
+    async def test_disconnect_policy_closes_slow_client(self):
+        engine = FanoutEngine(queue_size=1, policy=SlowClientPolicy.DISCONNECT)
+        closed = []
+        ws = FakeWebSocket(blocked=True)
+        engine.register(ws, on_close=closed.append)
+        engine.send(ws, "a")
+        await _wait(ws.sending.wait())
+        engine.send(ws, "b")
+
+        assert engine.send(ws, "c") is False
+        await _wait(ws.closed.wait())
+        assert closed == [ws]
+        assert ws.closed_with == 1013
+        assert not engine.is_registered(ws)
+        assert engine.stats["slow_disconnects"] == 1
+
+    async def test_send_timeout_closes_connection(self):
+        engine = FanoutEngine(queue_size=4, send_timeout=0.05)
+        closed = []
+        ws = FakeWebSocket(blocked=True)
+        engine.register(ws, on_close=closed.append)
+        engine.send(ws, "stuck")
+        await _wait(ws.closed.wait())
+
+        assert closed == [ws]
+        assert engine.stats["send_timeouts"] == 1
+
+    async def test_prometheus_lines(self):
+        engine = FanoutEngine()
+        ws = FakeWebSocket()
+        engine.register(ws)
+        engine.send(ws, "x")
+        await _wait(engine.drain())
+
+        lines = engine.prometheus_lines()
+        assert "ws_fanout_delivered_total 1" in lines
+        assert 'ws_fanout_delivery_lag_seconds_bucket{le="+Inf"} 1' in lines
+        assert "ws_fanout_queue_depth 0" in lines
+
+
+class TestConnectionManagerFanout:
+    """Test the venue ConnectionManager on top of the shared engine."""
+
+    async def test_broadcast_serializes_once(self, monkeypatch):
+        manager = ConnectionManager(bus=EventBus())
+        sockets = [FakeWebSocket() for _ in range(3)]
+        for ws in sockets:
+            await manager.connect(ws, venue_id=1, channels=["bar"])
+        await _wait(ws_fanout.drain(sockets))
+
+        calls = []
+        original = WebSocketMessage.to_json
+
+        def counting_to_json(message):
+            calls.append(message.event)
+            return original(message)
+
+        monkeypatch.setattr(WebSocketMessage, "to_json", counting_to_json)
+        await manager.broadcast_channel(1, "bar", WebSocketMessage(event="keg_update", data={"keg_id": "k1"}))
+        await _wait(ws_fanout.drain(sockets))
+
+        assert calls == ["keg_update"]
+        for ws in sockets:
+            assert '"keg_update"' in ws.sent[-1]
+            manager.disconnect(ws)
+
+    async def test_failed_socket_is_disconnected(self):
+        manager = ConnectionManager(bus=EventBus())
+        ws = FakeWebSocket()
+        await manager.connect(ws, venue_id=2)
+        await _wait(ws_fanout.drain([ws]))
+
+        ws.fail = True
+        await manager.broadcast_venue(2, WebSocketMessage(event="alert", data={}))
+        await _wait(ws.closed.wait())
+
+        assert manager.get_connection_count() == 0
+        assert ws not in manager.connection_info